@@ -30,11 +30,13 @@ import logging
 import hashlib
 import io
 import csv
+import sqlalchemy
 from database.config import Collector as CollectorConfig
 from urllib.parse import urlparse
 from xml.etree.ElementTree import Element
 from typing import List
 from typing import Dict
+from typing import Tuple
 from typing import TypeVar
 from database.model import Workspace
 from database.model import HostName
@@ -62,6 +64,7 @@ from database.model import HostHostNameMapping
 from database.model import HostNameHostNameMapping
 from database.model import DnsResourceRecordType
 from database.model import CipherSuite
+from database.model import CipherSuiteIndex
 from database.model import HashAlgorithm
 from database.model import TlsInfo
 from database.model import TlsVersion
@@ -86,6 +89,8 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives import asymmetric
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.serialization import Encoding
+from sqlalchemy.orm import defer
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.session import Session
 
 BaseCollector = TypeVar('collectors.os.collector.BaseCollector')
@@ -198,6 +203,68 @@ class BaseUtils:
         """
         session.query(Workspace).filter_by(name=workspace).delete()
 
+    @staticmethod
+    def index_command_outputs(session: Session, workspace: Workspace) -> int:
+        """
+        This method (re-)builds the search index over the collector outputs of all commands of the given workspace
+        (see Command.update_search_vector). New commands are indexed by method process_command_results.
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param workspace: The workspace whose commands shall be indexed
+        :return: The number of indexed commands
+        """
+        result = session.execute(sqlalchemy.text("""INSERT INTO command_search_index (command_id, search_vector)
+            SELECT id, command_search_vector(array_to_string(array_cat(stdout_output, stderr_output), E'\\n'))
+            FROM command WHERE workspace_id = :workspace_id
+            ON CONFLICT (command_id) DO UPDATE SET search_vector = EXCLUDED.search_vector"""),
+                                 {"workspace_id": workspace.id})
+        return result.rowcount
+
+    @staticmethod
+    def search_command_outputs(session: Session,
+                               workspaces: List[Workspace],
+                               text: str) -> List[Tuple[Command, str, int, str]]:
+        """
+        This method returns all stdout and stderr lines of the given workspaces' commands that contain the words of
+        the given text in the given order. Words are case-insensitive and consist of letters and digits (e.g.,
+        Tomcat/9.0 matches the line Apache Tomcat/9.0.41). The search index (see index_command_outputs) narrows down
+        the commands, whose outputs are searched. Commands without index (e.g., commands that were executed before the
+        index was introduced) are always searched.
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param workspaces: The workspaces whose commands shall be searched
+        :param text: The words (e.g., Apache Tomcat) that each returned line must contain
+        :return: List of tuples (command, output (stdout or stderr), line number, line)
+        """
+        rows = session.execute(sqlalchemy.text("""SELECT c.id, o.output, o.number, o.line FROM command c
+            CROSS JOIN LATERAL (SELECT 'stdout' AS output, u.number, u.line
+                                FROM unnest(c.stdout_output) WITH ORDINALITY AS u(line, number)
+                                UNION ALL
+                                SELECT 'stderr' AS output, u.number, u.line
+                                FROM unnest(c.stderr_output) WITH ORDINALITY AS u(line, number)) o
+            WHERE c.workspace_id = ANY(:workspace_ids) AND
+                  c.id IN (SELECT command_id FROM command_search_index
+                           WHERE search_vector @@ plainto_tsquery('simple', command_search_text(:text))
+                           UNION ALL
+                           SELECT id FROM command n
+                           WHERE workspace_id = ANY(:workspace_ids) AND
+                                 NOT EXISTS(SELECT * FROM command_search_index i
+                                            WHERE i.command_id = n.id AND i.search_vector IS NOT NULL)) AND
+                  to_tsvector('simple', command_search_text(o.line)) @@
+                  phraseto_tsquery('simple', command_search_text(:text))
+            ORDER BY c.id, o.output DESC, o.number"""),
+                               {"workspace_ids": [item.id for item in workspaces], "text": text}).fetchall()
+        commands = {}
+        if rows:
+            for command in session.query(Command) \
+                    .filter(Command.id.in_(set([item[0] for item in rows]))) \
+                    .options(defer(Command._stdout_output),
+                             defer(Command._stderr_output),
+                             defer(Command.xml_output),
+                             defer(Command.json_output),
+                             defer(Command.binary_output),
+                             selectinload(Command.collector_name)):
+                commands[command.id] = command
+        return [(commands[command_id], output, number, line) for command_id, output, number, line in rows]
+
     @staticmethod
     def add_host_host_name_mapping(session: Session,
                                    host: Host,
@@ -274,6 +341,102 @@ class BaseUtils:
         session.flush()
         return mapping
 
+    @staticmethod
+    def add_host_host_name_mappings(session: Session,
+                                    mappings: List[Tuple[Host, HostName, DnsResourceRecordType]],
+                                    source: Source = None,
+                                    report_item: ReportItem = None) -> List[HostHostNameMapping]:
+        """
+        This method establishes links between hosts and host names in bulk. In contrast to method
+        add_host_host_name_mapping, all already existing links are obtained by a single query and the session is only
+        flushed once.
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param mappings: List of tuples containing the host, the host name, and the type of link
+        :param source: The source that identified the links
+        :param report_item: Item that can be used for pushing information into the view
+        """
+        result = []
+        if not mappings:
+            return result
+        for host, host_name, _ in mappings:
+            if not host or not host_name:
+                raise ValueError("host and host name are mandatory")
+        host_ids = set([host.id for host, _, _ in mappings])
+        host_name_ids = set([host_name.id for _, host_name, _ in mappings])
+        existing = {(item.host_id, item.host_name_id): item
+                    for item in session.query(HostHostNameMapping)
+                                       .options(selectinload(HostHostNameMapping.sources))
+                                       .filter(HostHostNameMapping.host_id.in_(host_ids),
+                                               HostHostNameMapping.host_name_id.in_(host_name_ids)).all()}
+        for host, host_name, mapping_type in mappings:
+            mapping = existing.get((host.id, host_name.id))
+            if not mapping:
+                mapping = HostHostNameMapping(host=host, host_name=host_name, type=mapping_type)
+                session.add(mapping)
+                existing[(host.id, host_name.id)] = mapping
+            if mapping_type:
+                mapping.type |= mapping_type
+            if source and source not in mapping.sources:
+                mapping.sources.append(source)
+            if report_item:
+                source_info = " (source: {})".format(source.name) if source else ""
+                report_item.details = "add potentially new link ({}) between {} and {}{}"\
+                    .format(mapping_type.name.upper(), host.address, host_name.full_name, source_info)
+                report_item.report_type = "GENERIC"
+                report_item.notify()
+            result.append(mapping)
+        session.flush()
+        return result
+
+    @staticmethod
+    def add_host_name_host_name_mappings(session: Session,
+                                         mappings: List[Tuple[HostName, HostName, DnsResourceRecordType]],
+                                         source: Source = None,
+                                         report_item: ReportItem = None) -> List[HostNameHostNameMapping]:
+        """
+        This method establishes links between host names in bulk. In contrast to method
+        add_host_name_host_name_mapping, all already existing links are obtained by a single query and the session is
+        only flushed once.
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param mappings: List of tuples containing the source host name, the resolved host name, and the type of link
+        :param source: The source that identified the links
+        :param report_item: Item that can be used for pushing information into the view
+        """
+        result = []
+        if not mappings:
+            return result
+        for source_host_name, resolved_host_name, _ in mappings:
+            if not source_host_name or not resolved_host_name:
+                raise ValueError("source and resolved host names are mandatory")
+        source_ids = set([item.id for item, _, _ in mappings])
+        resolved_ids = set([item.id for _, item, _ in mappings])
+        existing = {(item.source_host_name_id, item.resolved_host_name_id): item
+                    for item in session.query(HostNameHostNameMapping)
+                                       .options(selectinload(HostNameHostNameMapping.sources))
+                                       .filter(HostNameHostNameMapping.source_host_name_id.in_(source_ids),
+                                               HostNameHostNameMapping.resolved_host_name_id.in_(resolved_ids)).all()}
+        for source_host_name, resolved_host_name, mapping_type in mappings:
+            key = (source_host_name.id, resolved_host_name.id)
+            mapping = existing.get(key)
+            if not mapping:
+                mapping = HostNameHostNameMapping(source_host_name=source_host_name,
+                                                  resolved_host_name=resolved_host_name)
+                session.add(mapping)
+                existing[key] = mapping
+            if mapping_type:
+                mapping.type |= mapping_type
+            if source and source not in mapping.sources:
+                mapping.sources.append(source)
+            if report_item:
+                source_info = " (source: {})".format(source.name) if source else ""
+                report_item.details = "add potentially new link between {} and {}{}"\
+                    .format(source_host_name.full_name, resolved_host_name.full_name, source_info)
+                report_item.report_type = "GENERIC"
+                report_item.notify()
+            result.append(mapping)
+        session.flush()
+        return result
+
     @staticmethod
     def add_vhost_name_mapping(session: Session,
                                service: Service,
@@ -363,7 +526,9 @@ class BaseUtils:
                     input_file_2: str = None,
                     working_directory: str = None,
                     generic_file_name: str = None,
-                    exec_user: str = None) -> Command:
+                    exec_user: str = None,
+                    threads: int = None,
+                    threads_argument: str = None) -> Command:
         """
         This method can be used by all collectors to create new commands in the database.
         :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
@@ -386,6 +551,10 @@ class BaseUtils:
         with xml_file, json_file or binary_file, which specify the final location of the input files.
         :param exec_user: The username with whom the command is executed
         :param working_directory: The command's working directory
+        :param threads: The default number of threads the command's tool uses
+        :param threads_argument: The tool's command line argument (e.g., -t), which specifies the number of threads. At
+        execution time, it is added to the OS command together with the number of threads (see
+        Command.os_command_substituted)
         :return: The queried or newly created collector class
         """
         tmp = [str(item) for item in os_command]
@@ -490,6 +659,13 @@ class BaseUtils:
         elif not exec_user and ExecutionInfoType.username.name in command.execution_info:
             del command.execution_info[ExecutionInfoType.username.name]
         command.execution_info[ExecutionInfoType.command_id.name] = command.id
+        if threads and threads_argument:
+            command.execution_info[ExecutionInfoType.threads.name] = threads
+            command.execution_info[ExecutionInfoType.threads_argument.name] = threads_argument
+        else:
+            for item in [ExecutionInfoType.threads, ExecutionInfoType.threads_argument]:
+                if item.name in command.execution_info:
+                    del command.execution_info[item.name]
         if input_file:
             if not os.path.isfile(input_file):
                 raise FileNotFoundError("input file '{}' does not exist".format(input_file))
@@ -630,11 +806,25 @@ class BaseUtils:
                     report_item.notify()
         return rvalue
 
+    @staticmethod
+    def get_json_digest(json_object) -> str:
+        """
+        This method returns the SHA256 value of the given json object's canonical representation (sorted keys and no
+        whitespaces). Thereby, json objects with the same content have the same digest.
+        :param json_object: The json object whose digest is computed
+        :return: The hex digest
+        """
+        content = json.dumps(json_object, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
     @staticmethod
     def add_json_results(command: Command,
                          json_objects: List[Dict[str, str]]):
         """
-        This method adds the given json objects to the given command
+        This method adds the given json objects to the given command. Json objects, which are already stored, are
+        ignored. For this check, the digests (see method get_json_digest) of the command's json objects are cached in
+        the command object. Thereby, collectors that add thousands of json objects do not compare each new object
+        with all stored objects.
         :param command:
         :param json_objects:
         :return:
@@ -643,9 +833,25 @@ class BaseUtils:
             json_objects = [json_objects] if not isinstance(json_objects, list) else json_objects
             if not command.json_output:
                 command.json_output = []
+            json_output = command.json_output
+            # The cache contains the list, from which it was built, the list's length, and the digests. It is rebuilt,
+            # if the json objects were replaced or modified by other means than this method.
+            cache = getattr(command, "_json_output_digests", None)
+            if cache and cache[0] is json_output and cache[1] == len(json_output):
+                digests = cache[2]
+            else:
+                digests = {BaseUtils.get_json_digest(item) for item in json_output}
+            new_objects = []
             for item in json_objects:
-                if item and item not in command.json_output:
-                    command.json_output.append(item)
+                if item:
+                    digest = BaseUtils.get_json_digest(item)
+                    if digest not in digests:
+                        digests.add(digest)
+                        new_objects.append(item)
+            # The json objects are added at once and thus, the list is marked as changed only once
+            if new_objects:
+                json_output.extend(new_objects)
+            command._json_output_digests = (json_output, len(json_output), digests)
 
     @staticmethod
     def add_binary_result(command: Command, content: bytes):
@@ -1411,27 +1617,34 @@ class BaseUtils:
                              "gnutls_name")
         if cipher_suite:
             pass
-        elif iana_name:
-            cipher_suite = session.query(CipherSuite).filter_by(iana_name=iana_name).one_or_none()
-        elif openssl_name:
-            cipher_suite = session.query(CipherSuite).filter_by(openssl_name=openssl_name).one_or_none()
-        elif gnutls_name:
-            cipher_suite = session.query(CipherSuite).filter_by(gnutls_name=gnutls_name).one_or_none()
+        elif iana_name or openssl_name or gnutls_name:
+            # Cipher suites are static reference data and thus, their IDs are looked up in memory. Afterwards, the
+            # cipher suite is usually obtained from the session's identity map.
+            cipher_suite_id = CipherSuiteIndex.get_id(session=session,
+                                                      iana_name=iana_name,
+                                                      openssl_name=openssl_name,
+                                                      gnutls_name=gnutls_name)
+            cipher_suite = session.get(CipherSuite, cipher_suite_id) if cipher_suite_id else None
         else:
             raise ValueError("at least one of the parameters is mandatory: cipher_suite, iana_name, openssl_cipher, or "
                              "gnutls_name")
         if not cipher_suite:
             return None
-        rvalue = session.query(TlsInfoCipherSuiteMapping)\
-            .filter_by(tls_info_id=tls_info.id,
-                       cipher_suite_id=cipher_suite.id,
-                       kex_algorithm_details=kex_algorithm_details).one_or_none()
+        # The TLS info's mappings are loaded once and afterwards, they are looked up in memory. Thereby, the session
+        # does not have to be flushed for each new mapping and all new mappings of the TLS info are inserted together
+        # by the next flush.
+        rvalue = None
+        for item in tls_info.cipher_suite_mappings:
+            if item.cipher_suite_id == cipher_suite.id and item.kex_algorithm_details == kex_algorithm_details:
+                rvalue = item
+                break
         if not rvalue:
+            # The foreign key is set as well, as it is used by the lookup above before the mapping is flushed
             rvalue = TlsInfoCipherSuiteMapping(tls_info=tls_info,
                                                cipher_suite=cipher_suite,
+                                               cipher_suite_id=cipher_suite.id,
                                                kex_algorithm_details=kex_algorithm_details)
             session.add(rvalue)
-            session.flush()
         if prefered:
             rvalue.prefered = prefered
         if order:
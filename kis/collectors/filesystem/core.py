@@ -30,6 +30,7 @@ from database.model import Host
 from database.model import Service
 from database.model import Source
 from database.model import ServiceState
+from database.utils import Engine
 from collectors.core import DomainUtils
 from collectors.core import IpUtils
 from view.core import ReportItem
@@ -78,7 +79,9 @@ class BaseDatabaseImporter:
         for input_file in self._input_files:
             try:
                 print("[*] importing XML file: {}".format(input_file))
-                self._import_file(input_file)
+                # Scopes and services are updated at once after the import of each file
+                with Engine.bulk_mode(session=self._session, workspace=self._workspace):
+                    self._import_file(input_file)
                 self._session.commit()
             except xml.etree.ElementTree.ParseError as e:
                 print("[E]   import failed due to exception: {}".format(e))
@@ -32,12 +32,14 @@ import sys
 import stat
 import traceback
 import argparse
+import multiprocessing
 from argparse import _ArgumentGroup
 from queue import Queue
 from datetime import datetime
 from threading import Lock
 from threading import Thread
 from database.config import Collector
+from database.config import BaseConfig
 from database.config import SortingHelpFormatter
 from database.model import Service
 from database.model import Host
@@ -53,6 +55,7 @@ from database.model import Email
 from database.model import Company
 from database.model import CommandStatus
 from database.model import VhostChoice
+from database.model import ExecutionInfoType
 from database.utils import Engine
 from sqlalchemy import and_
 from typing import Dict
@@ -68,6 +71,12 @@ from collectors.os.modules.core import CompanyCollector
 from collectors.os.modules.core import ExecutionFailedException
 from collectors.os.modules.core import Delay
 from collectors.os.modules.core import BaseCollector
+from collectors.os.core import ConcurrencyGovernor
+from collectors.os.core import TelemetryPhase
+from collectors.os.core import ExecutionTelemetry
+from collectors.os.core import AnalysisBatch
+from collectors.os.core import AnalysisBatchResult
+from collectors.os.core import AnalysisCheckpoint
 from sqlalchemy.orm.session import Session
 
 logger = logging.getLogger('collector')
@@ -139,15 +148,27 @@ class CommandQueueItem:
     def __init__(self,
                  command_id: int,
                  timeout: int = None,
-                 active_collector: bool = True):
+                 active_collector: bool = True,
+                 batch_command_ids: List[int] = None):
         self._command_id = command_id
         self._timeout = timeout
         self._active_collector = active_collector
+        self._batch_command_ids = batch_command_ids if batch_command_ids else []
+        # Point in time (see time.perf_counter) at which the item was put into the command queue
+        self.queue_time = time.perf_counter()
 
     @property
     def command_id(self):
         return self._command_id
 
+    @property
+    def batch_command_ids(self) -> List[int]:
+        """
+        :return: The IDs of all commands that shall be executed together by a single operating system command. If the
+        list is empty, then only the command with ID command_id is executed.
+        """
+        return self._batch_command_ids
+
     @property
     def timeout(self):
         return self._timeout
@@ -160,6 +181,9 @@ class CommandQueueItem:
 class CollectorProducer(Thread):
     """This class loads all modules and creates the desired commands."""
 
+    # The number of commands after which kiscollect's analysis (see argument --analyze) starts a new batch
+    ANALYSIS_BATCH_SIZE = 100
+
     def __init__(self,
                  engine: Engine,
                  command_queue: Queue = None,
@@ -174,6 +198,10 @@ class CollectorProducer(Thread):
                  delay_max: int = None,
                  included_items: List[str] = [],
                  excluded_items: List[str] = [],
+                 target_threads: int = 16,
+                 telemetry_file: str = None,
+                 analysis_processes: int = 1,
+                 resume_analysis: bool = False,
                  **kwargs):
         super().__init__()
         self.collector_config = Collector()
@@ -191,10 +219,15 @@ class CollectorProducer(Thread):
         self._excluded_items = excluded_items
         self._restart_statuses = restart_statuses
         self._analyze_results = analyze_results
+        self._analysis_processes = analysis_processes
+        self._resume_analysis = resume_analysis
+        self._arguments = {}
         self._strict_open = strict_open
         self._delay_min = delay_min
         self._delay_max = delay_max
         self._delay = None
+        self._governor = ConcurrencyGovernor(max_target_threads=target_threads)
+        self._telemetry = ExecutionTelemetry(file_name=telemetry_file, workspace=workspace)
         self._vhost = vhost
         self._continue_execution = False
         self._collection_status_lock = Lock()
@@ -217,6 +250,14 @@ class CollectorProducer(Thread):
     def selected_collectors(self) -> List[ArgParserModule]:
         return self._selected_collectors
 
+    @property
+    def governor(self) -> ConcurrencyGovernor:
+        return self._governor
+
+    @property
+    def telemetry(self) -> ExecutionTelemetry:
+        return self._telemetry
+
     @property
     def collection_status(self) -> CollectionStatus:
         with self._collection_status_lock:
@@ -365,6 +406,12 @@ class CollectorProducer(Thread):
                             help="usually vhost collectors like httpgobuster do not create commands for "
                                  "top-level domains (TLDs), if they resolve to an in-scope IP address. use this "
                                  "argument to use TLDs as well")
+        ogroup.add_argument("--profile-sql", dest="profile_sql",
+                            action="store_true",
+                            help="if specified, then the SQL statements sent to the database are counted and timed per "
+                                 "call site, and a ranked profile including possible N+1 query patterns is printed to "
+                                 "stderr at exit. alternatively, set environment variable "
+                                 "{}=1".format(BaseConfig.ENV_PROFILE_SQL))
         ogroup.add_argument("--debug",
                             action="store_true",
                             help="prints extra information to log file")
@@ -399,6 +446,37 @@ class CollectorProducer(Thread):
                             type=int,
                             default=1,
                             help="number of threads that execute collection")
+        ogroup.add_argument("--batch-size", metavar="N", dest="batch_size",
+                            type=int,
+                            default=0,
+                            help="number of targets that collectors, which support batch execution (e.g., "
+                                 "dnsresolvehost), process by a single operating system command. per default, each "
+                                 "target is processed by its own operating system command")
+        ogroup.add_argument("--target-threads", metavar="N", dest="target_threads",
+                            type=int,
+                            default=16,
+                            help="maximum number of threads that all tools (e.g., gobuster or hydra), which are "
+                                 "concurrently executed against the same IP address or host name, use together. "
+                                 "the number of threads of each tool is determined when its command is started")
+        ogroup.add_argument("--telemetry", metavar="FILE",
+                            type=str,
+                            nargs="?",
+                            const=BaseConfig.get_telemetry_file(),
+                            help="append the durations of creating, queuing, executing, storing, and analysing each "
+                                 "collector's commands as JSON lines to the given file. use kisreport module "
+                                 "telemetry to rank the collectors based on this file. if no file is given, then file "
+                                 "{} is used. per default, the durations are only kept in memory (see console command "
+                                 "stats)".format(BaseConfig.get_telemetry_file()))
+        ogroup.add_argument("--processes", metavar="N", dest="analysis_processes",
+                            type=int,
+                            default=1,
+                            help="number of worker processes that re-analyze the already collected information (see "
+                                 "argument --analyze). each worker process analyzes the commands of different targets "
+                                 "and commits its results in batches")
+        ogroup.add_argument("--resume", dest="resume_analysis",
+                            action="store_true",
+                            help="resume an interrupted re-analysis (see argument --analyze) from its checkpoint. "
+                                 "per default, all commands are re-analyzed")
         ogroup.add_argument("-w", "--workspace",
                             type=str,
                             required=True,
@@ -494,6 +572,7 @@ class CollectorProducer(Thread):
         :return:
         """
         self._selected_collectors = []
+        self._arguments = dict(args)
         kwargs = {}
         to_instantiate = []
         for key, value in args.items():
@@ -502,8 +581,13 @@ class CollectorProducer(Thread):
                 to_instantiate.append(self._collector_classes[key])
             elif key == "threads" and value > 0:
                 self._number_of_threads = value
+            elif key == "target_threads" and value and value > 0:
+                self._governor.max_target_threads = value
             elif key == "workspace" and value:
                 self._workspace = value
+                self._telemetry.workspace = value
+            elif key == "telemetry" and value:
+                self._telemetry.file_name = value
             elif key == "print_commands" and value:
                 self._print_commands = value
             elif key == "filter" and value:
@@ -513,6 +597,10 @@ class CollectorProducer(Thread):
                 self._restart_statuses = [CommandStatus[item] for item in value]
             elif key == "analyze" and value:
                 self._analyze_results = value
+            elif key == "analysis_processes" and value and value > 0:
+                self._analysis_processes = value
+            elif key == "resume_analysis" and value:
+                self._resume_analysis = value
             elif key == "strict" and value:
                 self._strict_open = value
             elif key == "force_delay_min" and value:
@@ -635,6 +723,7 @@ class CollectorProducer(Thread):
                         break
                     self.current_collector = collector
                     collector_types = [item.collector_type for item in collector.collector_type_info]
+                    start_time = time.perf_counter()
                     with self._engine.session_scope() as session:
                         try:
                             commands = []
@@ -651,6 +740,7 @@ class CollectorProducer(Thread):
                                     commands += command_creation_method(session, collector_name, collector_types)
                             BaseUtils.add_source(session=session, name=collector_name.name)
                             # Populate the queue
+                            batches = {}
                             for item in commands:
                                 if (item.status_value <= CommandStatus.collecting.value or
                                     (self._restart_statuses and
@@ -658,11 +748,20 @@ class CollectorProducer(Thread):
                                     uniq_command_ids[item.id] = CommandQueueItem(item.id,
                                                                                  self.current_collector.instance.timeout,
                                                                                  self.current_collector.instance.active_collector)
+                                    if collector.instance.batch_size:
+                                        batch_key = collector.instance.get_batch_key(item)
+                                        batches.setdefault(batch_key, []).append(item.id)
+                            # Combine compatible commands into batches, which are executed by a single OS command
+                            if batches:
+                                uniq_command_ids = self._create_batch_queue_items(collector, batches)
                         except Exception as ex:
                             traceback.print_exc(file=sys.stderr)
                             session.rollback()
                             self.log_exception(ex)
                             break
+                    self._telemetry.record(collector=collector.name,
+                                           phase=TelemetryPhase.create,
+                                           duration=time.perf_counter() - start_time)
                     if self._command_queue:
                         # We remove already completed collectors from list
                         with self._remaining_collectors_lock:
@@ -671,6 +770,7 @@ class CollectorProducer(Thread):
                                 self._remaining_collectors = self._remaining_collectors[index:]
                         # We add new command IDs to the queue
                         for key, value in uniq_command_ids.items():
+                            value.queue_time = time.perf_counter()
                             self._command_queue.put(value)
                         self._command_queue.join()
                 except Exception as ex:
@@ -681,12 +781,37 @@ class CollectorProducer(Thread):
             continue_collection = self.collection_status == CollectionStatus.running and self._continue_execution
             if continue_collection:
                 time.sleep(2)
+        self._telemetry.close()
         if not self.print_commands:
             for console in self.consoles:
                 console.notify_finished()
 
+    @staticmethod
+    def _create_batch_queue_items(collector: ArgParserModule, batches: Dict[str, List[int]]) -> dict:
+        """
+        This method splits the given batches of compatible command IDs into queue items that contain at most
+        batch_size commands.
+        :param collector: The collector that created the commands
+        :param batches: Dictionary containing the batch keys as keys and the compatible command IDs as values
+        :return: Dictionary containing the first command ID of each batch as key and the queue item as value
+        """
+        result = {}
+        batch_size = collector.instance.batch_size
+        timeout = collector.instance.timeout
+        for command_ids in batches.values():
+            for i in range(0, len(command_ids), batch_size):
+                batch = command_ids[i:i + batch_size]
+                result[batch[0]] = CommandQueueItem(batch[0],
+                                                    timeout * len(batch) if timeout else timeout,
+                                                    collector.instance.active_collector,
+                                                    batch_command_ids=batch)
+        return result
+
     def _verify_command(self, commands: List[Command]):
+        # Commands that are executed in-process (e.g. kis-resolver) do not have an executable
+        in_process_tool = getattr(self.current_collector.instance.execution_class, "TOOL", None)
         if commands and commands[0].os_command and \
+                commands[0].os_command[0] != in_process_tool and \
                 not os.path.isfile(commands[0].os_command[0]):
             raise FileNotFoundError(
                 "the command '{}' does not exist!".format(commands[0].os_command[0]))
@@ -854,122 +979,197 @@ class CollectorProducer(Thread):
                 self._verify_command(commands)
         return commands
 
+    def _get_analysis_targets(self,
+                              session: Session,
+                              collector: ArgParserModule,
+                              checkpoint: AnalysisCheckpoint) -> Dict[tuple, List[int]]:
+        """
+        This method determines the commands of the given collector, which are re-analysed.
+        :param session: The database session used to query the commands
+        :param collector: The collector whose commands are re-analysed
+        :param checkpoint: Commands that are already marked as completed in this checkpoint are ignored
+        :return: Dictionary whose keys are the targets (tuple of target type and ID) and whose values are the IDs of
+        the commands of the respective target and all targets connected to it (see AnalysisBatch.group)
+        """
+        command_targets = {}
+        # todo: update for new collector
+        for target_type, query in [("host", session.query(Command.id, Command.host_id)
+                                    .join((CollectorName, Command.collector_name))
+                                    .join((Host, Command.host))
+                                    .join((Workspace, Host.workspace))),
+                                   ("host_name", session.query(Command.id, Command.host_name_id)
+                                    .join((CollectorName, Command.collector_name))
+                                    .join((HostName, Command.host_name))
+                                    .join((DomainName, HostName.domain_name))
+                                    .join((Workspace, DomainName.workspace))),
+                                   ("network", session.query(Command.id, Command.ipv4_network_id)
+                                    .join((CollectorName, Command.collector_name))
+                                    .join((Network, Command.ipv4_network))
+                                    .join((Workspace, Network.workspace))),
+                                   ("email", session.query(Command.id, Command.email_id)
+                                    .join((CollectorName, Command.collector_name))
+                                    .join((Email, Command.email))
+                                    .join((HostName, Email.host_name))
+                                    .join((DomainName, HostName.domain_name))
+                                    .join((Workspace, DomainName.workspace))),
+                                   ("company", session.query(Command.id, Command.company_id)
+                                    .join((CollectorName, Command.collector_name))
+                                    .join((Company, Command.company))
+                                    .join((Workspace, Company.workspace)))]:
+            for command_id, target_id in query.filter(and_(Workspace.name == self._workspace,
+                                                           CollectorName.name == collector.name)):
+                # Commands might have more than one target (e.g., a host and a host name)
+                if not checkpoint.is_completed(collector.name, command_id):
+                    command_targets.setdefault(command_id, []).append((target_type, target_id))
+        return AnalysisBatch.group(command_targets)
+
+    def _is_analysable(self, command: Command) -> bool:
+        """
+        This method determines whether the given command's target is processable according to argument --filter.
+        """
+        return bool((command.host and command.host.is_processable(self._included_items,
+                                                                  self._excluded_items)) or
+                    (command.host_name and command.host_name.is_processable(self._included_items,
+                                                                            self._excluded_items,
+                                                                            CollectorType.vhost_service)) or
+                    (command.ipv4_network and command.ipv4_network.is_processable(self._included_items,
+                                                                                  self._excluded_items)) or
+                    (command.email and command.email.is_processable(self._included_items,
+                                                                    self._excluded_items)) or
+                    (command.company and command.company.is_processable(self._included_items,
+                                                                        self._excluded_items)))
+
+    def analyze_batch(self, batch: AnalysisBatch, replay: bool = False) -> AnalysisBatchResult:
+        """
+        This method re-analyses the commands of the given batch in the order of their IDs and commits the results
+        within one transaction.
+        :param batch: The batch whose commands are re-analysed
+        :param replay: If false, then a database error (e.g., a unique constraint violation caused by a concurrent
+        worker process) rolls back the entire batch so that it can be replayed after all other batches. If true, then
+        only the changes of the failed command are rolled back.
+        :return: The outcome of the batch's analysis
+        """
+        result = AnalysisBatchResult(batch)
+        collector = [item for item in self._selected_collectors if item.name == batch.collector][0]
+        try:
+            with self._engine.session_scope() as session:
+                source = session.query(Source).filter_by(name=batch.collector).one()
+                for command in session.query(Command) \
+                        .filter(Command.id.in_(batch.command_ids)) \
+                        .order_by(Command.id).all():
+                    if not self._is_analysable(command):
+                        result.skipped += 1
+                        continue
+                    try:
+                        with session.begin_nested():
+                            report_item = BaseCollector.get_report_item(command)
+                            collector.instance.verify_command_execution(session,
+                                                                        command=command,
+                                                                        source=source,
+                                                                        report_item=report_item)
+                        result.analysed += 1
+                    except sqlalchemy.exc.DBAPIError as ex:
+                        if not replay:
+                            raise
+                        result.failed += 1
+                        self.log_exception(ex)
+                    except Exception as ex:
+                        result.failed += 1
+                        self.log_exception(ex)
+        except sqlalchemy.exc.DBAPIError:
+            # Engine.session_scope already logged the exception
+            result = AnalysisBatchResult(batch)
+            result.conflict = True
+        return result
+
+    def _analyze_batches(self, batches: List[AnalysisBatch], checkpoint: AnalysisCheckpoint) -> List[AnalysisBatch]:
+        """
+        This method re-analyses the given batches either in this process or in a pool of worker processes.
+        :param batches: The batches that are re-analysed
+        :param checkpoint: The checkpoint to which the commands of all committed batches are added
+        :return: The batches that failed due to database conflicts
+        """
+        results = []
+        if self._analysis_processes > 1 and len(batches) > 1:
+            root_logger = logging.getLogger()
+            log_files = [item.baseFilename for item in root_logger.handlers if isinstance(item, logging.FileHandler)]
+            # Worker processes are spawned (instead of forked) as the database connections and the threads of this
+            # process must not be shared
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(processes=min(self._analysis_processes, len(batches)),
+                              initializer=_init_analysis_process,
+                              initargs=(self._engine.production,
+                                        self._arguments,
+                                        log_files[0] if log_files else None,
+                                        root_logger.level)) as pool:
+                for result in pool.imap_unordered(_analyze_batch, batches):
+                    results.append(result)
+                    if not result.conflict:
+                        checkpoint.add(result.batch.collector, result.batch.command_ids)
+                    if self.collection_status == CollectionStatus.stopped:
+                        break
+        else:
+            for batch in batches:
+                if self.collection_status == CollectionStatus.stopped:
+                    break
+                result = self.analyze_batch(batch)
+                results.append(result)
+                if not result.conflict:
+                    checkpoint.add(batch.collector, batch.command_ids)
+        logger.info("analysed {} commands ({} skipped, {} failed) in {} batches. {} batches conflicted".format(
+            sum([item.analysed for item in results]),
+            sum([item.skipped for item in results]),
+            sum([item.failed for item in results]),
+            len(results),
+            len([item for item in results if item.conflict])))
+        return [item.batch for item in results if item.conflict]
+
     def _analyze(self):
         """
         Analyzes all collected information
+
+        The commands of each selected collector are grouped by their targets into batches (see AnalysisBatch), which
+        are re-analysed by a pool of worker processes (see argument --processes). Each batch is committed on its own
+        and recorded in a checkpoint file, from which an interrupted analysis can be resumed (see argument --resume).
+        Batches that failed due to conflicting database updates of concurrent workers are finally replayed one after
+        the other in their original order.
         """
+        checkpoint = AnalysisCheckpoint(file_name=BaseConfig.get_analysis_checkpoint_file(self._workspace),
+                                        workspace=self._workspace)
+        if self._resume_analysis:
+            checkpoint.load()
+        else:
+            checkpoint.remove()
+        completed = True
         self.current_collector_index = 0
         for argument in self._selected_collectors:
             try:
                 # if the user enters q, then we quit collection
                 if self.collection_status == CollectionStatus.stopped:
+                    completed = False
                     break
                 self.current_collector = argument
                 with self._engine.session_scope() as session:
-                    # todo: update for new collector
-                    # Analyze host and service collectors
-                    for command in session.query(Command) \
-                         .join((CollectorName, Command.collector_name)) \
-                         .join((Host, Command.host)) \
-                         .join((Workspace, Host.workspace)) \
-                         .filter(and_(Workspace.name == self._workspace,
-                                      CollectorName.name == argument.name)).all():
-                        if command.host.is_processable(self._included_items,
-                                                       self._excluded_items):
-                            try:
-                                source = self._engine.get_or_create(session, Source, name=command.collector_name.name)
-                                report_item = BaseCollector.get_report_item(command)
-                                argument.instance.verify_command_execution(session,
-                                                                           command=command,
-                                                                           source=source,
-                                                                           report_item=report_item)
-                            except Exception as e:
-                                session.rollback()
-                                self.log_exception(e)
-                    # Analyze host name and host name/service collectors
-                    for command in session.query(Command) \
-                         .join((CollectorName, Command.collector_name)) \
-                         .join((HostName, Command.host_name)) \
-                         .join((DomainName, HostName.domain_name)) \
-                         .join((Workspace, DomainName.workspace)) \
-                         .filter(and_(Workspace.name == self._workspace,
-                                      CollectorName.name == argument.name)).all():
-                        if command.host_name.is_processable(self._included_items,
-                                                            self._excluded_items,
-                                                            CollectorType.vhost_service):
-                            try:
-                                source = self._engine.get_or_create(session, Source, name=command.collector_name.name)
-                                report_item = BaseCollector.get_report_item(command)
-                                argument.instance.verify_command_execution(session,
-                                                                           command=command,
-                                                                           source=source,
-                                                                           report_item=report_item)
-                            except Exception as e:
-                                session.rollback()
-                                self.log_exception(e)
-                    # Analyze network collectors
-                    for command in session.query(Command) \
-                         .join((CollectorName, Command.collector_name)) \
-                         .join((Network, Command.ipv4_network)) \
-                         .join((Workspace, Network.workspace)) \
-                         .filter(and_(Workspace.name == self._workspace,
-                                      CollectorName.name == argument.name)).all():
-                        if command.ipv4_network.is_processable(self._included_items,
-                                                               self._excluded_items):
-                            try:
-                                source = self._engine.get_or_create(session, Source, name=command.collector_name.name)
-                                report_item = BaseCollector.get_report_item(command)
-                                argument.instance.verify_command_execution(session,
-                                                                           command=command,
-                                                                           source=source,
-                                                                           report_item=report_item)
-                            except Exception as e:
-                                session.rollback()
-                                self.log_exception(e)
-                    # Analyze email collectors
-                    for command in session.query(Command) \
-                         .join((CollectorName, Command.collector_name)) \
-                         .join((Email, Command.email)) \
-                         .join((HostName, Email.host_name)) \
-                         .join((DomainName, HostName.domain_name)) \
-                         .join((Workspace, DomainName.workspace)) \
-                         .filter(and_(Workspace.name == self._workspace,
-                                      CollectorName.name == argument.name)).all():
-                        if command.email.is_processable(self._included_items,
-                                                        self._excluded_items):
-                            try:
-                                source = self._engine.get_or_create(session, Source, name=command.collector_name.name)
-                                report_item = BaseCollector.get_report_item(command)
-                                argument.instance.verify_command_execution(session,
-                                                                           command=command,
-                                                                           source=source,
-                                                                           report_item=report_item)
-                            except Exception as e:
-                                session.rollback()
-                                self.log_exception(e)
-                    # Analyze company collectors
-                    for command in session.query(Command) \
-                         .join((CollectorName, Command.collector_name)) \
-                         .join((Company, Command.company)) \
-                         .join((Workspace, Company.workspace)) \
-                         .filter(and_(Workspace.name == self._workspace,
-                                      CollectorName.name == argument.name)).all():
-                        if command.company.is_processable(self._included_items,
-                                                          self._excluded_items):
-                            try:
-                                source = self._engine.get_or_create(session, Source, name=command.collector_name.name)
-                                report_item = BaseCollector.get_report_item(command)
-                                argument.instance.verify_command_execution(session,
-                                                                           command=command,
-                                                                           source=source,
-                                                                           report_item=report_item)
-                            except Exception as e:
-                                session.rollback()
-                                self.log_exception(e)
+                    self._engine.get_or_create(session, Source, name=argument.name)
+                    targets = self._get_analysis_targets(session, argument, checkpoint)
+                batches = AnalysisBatch.partition(collector=argument.name,
+                                                  targets=targets,
+                                                  batch_size=self.ANALYSIS_BATCH_SIZE)
+                conflicts = self._analyze_batches(batches, checkpoint)
+                for batch in sorted(conflicts, key=lambda item: item.index):
+                    if self.collection_status == CollectionStatus.stopped:
+                        break
+                    self.analyze_batch(batch, replay=True)
+                    checkpoint.add(batch.collector, batch.command_ids)
+                if self.collection_status == CollectionStatus.stopped:
+                    completed = False
             except Exception as ex:
+                completed = False
                 self.log_exception(ex)
                 self.current_collector = None
             self.current_collector_index += 1
+        if completed:
+            checkpoint.remove()
 
     def terminate_all_processes(self) -> None:
         """
@@ -977,7 +1177,7 @@ class CollectorProducer(Thread):
         :return:
         """
         for thread in self.consumer_threads:
-            thread.terminate_current_command()
+            thread.kill_current_command()
 
     def stop(self) -> None:
         # Signal that collection stopped
@@ -1007,6 +1207,36 @@ class CollectorProducer(Thread):
             self.collection_status = CollectionStatus.finished
 
 
+# The collector producer of a worker process of kiscollect's analysis (see CollectorProducer._analyze_batches)
+_analysis_producer = None
+
+
+def _init_analysis_process(production: bool, arguments: dict, log_file: str, log_level: int) -> None:
+    """
+    This function initializes a worker process of kiscollect's analysis. Each worker process uses its own database
+    engine and collector instances.
+    :param production: Specifies whether the production or testing database is used
+    :param arguments: The argparser arguments with which the parent's collector producer was initialized
+    :param log_file: The log file of the parent process or None, if the parent process does not log to a file
+    :param log_level: The log level of the parent process
+    """
+    global _analysis_producer
+    if log_file:
+        logging.basicConfig(filename=log_file,
+                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                            datefmt='%Y-%m-%d %H:%M:%S',
+                            level=log_level)
+    _analysis_producer = CollectorProducer(Engine(production=production, profile_sql=False))
+    _analysis_producer.init(arguments)
+
+
+def _analyze_batch(batch: AnalysisBatch) -> AnalysisBatchResult:
+    """
+    This function re-analyses the given batch in a worker process of kiscollect's analysis.
+    """
+    return _analysis_producer.analyze_batch(batch)
+
+
 class CollectorConsumer(Thread):
     """
     This class executes all commands
@@ -1035,6 +1265,7 @@ class CollectorConsumer(Thread):
         self._consoles = producer_thread.consoles
         self._current_os_command_lock = Lock()
         self._current_os_command = None
+        self._target_lease = None
 
     def __repr__(self):
         with self._consumer_status_lock:
@@ -1086,7 +1317,7 @@ class CollectorConsumer(Thread):
 
     def kill_current_command(self) -> None:
         """
-        This method kills the currently running OS command.using SIGTERM
+        This method kills the currently running OS command using SIGKILL
         :return:
         """
         with self._current_process_lock:
@@ -1095,13 +1326,160 @@ class CollectorConsumer(Thread):
 
     def terminate_current_command(self) -> None:
         """
-        This method kills the currently running OS command.using SIGKILL
+        This method terminates the currently running OS command using SIGTERM
         :return:
         """
         with self._current_process_lock:
             if self._current_process:
                 self._current_process.terminate()
 
+    @staticmethod
+    def get_target(command: Command) -> str:
+        """
+        This method returns the IP address or host name against which the given command is executed.
+        :return: The IP address or host name or None, if the command is not executed against a host or host name
+        """
+        result = None
+        if command.service:
+            result = command.service.address
+        elif command.host:
+            result = command.host.address
+        elif command.host_name:
+            result = command.host_name.full_name
+        return result
+
+    def _acquire_target(self, command: Command) -> None:
+        """
+        This method registers the given command at the producer's concurrency governor and determines the number of
+        threads that the command's tool uses for this execution.
+        """
+        target = self.get_target(command)
+        if target:
+            collector = self._producer_thread.current_collector.instance
+            threads = self._producer_thread.governor.acquire(target, collector.command_threads)
+            if threads:
+                command.execution_info[ExecutionInfoType.threads.name] = threads
+            self._target_lease = (target, threads)
+
+    def _release_target(self) -> None:
+        """
+        This method unregisters the command, which was registered by method _acquire_target, at the producer's
+        concurrency governor.
+        """
+        if self._target_lease:
+            target, threads = self._target_lease
+            self._target_lease = None
+            self._producer_thread.governor.release(target, threads)
+
+    def _reset_batch(self, command_ids: List[int], executed: bool) -> None:
+        """
+        This method resets the status of the given batch commands, which are still in status collecting, after the
+        batch execution failed. Commands, whose operating system command was not started yet, are set back to pending
+        so that they are executed again; the others are set to failed.
+        :param command_ids: The IDs of the commands of the failed batch
+        :param executed: True, if the batched operating system command was already started
+        """
+        if command_ids:
+            with self._engine.session_scope() as session:
+                for command in session.query(Command) \
+                        .filter(Command.id.in_(command_ids), Command.status == CommandStatus.collecting).all():
+                    if executed:
+                        command.status = CommandStatus.failed
+                        command.stop_time = datetime.utcnow()
+                    else:
+                        command.status = CommandStatus.pending
+                        command.start_time = None
+
+    def _execute_batch(self, command_item: CommandQueueItem) -> bool:
+        """
+        This method executes all commands of the given batch by a single operating system command. Afterwards, the
+        combined output is split per command and the results of each command are processed as if the command had been
+        executed on its own.
+        :param command_item: The queue item containing the IDs of all commands that shall be executed together
+        :return: True, if an operating system command was executed
+        """
+        collector = self._producer_thread.current_collector.instance
+        input_file = None
+        command_ids = []
+        executed = False
+        try:
+            with self._engine.session_scope() as session:
+                commands = []
+                for command in session.query(Command) \
+                        .filter(Command.id.in_(command_item.batch_command_ids)) \
+                        .order_by(Command.id).all():
+                    if self._producer_thread.print_commands:
+                        print(command.os_command_string)
+                    elif not collector.start_command_execution(session, command):
+                        command.status = CommandStatus.terminated
+                        command.stop_time = datetime.utcnow()
+                    else:
+                        command.update_file_permissions()
+                        command.start_time = datetime.utcnow()
+                        command.status = CommandStatus.collecting
+                        command.reset()
+                        commands.append(command)
+                if not commands:
+                    return False
+                command_ids = [item.id for item in commands]
+                input_file = collector.create_batch_input_file(commands)
+                os_command = collector.create_batch_os_command(commands, input_file)
+                working_directory = commands[0].working_directory
+                username = commands[0].username
+                with self._consumer_status_lock:
+                    self._current_username = username
+                    self._current_host = "{} targets".format(len(commands))
+                    self._current_service = "n/a"
+                    self._current_start_time = commands[0].start_time
+            self.current_os_command = " ".join(os_command)
+            self.current_process = collector.execution_class(os_command,
+                                                             timeout=command_item.timeout,
+                                                             cwd=working_directory,
+                                                             env=self._engine.config.db_envs,
+                                                             stdout=subprocess.PIPE,
+                                                             stderr=subprocess.PIPE,
+                                                             username=username)
+            with self._producer_thread.telemetry.span(collector=collector.name,
+                                                      phase=TelemetryPhase.execute,
+                                                      command_id=command_item.command_id):
+                executed = True
+                self.current_process.start()
+                self.current_process.join()
+            if not self.current_process.killed:
+                self.current_process.stop_time = datetime.utcnow()
+                status_id = CommandStatus.completed
+            else:
+                self.kill_current_command()
+                self.current_process.stop_time = datetime.utcnow()
+                status_id = CommandStatus.terminated
+            with self._engine.session_scope() as session:
+                commands = session.query(Command).filter(Command.id.in_(command_ids)).order_by(Command.id).all()
+                results = collector.split_batch_output(commands, self.current_process)
+            # Now we store the results of each command in the database
+            for command_id in command_ids:
+                try:
+                    collector.process_command_results(self._engine,
+                                                      command_id,
+                                                      status_id,
+                                                      results[command_id],
+                                                      listeners=self._consoles,
+                                                      telemetry=self._producer_thread.telemetry)
+                except Exception as ex:
+                    self._producer_thread.log_exception(ex)
+            self.current_process.close()
+        except Exception:
+            self._reset_batch(command_ids, executed)
+            raise
+        finally:
+            if input_file and os.path.isfile(input_file):
+                os.remove(input_file)
+            self.current_os_command = None
+            with self._consumer_status_lock:
+                self._current_host = None
+                self._current_service = None
+                self._current_start_time = None
+        return True
+
     def run(self):
         while self._producer_thread.collection_status == CollectionStatus.running:
             try:
@@ -1110,10 +1488,25 @@ class CollectorConsumer(Thread):
                 # Check maximum number of threads
                 if 0 < self._producer_thread.current_collector.instance.max_threads >= self._id or \
                         self._producer_thread.current_collector.instance.max_threads == 0:
+                    self._producer_thread.telemetry.record(collector=self._producer_thread.current_collector.name,
+                                                           phase=TelemetryPhase.queue,
+                                                           duration=time.perf_counter() - command_item.queue_time,
+                                                           command_id=command_item.command_id)
+                    if command_item.batch_command_ids:
+                        try:
+                            executed_command = self._execute_batch(command_item)
+                        finally:
+                            self._commands_queue.task_done()
+                        if self._producer_thread.current_collector and \
+                                self._producer_thread.current_collector.instance and executed_command:
+                            self._producer_thread.current_collector.instance.sleep()
+                        continue
                     executed_command = True
                     # Obtain the command to be executed and update its status to "in process"
                     with self._engine.session_scope() as session:
                         command = session.query(Command).filter_by(id=command_item.command_id).one()
+                        if not self._producer_thread.print_commands:
+                            self._acquire_target(command)
                         working_directory = command.working_directory
                         username = command.username
                         os_command = command.os_command_substituted
@@ -1183,13 +1576,17 @@ class CollectorConsumer(Thread):
                                                                        stdout=subprocess.PIPE,
                                                                        stderr=subprocess.PIPE,
                                                                        username=username)
-                        self.current_process.start()
-                        self.current_process.join()
+                        with self._producer_thread.telemetry.span(
+                                collector=self._producer_thread.current_collector.name,
+                                phase=TelemetryPhase.execute,
+                                command_id=command_item.command_id):
+                            self.current_process.start()
+                            self.current_process.join()
                         if not self.current_process.killed:
                             self.current_process.stop_time = datetime.utcnow()
                             status_id = CommandStatus.completed
                         else:
-                            self.terminate_current_command()
+                            self.kill_current_command()
                             self.current_process.stop_time = datetime.utcnow()
                             status_id = CommandStatus.terminated
                         # Now we store the command's results in the database
@@ -1198,7 +1595,8 @@ class CollectorConsumer(Thread):
                                                                                                      command_item.command_id,
                                                                                                      status_id,
                                                                                                      self.current_process,
-                                                                                                     listeners=self._consoles)
+                                                                                                     listeners=self._consoles,
+                                                                                                     telemetry=self._producer_thread.telemetry)
                         except sqlalchemy.orm.exc.NoResultFound as ex:
                             print("no command with ID {} found".format(command_item.command_id))
                             logger.critical("no command with ID {} found (see the following stacktrade)"
@@ -1211,6 +1609,7 @@ class CollectorConsumer(Thread):
                             self._producer_thread.log_exception(ex)
                         self.current_process.close()
                         self.current_os_command = None
+                    self._release_target()
                     with self._consumer_status_lock:
                         self._current_host = None
                         self._current_service = None
@@ -1225,5 +1624,6 @@ class CollectorConsumer(Thread):
                     time.sleep(1)
             except Exception as ex:
                 self.current_os_command = None
+                self._release_target()
                 traceback.print_exc(file=sys.stderr)
                 self._producer_thread.log_exception(ex)
@@ -21,15 +21,22 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import subprocess
-import psutil
+import asyncio
+import bisect
+import signal
+import enum
+import json
 import os
 import time
 import logging
 import pwd
 from threading import Thread
+from threading import Event
 from threading import Lock
 from typing import List
+from typing import Iterator
 from datetime import datetime
+from contextlib import contextmanager
 from database.config import BaseConfig
 
 logger = logging.getLogger('process')
@@ -128,6 +135,7 @@ class BaseCommand(Thread):
         self._cwd = cwd
         self._start_time = None
         self._stop_time = None
+        self._rusage = None
         self._lock = Lock()
         self._pwd = None
         # Pass relevant environment variables to subprocesses
@@ -211,6 +219,14 @@ class BaseCommand(Thread):
         with self._lock:
             self._stop_time = value
 
+    @property
+    def rusage(self):
+        """
+        :return: Returns the resource usage (see resource.struct_rusage) of the terminated process or None, if it is
+        not available.
+        """
+        return self._rusage
+
     @property
     def command(self) -> List[str]:
         return self._os_command
@@ -244,6 +260,7 @@ class PopenCommand(BaseCommand):
         self._timeout = timeout if timeout and timeout > 0 else None
         self._stdout_reader_lock = Lock()
         self._stderr_reader_lock = Lock()
+        self._reap_lock = Lock()
         self._stdout_reader = None
         self._stderr_reader = None
 
@@ -307,35 +324,69 @@ class PopenCommand(BaseCommand):
         :return: Returns None as long as the process is still running or the process' return code.
         """
         with self._lock:
-            self._return_code = self._proc.poll()
+            self.reap(os.WNOHANG)
+            self._return_code = self._proc.returncode
             return self._return_code
 
-    def _kill_process(self, process_id: int, signal: int):
-        try:
-            os.kill(process_id, signal)
-        except psutil.NoSuchProcess:
-            pass
-        except ProcessLookupError:
-            pass
+    def reap(self, options: int = 0) -> bool:
+        """
+        This method collects the return code and the resource usage of the terminated process via wait4.
+        :param options: The options passed to os.wait4 (e.g., os.WNOHANG)
+        :return: True, if the process terminated, else False
+        """
+        # All waits of this class for the process are serialized, so that the exit status is only collected once
+        with self._reap_lock:
+            if self._proc.returncode is not None:
+                return True
+            try:
+                pid, status, rusage = os.wait4(self._proc.pid, options)
+            except ChildProcessError:
+                # The exit status was already collected elsewhere (e.g., by Popen.communicate)
+                if self._proc.returncode is None:
+                    logger.warning("could not collect the return code of process {} as it was already "
+                                   "reaped.".format(self._proc.pid))
+                    self._proc.returncode = -1
+                return True
+            if pid == 0:
+                return False
+            self._rusage = rusage
+            self._proc.returncode = os.waitstatus_to_exitcode(status)
+        return True
+
+    def _wait4(self, timeout: float = None) -> bool:
+        """
+        This method waits until the process terminated and then collects its return code and resource usage.
+        :param timeout: The maximum number of seconds to wait or None to wait until the process terminated
+        :return: True, if the process terminated, else False
+        """
+        if timeout is None:
+            return self.reap()
+        end_time = time.monotonic() + timeout
+        delay = 0.0005
+        while not self.reap(os.WNOHANG):
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                return False
+            delay = min(delay * 2, remaining, .05)
+            time.sleep(delay)
+        return True
 
     def _kill_all(self, signal: int):
+        # The process is started in its own session and thus, signalling its process group reaches all of its children
         if self._proc and self._proc.pid:
             try:
-                parent = psutil.Process(self._proc.pid)
-                for child in parent.children(recursive=True):
-                    self._kill_process(process_id=child.pid, signal=signal)
-                self._kill_process(process_id=parent.pid, signal=signal)
-            except psutil.NoSuchProcess:
+                os.killpg(self._proc.pid, signal)
+            except (ProcessLookupError, PermissionError):
                 pass
         self._killed = True
 
     def kill(self) -> None:
         """Kills the process with SIGKILL."""
-        self._kill_all(signal=15)
+        self._kill_all(signal=signal.SIGKILL)
 
     def terminate(self) -> None:
         """Terminates the process with SIGTERM"""
-        self._kill_all(signal=9)
+        self._kill_all(signal=signal.SIGTERM)
 
     def communicate(self, input=None, timeout=None):
         """
@@ -357,6 +408,7 @@ class PopenCommand(BaseCommand):
                                               shell=False,
                                               cwd=self._cwd,
                                               env=env,
+                                              start_new_session=True,
                                               preexec_fn=self._demote)
                 if self._stdout == subprocess.PIPE:
                     with self._stdout_reader_lock:
@@ -366,9 +418,14 @@ class PopenCommand(BaseCommand):
                     with self._stderr_reader_lock:
                         self._stderr_reader = StderrReader(self._proc)
                     self._stderr_reader.start()
-                self._return_code = self._proc.wait(self._timeout)
-            except subprocess.TimeoutExpired:
-                self._killed = True
+            except Exception as ex:
+                logger.exception(ex)
+                return
+            if not self._wait4(self._timeout):
+                # The process group must be killed as its members would otherwise keep the output pipes open
+                self._kill_all(signal=signal.SIGKILL)
+                self._wait4()
+            self._return_code = self._proc.returncode
             if self._stdout == subprocess.PIPE:
                 self._stdout_reader.join()
             if self._stderr == subprocess.PIPE:
@@ -383,7 +440,723 @@ class PopenCommand(BaseCommand):
                     self._proc.stderr.close()
 
 
-class PopenCommandWithoutStderr(PopenCommand):
+class OutputBuffer:
+    """
+    This class splits the chunks, which are read from a process' STDOUT or STDERR, into lines.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._output = []
+        self._pending = b""
+
+    @property
+    def output(self) -> list:
+        """
+        :return: The lines that have been read so far
+        """
+        with self._lock:
+            return list(self._output)
+
+    def feed(self, data: bytes) -> None:
+        """
+        This method adds the given chunk. Incomplete lines are kept until the next chunk arrives.
+        :param data: The chunk read from the pipe. An empty chunk signals the end of the stream.
+        """
+        if data:
+            data = self._pending + data
+            index = data.rfind(b"\n")
+            if index < 0:
+                self._pending = data
+                return
+            self._pending = data[index + 1:]
+            data = data[:index]
+        else:
+            data, self._pending = self._pending, b""
+            if not data:
+                return
+        # As the chunk is split at a line feed, it does not end within a multi-byte character.
+        lines = [line.rstrip() for line in data.decode(errors="ignore").split("\n")]
+        with self._lock:
+            self._output.extend(lines)
+
+
+class ProcessSupervisor:
+    """
+    This class supervises all processes, which are started by AsyncPopenCommand, within a single asyncio event loop.
+
+    Instead of using three threads per running command (the command thread itself and one reader thread for STDOUT and
+    STDERR each), the event loop multiplexes the pipes of all processes and reads their output in chunks. The
+    termination of a process is detected via a pidfd or, if pidfds are not supported, by polling.
+    """
+    CHUNK_SIZE = 65536
+    POLL_INTERVAL = 0.5
+    _instance = None
+    _instance_lock = Lock()
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._loop.run_forever, name="process-supervisor", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def get_instance():
+        """
+        :return: The process-wide supervisor instance
+        """
+        with ProcessSupervisor._instance_lock:
+            if ProcessSupervisor._instance is None:
+                ProcessSupervisor._instance = ProcessSupervisor()
+            return ProcessSupervisor._instance
+
+    def supervise(self, command) -> None:
+        """
+        This method hands the given, already started command over to the event loop. It can be called by any thread.
+        :param command: The AsyncPopenCommand whose process shall be supervised
+        """
+        asyncio.run_coroutine_threadsafe(self._supervise(command), self._loop)
+
+    def _read(self, stream, buffer: OutputBuffer) -> asyncio.Future:
+        """
+        This method reads the given pipe in chunks until EOF.
+        :return: Future that is done as soon as the pipe is closed
+        """
+        future = self._loop.create_future()
+        fd = stream.fileno()
+        os.set_blocking(fd, False)
+
+        def on_readable():
+            try:
+                data = os.read(fd, self.CHUNK_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b""
+            buffer.feed(data)
+            if not data:
+                self._loop.remove_reader(fd)
+                stream.close()
+                future.set_result(None)
+        self._loop.add_reader(fd, on_readable)
+        return future
+
+    def _wait(self, command) -> asyncio.Future:
+        """
+        This method waits until the given command's process terminates.
+        :return: Future that is done as soon as the process terminated
+        """
+        future = self._loop.create_future()
+        try:
+            pidfd = os.pidfd_open(command.proc.pid)
+        except (AttributeError, OSError):
+            pidfd = None
+
+        def check():
+            if not command.reap(os.WNOHANG):
+                if pidfd is None:
+                    self._loop.call_later(self.POLL_INTERVAL, check)
+                return
+            if pidfd is not None:
+                self._loop.remove_reader(pidfd)
+                os.close(pidfd)
+            future.set_result(command.proc.returncode)
+        if pidfd is None:
+            self._loop.call_soon(check)
+        else:
+            self._loop.add_reader(pidfd, check)
+        return future
+
+    async def _supervise(self, command) -> None:
+        """
+        This coroutine reads the output of the given command until its process terminated.
+        """
+        proc = command.proc
+        timer = None
+        try:
+            waiters = [self._wait(command)]
+            if proc.stdout:
+                waiters.append(self._read(proc.stdout, command.stdout_buffer))
+            if proc.stderr:
+                waiters.append(self._read(proc.stderr, command.stderr_buffer))
+            if command.timeout:
+                timer = self._loop.call_later(command.timeout, command.expire)
+            await asyncio.gather(*waiters)
+        except Exception as ex:
+            logger.exception(ex)
+        finally:
+            if timer:
+                timer.cancel()
+            command.reap(os.WNOHANG)
+            command.finish(proc.returncode)
+
+
+class AsyncPopenCommand(PopenCommand):
+    """
+    This class implements the interface of class PopenCommand without using any threads.
+
+    The process is started in its own session (and therefore in its own process group) and then handed over to the
+    ProcessSupervisor, which reads the process' output and detects its termination. As a result, methods kill and
+    terminate signal the entire process tree by a single system call (see PopenCommand).
+    """
+    def __init__(self, os_command: List[str],
+                 stdout: int = subprocess.PIPE,
+                 stderr: int = subprocess.PIPE,
+                 cwd: str = None,
+                 timeout: int = None,
+                 **kwargs):
+        super().__init__(os_command=os_command, stdout=stdout, stderr=stderr, cwd=cwd, timeout=timeout, **kwargs)
+        self._done = Event()
+        self._started = False
+        self.stdout_buffer = OutputBuffer() if stdout == subprocess.PIPE else None
+        self.stderr_buffer = OutputBuffer() if stderr == subprocess.PIPE else None
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout
+
+    @property
+    def stdout_list(self) -> list:
+        """
+        :return: Returns the standard output of the executed command or None.
+        """
+        return self.stdout_buffer.output if self._started and self.stdout_buffer else None
+
+    @property
+    def stderr_list(self) -> list:
+        """
+        :return: Returns the standard error of the executed command or None.
+        """
+        return self.stderr_buffer.output if self._started and self.stderr_buffer else None
+
+    def start(self) -> None:
+        """This method starts the OS command and returns immediately."""
+        with self._lock:
+            if self._started:
+                raise RuntimeError("commands can only be started once")
+            self._started = True
+            try:
+                env = dict(self._env)
+                env['HOME'] = self._cwd
+                self._start_time = datetime.utcnow()
+                self._proc = subprocess.Popen(self.command,
+                                              stdout=self._stdout,
+                                              stderr=self._stderr,
+                                              shell=False,
+                                              cwd=self._cwd,
+                                              env=env,
+                                              start_new_session=True,
+                                              preexec_fn=self._demote)
+            except Exception as ex:
+                logger.exception(ex)
+                self._done.set()
+                return
+        ProcessSupervisor.get_instance().supervise(self)
+
+    def run(self) -> None:
+        """This method executes the OS command and returns as soon as it terminated."""
+        self.start()
+        self.join()
+
+    def join(self, timeout: float = None) -> None:
+        """This method waits until the OS command terminated."""
+        self._done.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return self._started and not self._done.is_set()
+
+    def expire(self) -> None:
+        """This method is called by the ProcessSupervisor when the command's timeout expired."""
+        self._kill_all(signal=signal.SIGKILL)
+
+    def finish(self, return_code: int) -> None:
+        """This method is called by the ProcessSupervisor when the process terminated and its pipes are closed."""
+        with self._lock:
+            self._return_code = return_code
+        self._done.set()
+
+
+class BatchCommandResult:
+    """
+    This class holds the share of a single target in the output of a batched command execution.
+
+    Collectors that execute several commands at once (see BaseCollector.batch_size) split the combined output of the
+    executed process into objects of this class. As these objects provide the same attributes as PopenCommand, the
+    results of each command can be stored and verified as if the command had been executed on its own.
+    """
+    def __init__(self,
+                 process: BaseCommand,
+                 stdout_list: List[str] = None,
+                 stderr_list: List[str] = None,
+                 return_code: int = None):
+        self._process = process
+        self.stdout_list = stdout_list if stdout_list is not None else []
+        self.stderr_list = stderr_list if stderr_list is not None else []
+        self.return_code = process.return_code if return_code is None else return_code
+
+    @property
+    def os_command(self) -> List[str]:
+        return self._process.os_command
+
+    @property
+    def start_time(self) -> datetime:
+        return self._process.start_time
+
+    @property
+    def stop_time(self) -> datetime:
+        return self._process.stop_time
+
+    @property
+    def killed(self) -> bool:
+        return self._process.killed
+
+    @property
+    def rusage(self):
+        # The resource usage of the batched process cannot be attributed to a single command
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class TargetConcurrency:
+    """
+    This class holds the concurrency metrics of a single target (IP address or host name)
+    """
+    def __init__(self, target: str):
+        self.target = target
+        self.commands = 0
+        self.threads = 0
+        self.peak_commands = 0
+        self.peak_threads = 0
+        self.total_commands = 0
+
+    def copy(self):
+        result = TargetConcurrency(self.target)
+        result.__dict__.update(self.__dict__)
+        return result
+
+
+class ConcurrencyGovernor:
+    """
+    This class tracks the commands that are currently executed against each target by all consumer threads.
+
+    Collectors, whose tools support internal threads (e.g., gobuster or hydra), request their default number of threads
+    for each command. The governor grants at most the threads that are still available for the target so that the
+    total number of tool threads per target does not exceed max_target_threads. Each command obtains at least one
+    thread.
+    """
+    def __init__(self, max_target_threads: int = 16):
+        self.max_target_threads = max_target_threads
+        self._lock = Lock()
+        self._targets = {}
+
+    def acquire(self, target: str, threads: int = 0) -> int:
+        """
+        This method registers the start of a command against the given target.
+        :param target: The IP address or host name against which the command is executed
+        :param threads: The number of threads the command's tool uses per default or 0 if the tool does not support
+        threads
+        :return: The number of threads the tool shall use or 0 if the tool does not support threads. The return value
+        must be passed to method release after the command's execution.
+        """
+        with self._lock:
+            item = self._targets.setdefault(target, TargetConcurrency(target))
+            result = max(1, min(threads, self.max_target_threads - item.threads)) if threads > 0 else 0
+            item.commands += 1
+            item.threads += max(1, result)
+            item.total_commands += 1
+            item.peak_commands = max(item.peak_commands, item.commands)
+            item.peak_threads = max(item.peak_threads, item.threads)
+        return result
+
+    def release(self, target: str, threads: int) -> None:
+        """
+        This method registers the end of a command against the given target.
+        :param target: The IP address or host name against which the command was executed
+        :param threads: The number of threads returned by method acquire
+        """
+        with self._lock:
+            item = self._targets[target]
+            item.commands -= 1
+            item.threads -= max(1, threads)
+
+    def get_metrics(self) -> List[TargetConcurrency]:
+        """
+        This method returns a snapshot of the concurrency metrics of all targets.
+        """
+        with self._lock:
+            return [item.copy() for item in self._targets.values()]
+
+
+class TelemetryPhase(enum.Enum):
+    """
+    This enumeration specifies the phases of a kiscollect run whose durations are measured by ExecutionTelemetry.
+    """
+    # The producer thread creates the OS commands of a collector
+    create = enum.auto()
+    # The OS command waits in the command queue until a consumer thread picks it up
+    queue = enum.auto()
+    # The OS command's process is running
+    execute = enum.auto()
+    # The consumer thread waits for the collector's database lock (see BaseCollector.process_command_results)
+    lock = enum.auto()
+    # The OS command's output is stored in the database
+    store = enum.auto()
+    # The OS command's output is analysed (see BaseCollector.verify_results)
+    verify = enum.auto()
+
+
+class TelemetryStatistics:
+    """
+    This class holds the aggregated durations of one phase of one collector.
+    """
+    # Upper bounds (in seconds) of the histogram buckets. The last bucket counts all longer durations.
+    BUCKETS = [0.01, 0.1, 1, 10, 60, 600]
+
+    def __init__(self, collector: str, phase: TelemetryPhase):
+        self.collector = collector
+        self.phase = phase
+        self.count = 0
+        self.total = 0.
+        self.maximum = 0.
+        self.output_size = 0
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.
+
+    def add(self, duration: float, output_size: int = None) -> None:
+        """
+        This method adds the given span.
+        :param duration: The span's duration in seconds
+        :param output_size: The number of bytes of OS command output, which was processed during the span
+        """
+        self.count += 1
+        self.total += duration
+        self.maximum = max(self.maximum, duration)
+        self.output_size += output_size or 0
+        self.histogram[bisect.bisect_left(self.BUCKETS, duration)] += 1
+
+    def copy(self):
+        result = TelemetryStatistics(collector=self.collector, phase=self.phase)
+        result.count = self.count
+        result.total = self.total
+        result.maximum = self.maximum
+        result.output_size = self.output_size
+        result.histogram = list(self.histogram)
+        return result
+
+
+class ExecutionTelemetry:
+    """
+    This class measures where the wall time of a kiscollect run goes.
+
+    The producer thread, the consumer threads, and the collectors record the duration of each phase (see
+    TelemetryPhase) as a span. The spans are aggregated per collector and phase in memory (see kiscollect's console
+    command stats) and, if a file is given, appended as JSON lines to this file (see kisreport module telemetry). The
+    file is written buffered and flushed when it is closed. If it cannot be written, then it is no longer used.
+    """
+    def __init__(self, file_name: str = None, workspace: str = None):
+        self._lock = Lock()
+        self._statistics = {}
+        self._file_name = file_name
+        self._file = None
+        self.workspace = workspace
+
+    @property
+    def file_name(self) -> str:
+        with self._lock:
+            return self._file_name
+
+    @file_name.setter
+    def file_name(self, value: str) -> None:
+        with self._lock:
+            self._close_file()
+            self._file_name = value
+
+    def record(self,
+               collector: str,
+               phase: TelemetryPhase,
+               duration: float,
+               command_id: int = None,
+               output_size: int = None) -> None:
+        """
+        This method records the given span.
+        :param collector: The name of the collector
+        :param phase: The measured phase
+        :param duration: The span's duration in seconds
+        :param command_id: The ID of the command, which was processed during the span
+        :param output_size: The number of bytes of OS command output, which was processed during the span
+        """
+        with self._lock:
+            key = (collector, phase)
+            if key not in self._statistics:
+                self._statistics[key] = TelemetryStatistics(collector=collector, phase=phase)
+            self._statistics[key].add(duration=duration, output_size=output_size)
+            if self._file_name:
+                try:
+                    if not self._file:
+                        self._file = open(self._file_name, "a")
+                    self._file.write(json.dumps({"time": datetime.utcnow().isoformat(),
+                                                 "workspace": self.workspace,
+                                                 "collector": collector,
+                                                 "phase": phase.name,
+                                                 "duration": duration,
+                                                 "command_id": command_id,
+                                                 "output_size": output_size}) + os.linesep)
+                except OSError as ex:
+                    # Telemetry must never break the collection. Thus, we stop writing the spans to the file.
+                    logger.exception(ex)
+                    self._close_file()
+                    self._file_name = None
+
+    @contextmanager
+    def span(self, collector: str, phase: TelemetryPhase, command_id: int = None) -> Iterator[dict]:
+        """
+        This method measures the duration of the with block and records it as span.
+        :param collector: The name of the collector
+        :param phase: The measured phase
+        :param command_id: The ID of the command, which is processed within the with block
+        :return: Dictionary, which allows the with block to add further attributes (e.g., output_size) to the span
+        """
+        attributes = {}
+        start_time = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            self.record(collector=collector,
+                        phase=phase,
+                        duration=time.perf_counter() - start_time,
+                        command_id=command_id,
+                        **attributes)
+
+    def get_statistics(self) -> List[TelemetryStatistics]:
+        """
+        :return: A snapshot of the aggregated durations of all collectors and phases
+        """
+        with self._lock:
+            return [item.copy() for item in self._statistics.values()]
+
+    def get_ranking(self) -> List[list]:
+        """
+        This method ranks the collectors by the execution time of their OS commands.
+        :return: List of rows, each containing the collector name, the number of executed OS commands, the command
+        creation time, the average queue wait time, the average execution time, the analysis time per MB of output, the
+        database time (waiting for the database lock and storing the outputs), and the average database time per
+        command. All times are in seconds.
+        """
+        collectors = {}
+        for item in self.get_statistics():
+            collectors.setdefault(item.collector, {})[item.phase] = item
+        result = []
+        for collector, phases in collectors.items():
+            empty = TelemetryStatistics(collector=collector, phase=None)
+            create = phases.get(TelemetryPhase.create, empty)
+            queue = phases.get(TelemetryPhase.queue, empty)
+            execute = phases.get(TelemetryPhase.execute, empty)
+            lock = phases.get(TelemetryPhase.lock, empty)
+            store = phases.get(TelemetryPhase.store, empty)
+            verify = phases.get(TelemetryPhase.verify, empty)
+            database = lock.total + store.total
+            result.append([collector,
+                           execute.count,
+                           create.total,
+                           queue.average,
+                           execute.average,
+                           verify.total / (verify.output_size / 1024 ** 2) if verify.output_size else None,
+                           database,
+                           database / store.count if store.count else None])
+        result.sort(key=lambda x: (-x[4], x[0]))
+        return result
+
+    def _close_file(self) -> None:
+        if self._file:
+            try:
+                self._file.close()
+            except OSError as ex:
+                logger.exception(ex)
+            self._file = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+    @staticmethod
+    def load(file_name: str, workspaces: List[str] = None):
+        """
+        This method aggregates the spans stored in the given file. Invalid lines are logged and skipped.
+        :param file_name: The file written by kiscollect (see kiscollect argument --telemetry)
+        :param workspaces: If specified, then only the spans of these workspaces are aggregated
+        :return: ExecutionTelemetry object containing the aggregated spans
+        """
+        result = ExecutionTelemetry()
+        with open(file_name, "r") as file:
+            for number, line in enumerate(file, start=1):
+                line = line.strip()
+                if line:
+                    try:
+                        span = json.loads(line)
+                    except json.JSONDecodeError:
+                        # kiscollect appends the spans while it is running. Thus, the file might end with a partial
+                        # line (e.g., after a crash).
+                        logger.warning("skipping invalid line {} of telemetry file: {}".format(number, file_name))
+                        continue
+                    if not workspaces or span.get("workspace") in workspaces:
+                        result.record(collector=span["collector"],
+                                      phase=TelemetryPhase[span["phase"]],
+                                      duration=span["duration"],
+                                      output_size=span.get("output_size"))
+        return result
+
+
+class AnalysisBatch:
+    """
+    This class holds the commands of one or more targets, which are re-analysed (see kiscollect argument --analyze)
+    within one database transaction.
+
+    All commands of connected targets are always part of the same batch. Targets are connected, if a command has more
+    than one target (e.g., a host and a host name) (see method group). Thus, concurrent worker processes do not analyse
+    commands of the same target. Nevertheless, the analyses of different batches might still create or update shared
+    information (e.g., domains, host names, or paths). The resulting database conflicts roll back the respective batch,
+    which is then replayed after all other batches (see CollectorProducer.analyze_batch).
+    """
+    def __init__(self, index: int, collector: str, command_ids: List[int]):
+        """
+        :param index: The batch's position within the analysis. Conflicting batches are replayed in this order.
+        :param collector: The name of the collector that analyses the commands
+        :param command_ids: The IDs of the commands that are analysed
+        """
+        self.index = index
+        self.collector = collector
+        self.command_ids = command_ids
+
+    @staticmethod
+    def group(command_targets: dict) -> dict:
+        """
+        This method groups the given commands by connected targets. Two targets are connected, if at least one command
+        has both targets.
+        :param command_targets: Dictionary whose keys are command IDs and whose values are the lists of sortable target
+        identifiers (e.g., ("host", 1)) of the respective command
+        :return: Dictionary whose keys are the smallest target identifiers of each group of connected targets and whose
+        values are the lists of command IDs of the respective group
+        """
+        parents = {}
+
+        def find(target: tuple) -> tuple:
+            parents.setdefault(target, target)
+            while parents[target] != target:
+                parents[target] = parents[parents[target]]
+                target = parents[target]
+            return target
+
+        for targets in command_targets.values():
+            for target in targets[1:]:
+                roots = sorted([find(targets[0]), find(target)])
+                parents[roots[1]] = roots[0]
+        result = {}
+        for command_id, targets in command_targets.items():
+            result.setdefault(find(targets[0]), []).append(command_id)
+        return result
+
+    @staticmethod
+    def partition(collector: str, targets: dict, batch_size: int, start_index: int = 0) -> list:
+        """
+        This method splits the commands of the given targets into batches.
+        :param collector: The name of the collector that analyses the commands
+        :param targets: Dictionary whose keys are sortable target identifiers (e.g., ("host", 1)) and whose values are
+        the lists of command IDs of the respective target
+        :param batch_size: The number of commands after which a new batch is started. Batches might contain more
+        commands, if a single target has more commands.
+        :param start_index: The index of the first batch
+        :return: List of AnalysisBatch objects in a deterministic order
+        """
+        result = []
+        command_ids = []
+        for key in sorted(targets.keys()):
+            command_ids += sorted(targets[key])
+            if len(command_ids) >= batch_size:
+                result.append(AnalysisBatch(start_index + len(result), collector, command_ids))
+                command_ids = []
+        if command_ids:
+            result.append(AnalysisBatch(start_index + len(result), collector, command_ids))
+        return result
+
+
+class AnalysisBatchResult:
+    """
+    This class holds the outcome of the analysis of one AnalysisBatch.
+    """
+    def __init__(self, batch: AnalysisBatch):
+        self.batch = batch
+        self.analysed = 0
+        self.skipped = 0
+        self.failed = 0
+        # True, if the batch's transaction failed due to a database conflict (e.g., a unique constraint violation or a
+        # deadlock caused by another worker process). Such batches are replayed after all other batches are analysed.
+        self.conflict = False
+
+
+class AnalysisCheckpoint:
+    """
+    This class persists the IDs of the commands, whose re-analysis (see kiscollect argument --analyze) is already
+    committed to the database. Thereby, an interrupted analysis can be resumed (see kiscollect argument --resume).
+    """
+    def __init__(self, file_name: str, workspace: str):
+        self._lock = Lock()
+        self._file_name = file_name
+        self._workspace = workspace
+        self._completed = {}
+
+    @property
+    def file_name(self) -> str:
+        return self._file_name
+
+    def load(self) -> None:
+        """
+        This method loads the completed commands from the checkpoint file. Checkpoints of other workspaces are ignored.
+        """
+        with self._lock:
+            self._completed = {}
+            if os.path.isfile(self._file_name):
+                with open(self._file_name, "r") as file:
+                    content = json.load(file)
+                if content.get("workspace") == self._workspace:
+                    self._completed = {key: set(value) for key, value in content.get("completed", {}).items()}
+
+    def is_completed(self, collector: str, command_id: int) -> bool:
+        with self._lock:
+            return command_id in self._completed.get(collector, set())
+
+    def get_completed(self, collector: str) -> int:
+        """
+        :return: The number of already analysed commands of the given collector
+        """
+        with self._lock:
+            return len(self._completed.get(collector, set()))
+
+    def add(self, collector: str, command_ids: List[int]) -> None:
+        """
+        This method marks the given commands as analysed and atomically updates the checkpoint file.
+        """
+        with self._lock:
+            self._completed.setdefault(collector, set()).update(command_ids)
+            temp_file = "{}.tmp".format(self._file_name)
+            with open(temp_file, "w") as file:
+                json.dump({"workspace": self._workspace,
+                           "completed": {key: sorted(value) for key, value in self._completed.items()}}, file)
+            os.replace(temp_file, self._file_name)
+
+    def remove(self) -> None:
+        """
+        This method deletes the checkpoint file after the analysis completed.
+        """
+        with self._lock:
+            self._completed = {}
+            if os.path.isfile(self._file_name):
+                os.remove(self._file_name)
+
+
+class PopenCommandWithoutStderr(AsyncPopenCommand):
     """
     This class implements an interface to execute an OS command in a separate thread.
 
@@ -451,6 +1224,7 @@ class PopenCommandOpenSsl(PopenCommand):
                                               shell=False,
                                               env=self._env,
                                               cwd=self._cwd,
+                                              start_new_session=True,
                                               preexec_fn=self._demote)
                 self._stderr_list = [item.decode("utf-8").strip() for item in iter(self._proc.stderr.readline, b'')]
                 self._stdout_list = [item.decode("utf-8").strip() for item in iter(self._proc.stdout.readline, b'')]
@@ -509,6 +1283,7 @@ class PopenCommandWithOutputQueue(PopenCommand):
                                           shell=self._shell,
                                           cwd=self._cwd,
                                           env=self._env,
+                                          start_new_session=True,
                                           preexec_fn=self._demote)
             self._stdout_reader = StdoutReader(self._proc)
             self._stderr_reader = StderrReader(self._proc)
@@ -32,6 +32,8 @@ import enum
 import json
 import pwd
 import stat
+import tempfile
+import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
 from database.model import Service
 from database.model import Host
@@ -76,6 +78,10 @@ from database.utils import DnsResourceRecordType
 from threading import Lock
 from database import config
 from collectors.os.core import PopenCommand
+from collectors.os.core import AsyncPopenCommand
+from collectors.os.core import BatchCommandResult
+from collectors.os.core import TelemetryPhase
+from collectors.os.core import ExecutionTelemetry
 from collectors.core import NmapUtils
 from collectors.core import XmlUtils
 from collectors.core import DomainUtils
@@ -84,6 +90,8 @@ from collectors.core import IpUtils
 from collectors.core import JsonUtils
 from typing import List
 from typing import Dict
+from typing import Tuple
+from typing import Callable
 from view.core import ReportItem
 from sqlalchemy.orm.session import Session
 from urllib.parse import ParseResult
@@ -377,8 +385,11 @@ class BaseCollector(config.Collector):
                  ignore: bool = True,
                  vhost: str = None,
                  tld: bool = False,
-                 execution_class: PopenCommand = PopenCommand,
+                 execution_class: PopenCommand = AsyncPopenCommand,
                  exec_user: str = "nobody",
+                 batch_size: int = 0,
+                 command_threads: int = 0,
+                 threads_argument: str = None,
                  **kwargs):
         """
         This is the base class for all collectors.
@@ -416,6 +427,14 @@ class BaseCollector(config.Collector):
         :analyze: If true, then output is analyzed and not commands are created. Potentially useful for collectors
         during command output analysis
         :execution_class: Specifies which object performs the execution of the created commands
+        :batch_size: The maximum number of commands that are executed together by a single operating system command.
+        This only applies to collectors that support batch execution (see method supports_batch_execution)
+        :command_threads: The default number of threads used by the collector's tool per command or 0 if the tool does
+        not support threads. The actual number of threads is determined per execution by the concurrency governor and
+        passed to the tool via argument threads_argument
+        :threads_argument: The tool's command line argument (e.g., -t), which specifies the number of threads. It is
+        added at execution time and thus, it is not part of the commands' os_command (see
+        Command.os_command_substituted)
         """
         super().__init__()
         self._update_db_lock = Lock()
@@ -433,12 +452,15 @@ class BaseCollector(config.Collector):
         self._listeners = listeners if listeners else []
         self._hashes = hashes
         self.execution_class = execution_class
+        self._batch_size = batch_size
         self._http_proxy = urlparse(http_proxy) if http_proxy else None
         self._cookies = cookies if cookies else []
         self._kwargs = kwargs
         self._min_delay = force_delay_min if force_delay_min and force_delay_min > delay_min else delay_min
         self._max_delay = force_delay_max if force_delay_max and force_delay_max > delay_max else delay_max
         self._max_threads = 1 if self._min_delay or self._max_delay else max_threads
+        self._command_threads = min(1, command_threads) if self._min_delay or self._max_delay else command_threads
+        self._threads_argument = threads_argument
         self._dns_server = self.get_commandline_argument_value("dns_server")
         self._user_agent = self.get_commandline_argument_value("user_agent")
         self._password = self.get_commandline_argument_value("password")
@@ -502,6 +524,22 @@ class BaseCollector(config.Collector):
     def timeout(self) -> int:
         return self._timeout
 
+    @property
+    def command_threads(self) -> int:
+        """
+        :return: The default number of threads used by the collector's tool per command or 0 if the tool does not
+        support threads.
+        """
+        return self._command_threads
+
+    @property
+    def batch_size(self) -> int:
+        """
+        :return: The maximum number of commands that are executed together by a single operating system command or 0
+        if the collector executes each command on its own.
+        """
+        return self._batch_size if self._batch_size and self._batch_size > 1 and self.supports_batch_execution() else 0
+
     @property
     def http_proxy(self) -> ParseResult:
         return self._http_proxy
@@ -727,6 +765,48 @@ class BaseCollector(config.Collector):
                                                                      report_item=report_item)
         return mapping
 
+    def add_host_host_name_mappings(self,
+                                    session: Session,
+                                    command: Command,
+                                    mappings: List[Tuple[Host, HostName, DnsResourceRecordType]],
+                                    source: Source,
+                                    report_item: ReportItem = None) -> List[HostHostNameMapping]:
+        """
+        This method establishes links between hosts and host names in bulk
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param command: The command instance that contains the results of the command execution
+        :param mappings: List of tuples containing the host, the host name, and the type of link
+        :param source: The source that identified the links
+        :param report_item: Item that can be used for pushing information into the view
+        """
+        if report_item:
+            report_item.listener = self._listeners
+        return self._domain_utils.add_host_host_name_mappings(session=session,
+                                                              mappings=mappings,
+                                                              source=source,
+                                                              report_item=report_item)
+
+    def add_host_name_host_name_mappings(self,
+                                         session: Session,
+                                         command: Command,
+                                         mappings: List[Tuple[HostName, HostName, DnsResourceRecordType]],
+                                         source: Source,
+                                         report_item: ReportItem = None) -> List[HostNameHostNameMapping]:
+        """
+        This method establishes links between host names in bulk
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param command: The command instance that contains the results of the command execution
+        :param mappings: List of tuples containing the source host name, the resolved host name, and the type of link
+        :param source: The source that identified the links
+        :param report_item: Item that can be used for pushing information into the view
+        """
+        if report_item:
+            report_item.listener = self._listeners
+        return self._domain_utils.add_host_name_host_name_mappings(session=session,
+                                                                   mappings=mappings,
+                                                                   source=source,
+                                                                   report_item=report_item)
+
     def add_vhost_name_mapping(self,
                                session: Session,
                                service: Service,
@@ -2079,7 +2159,9 @@ class BaseCollector(config.Collector):
                                               binary_file=binary_file,
                                               working_directory=working_directory,
                                               generic_file_name=generic_file_name,
-                                              exec_user=exec_user)
+                                              exec_user=exec_user,
+                                              threads=self._command_threads,
+                                              threads_argument=self._threads_argument)
 
     def verify_command_execution(self,
                                  session: Session,
@@ -2112,7 +2194,8 @@ class BaseCollector(config.Collector):
                                 command_id: int,
                                 status: CommandStatus,
                                 process: PopenCommand = None,
-                                listeners: list = None) -> None:
+                                listeners: list = None,
+                                telemetry: ExecutionTelemetry = None) -> None:
         """This method stores the command's output in the database and analyses the results of the command execution.
 
         After the execution, this method checks the OS command's results to determine the command's execution status as
@@ -2126,28 +2209,41 @@ class BaseCollector(config.Collector):
         :param process: The PopenCommand object that executed the given result. This object holds stderr, stdout, return
         code etc.
         :param listeners: The listeners that need to be notified about this report item.
+        :param telemetry: The object that records how long storing and analysing the results took
         """
+        telemetry = telemetry if telemetry else ExecutionTelemetry()
+        start_time = time.perf_counter()
         with self._update_db_lock:
+            telemetry.record(collector=self.name,
+                             phase=TelemetryPhase.lock,
+                             duration=time.perf_counter() - start_time,
+                             command_id=command_id)
             with engine.session_scope() as session:
-                command = session.query(Command).filter_by(id=command_id).one()
-                source = engine.get_or_create(session, Source, name=command.collector_name.name)
-                command.return_code = process.return_code
-                command.stdout_output = process.stdout_list
-                command.stderr_output = process.stderr_list
-                command.stop_time = process.stop_time
-                command.start_time = process.start_time
-                command.status = status
-                try:
-                    self.import_output_files(command)
-                except Exception as e:
-                    logger.exception(e)
-                session.commit()
-                report_item = BaseCollector.get_report_item(command, listeners=listeners)
-                self.verify_command_execution(session,
-                                              command=command,
-                                              source=source,
-                                              report_item=report_item,
-                                              process=process)
+                with telemetry.span(collector=self.name, phase=TelemetryPhase.store, command_id=command_id):
+                    command = session.query(Command).filter_by(id=command_id).one()
+                    source = engine.get_or_create(session, Source, name=command.collector_name.name)
+                    command.return_code = process.return_code
+                    command.stdout_output = process.stdout_list
+                    command.stderr_output = process.stderr_list
+                    command.update_search_vector()
+                    command.stop_time = process.stop_time
+                    command.start_time = process.start_time
+                    command.update_resource_usage(process.rusage)
+                    command.status = status
+                    try:
+                        self.import_output_files(command)
+                    except Exception as e:
+                        logger.exception(e)
+                    session.commit()
+                with telemetry.span(collector=self.name, phase=TelemetryPhase.verify, command_id=command_id) as span:
+                    span["output_size"] = sum([len(line) + 1 for line in (command.stdout_output or []) +
+                                               (command.stderr_output or [])])
+                    report_item = BaseCollector.get_report_item(command, listeners=listeners)
+                    self.verify_command_execution(session,
+                                                  command=command,
+                                                  source=source,
+                                                  report_item=report_item,
+                                                  process=process)
 
     def start_command_execution(self, session: Session, command: Command) -> bool:
         """
@@ -2161,6 +2257,163 @@ class BaseCollector(config.Collector):
         """
         return True
 
+    @staticmethod
+    def supports_batch_execution() -> bool:
+        """
+        This method returns True, if the collector is able to execute several of its commands together by a single
+        operating system command. Such collectors must implement the methods get_batch_target,
+        create_batch_os_command, and split_batch_output.
+        """
+        return False
+
+    def get_batch_target(self, command: Command) -> str:
+        """
+        This method returns the target (e.g., IP address or host name) of the given command, which is written into the
+        input file of the batched operating system command.
+
+        :param command: The command whose target shall be returned
+        :return: The command's target
+        """
+        raise NotImplementedError("The function is not implemented!")
+
+    def get_batch_key(self, command: Command) -> str:
+        """
+        This method returns a key that is identical for all commands that can be executed together by a single
+        operating system command. Per default, commands are compatible if their operating system commands only differ
+        in the target.
+
+        :param command: The command whose key shall be returned
+        :return: The command's batch key
+        """
+        target = self.get_batch_target(command)
+        return " ".join([item for item in command.os_command if item != target])
+
+    def create_batch_os_command(self, commands: List[Command], input_file: str) -> List[str]:
+        """
+        This method creates the operating system command that executes all given commands at once.
+
+        :param commands: The commands that shall be executed together. All commands have the same batch key
+        :param input_file: The file that contains the targets of all given commands (one target per line)
+        :return: The operating system command
+        """
+        raise NotImplementedError("The function is not implemented!")
+
+    def split_batch_output(self, commands: List[Command], process: PopenCommand) -> Dict[int, BatchCommandResult]:
+        """
+        This method splits the output of the given batched operating system command per command.
+
+        :param commands: The commands that were executed together
+        :param process: The PopenCommand object that executed the batched operating system command
+        :return: Dictionary containing the command IDs as keys and their share of the output as values
+        """
+        raise NotImplementedError("The function is not implemented!")
+
+    def create_batch_input_file(self, commands: List[Command]) -> str:
+        """
+        This method writes the targets of all given commands into a new input file.
+
+        :param commands: The commands whose targets shall be written into the input file
+        :return: The path to the input file
+        """
+        with tempfile.NamedTemporaryFile(mode="w",
+                                         dir=self._output_dir,
+                                         prefix="{}-batch-".format(self._name),
+                                         suffix=".txt",
+                                         delete=False) as file:
+            for command in commands:
+                file.write(self.get_batch_target(command) + os.linesep)
+        os.chmod(file.name, 0o644)
+        return file.name
+
+    @staticmethod
+    def get_batch_xml_file(input_file: str) -> str:
+        """
+        This method returns the path to the XML output file of the batched operating system command, which uses the
+        given input file.
+
+        :param input_file: The input file of the batched operating system command
+        :return: The path to the XML output file
+        """
+        return os.path.splitext(input_file)[0] + ".xml"
+
+    def _split_batch_stdout(self,
+                            commands: List[Command],
+                            process: PopenCommand,
+                            re_header: re.Pattern,
+                            get_target: Callable[[re.Match], str],
+                            re_trailer: re.Pattern = None) -> Dict[int, BatchCommandResult]:
+        """
+        This method splits the standard output of the given batched operating system command per command. The output
+        of each target starts with a header line, whose target is compared with the batch target of each command. Lines
+        before the first header line and lines after the first trailer line are assigned to all commands.
+
+        :param commands: The commands that were executed together
+        :param process: The PopenCommand object that executed the batched operating system command
+        :param re_header: Regular expression that matches the first output line of a target
+        :param get_target: Function that returns the target of a match of the regular expression re_header
+        :param re_trailer: Regular expression that matches the first output line after the output of all targets
+        :return: Dictionary containing the command IDs as keys and their share of the output as values
+        """
+        header = []
+        trailer = []
+        blocks = {}
+        current = header
+        for line in process.stdout_list if process.stdout_list else []:
+            match = re_header.match(line)
+            if match:
+                current = blocks.setdefault(get_target(match).lower(), [])
+            elif re_trailer and current is not trailer and re_trailer.match(line):
+                current = trailer
+            current.append(line)
+        result = {}
+        for command in commands:
+            stdout = header + blocks.get(self.get_batch_target(command).lower(), []) + trailer
+            result[command.id] = BatchCommandResult(process=process,
+                                                    stdout_list=stdout,
+                                                    stderr_list=list(process.stderr_list) if process.stderr_list else [])
+        return result
+
+    def _split_batch_xml_file(self,
+                              commands: List[Command],
+                              xml_file: str,
+                              tag: str,
+                              get_targets: Callable[[ET.Element], List[str]]) -> None:
+        """
+        This method splits the XML output file of the batched operating system command into the XML output files of
+        the given commands. Each command's XML output file contains all child tags of the root tag except the child
+        tags with the given name, which are only kept if one of their targets is the batch target of the command.
+        Afterwards, the XML output file of the batched operating system command is deleted.
+
+        :param commands: The commands that were executed together
+        :param xml_file: The XML output file of the batched operating system command
+        :param tag: The name of the root's child tags that contain the results of a single target
+        :param get_targets: Function that returns the targets (e.g., IP addresses or host names) of a child tag
+        """
+        if not os.path.isfile(xml_file):
+            logger.warning("could not find XML file '{}'.".format(xml_file))
+            return
+        try:
+            root = ET.parse(xml_file).getroot()
+        except ET.ParseError as ex:
+            logger.exception(ex)
+            return
+        finally:
+            os.remove(xml_file)
+        targets = {}
+        for item in root:
+            if item.tag == tag:
+                for target in get_targets(item):
+                    targets.setdefault(target.lower(), []).append(item)
+        for command in commands:
+            if ExecutionInfoType.xml_output_file.name in command.execution_info:
+                items = targets.get(self.get_batch_target(command).lower(), [])
+                command_root = ET.Element(root.tag, root.attrib)
+                command_root.text = root.text
+                command_root.extend([item for item in root if item.tag != tag or item in items])
+                ET.ElementTree(command_root).write(command.execution_info[ExecutionInfoType.xml_output_file.name],
+                                                   encoding="unicode",
+                                                   xml_declaration=True)
+
     def _remove_console_color(self, line: str) -> str:
         """
         removes console color coding from line
@@ -2383,6 +2636,8 @@ class BaseChangeme(BaseCollector):
         super().__init__(priority=priority,
                          timeout=timeout,
                          service_descriptors=service_descriptors,
+                         command_threads=10,
+                         threads_argument="--threads",
                          **kwargs)
 
     @staticmethod
@@ -2744,6 +2999,44 @@ class BaseNmap(BaseCollector):
                 CommandFailureRule(regex=re.compile("^.*WARNING: No targets were specified, so 0 hosts scanned.*$"),
                                    output_type=OutputType.stderr)]
 
+    @staticmethod
+    def supports_batch_execution() -> bool:
+        return True
+
+    def get_batch_target(self, command: Command) -> str:
+        return command.os_command[-1]
+
+    def create_batch_os_command(self, commands: List[Command], input_file: str) -> List[str]:
+        os_command = [self.get_batch_xml_file(input_file) if item == ExecutionInfoType.xml_output_file.argument
+                      else item for item in commands[0].os_command[:-1]]
+        return os_command + ["-iL", input_file]
+
+    @staticmethod
+    def _get_host_tag_targets(host_tag: ET.Element) -> List[str]:
+        """
+        This method returns the IP addresses and host names of the given Nmap host XML tag.
+        """
+        result = [XmlUtils.get_xml_attribute("addr", item.attrib) for item in host_tag.findall("address")]
+        result += [XmlUtils.get_xml_attribute("name", item.attrib) for item in host_tag.findall("hostnames/hostname")]
+        return [item for item in result if item]
+
+    def split_batch_output(self, commands: List[Command], process: PopenCommand) -> Dict[int, BatchCommandResult]:
+        """
+        This method splits the XML output file of the batched Nmap scan into the commands' XML output files, which
+        contain the host XML tags of the respective command's target. Likewise, the standard output is split per
+        "Nmap scan report for" section.
+        """
+        self._split_batch_xml_file(commands,
+                                   xml_file=process.os_command[process.os_command.index("-oX") + 1],
+                                   tag="host",
+                                   get_targets=self._get_host_tag_targets)
+        return self._split_batch_stdout(commands,
+                                        process,
+                                        re_header=re.compile("^Nmap scan report for (?P<target>[^ ]+)"),
+                                        get_target=lambda match: match.group("target"),
+                                        re_trailer=re.compile("^(Post-scan script results:|"
+                                                              "Service detection performed\\.|Nmap done:)"))
+
     def __create_commands(self,
                           session: Session,
                           service: Service,
@@ -3034,9 +3327,12 @@ class BaseHydra(BaseCollector):
                  timeout: int,
                  service_descriptors: ServiceDescriptorBase,
                  **kwargs):
+        # Hydra uses 16 parallel tasks per default (see hydra argument -t)
         super().__init__(priority=priority,
                          timeout=timeout,
                          service_descriptors=service_descriptors,
+                         command_threads=16,
+                         threads_argument="-t",
                          **kwargs)
         self._re_creds = re.compile("^\[.+?\]\[.+?\] host: .+?(   login: (?P<user>.+?))?(   password: (?P<password>.+?))?$")
 
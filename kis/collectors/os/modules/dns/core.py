@@ -34,6 +34,9 @@ from collectors.os.modules.core import CommandFailureRule
 from collectors.os.modules.core import OutputType
 from collectors.os.modules.core import BaseExtraServiceInfoExtraction
 from collectors.os.core import PopenCommand
+from collectors.os.core import BatchCommandResult
+from collectors.os.modules.dns.resolver import DnsResolver
+from collectors.os.modules.dns.resolver import DnsResolverCommand
 from database.model import Command
 from database.model import Host
 from database.model import HostName
@@ -44,6 +47,7 @@ from database.model import DnsResourceRecordType
 from database.model import ExecutionInfoType
 from view.core import ReportItem
 from typing import List
+from typing import Dict
 from sqlalchemy.orm.session import Session
 
 logger = logging.getLogger('dns.core')
@@ -249,6 +253,249 @@ class BaseDnsHost(BaseDnsCollector):
                                                          report_item=report_item)
 
 
+class BaseDnsResolver(BaseDnsCollector):
+    """
+    This class implements basic functionality for DNS collectors that resolve their targets in-process by using the
+    asynchronous DNS resolver instead of executing the command line tool host for each target.
+    """
+
+    def __init__(self, priority, timeout, **kwargs):
+        super().__init__(priority=priority,
+                         timeout=timeout,
+                         execution_class=DnsResolverCommand,
+                         **kwargs)
+        self._re_ipv4 = re.compile("^(?P<domain>.+?)\.? has address (?P<address>.+)$")
+        self._re_ipv6 = re.compile("^(?P<domain>.+?)\.? has IPv6 address (?P<address>.+)$", re.IGNORECASE)
+        self._re_host_mx = re.compile("^.+ mail is handled by( [0-9]+)? (?P<domain>.+?)\.?$")
+        self._re_cname = re.compile("^(?P<domain1>.+?)\.? is an alias for (?P<domain2>.+?)\.?$")
+        self._re_pointer = re.compile("^(?P<pointer>.+?)\.? domain name pointer (?P<domain>.+?)\.?$")
+
+    @staticmethod
+    def get_failed_regex() -> List[CommandFailureRule]:
+        """
+        This method returns regular expressions that allows KIS to identify failed command executions
+        """
+        return [CommandFailureRule(regex=re.compile("^.*connection timed out; no servers could be reached.*$"),
+                                   output_type=OutputType.stdout)]
+
+    @staticmethod
+    def get_address_from_pointer(pointer: str) -> str:
+        """
+        This method converts the given reverse lookup name (e.g., 1.0.0.127.in-addr.arpa) into the IP address.
+        :return: The IP address or None if the given name is not a valid reverse lookup name
+        """
+        result = None
+        pointer = pointer.strip(".").lower()
+        try:
+            if pointer.endswith(".in-addr.arpa"):
+                labels = pointer[:-len(".in-addr.arpa")].split(".")
+                result = str(ipaddress.IPv4Address(".".join(reversed(labels))))
+            elif pointer.endswith(".ip6.arpa"):
+                nibbles = "".join(reversed(pointer[:-len(".ip6.arpa")].split(".")))
+                result = str(ipaddress.IPv6Address(":".join([nibbles[i:i + 4] for i in range(0, len(nibbles), 4)])))
+        except ValueError:
+            pass
+        return result
+
+    def _get_resolver_command(self, targets: List[str], record_types: DnsResourceRecordType = None) -> List[str]:
+        """
+        This method returns the operating system command that resolves the given targets in-process.
+        :param targets: The host names or IP addresses (if record_types is None) that shall be resolved
+        :param record_types: The record types that shall be queried for each host name
+        """
+        nameservers = [item.strip() for item in self._dns_server.split(",") if item.strip()] \
+            if self._dns_server else None
+        return DnsResolverCommand.create_os_command(targets=targets,
+                                                    record_types=record_types,
+                                                    reverse=record_types is None,
+                                                    nameservers=nameservers,
+                                                    concurrency=self._dns_resolver_concurrency,
+                                                    retries=self._dns_resolver_retries,
+                                                    wait=self._dns_resolver_timeout)
+
+    @staticmethod
+    def supports_batch_execution() -> bool:
+        return True
+
+    def get_batch_target(self, command: Command) -> str:
+        os_command = command.os_command
+        return os_command[os_command.index("--") + 1]
+
+    def create_batch_os_command(self, commands: List[Command], input_file: str) -> List[str]:
+        os_command = commands[0].os_command
+        return os_command[:os_command.index("--")] + ["-i", input_file]
+
+    @staticmethod
+    def _get_line_name(line: str) -> str:
+        """
+        This method returns the queried name of the given output line of DnsResolverCommand.
+        """
+        items = line.split()
+        if line.startswith("Host ") and len(items) > 1:
+            result = items[1]
+        elif line.startswith(";; ") and len(items) > 2:
+            result = items[2].rstrip(":")
+        else:
+            result = items[0] if items else ""
+        return result.rstrip(".").lower()
+
+    def split_batch_output(self, commands: List[Command], process: PopenCommand) -> Dict[int, BatchCommandResult]:
+        """
+        This method assigns each output line of the batched DnsResolverCommand to the command, whose target was queried.
+        Lines of CNAME targets are assigned to all commands, whose targets are aliases of the CNAME target.
+        """
+        result = {}
+        stdout_list = process.stdout_list if process.stdout_list else []
+        stderr_list = process.stderr_list if process.stderr_list else []
+        aliases = {}
+        for line in stdout_list:
+            match = self._re_cname.match(line)
+            if match:
+                aliases.setdefault(match.group("domain1").strip().lower(), match.group("domain2").strip().lower())
+        # Bucket the line indices by queried name once instead of scanning all lines per command
+        stdout_names = {}
+        stderr_names = {}
+        for lines, buckets in [(stdout_list, stdout_names), (stderr_list, stderr_names)]:
+            for index, line in enumerate(lines):
+                buckets.setdefault(self._get_line_name(line), []).append(index)
+        for command in commands:
+            target = self.get_batch_target(command)
+            if "-x" in command.os_command:
+                target = DnsResolver.get_reverse_pointer(target)
+            names = set()
+            name = target.lower()
+            while name and name not in names:
+                names.add(name)
+                name = aliases.get(name)
+            # Sorting the indices keeps the original output order across the alias names
+            stdout = [stdout_list[index] for index in sorted(index for name in names
+                                                             for index in stdout_names.get(name, []))]
+            stderr = [stderr_list[index] for index in sorted(index for name in names
+                                                             for index in stderr_names.get(name, []))]
+            return_code = 0
+            # As tool host, a target fails if none of its queries could be answered
+            if not stdout and stderr:
+                stdout.append(";; connection timed out; no servers could be reached")
+                return_code = 1
+            result[command.id] = BatchCommandResult(process=process,
+                                                    stdout_list=stdout,
+                                                    stderr_list=stderr,
+                                                    return_code=return_code)
+        return result
+
+    def verify_results(self, session: Session,
+                       command: Command,
+                       source: Source,
+                       report_item: ReportItem,
+                       process: PopenCommand = None, **kwargs) -> None:
+        """This method analyses the results of the command execution.
+
+        After the execution, this method checks the OS command's results to determine the command's execution status as
+        well as existing vulnerabilities (e.g. weak login credentials, NULL sessions, hidden Web folders). The
+        stores the output in table command. In addition, the collector might add derived information to other tables as
+        well.
+
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param command: The command instance that contains the results of the command execution
+        :param source: The source object of the current collector
+        :param report_item: Item that can be used for reporting potential findings in the UI
+        :param process: The PopenCommand object that executed the given result. This object holds stderr, stdout, return
+        code etc.
+        """
+        command.hide = True
+        aliases = {}
+        addresses = []
+        pointers = []
+        host_names = {}
+        hosts = {}
+
+        def get_host_name(name: str) -> HostName:
+            name = name.strip().lower()
+            if name not in host_names:
+                host_names[name] = self.add_host_name(session=session,
+                                                      command=command,
+                                                      host_name=name,
+                                                      source=source,
+                                                      report_item=report_item)
+                if not host_names[name]:
+                    logger.debug("ignoring host name due to invalid domain: {}".format(name))
+            return host_names[name]
+
+        def get_host(address: str) -> Host:
+            if address not in hosts:
+                hosts[address] = self.add_host(session=session,
+                                               command=command,
+                                               source=source,
+                                               address=address,
+                                               report_item=report_item)
+                if not hosts[address]:
+                    logger.debug("ignoring host due to invalid IP address: {}".format(address))
+            return hosts[address]
+
+        for line in command.stdout_output:
+            ipv4_match = self._re_ipv4.match(line)
+            ipv6_match = self._re_ipv6.match(line)
+            cname_match = self._re_cname.match(line)
+            mx_host_match = self._re_host_mx.match(line)
+            pointer_match = self._re_pointer.match(line)
+            if ipv4_match:
+                addresses.append((ipv4_match.group("domain").strip().lower(),
+                                  ipv4_match.group("address").strip(),
+                                  DnsResourceRecordType.a))
+            elif ipv6_match:
+                addresses.append((ipv6_match.group("domain").strip().lower(),
+                                  ipv6_match.group("address").strip(),
+                                  DnsResourceRecordType.aaaa))
+            elif cname_match:
+                aliases[cname_match.group("domain1").strip().lower()] = cname_match.group("domain2").strip().lower()
+            elif mx_host_match:
+                get_host_name(mx_host_match.group("domain"))
+            elif pointer_match:
+                address = self.get_address_from_pointer(pointer_match.group("pointer"))
+                if address:
+                    pointers.append((address, pointer_match.group("domain")))
+                else:
+                    logger.debug("ignoring invalid pointer in line: {}".format(line))
+        # Determine for each canonical name all host names that point to it via CNAME records
+        canonical_names = {}
+        for alias in aliases.keys():
+            canonical_name = alias
+            visited = set()
+            while canonical_name in aliases and canonical_name not in visited:
+                visited.add(canonical_name)
+                canonical_name = aliases[canonical_name]
+            canonical_names.setdefault(canonical_name, []).append(alias)
+        host_host_name_mappings = []
+        for name, address, mapping_type in addresses:
+            host = get_host(address)
+            if host:
+                for item in [name] + canonical_names.get(name, []):
+                    host_name = get_host_name(item)
+                    if host_name:
+                        host_host_name_mappings.append((host, host_name, mapping_type))
+        for address, name in pointers:
+            host = get_host(address)
+            host_name = get_host_name(name)
+            if host and host_name:
+                host_host_name_mappings.append((host, host_name, DnsResourceRecordType.ptr))
+        host_name_host_name_mappings = []
+        for source_name, target_name in aliases.items():
+            source_host_name = get_host_name(source_name)
+            target_host_name = get_host_name(target_name)
+            if source_host_name and target_host_name:
+                host_name_host_name_mappings.append((source_host_name, target_host_name, DnsResourceRecordType.cname))
+        self.add_host_host_name_mappings(session=session,
+                                         command=command,
+                                         mappings=host_host_name_mappings,
+                                         source=source,
+                                         report_item=report_item)
+        self.add_host_name_host_name_mappings(session=session,
+                                              command=command,
+                                              mappings=host_name_host_name_mappings,
+                                              source=source,
+                                              report_item=report_item)
+
+
 class BaseAmass(BaseDnsCollector, DomainCollector):
     """This class implements the base class for Amass."""
 
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+resolve the IPv4/IPv6 addresses, CNAME and MX records of each collected in-scope host name (e.g., www.megacorpone.com)
+and second-level domain (e.g., megacorpone.com) by using KIS' built-in asynchronous DNS resolver instead of tool host.
+use optional argument --dns-server to explicitly specify other DNS servers (separate multiple servers by commas)
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2018 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import logging
+from typing import List
+from collectors.os.modules.core import DomainCollector
+from collectors.os.modules.dns.core import BaseDnsResolver
+from collectors.os.modules.core import BaseCollector
+from database.model import HostName
+from database.model import CollectorName
+from database.model import DnsResourceRecordType
+from sqlalchemy.orm.session import Session
+
+logger = logging.getLogger('dnsresolvehost')
+
+
+class CollectorClass(BaseDnsResolver, DomainCollector):
+    """This class implements a collector module that is automatically incorporated into the application."""
+
+    def __init__(self, **kwargs):
+        super().__init__(priority=311,
+                         timeout=0,
+                         **kwargs)
+
+    @staticmethod
+    def get_argparse_arguments():
+        return {"help": __doc__, "action": "store_true"}
+
+    def create_domain_commands(self,
+                               session: Session,
+                               host_name: HostName,
+                               collector_name: CollectorName) -> List[BaseCollector]:
+        """This method creates and returns a list of commands based on the given service.
+
+        This method determines whether the command exists already in the database. If it does, then it does nothing,
+        else, it creates a new Collector entry in the database for each new command as well as it creates a corresponding
+        operating system command and attaches it to the respective newly created Collector class.
+
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param host_name: The host name based on which commands shall be created.
+        :param collector_name: The name of the collector as specified in table collector_name
+        :return: List of Collector instances that shall be processed.
+        """
+        collectors = []
+        if host_name:
+            os_command = self._get_resolver_command(targets=[host_name.full_name],
+                                                    record_types=DnsResourceRecordType.a |
+                                                                 DnsResourceRecordType.aaaa |
+                                                                 DnsResourceRecordType.mx)
+            collector = self._get_or_create_command(session, os_command, collector_name, host_name=host_name)
+            collectors.append(collector)
+        return collectors
@@ -0,0 +1,568 @@
+# -*- coding: utf-8 -*-
+"""
+This file implements an in-process asynchronous DNS resolver, which allows DNS collectors to resolve large numbers of
+host names and IP addresses without spawning one operating system process per target.
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2018 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import os
+import re
+import struct
+import random
+import asyncio
+import logging
+import argparse
+import ipaddress
+import subprocess
+from threading import Lock
+from typing import List
+from typing import Tuple
+from datetime import datetime
+from database.model import DnsResourceRecordType
+from collectors.os.core import BaseCommand
+
+logger = logging.getLogger('dns.resolver')
+
+
+class DnsAnswer:
+    """This class holds a single resource record of a DNS response's answer section"""
+
+    def __init__(self, name: str, record_type: DnsResourceRecordType, ttl: int, value: str):
+        self.name = name
+        self.record_type = record_type
+        self.ttl = ttl
+        self.value = value
+
+    def __repr__(self):
+        return "<DnsAnswer name='{}' type='{}' value='{}' />".format(self.name,
+                                                                     self.record_type.name.upper(),
+                                                                     self.value)
+
+    def __str__(self):
+        """
+        :return: The answer in the format of the command line tool host. This allows existing DNS collectors to reuse
+        their parsers.
+        """
+        if self.record_type == DnsResourceRecordType.a:
+            result = "{} has address {}".format(self.name, self.value)
+        elif self.record_type == DnsResourceRecordType.aaaa:
+            result = "{} has IPv6 address {}".format(self.name, self.value)
+        elif self.record_type == DnsResourceRecordType.cname:
+            result = "{} is an alias for {}.".format(self.name, self.value)
+        elif self.record_type == DnsResourceRecordType.mx:
+            result = "{} mail is handled by {}.".format(self.name, self.value)
+        elif self.record_type == DnsResourceRecordType.ptr:
+            result = "{} domain name pointer {}.".format(self.name, self.value)
+        elif self.record_type == DnsResourceRecordType.ns:
+            result = "{} name server {}.".format(self.name, self.value)
+        else:
+            result = "{} has {} record {}".format(self.name, self.record_type.name.upper(), self.value)
+        return result
+
+
+class DnsResponse:
+    """This class holds the result of a single DNS query"""
+
+    def __init__(self, name: str, record_type: DnsResourceRecordType, rcode: int = None, error: str = None):
+        self.name = name
+        self.record_type = record_type
+        self.rcode = rcode
+        self.error = error
+        self.answers = []
+
+    @property
+    def not_found(self) -> bool:
+        return self.rcode == DnsResolver.RCODE_NXDOMAIN
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+
+class _DnsDatagramProtocol(asyncio.DatagramProtocol):
+    """This protocol sends a single DNS query via UDP and waits for the response with the matching query ID"""
+
+    def __init__(self, packet: bytes, future: asyncio.Future):
+        self._packet = packet
+        self._future = future
+        self._query_id = packet[:2]
+
+    def connection_made(self, transport):
+        transport.sendto(self._packet)
+
+    def datagram_received(self, data, addr):
+        if data[:2] == self._query_id and not self._future.done():
+            self._future.set_result(data)
+
+    def error_received(self, exc):
+        if not self._future.done():
+            self._future.set_exception(exc)
+
+    def connection_lost(self, exc):
+        if exc and not self._future.done():
+            self._future.set_exception(exc)
+
+
+class DnsResolver:
+    """
+    This class implements an asynchronous stub resolver, which sends DNS queries directly to the configured name
+    servers. Queries are distributed in a round robin fashion over all name servers and failed queries are retried on
+    the next name server. The number of concurrently outstanding queries is limited by argument concurrency.
+    """
+
+    RCODE_NOERROR = 0
+    RCODE_SERVFAIL = 2
+    RCODE_NXDOMAIN = 3
+    RCODE_REFUSED = 5
+    QUERY_TYPES = {DnsResourceRecordType.a: 1,
+                   DnsResourceRecordType.ns: 2,
+                   DnsResourceRecordType.cname: 5,
+                   DnsResourceRecordType.soa: 6,
+                   DnsResourceRecordType.ptr: 12,
+                   DnsResourceRecordType.mx: 15,
+                   DnsResourceRecordType.txt: 16,
+                   DnsResourceRecordType.aaaa: 28}
+    RECORD_TYPES = {value: key for key, value in QUERY_TYPES.items()}
+
+    def __init__(self,
+                 nameservers: List[str] = None,
+                 concurrency: int = 100,
+                 retries: int = 2,
+                 timeout: float = 2):
+        """
+        :param nameservers: List of name servers (e.g., 8.8.8.8 or 127.0.0.1:5353), which are queried. If None, then
+        the name servers of /etc/resolv.conf are used.
+        :param concurrency: The maximum number of concurrently outstanding queries
+        :param retries: The number of times a failed query is repeated on the next name server
+        :param timeout: The number of seconds to wait for each answer
+        """
+        self._nameservers = [DnsResolver.parse_nameserver(item)
+                             for item in (nameservers if nameservers else DnsResolver.get_system_nameservers())]
+        if not self._nameservers:
+            raise ValueError("at least one name server is required")
+        self._concurrency = concurrency if concurrency and concurrency > 0 else 1
+        self._retries = retries if retries and retries > 0 else 0
+        self._timeout = timeout
+        self._nameserver_index = random.randint(0, len(self._nameservers) - 1)
+        self._lock = Lock()
+
+    @property
+    def nameservers(self) -> List[Tuple[str, int]]:
+        return self._nameservers
+
+    @staticmethod
+    def parse_nameserver(value: str) -> Tuple[str, int]:
+        """
+        This method parses the given name server string (e.g., 8.8.8.8, 127.0.0.1:5353 or [::1]:5353)
+        :return: Tuple containing the name server's IP address and port
+        """
+        match = re.match(r"^\[(?P<address>.+)\](:(?P<port>[0-9]+))?$", value) or \
+            re.match(r"^(?P<address>[^:]+)(:(?P<port>[0-9]+))?$", value)
+        address = match.group("address") if match else value
+        port = int(match.group("port")) if match and match.group("port") else 53
+        return str(ipaddress.ip_address(address)), port
+
+    @staticmethod
+    def get_system_nameservers(path: str = "/etc/resolv.conf") -> List[str]:
+        """
+        This method returns the operating system's name servers.
+        """
+        result = []
+        if os.path.isfile(path):
+            with open(path, "r") as file:
+                for line in file:
+                    items = line.split()
+                    if len(items) >= 2 and items[0] == "nameserver":
+                        result.append(items[1].split("%")[0])
+        return result
+
+    @staticmethod
+    def get_reverse_pointer(address: str) -> str:
+        """
+        This method returns the reverse lookup name (e.g., 1.0.0.127.in-addr.arpa) of the given IP address
+        """
+        return ipaddress.ip_address(address).reverse_pointer
+
+    @staticmethod
+    def encode_name(name: str) -> bytes:
+        result = b""
+        for label in name.strip(".").split("."):
+            if label:
+                label = label.encode("idna")
+                if len(label) > 63:
+                    raise ValueError("label '{}' of domain '{}' is too long".format(label, name))
+                result += bytes([len(label)]) + label
+        return result + b"\x00"
+
+    @staticmethod
+    def build_query(query_id: int, name: str, record_type: DnsResourceRecordType) -> bytes:
+        """
+        This method creates a recursive DNS query packet for the given name and record type.
+        """
+        header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+        return header + DnsResolver.encode_name(name) + struct.pack("!HH", DnsResolver.QUERY_TYPES[record_type], 1)
+
+    @staticmethod
+    def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+        """
+        This method reads a (compressed) domain name from the given DNS packet.
+        :return: Tuple containing the domain name and the offset of the first byte after the name
+        """
+        labels = []
+        end_offset = None
+        jumps = 0
+        while True:
+            if offset >= len(data):
+                raise ValueError("domain name exceeds packet boundary")
+            length = data[offset]
+            if length & 0xC0 == 0xC0:
+                if end_offset is None:
+                    end_offset = offset + 2
+                jumps += 1
+                if jumps > 127:
+                    raise ValueError("domain name compression loop")
+                offset = ((length & 0x3F) << 8) | data[offset + 1]
+            elif length == 0:
+                offset += 1
+                break
+            else:
+                labels.append(data[offset + 1:offset + 1 + length].decode("ascii", errors="ignore"))
+                offset += 1 + length
+        return ".".join(labels).lower(), end_offset if end_offset is not None else offset
+
+    @staticmethod
+    def parse_response(data: bytes) -> Tuple[int, int, int, List[DnsAnswer]]:
+        """
+        This method parses the given DNS response packet.
+        :return: Tuple containing the query ID, the header flags, the response code and the list of answers
+        """
+        query_id, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+        offset = 12
+        for _ in range(qdcount):
+            _, offset = DnsResolver._read_name(data, offset)
+            offset += 4
+        answers = []
+        for _ in range(ancount):
+            name, offset = DnsResolver._read_name(data, offset)
+            rtype, _, ttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+            offset += 10
+            rdata_offset = offset
+            offset += rdlength
+            record_type = DnsResolver.RECORD_TYPES.get(rtype)
+            if record_type == DnsResourceRecordType.a and rdlength == 4:
+                value = str(ipaddress.IPv4Address(data[rdata_offset:offset]))
+            elif record_type == DnsResourceRecordType.aaaa and rdlength == 16:
+                value = str(ipaddress.IPv6Address(data[rdata_offset:offset]))
+            elif record_type in [DnsResourceRecordType.cname, DnsResourceRecordType.ptr, DnsResourceRecordType.ns]:
+                value, _ = DnsResolver._read_name(data, rdata_offset)
+            elif record_type == DnsResourceRecordType.mx:
+                preference = struct.unpack("!H", data[rdata_offset:rdata_offset + 2])[0]
+                exchange, _ = DnsResolver._read_name(data, rdata_offset + 2)
+                value = "{} {}".format(preference, exchange)
+            elif record_type == DnsResourceRecordType.txt:
+                value = ""
+                position = rdata_offset
+                while position < offset:
+                    length = data[position]
+                    value += data[position + 1:position + 1 + length].decode("utf-8", errors="ignore")
+                    position += 1 + length
+            else:
+                continue
+            answers.append(DnsAnswer(name=name, record_type=record_type, ttl=ttl, value=value))
+        return query_id, flags, flags & 0x000F, answers
+
+    def _next_nameserver_index(self) -> int:
+        with self._lock:
+            self._nameserver_index = (self._nameserver_index + 1) % len(self._nameservers)
+            return self._nameserver_index
+
+    async def _send_udp(self, nameserver: Tuple[str, int], packet: bytes) -> bytes:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(lambda: _DnsDatagramProtocol(packet, future),
+                                                           remote_addr=nameserver)
+        try:
+            return await asyncio.wait_for(future, self._timeout)
+        finally:
+            transport.close()
+
+    async def _send_tcp(self, nameserver: Tuple[str, int], packet: bytes) -> bytes:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(*nameserver), self._timeout)
+        try:
+            writer.write(struct.pack("!H", len(packet)) + packet)
+            await writer.drain()
+            length = struct.unpack("!H", await asyncio.wait_for(reader.readexactly(2), self._timeout))[0]
+            return await asyncio.wait_for(reader.readexactly(length), self._timeout)
+        finally:
+            writer.close()
+
+    async def query(self, name: str, record_type: DnsResourceRecordType) -> DnsResponse:
+        """
+        This method queries the given record type of the given name. If the query times out or the name server
+        returns SERVFAIL or REFUSED, then the query is repeated on the next name server.
+        """
+        result = DnsResponse(name=name, record_type=record_type)
+        try:
+            packet = DnsResolver.build_query(random.randint(0, 0xFFFF), name, record_type)
+        except (ValueError, UnicodeError) as ex:
+            result.error = str(ex)
+            return result
+        # Each query starts at the next name server and its retries are sent to the subsequent name servers
+        start = self._next_nameserver_index()
+        for attempt in range(self._retries + 1):
+            nameserver = self._nameservers[(start + attempt) % len(self._nameservers)]
+            try:
+                data = await self._send_udp(nameserver, packet)
+                _, flags, rcode, answers = DnsResolver.parse_response(data)
+                # The response was truncated and therefore, we repeat the query via TCP
+                if flags & 0x0200:
+                    data = await self._send_tcp(nameserver, packet)
+                    _, flags, rcode, answers = DnsResolver.parse_response(data)
+            except (asyncio.TimeoutError, OSError, ValueError, struct.error) as ex:
+                logger.debug("query {} {} on {}:{} failed: {}".format(record_type.name.upper(),
+                                                                      name,
+                                                                      *nameserver,
+                                                                      ex))
+                result.error = "connection timed out; no servers could be reached" \
+                    if isinstance(ex, asyncio.TimeoutError) else str(ex)
+                continue
+            if rcode in [DnsResolver.RCODE_SERVFAIL, DnsResolver.RCODE_REFUSED]:
+                result.error = "name server {} returned {}".format(nameserver[0],
+                                                                   "SERVFAIL" if rcode == DnsResolver.RCODE_SERVFAIL
+                                                                   else "REFUSED")
+                continue
+            result.error = None
+            result.rcode = rcode
+            result.answers = answers
+            break
+        return result
+
+    async def query_all(self, queries: List[Tuple[str, DnsResourceRecordType]]) -> List[DnsResponse]:
+        """
+        This method executes the given queries concurrently. At most concurrency queries are outstanding at the same
+        time.
+        :param queries: List of tuples containing the name and record type to query
+        :return: List of responses in the same order as the given queries
+        """
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def _query(name: str, record_type: DnsResourceRecordType) -> DnsResponse:
+            async with semaphore:
+                return await self.query(name, record_type)
+        return await asyncio.gather(*[_query(name, record_type) for name, record_type in queries])
+
+    def resolve(self, queries: List[Tuple[str, DnsResourceRecordType]]) -> List[DnsResponse]:
+        """
+        This method is the synchronous counterpart of method query_all.
+        """
+        return asyncio.run(self.query_all(queries))
+
+
+class DnsResolverCommand(BaseCommand):
+    """
+    This class provides the same interface as PopenCommand. Instead of executing an operating system process, it
+    resolves all targets specified in the command's arguments in-process by using class DnsResolver. The results are
+    written to the standard output in the format of the command line tool host.
+    """
+
+    TOOL = "kis-resolver"
+
+    def __init__(self, os_command: List[str],
+                 stdout: int = subprocess.PIPE,
+                 stderr: int = subprocess.PIPE,
+                 cwd: str = None,
+                 timeout: int = None,
+                 **kwargs):
+        super().__init__(os_command=os_command, stdout=stdout, stderr=stderr, cwd=cwd, shell=False, **kwargs)
+        self._return_code = None
+        self._killed = False
+        self._timeout = timeout if timeout and timeout > 0 else None
+        self._stdout_list = []
+        self._stderr_list = []
+        self._loop = None
+        self._task = None
+
+    @staticmethod
+    def get_argument_parser() -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(prog=DnsResolverCommand.TOOL, add_help=False)
+        parser.add_argument("-t", "--types", type=str, default="a,aaaa,mx")
+        parser.add_argument("-n", "--nameservers", type=str, nargs="+")
+        parser.add_argument("-c", "--concurrency", type=int, default=100)
+        parser.add_argument("-r", "--retries", type=int, default=2)
+        parser.add_argument("-W", "--wait", type=float, default=2)
+        parser.add_argument("-x", "--reverse", action="store_true")
+        parser.add_argument("-i", "--input-file", dest="input_file", type=str)
+        parser.add_argument("targets", type=str, nargs="*")
+        return parser
+
+    @staticmethod
+    def create_os_command(targets: List[str] = None,
+                          record_types: DnsResourceRecordType = None,
+                          nameservers: List[str] = None,
+                          reverse: bool = False,
+                          concurrency: int = None,
+                          retries: int = None,
+                          wait: float = None,
+                          input_file: str = None) -> List[str]:
+        """
+        This method creates the operating system command (as it is stored in table command) for the given arguments.
+        :param targets: The host names or IP addresses (if reverse is True) that shall be resolved
+        :param record_types: The record types that shall be queried for each host name
+        :param nameservers: The name servers that shall be queried
+        :param reverse: If True, then PTR records of the given IP addresses are queried
+        :param concurrency: The maximum number of concurrently outstanding queries
+        :param retries: The number of times a failed query is repeated on the next name server
+        :param wait: The number of seconds to wait for each answer
+        :param input_file: File that contains one target per line
+        """
+        result = [DnsResolverCommand.TOOL]
+        if reverse:
+            result.append("-x")
+        elif record_types:
+            result += ["-t", ",".join([item.name for item in DnsResourceRecordType if item in record_types])]
+        if nameservers:
+            result.append("-n")
+            result.extend(nameservers)
+        if concurrency:
+            result += ["-c", str(concurrency)]
+        if retries is not None:
+            result += ["-r", str(retries)]
+        if wait:
+            result += ["-W", str(wait)]
+        if input_file:
+            result += ["-i", input_file]
+        if targets:
+            result.append("--")
+            result.extend(targets)
+        return result
+
+    @property
+    def stdout_list(self) -> List[str]:
+        with self._lock:
+            return list(self._stdout_list)
+
+    @property
+    def stderr_list(self) -> List[str]:
+        with self._lock:
+            return list(self._stderr_list)
+
+    @property
+    def return_code(self) -> int:
+        with self._lock:
+            return self._return_code
+
+    @property
+    def killed(self) -> bool:
+        with self._lock:
+            return self._killed
+
+    def poll(self) -> int:
+        return self.return_code
+
+    def _cancel(self) -> None:
+        with self._lock:
+            self._killed = True
+            loop = self._loop
+            task = self._task
+        if loop and task and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    def kill(self) -> None:
+        """Stops the resolution of all outstanding queries."""
+        self._cancel()
+
+    def terminate(self) -> None:
+        """Stops the resolution of all outstanding queries."""
+        self._cancel()
+
+    def communicate(self, input=None, timeout=None):
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _get_queries(self, arguments: argparse.Namespace) -> List[Tuple[str, DnsResourceRecordType]]:
+        targets = list(arguments.targets)
+        if arguments.input_file:
+            with open(arguments.input_file, "r") as file:
+                targets.extend([line.strip() for line in file if line.strip()])
+        if arguments.reverse:
+            result = [(DnsResolver.get_reverse_pointer(item), DnsResourceRecordType.ptr) for item in targets]
+        else:
+            record_types = [DnsResourceRecordType[item.strip().lower()] for item in arguments.types.split(",")]
+            result = [(item, record_type) for item in targets for record_type in record_types]
+        return result
+
+    async def _run(self, resolver: DnsResolver, queries: List[Tuple[str, DnsResourceRecordType]]):
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            if self._killed:
+                raise asyncio.CancelledError()
+        return await asyncio.wait_for(resolver.query_all(queries), self._timeout)
+
+    def run(self) -> None:
+        """This method resolves all targets."""
+        with self._lock:
+            self._start_time = datetime.utcnow()
+        stdout = []
+        stderr = []
+        return_code = 0
+        try:
+            arguments = DnsResolverCommand.get_argument_parser().parse_args(self._os_command[1:])
+            queries = self._get_queries(arguments)
+            resolver = DnsResolver(nameservers=arguments.nameservers,
+                                   concurrency=arguments.concurrency,
+                                   retries=arguments.retries,
+                                   timeout=arguments.wait)
+            responses = asyncio.run(self._run(resolver, queries))
+            lines = {}
+            for response in responses:
+                if response.failed:
+                    stderr.append(";; {} {}: {}".format(response.record_type.name.upper(),
+                                                       response.name,
+                                                       response.error))
+                elif response.not_found:
+                    lines["Host {} not found: 3(NXDOMAIN)".format(response.name)] = None
+                for answer in response.answers:
+                    # Name servers usually return the same CNAME records for A, AAAA, and MX queries
+                    lines[str(answer)] = None
+            stdout.extend(lines.keys())
+            # As the command line tool host, we only fail if none of the name servers could be reached
+            if responses and all([item.failed for item in responses]):
+                stdout.append(";; connection timed out; no servers could be reached")
+                return_code = 1
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            with self._lock:
+                self._killed = True
+        except SystemExit:
+            stderr.append("{}: invalid arguments: {}".format(DnsResolverCommand.TOOL, " ".join(self._os_command[1:])))
+            return_code = 2
+        except Exception as ex:
+            logger.exception(ex)
+            stderr.append(str(ex))
+            return_code = 1
+        with self._lock:
+            self._stdout_list = stdout
+            self._stderr_list = stderr
+            self._return_code = return_code
+            self._loop = None
+            self._task = None
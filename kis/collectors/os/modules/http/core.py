@@ -151,7 +151,7 @@ class BaseHttpGoBuster(BaseHttpCollector):
     """
 
     def __init__(self, mode: str, **kwargs):
-        super().__init__(**kwargs)
+        super().__init__(command_threads=10, threads_argument="-t", **kwargs)
         self._mode = mode
 
     @staticmethod
@@ -30,6 +30,7 @@ __version__ = 0.1
 
 import re
 import os
+import hashlib
 import logging
 from typing import List
 from collectors.os.modules.core import ServiceCollector
@@ -44,8 +45,11 @@ from database.model import CredentialType
 from database.model import Source
 from database.model import HostName
 from database.model import DomainName
+from database.model import HostHostNameMapping
 from database.model import DnsResourceRecordType
 from view.core import ReportItem
+from sqlalchemy import and_
+from sqlalchemy import exists
 from sqlalchemy.orm.session import Session
 
 logger = logging.getLogger('vhostgobuster')
@@ -60,11 +64,64 @@ class CollectorClass(BaseHttpGoBuster, ServiceCollector):
                          mode="vhost",
                          **kwargs)
         self._re_vhost = re.compile("^Found:\s+(?P<vhost>.+?)\s+\(Status:\s*(?P<status>\d+)\)\s+\[Size:\s*(?P<size>\d+?)\]\s*$")
+        # Digest of the wordlist per workspace ID together with the transaction (collection pass) in which it was
+        # computed
+        self._host_name_wordlists = {}
 
     @staticmethod
     def get_argparse_arguments():
         return {"help": __doc__, "action": "store_true"}
 
+    def _get_host_names(self, session: Session, workspace_id: int) -> List[str]:
+        """
+        This method returns the sorted list of in-scope host names that do not resolve to any IP address (A or AAAA
+        record) and that are not excluded by kiscollect's --filter argument. The host names are obtained by a single
+        query.
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param workspace_id: The ID of the workspace whose host names shall be returned
+        :return: Sorted list of host names
+        """
+        result = []
+        record_types = DnsResourceRecordType.a.value | DnsResourceRecordType.aaaa.value
+        resolves_to = exists().where(and_(HostHostNameMapping.host_name_id == HostName.id,
+                                          HostHostNameMapping._type.op("&")(record_types) > 0))
+        query = session.query(HostName.name, DomainName.name, resolves_to) \
+            .join(DomainName, HostName.domain_name) \
+            .filter(DomainName.workspace_id == workspace_id, HostName._in_scope)
+        for name, domain_name, resolves in query:
+            full_name = "{}.{}".format(name, domain_name) if name else domain_name
+            if (not resolves and not self._blacklist_filter and not self._whitelist_filter) or \
+                    ((not resolves and self._blacklist_filter and full_name not in self._blacklist_filter) or
+                     (self._whitelist_filter and full_name in self._whitelist_filter)):
+                result.append(full_name)
+        result.sort()
+        return result
+
+    def _get_host_name_wordlist(self, session: Session, workspace_id: int) -> str:
+        """
+        This method returns the path to the wordlist containing the host names of method _get_host_names. The host
+        names are computed once per collection pass (database transaction) and written to a file in the output
+        directory, which is shared by all services of the workspace. The file's path does not depend on the host names.
+        Thus, new host names do not result in new commands for services that were already scanned. The file is only
+        rewritten if the host names or their mappings to hosts change.
+        :param session: Sqlalchemy session that manages persistence operations for ORM-mapped objects
+        :param workspace_id: The ID of the workspace whose host names shall be returned
+        :return: Path to the wordlist
+        """
+        transaction = session.get_transaction()
+        file_path = os.path.join(self.output_dir, "{}-{}-wordlist.txt".format(self.name, workspace_id))
+        cached_transaction, cached_digest = self._host_name_wordlists.get(workspace_id, (None, None))
+        if transaction is None or cached_transaction is not transaction or not os.path.isfile(file_path):
+            content = os.linesep.join(self._get_host_names(session, workspace_id))
+            digest = hashlib.sha256(content.encode()).hexdigest()
+            if digest != cached_digest or not os.path.isfile(file_path):
+                tmp_path = "{}.tmp".format(file_path)
+                with open(tmp_path, "w") as file:
+                    file.write(content)
+                os.replace(tmp_path, file_path)
+            self._host_name_wordlists[workspace_id] = (transaction, digest)
+        return file_path
+
     def create_service_commands(self,
                                 session: Session,
                                 service: Service,
@@ -85,24 +142,7 @@ class CollectorClass(BaseHttpGoBuster, ServiceCollector):
         if self.match_nmap_service_name(service):
             wordlists = []
             if not self._wordlist_files:
-                # Compile list of host names that do not resolve to any IP address
-                host_names = []
-                for host_name in session.query(HostName) \
-                     .join(DomainName) \
-                     .filter(DomainName.workspace_id == service.workspace_id, HostName._in_scope):
-                    resolves_to = host_name.get_host_host_name_mappings([DnsResourceRecordType.a,
-                                                                         DnsResourceRecordType.aaaa])
-                    if (not resolves_to and not self._blacklist_filter and not self._whitelist_filter) or \
-                            ((not resolves_to and self._blacklist_filter and host_name.full_name not in self._blacklist_filter) or
-                             (self._whitelist_filter and host_name.full_name in self._whitelist_filter)):
-                        host_names.append(host_name.full_name)
-                # Write wordlist to filesystem
-                file_path = self.create_text_file_path(service=service,
-                                                       delete_existing=True,
-                                                       file_suffix="wordlist")
-                with open(file_path, "w") as file:
-                    file.write(os.linesep.join(host_names))
-                wordlists.append(file_path)
+                wordlists.append(self._get_host_name_wordlist(session, service.workspace_id))
             else:
                 wordlists = self._wordlist_files
             # Create commands
@@ -23,9 +23,11 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 __version__ = 0.1
 
+import re
 import xml
 import logging
 from typing import List
+from typing import Dict
 from collectors.core import XmlUtils
 from collectors.os.modules.core import HostNameServiceCollector
 from collectors.os.modules.core import ServiceCollector
@@ -39,6 +41,7 @@ from collectors.os.modules.ldap.core import LdapServiceDescriptor
 from collectors.os.modules.pgsql.core import PostgresSqlServiceDescriptor
 from collectors.os.modules.core import BaseCollector
 from collectors.os.core import PopenCommand
+from collectors.os.core import BatchCommandResult
 from database.model import Service
 from database.model import Command
 from database.model import CollectorName
@@ -67,6 +70,45 @@ class CollectorClass(BaseTlsCollector, ServiceCollector, HostNameServiceCollecto
     def get_argparse_arguments():
         return {"help": __doc__, "action": "store_true"}
 
+    @staticmethod
+    def supports_batch_execution() -> bool:
+        return True
+
+    def get_batch_target(self, command: Command) -> str:
+        return command.os_command[-1]
+
+    def create_batch_os_command(self, commands: List[Command], input_file: str) -> List[str]:
+        xml_argument = "--xml={}".format(ExecutionInfoType.xml_output_file.argument)
+        os_command = ["--xml={}".format(self.get_batch_xml_file(input_file)) if item == xml_argument else item
+                      for item in commands[0].os_command[:-1]]
+        return os_command + ["--targets={}".format(input_file)]
+
+    @staticmethod
+    def _get_target(host: str, port: str) -> str:
+        """
+        This method returns the target of the given host and port in the notation of the sslscan command line.
+        """
+        return "[{}]:{}".format(host, port) if ":" in host else "{}:{}".format(host, port)
+
+    def split_batch_output(self, commands: List[Command], process: PopenCommand) -> Dict[int, BatchCommandResult]:
+        """
+        This method splits the XML output file of the batched sslscan command into the commands' XML output files, which
+        contain the ssltest XML tag of the respective command's target. Likewise, the standard output is split per
+        "Testing SSL server" section.
+        """
+        xml_file = [item for item in process.os_command if item.startswith("--xml=")][0][len("--xml="):]
+        self._split_batch_xml_file(commands,
+                                   xml_file=xml_file,
+                                   tag="ssltest",
+                                   get_targets=lambda tag: [self._get_target(tag.attrib.get("host", ""),
+                                                                             tag.attrib.get("port", ""))])
+        return self._split_batch_stdout(commands,
+                                        process,
+                                        re_header=re.compile("^Testing SSL server (?P<host>[^ ]+) on port "
+                                                             "(?P<port>[0-9]+)"),
+                                        get_target=lambda match: self._get_target(match.group("host"),
+                                                                                  match.group("port")))
+
     def _create_command(self,
                         session: Session,
                         service: Service,
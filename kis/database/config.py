@@ -54,6 +54,7 @@ class BaseConfig:
     ENV_PORT = "KIS_DB_PORT"
     ENV_DB_NAME = "KIS_DB_NAME"
     ENV_LOG_PATH = "KIS_LOG_PATH"
+    ENV_PROFILE_SQL = "KIS_PROFILE_SQL"
 
     def __init__(self, config_file: str):
         self._config_file = config_file
@@ -73,6 +74,14 @@ class BaseConfig:
             path = os.environ[BaseConfig.ENV_LOG_PATH]
         return os.path.join(path, "kaliintelsuite.log")
 
+    @staticmethod
+    def get_telemetry_file() -> str:
+        return os.path.join(os.path.dirname(BaseConfig.get_log_file()), "kiscollect-telemetry.jsonl")
+
+    @staticmethod
+    def get_analysis_checkpoint_file(workspace: str) -> str:
+        return os.path.join(os.path.dirname(BaseConfig.get_log_file()), "kiscollect-analyze-{}.json".format(workspace))
+
     @staticmethod
     def get_config_home() -> str:
         return os.path.join(BaseConfig.get_script_home(), "configs")
@@ -131,6 +140,13 @@ class Database(BaseConfig):
                       Database.ENV_PASSWORD_FILE: self.env_password_file}
         return result
 
+    @staticmethod
+    def env_profile_sql() -> bool:
+        """
+        :return: True, if environment variable KIS_PROFILE_SQL enables the SQL query profiler (see SqlProfiler)
+        """
+        return os.environ.get(Database.ENV_PROFILE_SQL, "").lower() in ["1", "true", "yes", "on"]
+
     @property
     def env_host(self) -> str:
         result = None
@@ -236,6 +252,9 @@ class Collector(BaseConfig):
         super().__init__("collectors.config")
         self._default_user_agent_string = self.get_config_str("general", "user_agent_string")
         self._default_dns_server = self.get_config_str("general", "default_dns_server")
+        self._dns_resolver_concurrency = self.get_config_int("general", "dns_resolver_concurrency")
+        self._dns_resolver_retries = self.get_config_int("general", "dns_resolver_retries")
+        self._dns_resolver_timeout = self.get_config_int("general", "dns_resolver_timeout")
         self._path_proxychains = self.get_config_str("file_paths", "proxychains")
         self._path_smb4linux = self.get_config_str("file_paths", "enum4linux")
         self._path_gobuster = self.get_config_str("file_paths", "gobuster")
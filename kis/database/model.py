@@ -26,6 +26,7 @@ import enum
 import urllib
 import logging
 import subprocess
+import threading
 import ipaddress
 import re
 import pwd
@@ -34,10 +35,13 @@ import sqlalchemy as sa
 from database.config import BaseConfig
 from sqlalchemy import Column
 from sqlalchemy import Integer
+from sqlalchemy import BigInteger
+from sqlalchemy import Float
 from sqlalchemy import String
 from sqlalchemy import DateTime
 from sqlalchemy import ForeignKey
 from sqlalchemy import Text
+from sqlalchemy import text
 from sqlalchemy import Boolean
 from sqlalchemy import Table
 from sqlalchemy import Enum
@@ -46,17 +50,22 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.orm import backref
 from sqlalchemy import UniqueConstraint
 from sqlalchemy import CheckConstraint
+from sqlalchemy import Index
+from sqlalchemy import FetchedValue
+from sqlalchemy import inspect
 from sqlalchemy.dialects.postgresql import MACADDR
 from sqlalchemy.dialects.postgresql import INET
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import BYTEA
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 from datetime import timedelta
 from typing import List
 from typing import Dict
 from urllib.parse import urlparse
+from types import MappingProxyType
 
 DeclarativeBase = declarative_base()
 
@@ -136,6 +145,10 @@ class MutableList(Mutable, list):
         list.append(self, value)
         self.changed()
 
+    def extend(self, values):
+        list.extend(self, values)
+        self.changed()
+
     @classmethod
     def coerce(cls, key, value):
         if not isinstance(value, MutableList):
@@ -579,7 +592,8 @@ class Workspace(DeclarativeBase):
 source_host_mapping = Table("source_host_mapping", DeclarativeBase.metadata,
                             Column("id", Integer, primary_key=True),
                             Column("host_id", Integer, ForeignKey('host.id', ondelete='cascade'), nullable=False),
-                            Column("source_id", Integer, ForeignKey('source.id', ondelete='cascade'), nullable=False),
+                            Column("source_id", Integer, ForeignKey('source.id', ondelete='cascade'), nullable=False,
+                                   index=True),
                             Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                             Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                             UniqueConstraint("host_id",
@@ -591,7 +605,7 @@ source_service_mapping = Table("source_service_mapping", DeclarativeBase.metadat
                                Column("service_id", Integer, ForeignKey('service.id',
                                                                         ondelete='cascade'), nullable=False),
                                Column("source_id", Integer, ForeignKey('source.id',
-                                                                       ondelete='cascade'), nullable=False),
+                                                                       ondelete='cascade'), nullable=False, index=True),
                                Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                UniqueConstraint("service_id",
@@ -603,7 +617,8 @@ source_credentials_mapping = Table("source_credential_mapping", DeclarativeBase.
                                    Column("credential_id", Integer, ForeignKey('credential.id',
                                                                                 ondelete='cascade'), nullable=False),
                                    Column("source_id", Integer, ForeignKey('source.id',
-                                                                           ondelete='cascade'), nullable=False),
+                                                                           ondelete='cascade'), nullable=False,
+                                          index=True),
                                    Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                    Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                    UniqueConstraint("credential_id",
@@ -613,9 +628,9 @@ source_credentials_mapping = Table("source_credential_mapping", DeclarativeBase.
 source_path_mapping = Table("source_path_mapping", DeclarativeBase.metadata,
                             Column("id", Integer, primary_key=True),
                             Column("path_id", Integer, ForeignKey('path.id',
-                                                                  ondelete='cascade'), nullable=False),
+                                                                  ondelete='cascade'), nullable=False, index=True),
                             Column("source_id", Integer, ForeignKey('source.id',
-                                                                    ondelete='cascade'), nullable=False),
+                                                                    ondelete='cascade'), nullable=False, index=True),
                             Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                             Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()))
 
@@ -623,9 +638,10 @@ source_service_method_mapping = Table("source_service_method_mapping", Declarati
                                       Column("id", Integer, primary_key=True),
                                       Column("service_name_id",
                                              Integer, ForeignKey('service_method.id',
-                                                                 ondelete='cascade'), nullable=False),
+                                                                 ondelete='cascade'), nullable=False, index=True),
                                       Column("source_id", Integer, ForeignKey('source.id',
-                                                                              ondelete='cascade'), nullable=False),
+                                                                              ondelete='cascade'), nullable=False,
+                                             index=True),
                                       Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                       Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()))
 
@@ -634,7 +650,8 @@ source_host_name_mapping = Table("source_host_name_mapping", DeclarativeBase.met
                                  Column("host_name_id", Integer, ForeignKey('host_name.id',
                                                                             ondelete='cascade'), nullable=False),
                                  Column("source_id", Integer, ForeignKey('source.id',
-                                                                         ondelete='cascade'), nullable=False),
+                                                                         ondelete='cascade'), nullable=False,
+                                        index=True),
                                  Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                  Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                  UniqueConstraint("host_name_id",
@@ -647,7 +664,8 @@ source_additional_info_mapping = Table("source_additional_info_mapping", Declara
                                                                                         ondelete='cascade'),
                                               nullable=False),
                                        Column("source_id", Integer, ForeignKey('source.id',
-                                                                               ondelete='cascade'), nullable=False),
+                                                                               ondelete='cascade'), nullable=False,
+                                              index=True),
                                        Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                        Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                        UniqueConstraint("additional_info_id",
@@ -659,7 +677,7 @@ source_email_mapping = Table("source_email_mapping", DeclarativeBase.metadata,
                              Column("email_id", Integer, ForeignKey('email.id',
                                                                     ondelete='cascade'), nullable=False),
                              Column("source_id", Integer, ForeignKey('source.id',
-                                                                     ondelete='cascade'), nullable=False),
+                                                                     ondelete='cascade'), nullable=False, index=True),
                              Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                              Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                              UniqueConstraint("email_id", "source_id", name="_source_email_mapping_unique"))
@@ -669,7 +687,7 @@ source_company_mapping = Table("source_company_mapping", DeclarativeBase.metadat
                                Column("company_id", Integer, ForeignKey('company.id',
                                                                         ondelete='cascade'), nullable=False),
                                Column("source_id", Integer, ForeignKey('source.id',
-                                                                       ondelete='cascade'), nullable=False),
+                                                                       ondelete='cascade'), nullable=False, index=True),
                                Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                UniqueConstraint("company_id", "source_id", name="_source_company_mapping_unique"))
@@ -679,7 +697,7 @@ host_name_mapping = Table("host_name_mapping", DeclarativeBase.metadata,
                           Column("host_id", Integer, ForeignKey('host.id',
                                                                 ondelete='cascade'), nullable=False),
                           Column("host_name_id", Integer, ForeignKey('host_name.id',
-                                                                     ondelete='cascade'), nullable=False),
+                                                                     ondelete='cascade'), nullable=False, index=True),
                           Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                           Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                           UniqueConstraint("host_id", "host_name_id", name="_host_name_mapping_unique"))
@@ -689,7 +707,8 @@ source_ipv4_network_mapping = Table("source_network_mapping", DeclarativeBase.me
                                     Column("network_id", Integer, ForeignKey('network.id',
                                                                              ondelete='cascade'), nullable=False),
                                     Column("source_id", Integer, ForeignKey('source.id',
-                                                                            ondelete='cascade'), nullable=False),
+                                                                            ondelete='cascade'), nullable=False,
+                                           index=True),
                                     Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                     Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                     UniqueConstraint("network_id",
@@ -703,7 +722,8 @@ source_host_host_name_mapping = Table("source_host_host_name_mapping", Declarati
                                              ForeignKey('host_host_name_mapping.id', ondelete='cascade'),
                                              nullable=False),
                                       Column("source_id", Integer, ForeignKey('source.id',
-                                                                              ondelete='cascade'), nullable=False),
+                                                                              ondelete='cascade'), nullable=False,
+                                             index=True),
                                       Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                       Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                       UniqueConstraint("host_host_name_mapping_id",
@@ -717,7 +737,8 @@ source_host_name_host_name_mapping = Table("source_host_name_host_name_mapping",
                                                   ForeignKey('host_name_host_name_mapping.id', ondelete='cascade'),
                                                   nullable=False),
                                            Column("source_id", Integer, ForeignKey('source.id',
-                                                                                   ondelete='cascade'), nullable=False),
+                                                                                   ondelete='cascade'), nullable=False,
+                                                  index=True),
                                            Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                            Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                            UniqueConstraint("host_name_host_name_mapping_id",
@@ -731,7 +752,8 @@ source_vhost_name_mapping = Table("source_vhost_name_mapping", DeclarativeBase.m
                                          ForeignKey('vhost_name_mapping.id', ondelete='cascade'),
                                          nullable=False),
                                   Column("source_id", Integer, ForeignKey('source.id',
-                                                                          ondelete='cascade'), nullable=False),
+                                                                          ondelete='cascade'), nullable=False,
+                                         index=True),
                                   Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                   Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                   UniqueConstraint("vhost_name_mapping_id",
@@ -745,7 +767,8 @@ source_cert_info_mapping = Table("source_cert_info_mapping", DeclarativeBase.met
                                         ForeignKey('cert_info.id', ondelete='cascade'),
                                         nullable=False),
                                  Column("source_id", Integer, ForeignKey('source.id',
-                                                                         ondelete='cascade'), nullable=False),
+                                                                         ondelete='cascade'), nullable=False,
+                                        index=True),
                                  Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                  Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                  UniqueConstraint("cert_info_id",
@@ -760,7 +783,8 @@ source_tls_info_cipher_suite_mapping = Table("source_tls_info_cipher_suite_mappi
                                                     nullable=False),
                                              Column("source_id", Integer, ForeignKey('source.id',
                                                                                      ondelete='cascade'),
-                                                    nullable=False),
+                                                    nullable=False,
+                                                    index=True),
                                              Column("creation_date",
                                                     DateTime,
                                                     nullable=False,
@@ -779,7 +803,8 @@ company_network_mapping = Table("company_network_mapping", DeclarativeBase.metad
                                        ForeignKey('company.id', ondelete='cascade'),
                                        nullable=False),
                                 Column("network_id", Integer, ForeignKey('network.id',
-                                                                         ondelete='cascade'), nullable=False),
+                                                                         ondelete='cascade'), nullable=False,
+                                       index=True),
                                 Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                 Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                 UniqueConstraint("company_id",
@@ -793,7 +818,8 @@ company_domain_name_mapping = Table("company_domain_name_mapping", DeclarativeBa
                                            ForeignKey('company.id', ondelete='cascade'),
                                            nullable=False),
                                     Column("domain_name_id", Integer, ForeignKey('domain_name.id',
-                                                                                 ondelete='cascade'), nullable=False),
+                                                                                 ondelete='cascade'), nullable=False,
+                                           index=True),
                                     Column("creation_date", DateTime, nullable=False, default=datetime.utcnow()),
                                     Column("last_modified", DateTime, nullable=True, onupdate=datetime.utcnow()),
                                     UniqueConstraint("company_id",
@@ -816,7 +842,8 @@ class Host(DeclarativeBase):
     os_details = Column(Text, nullable=True, unique=False)
     workgroup = Column(Text, nullable=True, unique=False)
     workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False)
-    ipv4_network_id = Column("network_id", Integer, ForeignKey("network.id", ondelete='SET NULL'), nullable=True, unique=False)
+    ipv4_network_id = Column("network_id", Integer, ForeignKey("network.id", ondelete='SET NULL'), nullable=True, unique=False,
+                             index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     services = relationship("Service",
@@ -826,7 +853,11 @@ class Host(DeclarativeBase):
     host_names = relationship('HostName',
                               secondary='host_host_name_mapping',
                               back_populates="hosts")
-    __table_args__ = (UniqueConstraint('workspace_id', 'address', name='_host_unique'),)
+    __table_args__ = (UniqueConstraint('workspace_id', 'address', name='_host_unique'),
+                      # GiST index used by the containment operators (e.g., <<=) of the network scope triggers
+                      Index('ix_host_address_inet_ops', 'address',
+                            postgresql_using='gist',
+                            postgresql_ops={'address': 'inet_ops'}))
 
     def __eq__(self, other):
         rvalue = False
@@ -1147,13 +1178,18 @@ class Network(DeclarativeBase):
     id = Column(Integer, primary_key=True)
     network = Column("address", INET, nullable=False, unique=False)
     scope = Column(Enum(ScopeType), nullable=True, unique=False)
-    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False)
+    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False,
+                          index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     hosts = relationship("Host",
                          backref=backref("ipv4_network", uselist=False),
                          order_by="asc(Host.address)")
-    __table_args__ = (UniqueConstraint('address', 'workspace_id', name='_network_unique'),)
+    __table_args__ = (UniqueConstraint('address', 'workspace_id', name='_network_unique'),
+                      # GiST index used by the containment operators (e.g., >>, <<) of the network scope triggers
+                      Index('ix_network_address_inet_ops', 'address',
+                            postgresql_using='gist',
+                            postgresql_ops={'address': 'inet_ops'}))
 
     @property
     def in_scope(self) -> bool:
@@ -1314,7 +1350,8 @@ class HostName(DeclarativeBase):
                           backref=backref("host_name"),
                           cascade="delete",
                           order_by="asc(Email.address)")
-    domain_name_id = Column(Integer, ForeignKey("domain_name.id", ondelete='cascade'), nullable=False, unique=False)
+    domain_name_id = Column(Integer, ForeignKey("domain_name.id", ondelete='cascade'), nullable=False, unique=False,
+                            index=True)
     services = relationship("Service",
                             backref=backref("host_name"),
                             cascade="delete, delete-orphan",
@@ -1633,7 +1670,7 @@ class HostHostNameMapping(DeclarativeBase):
     __mapper_args__ = {'confirm_deleted_rows': False}
     id = Column("id", Integer, primary_key=True)
     host_id = Column(Integer, ForeignKey('host.id', ondelete='cascade'), nullable=False)
-    host_name_id = Column(Integer, ForeignKey('host_name.id', ondelete='cascade'), nullable=False)
+    host_name_id = Column(Integer, ForeignKey('host_name.id', ondelete='cascade'), nullable=False, index=True)
     _type = Column("type", Integer, nullable=False)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
@@ -1707,7 +1744,7 @@ class HostNameHostNameMapping(DeclarativeBase):
     __mapper_args__ = {'confirm_deleted_rows': False}
     id = Column("id", Integer, primary_key=True)
     source_host_name_id = Column(Integer, ForeignKey('host_name.id', ondelete='cascade'), nullable=False)
-    resolved_host_name_id = Column(Integer, ForeignKey('host_name.id', ondelete='cascade'), nullable=False)
+    resolved_host_name_id = Column(Integer, ForeignKey('host_name.id', ondelete='cascade'), nullable=False, index=True)
     _type = Column("type", Integer, nullable=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
@@ -1777,7 +1814,8 @@ class DomainName(DeclarativeBase):
     id = Column(Integer, primary_key=True)
     name = Column(Text, nullable=False, unique=False)
     scope = Column(Enum(ScopeType), nullable=False, unique=False, server_default='exclude')
-    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False)
+    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False,
+                          index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     host_names = relationship("HostName",
@@ -1922,7 +1960,8 @@ class Email(DeclarativeBase):
     __tablename__ = "email"
     id = Column(Integer, primary_key=True)
     address = Column(Text, nullable=False, unique=False)
-    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=False, unique=False)
+    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=False, unique=False,
+                          index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     credentials = relationship("Credentials",
@@ -2118,7 +2157,7 @@ class ServiceMethod(DeclarativeBase):
     __tablename__ = "service_method"
     id = Column(Integer, primary_key=True)
     name = Column(Text, nullable=False, unique=False)
-    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=False, unique=False)
+    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=False, unique=False, index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     __table_args__ = (UniqueConstraint('name', 'service_id', name='_service_method_unique'),)
@@ -2156,8 +2195,12 @@ class Service(DeclarativeBase):
     nmap_os_type = Column(Text, nullable=True, unique=False)
     smb_message_signing = Column(Boolean, nullable=True, unique=False)
     rdp_nla = Column(Boolean, nullable=True, unique=False)
-    host_id = Column(Integer, ForeignKey("host.id", ondelete='cascade'), nullable=True, unique=False)
-    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=True, unique=False)
+    host_id = Column(Integer, ForeignKey("host.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=True, unique=False,
+                          index=True)
+    # The base URL (e.g., https://www.megacorpone.com:8443) is maintained by the database trigger
+    # pre_update_service_url (see method get_urlparse)
+    url = Column(Text, nullable=True, unique=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     service_methods = relationship("ServiceMethod",
@@ -2177,7 +2220,8 @@ class Service(DeclarativeBase):
                       CheckConstraint('not host_id is null or not host_name_id is null',
                                       name='_service_mutex_constraint'),
                       CheckConstraint('host_id is null or host_name_id is null',
-                                      name='_service_all_constraint'),)
+                                      name='_service_all_constraint'),
+                      Index('ix_service_url', 'url', postgresql_ops={'url': 'text_pattern_ops'}))
 
     @property
     def tls(self) -> bool:
@@ -2446,6 +2490,9 @@ class Service(DeclarativeBase):
         :return: This method returns a URL based on the given service and host information. If no host information is
         given, then this method returns None
         """
+        # The base URL is already computed by the database unless the service has pending changes
+        if not ip_address and not path and not query and self.url and not inspect(self).modified:
+            return urlparse(self.url)
         url = None
         host = ip_address if ip_address else self.address
         try:
@@ -2507,6 +2554,30 @@ class Service(DeclarativeBase):
         return rvalue
 
 
+class ServiceSummary(DeclarativeBase):
+    """
+    This class holds the precomputed pairs of host services and the corresponding host name services (same port and
+    protocol) of all host names that resolve to the host (A and AAAA records). The rows are queried by the service
+    report and maintained by the database triggers post_update_service_summary_after_service_changes as well as
+    post_update_service_summary_after_host_host_name_mapping_changes. Command kismanage database --refresh-views
+    rebuilds the entire table.
+    """
+
+    __tablename__ = "service_summary"
+    id = Column(Integer, primary_key=True)
+    host_id = Column(Integer, ForeignKey("host.id", ondelete='cascade'), nullable=False, unique=False, index=True)
+    host_service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=False, unique=False,
+                             index=True)
+    # NULL if the host does not have any host names
+    host_host_name_mapping_id = Column(Integer, ForeignKey("host_host_name_mapping.id", ondelete='cascade'),
+                                       nullable=True, unique=False, index=True)
+    # NULL if the host name does not have any services
+    host_name_service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=True, unique=False,
+                                  index=True)
+    host_service = relationship(Service, foreign_keys=[host_service_id])
+    host_name_service = relationship(Service, foreign_keys=[host_name_service_id])
+
+
 class AdditionalInfo(DeclarativeBase):
     """This class holds all information about supported service methods like OPTIONS or PUT."""
 
@@ -2514,16 +2585,18 @@ class AdditionalInfo(DeclarativeBase):
     id = Column(Integer, primary_key=True)
     name = Column(Text, nullable=False, unique=False)
     _values = Column("values", MutableList.as_mutable(ARRAY(Text)), nullable=False, default=[])
-    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=True, unique=False)
-    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=True, unique=False)
-    email_id = Column(Integer, ForeignKey("email.id", ondelete='cascade'), nullable=True, unique=False)
-    company_id = Column(Integer, ForeignKey("company.id", ondelete='cascade'), nullable=True, unique=False)
-    host_id = Column(Integer, ForeignKey("host.id", ondelete='cascade'), nullable=True, unique=False)
+    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=True, unique=False,
+                          index=True)
+    email_id = Column(Integer, ForeignKey("email.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    company_id = Column(Integer, ForeignKey("company.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    host_id = Column(Integer, ForeignKey("host.id", ondelete='cascade'), nullable=True, unique=False, index=True)
     ipv4_network_id = Column("network_id",
                              Integer,
                              ForeignKey("network.id", ondelete='cascade'),
                              nullable=True,
-                             unique=False)
+                             unique=False,
+                             index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     host = relationship(Host,
@@ -2688,6 +2761,10 @@ class ExecutionInfoType(enum.Enum):
     command_id = enum.auto()
     working_directory = enum.auto()
     username = enum.auto()
+    # The number of threads the command's tool uses. It is determined per execution by the concurrency governor.
+    threads = enum.auto()
+    # The tool's command line argument (e.g., -t), which specifies the number of threads (see threads)
+    threads_argument = enum.auto()
     # This type only contains the file name without the extension. The actual program (e.g., theharvester) then
     # adds the file extension (e.g., json).
     generic_file_name = enum.auto()
@@ -2700,6 +2777,9 @@ class ExecutionInfoType(enum.Enum):
 class Command(DeclarativeBase):
     """This class holds all information about a task including its results."""
 
+    # Replaces outputs that are identical to the output of a previous command (see get_text)
+    DUPLICATE_OUTPUT = "<skipped (duplicate)>"
+
     __tablename__ = "command"
     id = Column(Integer, primary_key=True)
     os_command = Column(MutableList.as_mutable(ARRAY(Text)), nullable=False, unique=False)
@@ -2717,23 +2797,31 @@ class Command(DeclarativeBase):
     collector_name_id = Column(Integer,
                                ForeignKey("collector_name.id", ondelete='cascade'),
                                nullable=False,
-                               unique=False)
+                               unique=False,
+                               index=True)
     # todo: update for new collector
-    host_id = Column(Integer, ForeignKey("host.id", ondelete='cascade'), nullable=True, unique=False)
-    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=True, unique=False)
-    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=True, unique=False)
+    host_id = Column(Integer, ForeignKey("host.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    host_name_id = Column(Integer, ForeignKey("host_name.id", ondelete='cascade'), nullable=True, unique=False,
+                          index=True)
     ipv4_network_id = Column("network_id",
                              Integer,
                              ForeignKey("network.id", ondelete='cascade'),
                              nullable=True,
-                             unique=False)
-    email_id = Column(Integer, ForeignKey("email.id", ondelete='cascade'), nullable=True, unique=False)
-    company_id = Column(Integer, ForeignKey("company.id", ondelete='cascade'), nullable=True, unique=False)
+                             unique=False,
+                             index=True)
+    email_id = Column(Integer, ForeignKey("email.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    company_id = Column(Integer, ForeignKey("company.id", ondelete='cascade'), nullable=True, unique=False, index=True)
     workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     start_time = Column(DateTime, nullable=True, unique=False)
     stop_time = Column(DateTime, nullable=True, unique=False)
+    cpu_user_time = Column(Float, nullable=True, unique=False)
+    cpu_system_time = Column(Float, nullable=True, unique=False)
+    max_rss = Column(BigInteger, nullable=True, unique=False)
+    read_blocks = Column(BigInteger, nullable=True, unique=False)
+    write_blocks = Column(BigInteger, nullable=True, unique=False)
     host = relationship(Host,
                         backref=backref("commands",
                                         cascade="all",
@@ -2785,7 +2873,11 @@ class Command(DeclarativeBase):
                                       '+case when service_id is null and host_id is null and host_name_id is null and not network_id is null and email_id is null and company_id is null then 1 else 0 end'
                                       '+case when service_id is null and host_id is null and host_name_id is null and network_id is null and not email_id is null and company_id is null then 1 else 0 end'
                                       '+case when service_id is null and host_id is null and host_name_id is null and network_id is null and email_id is null and company_id is not null then 1 else 0 end) = 1',
-                                      name='_command_mutex_constraint'),)
+                                      name='_command_mutex_constraint'),
+                      Index('ix_command_workspace_id_status', 'workspace_id', 'status'),
+                      # Only contains the few incomplete commands, which are looked up at the start of each collection
+                      Index('ix_command_incomplete_status', 'status',
+                            postgresql_where=text("status IN ('pending', 'collecting')")))
 
     def __init__(self,
                  os_command: List[str],
@@ -2999,6 +3091,18 @@ class Command(DeclarativeBase):
             self.xml_output = None
             self.hint = []
             self.return_code = None
+            self.search_index = None
+
+    def update_search_vector(self) -> None:
+        """
+        This method updates the search index over the command's stdout and stderr outputs. The index is computed by
+        the database function command_search_vector when the command is flushed.
+        """
+        search_vector = sa.func.command_search_vector("\n".join(self.stdout_output + self.stderr_output))
+        if self.search_index:
+            self.search_index.search_vector = search_vector
+        else:
+            self.search_index = CommandSearchIndex(search_vector=search_vector)
 
     def _update_execution_info_permissions(self,
                                            execution_info_type: ExecutionInfoType,
@@ -3075,6 +3179,15 @@ class Command(DeclarativeBase):
                 except:
                     value = item
                 os_command.append(value)
+        threads = self.execution_info.get(ExecutionInfoType.threads.name)
+        threads_argument = self.execution_info.get(ExecutionInfoType.threads_argument.name)
+        if threads and threads_argument and os_command:
+            # The number of threads is not part of os_command as it changes from execution to execution, whereas
+            # os_command identifies the command (see BaseUtils.add_command)
+            if threads_argument in os_command[:-1]:
+                os_command[os_command.index(threads_argument) + 1] = str(threads)
+            else:
+                os_command[1:1] = [threads_argument, str(threads)]
         return os_command
 
     @property
@@ -3084,6 +3197,29 @@ class Command(DeclarativeBase):
             rvalue = self.stop_time - self.start_time
         return rvalue
 
+    @property
+    def cpu_time(self) -> float:
+        """
+        :return: The CPU time in seconds (user and system) consumed by the command's process or None
+        """
+        rvalue = None
+        if self.cpu_user_time is not None and self.cpu_system_time is not None:
+            rvalue = self.cpu_user_time + self.cpu_system_time
+        return rvalue
+
+    def update_resource_usage(self, rusage) -> None:
+        """
+        This method stores the resource usage of the command's process.
+        :param rusage: The resource usage (see resource.struct_rusage) returned by os.wait4 or None
+        """
+        if rusage:
+            self.cpu_user_time = rusage.ru_utime
+            self.cpu_system_time = rusage.ru_stime
+            # On Linux, the maximum resident set size is reported in kilobytes
+            self.max_rss = rusage.ru_maxrss
+            self.read_blocks = rusage.ru_inblock
+            self.write_blocks = rusage.ru_oublock
+
     @property
     def os_command_string(self) -> str:
         return subprocess.list2cmdline(self.os_command_substituted)
@@ -3235,7 +3371,7 @@ class Command(DeclarativeBase):
             if command_full_text:
                 hash_dedup = hashlib.sha224(command_full_text.encode('utf-8')).hexdigest()
                 if hash_dedup in hashes_dedup:
-                    command_output =["{}<skipped (duplicate)>".format(" " * ident)]
+                    command_output =["{}{}".format(" " * ident, Command.DUPLICATE_OUTPUT)]
                 else:
                     hashes_dedup[hash_dedup] = True
             rvalue.extend(command_output)
@@ -3245,6 +3381,19 @@ class Command(DeclarativeBase):
         return "<Command id={} os_command={}... status={}".format(self.id, self.os_command_string, self.status.name)
 
 
+class CommandSearchIndex(DeclarativeBase):
+    """This class holds the search index over the stdout and stderr outputs of a command (see Command.search_index)."""
+
+    __tablename__ = "command_search_index"
+    command_id = Column(Integer, ForeignKey("command.id", ondelete='cascade'), primary_key=True)
+    # NULL if the outputs are too large for a TSVECTOR. Such outputs are searched without index.
+    search_vector = Column(TSVECTOR, nullable=True, unique=False)
+    command = relationship(Command, backref=backref("search_index",
+                                                    uselist=False,
+                                                    cascade="all, delete-orphan"))
+    __table_args__ = (Index('ix_command_search_index_search_vector', 'search_vector', postgresql_using='gin'),)
+
+
 class Credentials(DeclarativeBase):
     """This class holds all information about identified credentials."""
 
@@ -3255,8 +3404,8 @@ class Credentials(DeclarativeBase):
     password = Column(Text, nullable=True, unique=False)
     type = Column(Enum(CredentialType), nullable=True, unique=False)
     complete = Column(Boolean, nullable=False, unique=False, default=False)
-    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=True, unique=False)
-    email_id = Column(Integer, ForeignKey("email.id", ondelete='cascade'), nullable=True, unique=False)
+    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=True, unique=False, index=True)
+    email_id = Column(Integer, ForeignKey("email.id", ondelete='cascade'), nullable=True, unique=False, index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     __table_args__ = (UniqueConstraint('username', 'password', 'type', 'service_id',
@@ -3347,14 +3496,18 @@ class Path(DeclarativeBase):
     return_code = Column(Integer, nullable=True, unique=False)
     size_bytes = Column(Integer, nullable=True, unique=False)
     type = Column(Enum(PathType), nullable=False, unique=False)
-    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=False, unique=False)
+    service_id = Column(Integer, ForeignKey("service.id", ondelete='cascade'), nullable=False, unique=False, index=True)
+    # The URL (e.g., https://www.megacorpone.com:8443/admin) is maintained by the database trigger
+    # pre_update_path_url (see method get_urlparse)
+    url = Column(Text, nullable=True, unique=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     queries = relationship("HttpQuery",
                            backref=backref("path"),
                            order_by="asc(HttpQuery.query)",
                            cascade='delete, delete-orphan')
-    __table_args__ = (UniqueConstraint('name', 'type', 'service_id', name='_path_unique'),)
+    __table_args__ = (UniqueConstraint('name', 'type', 'service_id', name='_path_unique'),
+                      Index('ix_path_url', 'url', postgresql_ops={'url': 'text_pattern_ops'}))
 
     @property
     def type_str(self) -> str:
@@ -3477,7 +3630,7 @@ class HttpQuery(DeclarativeBase):
     __tablename__ = "http_query"
     id = Column(Integer, primary_key=True)
     query = Column(Text, nullable=False, unique=False)
-    path_id = Column(Integer, ForeignKey("path.id", ondelete='cascade'), nullable=False, unique=False)
+    path_id = Column(Integer, ForeignKey("path.id", ondelete='cascade'), nullable=False, unique=False, index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     __table_args__ = (UniqueConstraint('query', 'path_id', name='_http_query_unique'),)
@@ -3496,7 +3649,8 @@ class File(DeclarativeBase):
     __tablename__ = "file"
     id = Column(Integer, primary_key=True)
     content = Column(BYTEA, nullable=False, unique=False)
-    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False)
+    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False,
+                          index=True)
     type = Column(Enum(FileType), nullable=False, unique=False)
     sha256_value = Column(Text, nullable=False, unique=False)
     commands = relationship('Command',
@@ -3520,7 +3674,7 @@ class CommandFileMapping(DeclarativeBase):
     __mapper_args__ = {'confirm_deleted_rows': False}
     id = Column("id", Integer, primary_key=True)
     file_name = Column("file_name", Text, nullable=False)
-    command_id = Column(Integer, ForeignKey('command.id', ondelete='cascade'), nullable=False)
+    command_id = Column(Integer, ForeignKey('command.id', ondelete='cascade'), nullable=False, index=True)
     file_id = Column(Integer, ForeignKey('file.id', ondelete='cascade'), nullable=False)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
@@ -3540,7 +3694,8 @@ class Company(DeclarativeBase):
     id = Column("id", Integer, primary_key=True)
     name = Column(Text, nullable=False, unique=False)
     in_scope = Column("in_scope", Boolean, nullable=False, unique=False, server_default='FALSE')
-    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False)
+    workspace_id = Column(Integer, ForeignKey("workspace.id", ondelete='cascade'), nullable=False, unique=False,
+                          index=True)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
     last_modified = Column(DateTime, nullable=True, onupdate=datetime.utcnow())
     domain_names = relationship("DomainName",
@@ -3922,7 +4077,8 @@ class TlsInfoCipherSuiteMapping(DeclarativeBase):
     cipher_suite_id = Column("cipher_suite_id",
                              Integer,
                              ForeignKey('cipher_suite.id', ondelete='cascade'),
-                             nullable=False)
+                             nullable=False,
+                             index=True)
     tls_info_id = Column("tls_info_id",
                          Integer,
                          ForeignKey('tls_info.id', ondelete='cascade'),
@@ -4173,6 +4329,88 @@ class CipherSuites(list):
                                         security=CipherSuiteSecurity[value["security"]]))
 
 
+class CipherSuiteIndex:
+    """
+    This class implements a process-wide, read-only index of table cipher_suite. As the cipher suites are static
+    reference data (see class CipherSuites), the table is queried only once per process and afterwards, the IDs of the
+    cipher suites are looked up in memory by their IANA, OpenSSL, or GnuTLS name or by their byte pair.
+    """
+
+    _lock = threading.Lock()
+    _index = None
+
+    @classmethod
+    def _get_index(cls, session) -> MappingProxyType:
+        """
+        This method returns the index and loads it, if it does not exist yet.
+        :param session: Sqlalchemy session that is used to load the index
+        :return:
+        """
+        with cls._lock:
+            if cls._index is None:
+                index = {"iana_name": {}, "openssl_name": {}, "gnutls_name": {}, "bytes": {}}
+                for cipher_suite_id, iana_name, openssl_name, gnutls_name, byte_1, byte_2 in \
+                        session.query(CipherSuite.id,
+                                      CipherSuite.iana_name,
+                                      CipherSuite.openssl_name,
+                                      CipherSuite.gnutls_name,
+                                      CipherSuite.byte_1,
+                                      CipherSuite.byte_2):
+                    index["iana_name"][iana_name] = cipher_suite_id
+                    index["bytes"][(byte_1, byte_2)] = cipher_suite_id
+                    if openssl_name:
+                        index["openssl_name"][openssl_name] = cipher_suite_id
+                    if gnutls_name:
+                        index["gnutls_name"][gnutls_name] = cipher_suite_id
+                result = MappingProxyType({key: MappingProxyType(value) for key, value in index.items()})
+                # An empty index is not kept as the cipher suites might not be loaded yet
+                if not index["iana_name"]:
+                    return result
+                cls._index = result
+            return cls._index
+
+    @classmethod
+    def get_id(cls,
+               session,
+               iana_name: str = None,
+               openssl_name: str = None,
+               gnutls_name: str = None,
+               byte_1: int = None,
+               byte_2: int = None) -> int:
+        """
+        This method returns the ID of the cipher suite with the given name or byte pair.
+        :param session: Sqlalchemy session that is used to load the index
+        :param iana_name: The cipher suite string in the IANA format
+        :param openssl_name: The cipher suite string in the OpenSSL format
+        :param gnutls_name: The cipher suite string in the GNU TLS format
+        :param byte_1: The first byte of the cipher suite's byte pair
+        :param byte_2: The second byte of the cipher suite's byte pair
+        :return: The ID of the cipher suite or None, if it does not exist
+        """
+        index = cls._get_index(session)
+        if iana_name:
+            result = index["iana_name"].get(iana_name)
+        elif openssl_name:
+            result = index["openssl_name"].get(openssl_name)
+        elif gnutls_name:
+            result = index["gnutls_name"].get(gnutls_name)
+        elif byte_1 is not None and byte_2 is not None:
+            result = index["bytes"].get((byte_1, byte_2))
+        else:
+            raise ValueError("at least one of the parameters is mandatory: iana_name, openssl_name, gnutls_name, or "
+                             "byte_1 and byte_2")
+        return result
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        This method removes the index. It is called when the database is initialized or dropped, as the IDs of the
+        cipher suites might change.
+        """
+        with cls._lock:
+            cls._index = None
+
+
 class VHostNameMapping(DeclarativeBase):
     """
     This class stores vhost relationships between host names and services.
@@ -4182,8 +4420,8 @@ class VHostNameMapping(DeclarativeBase):
     __mapper_args__ = {'confirm_deleted_rows': False}
     id = Column(Integer, primary_key=True)
     service_id = Column(Integer, ForeignKey('service.id', ondelete='cascade'), nullable=False)
-    host_name_id = Column(Integer, ForeignKey('host_name.id', ondelete='cascade'), nullable=True)
-    host_id = Column(Integer, ForeignKey('host.id', ondelete='cascade'), nullable=True)
+    host_name_id = Column(Integer, ForeignKey('host_name.id', ondelete='cascade'), nullable=True, index=True)
+    host_id = Column(Integer, ForeignKey('host.id', ondelete='cascade'), nullable=True, index=True)
     return_code = Column(Integer, nullable=True)
     size_bytes = Column(Integer, nullable=True, unique=False)
     creation_date = Column(DateTime, nullable=False, default=datetime.utcnow())
@@ -0,0 +1,1733 @@
+--
+-- Name: host ix_host_address_inet_ops; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_host_address_inet_ops ON public.host USING gist (address inet_ops);
+
+
+--
+-- Name: network ix_network_address_inet_ops; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_network_address_inet_ops ON public.network USING gist (address inet_ops);
+
+
+--
+-- Name: additional_info ix_additional_info_company_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_additional_info_company_id ON public.additional_info USING btree (company_id);
+
+
+--
+-- Name: additional_info ix_additional_info_email_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_additional_info_email_id ON public.additional_info USING btree (email_id);
+
+
+--
+-- Name: additional_info ix_additional_info_host_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_additional_info_host_id ON public.additional_info USING btree (host_id);
+
+
+--
+-- Name: additional_info ix_additional_info_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_additional_info_host_name_id ON public.additional_info USING btree (host_name_id);
+
+
+--
+-- Name: additional_info ix_additional_info_network_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_additional_info_network_id ON public.additional_info USING btree (network_id);
+
+
+--
+-- Name: additional_info ix_additional_info_service_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_additional_info_service_id ON public.additional_info USING btree (service_id);
+
+
+--
+-- Name: command ix_command_collector_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_collector_name_id ON public.command USING btree (collector_name_id);
+
+
+--
+-- Name: command ix_command_company_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_company_id ON public.command USING btree (company_id);
+
+
+--
+-- Name: command ix_command_email_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_email_id ON public.command USING btree (email_id);
+
+
+--
+-- Name: command ix_command_host_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_host_id ON public.command USING btree (host_id);
+
+
+--
+-- Name: command ix_command_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_host_name_id ON public.command USING btree (host_name_id);
+
+
+--
+-- Name: command ix_command_network_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_network_id ON public.command USING btree (network_id);
+
+
+--
+-- Name: command ix_command_service_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_service_id ON public.command USING btree (service_id);
+
+
+--
+-- Name: command ix_command_workspace_id_status; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_workspace_id_status ON public.command USING btree (workspace_id, status);
+
+
+--
+-- Name: command ix_command_incomplete_status; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_incomplete_status ON public.command USING btree (status) WHERE (status = ANY (ARRAY['pending'::public.commandstatus, 'collecting'::public.commandstatus]));
+
+
+--
+-- Name: command_file_mapping ix_command_file_mapping_command_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_file_mapping_command_id ON public.command_file_mapping USING btree (command_id);
+
+
+--
+-- Name: company ix_company_workspace_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_company_workspace_id ON public.company USING btree (workspace_id);
+
+
+--
+-- Name: company_domain_name_mapping ix_company_domain_name_mapping_domain_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_company_domain_name_mapping_domain_name_id ON public.company_domain_name_mapping USING btree (domain_name_id);
+
+
+--
+-- Name: company_network_mapping ix_company_network_mapping_network_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_company_network_mapping_network_id ON public.company_network_mapping USING btree (network_id);
+
+
+--
+-- Name: credential ix_credential_email_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_credential_email_id ON public.credential USING btree (email_id);
+
+
+--
+-- Name: credential ix_credential_service_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_credential_service_id ON public.credential USING btree (service_id);
+
+
+--
+-- Name: domain_name ix_domain_name_workspace_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_domain_name_workspace_id ON public.domain_name USING btree (workspace_id);
+
+
+--
+-- Name: email ix_email_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_email_host_name_id ON public.email USING btree (host_name_id);
+
+
+--
+-- Name: file ix_file_workspace_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_file_workspace_id ON public.file USING btree (workspace_id);
+
+
+--
+-- Name: host ix_host_network_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_host_network_id ON public.host USING btree (network_id);
+
+
+--
+-- Name: host_host_name_mapping ix_host_host_name_mapping_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_host_host_name_mapping_host_name_id ON public.host_host_name_mapping USING btree (host_name_id);
+
+
+--
+-- Name: host_name ix_host_name_domain_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_host_name_domain_name_id ON public.host_name USING btree (domain_name_id);
+
+
+--
+-- Name: host_name_host_name_mapping ix_host_name_host_name_mapping_resolved_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_host_name_host_name_mapping_resolved_host_name_id ON public.host_name_host_name_mapping USING btree (resolved_host_name_id);
+
+
+--
+-- Name: host_name_mapping ix_host_name_mapping_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_host_name_mapping_host_name_id ON public.host_name_mapping USING btree (host_name_id);
+
+
+--
+-- Name: http_query ix_http_query_path_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_http_query_path_id ON public.http_query USING btree (path_id);
+
+
+--
+-- Name: network ix_network_workspace_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_network_workspace_id ON public.network USING btree (workspace_id);
+
+
+--
+-- Name: path ix_path_service_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_path_service_id ON public.path USING btree (service_id);
+
+
+--
+-- Name: service ix_service_host_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_host_id ON public.service USING btree (host_id);
+
+
+--
+-- Name: service ix_service_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_host_name_id ON public.service USING btree (host_name_id);
+
+
+--
+-- Name: service_method ix_service_method_service_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_method_service_id ON public.service_method USING btree (service_id);
+
+
+--
+-- Name: source_additional_info_mapping ix_source_additional_info_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_additional_info_mapping_source_id ON public.source_additional_info_mapping USING btree (source_id);
+
+
+--
+-- Name: source_cert_info_mapping ix_source_cert_info_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_cert_info_mapping_source_id ON public.source_cert_info_mapping USING btree (source_id);
+
+
+--
+-- Name: source_company_mapping ix_source_company_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_company_mapping_source_id ON public.source_company_mapping USING btree (source_id);
+
+
+--
+-- Name: source_credential_mapping ix_source_credential_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_credential_mapping_source_id ON public.source_credential_mapping USING btree (source_id);
+
+
+--
+-- Name: source_email_mapping ix_source_email_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_email_mapping_source_id ON public.source_email_mapping USING btree (source_id);
+
+
+--
+-- Name: source_host_host_name_mapping ix_source_host_host_name_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_host_host_name_mapping_source_id ON public.source_host_host_name_mapping USING btree (source_id);
+
+
+--
+-- Name: source_host_mapping ix_source_host_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_host_mapping_source_id ON public.source_host_mapping USING btree (source_id);
+
+
+--
+-- Name: source_host_name_host_name_mapping ix_source_host_name_host_name_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_host_name_host_name_mapping_source_id ON public.source_host_name_host_name_mapping USING btree (source_id);
+
+
+--
+-- Name: source_host_name_mapping ix_source_host_name_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_host_name_mapping_source_id ON public.source_host_name_mapping USING btree (source_id);
+
+
+--
+-- Name: source_network_mapping ix_source_network_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_network_mapping_source_id ON public.source_network_mapping USING btree (source_id);
+
+
+--
+-- Name: source_path_mapping ix_source_path_mapping_path_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_path_mapping_path_id ON public.source_path_mapping USING btree (path_id);
+
+
+--
+-- Name: source_path_mapping ix_source_path_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_path_mapping_source_id ON public.source_path_mapping USING btree (source_id);
+
+
+--
+-- Name: source_service_mapping ix_source_service_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_service_mapping_source_id ON public.source_service_mapping USING btree (source_id);
+
+
+--
+-- Name: source_service_method_mapping ix_source_service_method_mapping_service_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_service_method_mapping_service_name_id ON public.source_service_method_mapping USING btree (service_name_id);
+
+
+--
+-- Name: source_service_method_mapping ix_source_service_method_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_service_method_mapping_source_id ON public.source_service_method_mapping USING btree (source_id);
+
+
+--
+-- Name: source_tls_info_cipher_suite_mapping ix_source_tls_info_cipher_suite_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_tls_info_cipher_suite_mapping_source_id ON public.source_tls_info_cipher_suite_mapping USING btree (source_id);
+
+
+--
+-- Name: source_vhost_name_mapping ix_source_vhost_name_mapping_source_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_source_vhost_name_mapping_source_id ON public.source_vhost_name_mapping USING btree (source_id);
+
+
+--
+-- Name: tls_info_cipher_suite_mapping ix_tls_info_cipher_suite_mapping_cipher_suite_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_tls_info_cipher_suite_mapping_cipher_suite_id ON public.tls_info_cipher_suite_mapping USING btree (cipher_suite_id);
+
+
+--
+-- Name: vhost_name_mapping ix_vhost_name_mapping_host_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_vhost_name_mapping_host_id ON public.vhost_name_mapping USING btree (host_id);
+
+
+--
+-- Name: vhost_name_mapping ix_vhost_name_mapping_host_name_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_vhost_name_mapping_host_name_id ON public.vhost_name_mapping USING btree (host_name_id);
+
+
+--
+-- Name: pre_update_network_scopes_after_network_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.pre_update_network_scopes_after_network_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+            network inet;
+            scope scopetype;
+            net_id integer;
+        BEGIN
+            -- RAISE NOTICE 'BEGIN PRE NETWORK: TG_OP = %, address = %, new scope = % old scope = %', TG_OP, NEW.address, NEW.scope, OLD.scope;
+            -- This trigger performs consistency checks as well as updates the scope of the current network
+            -- accordingly.
+            IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
+                IF COALESCE(NEW.scope, 'exclude') = 'vhost' AND
+                   EXISTS(SELECT * FROM domain_name d
+                            WHERE d.workspace_id = NEW.workspace_id AND
+                                  COALESCE(d.scope, 'exclude') = 'vhost') THEN
+                    RAISE EXCEPTION 'scope vhost cannot be set at domain and network level at the same time';
+                ELSIF (TG_OP = 'UPDATE' AND OLD.address <> NEW.address) THEN
+                    RAISE EXCEPTION 'changing the networks address (%) is not allowed as it might make scoping
+                                     inconsistent.', OLD.address;
+                ELSIF (NEW.scope IS NOT NULL) THEN
+                    -- If the current networks scope is explicitly set (NEW.scope IS NOT NULL), then check whether
+                    -- there is a scope contradiction with a parent network.
+                    SELECT n.address, n.scope INTO network, scope FROM network n
+                        WHERE n.workspace_id = NEW.workspace_id AND
+                              n.address >> NEW.address AND
+                              n.scope IS NOT NULL AND
+                              n.scope <> 'strict' AND -- inserting strict and exclude as parent networks is valid
+                              n.scope <> 'exclude' AND
+                              n.scope <> NEW.scope
+                        LIMIT 1;
+                    IF network IS NOT NULL THEN
+                        -- If a scope contradiction exists, then raise an exception
+                        RAISE EXCEPTION 'insert failed because there is the following scope contradiction: Current
+                                         network (%) with scope % cannot be inserted as it has a different
+                                         scope than the parent network % with scope %. update the scope of the
+                                         parent network first or use the same scope as the
+                                         parent network.', NEW.address, NEW.scope, network, scope;
+                    END IF;
+                ELSE
+                    -- If NEW.scope is NULL, then the network was automatically added. In this case, we have to
+                    -- determine whether there is already a parent network with a predefined scope. If there is such a
+                    -- network, then we update NEW.scope.
+                    SELECT n.scope INTO scope FROM network n
+                        WHERE n.workspace_id = NEW.workspace_id AND
+                              n.address >> NEW.address AND
+                              n.scope IS NOT NULL
+                        ORDER BY masklen(n.address) DESC
+                        LIMIT 1;
+                    IF (scope IS NOT NULL) THEN
+                        NEW.scope = scope;
+                    END IF;
+                END IF;
+                RETURN NEW;
+                -- RAISE NOTICE 'END PRE NETWORK: TG_OP = %, address = %, new scope = % old scope = %', TG_OP, NEW.address, NEW.scope, OLD.scope;
+            ELSIF (TG_OP = 'DELETE') THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.pre_update_network_scopes_after_network_changes() OWNER TO kis;
+
+--
+-- Name: post_update_network_scopes_after_network_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_network_scopes_after_network_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+            sub_net inet;
+        BEGIN
+            -- In deferred mode (see Engine.deferred_network_scope), hosts and networks are updated at once by
+            -- function update_network_scopes after the bulk load.
+            IF COALESCE(current_setting('kis.defer_network_scope', True), 'off') = 'on' THEN
+                RETURN NULL;
+            END IF;
+            -- This trigger updates all networks and hosts based on the current network's scope
+            -- RAISE NOTICE 'BEGIN POST NETWORK: TG_OP = %, address = %, new scope = % old scope = %', TG_OP, NEW.address, NEW.scope, OLD.scope;
+            IF (NEW.scope IS NOT NULL) THEN
+                -- Check whether all child networks have already the same scope. If they don't, then we update their
+                -- scope as well.
+                IF (NOT EXISTS(SELECT n.id FROM network n
+                                WHERE n.workspace_id = NEW.workspace_id AND
+                                      n.address >> NEW.address AND
+                                      n.scope IS NOT NULL AND NEW.scope IS NOT NULL
+                                      AND n.scope = NEW.scope)) THEN
+                    UPDATE network n
+                        SET scope = NEW.scope
+                        WHERE n.workspace_id = NEW.workspace_id AND
+                            n.address << NEW.address AND
+                            ((NEW.scope = 'strict' AND n.scope IS NULL) OR NEW.scope <> 'strict');
+                END IF;
+            END IF;
+        
+            IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
+                -- Check whether the network is the smallest network in the network table.
+                SELECT address INTO sub_net FROM network
+                    WHERE address << NEW.address AND
+                          workspace_id = NEW.id
+                    ORDER BY masklen(address) ASC LIMIT 1;
+                IF (sub_net IS NULL) THEN
+                    -- If this is the case, then we assign all hosts within this network to this network.
+                    UPDATE host
+                        SET network_id = NEW.id
+                        WHERE workspace_id = NEW.workspace_id AND address <<= NEW.address;
+                ELSE
+                    -- If not, then we have to assign all hosts that are within the current network and the next
+                    -- closest subnetwork, to the current network.
+                    UPDATE host
+                        SET network_id = NEW.id
+                    WHERE workspace_id = NEW.workspace_id AND
+                        NOT address << sub_net AND
+                        address <<= NEW.address;
+                END IF;
+            END IF;
+            IF TG_OP = 'UPDATE' AND COALESCE(OLD.scope, 'exclude') <> COALESCE(NEW.scope, 'exclude') THEN
+                -- Update scope of all hosts if the scope of the network is updated
+                IF NEW.scope = 'all' THEN
+                    UPDATE host
+                        SET in_scope = True
+                        WHERE network_id = NEW.id;
+                ELSIF COALESCE(NEW.scope, 'exclude') = 'exclude' OR COALESCE(NEW.scope, 'exclude') = 'vhost' THEN
+                    -- In case of vhost, we only have to set all hosts out of scope. The corresponding trigger
+                    -- will then automatically update the scope.
+                    UPDATE host
+                        SET in_scope = False
+                        WHERE network_id = NEW.id;
+                END IF;
+            END IF;
+            -- RAISE NOTICE 'END POST NETWORK: TG_OP = %, address = %, new scope = % old scope = %', TG_OP, NEW.address, NEW.scope, OLD.scope;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_network_scopes_after_network_changes() OWNER TO kis;
+
+--
+-- Name: pre_update_hosts_after_host_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.pre_update_hosts_after_host_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+            network_scope scopetype;
+        BEGIN
+            -- RAISE NOTICE 'BEGIN PRE HOST: TG_OP = %, address = %, new scope = %, old scope = %, network_id = %', TG_OP, NEW.address, NEW.in_scope, OLD.in_scope, NEW.network_id;
+            IF COALESCE(current_setting('kis.defer_network_scope', True), 'off') = 'on' THEN
+                -- In deferred mode, the network and scope is assigned by function update_network_scopes
+                RETURN NEW;
+            ELSIF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
+                -- Usually network assignments are performed when a new network is inserted or updated. If all
+                -- networks, however, are already inserted, then this case ensures that it is inserted to the smallest
+                -- network.
+                SELECT id, scope INTO NEW.network_id, network_scope FROM network
+                    WHERE address >>= NEW.address AND
+                          workspace_id = NEW.workspace_id
+                    ORDER BY masklen(address) DESC
+                    LIMIT 1;
+
+                IF network_scope IS NOT NULL THEN
+                    IF network_scope = 'all' OR 
+                       (network_scope = 'vhost' AND
+                        EXISTS(SELECT * FROM host_host_name_mapping m
+                               INNER JOIN host_name hn ON m.host_name_id = hn.id AND
+                                                          COALESCE(hn.in_scope, FALSE) AND
+                                                          COALESCE(m.type, 4) < 3 AND
+                                                          m.host_id = NEW.id)) THEN
+                        NEW.in_scope = True;
+                    ELSIF network_scope <> 'strict' THEN
+                        NEW.in_scope = False;
+                    END IF;
+                ELSE
+                    NEW.in_scope = False;
+                END IF;
+            END IF;
+            -- RAISE NOTICE 'END PRE HOST: TG_OP = %, address = %, new scope = %, old scope = %, network_id = %', TG_OP, NEW.address, NEW.in_scope, OLD.in_scope, NEW.network_id;
+            RETURN NEW;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.pre_update_hosts_after_host_changes() OWNER TO kis;
+
+--
+-- Name: update_network_scopes(id_workspace integer); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.update_network_scopes(id_workspace integer)
+ RETURNS void
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+            defer_network_scope text;
+            network inet;
+            network_scope scopetype;
+            parent_network inet;
+            parent_scope scopetype;
+        BEGIN
+            -- This function performs the network scope updates of triggers
+            -- post_update_network_scopes_after_network_changes and pre_update_hosts_after_host_changes at once for
+            -- all networks and hosts of the given workspace. It is called after bulk loads in deferred mode (see
+            -- Engine.deferred_network_scope). The result is the same as if all networks were inserted from the
+            -- largest to the smallest network.
+            defer_network_scope := current_setting('kis.defer_network_scope', True);
+            PERFORM set_config('kis.defer_network_scope', 'on', True);
+            -- Check whether there is a scope contradiction with the closest parent network
+            SELECT c.address, c.scope, p.address, p.scope INTO network, network_scope, parent_network, parent_scope
+                FROM network c
+                INNER JOIN LATERAL (SELECT n.address, n.scope FROM network n
+                                    WHERE n.workspace_id = c.workspace_id AND
+                                          n.address >> c.address AND
+                                          n.scope IS NOT NULL
+                                    ORDER BY masklen(n.address) DESC
+                                    LIMIT 1) p ON True
+                WHERE c.workspace_id = id_workspace AND
+                      c.scope IS NOT NULL AND
+                      p.scope <> 'strict' AND
+                      p.scope <> 'exclude' AND
+                      p.scope <> c.scope
+                LIMIT 1;
+            IF network IS NOT NULL THEN
+                RAISE EXCEPTION 'update failed because there is the following scope contradiction: Network (%) with
+                                 scope % has a different scope than the parent network % with scope %. update the
+                                 scope of the parent network first or use the same scope as the parent
+                                 network.', network, network_scope, parent_network, parent_scope;
+            END IF;
+            -- Networks without scope obtain the scope of the closest parent network
+            UPDATE network n
+                SET scope = t.scope
+                FROM (SELECT c.id, (SELECT p.scope FROM network p
+                                    WHERE p.workspace_id = c.workspace_id AND
+                                          p.address >> c.address AND
+                                          p.scope IS NOT NULL
+                                    ORDER BY masklen(p.address) DESC
+                                    LIMIT 1) AS scope
+                      FROM network c
+                      WHERE c.workspace_id = id_workspace AND c.scope IS NULL) t
+                WHERE n.id = t.id AND t.scope IS NOT NULL;
+            -- Hosts are assigned to the smallest network they are part of
+            UPDATE host h
+                SET network_id = t.network_id
+                FROM (SELECT c.id, (SELECT n.id FROM network n
+                                    WHERE n.workspace_id = c.workspace_id AND
+                                          n.address >>= c.address
+                                    ORDER BY masklen(n.address) DESC
+                                    LIMIT 1) AS network_id
+                      FROM host c
+                      WHERE c.workspace_id = id_workspace) t
+                WHERE h.id = t.id AND h.network_id IS DISTINCT FROM t.network_id;
+            -- Finally, the host's scope is updated based on the network's scope
+            UPDATE host h
+                SET in_scope = t.in_scope
+                FROM (SELECT c.id, CASE
+                                     WHEN n.scope = 'all' THEN True
+                                     WHEN n.scope = 'vhost' THEN
+                                         EXISTS(SELECT * FROM host_host_name_mapping m
+                                                INNER JOIN host_name hn ON m.host_name_id = hn.id AND
+                                                                           COALESCE(hn.in_scope, FALSE) AND
+                                                                           COALESCE(m.type, 4) < 3 AND
+                                                                           m.host_id = c.id)
+                                     WHEN n.scope = 'strict' THEN c.in_scope
+                                     ELSE False
+                                   END AS in_scope
+                      FROM host c
+                      LEFT OUTER JOIN network n ON n.id = c.network_id
+                      WHERE c.workspace_id = id_workspace) t
+                WHERE h.id = t.id AND h.in_scope IS DISTINCT FROM t.in_scope;
+            PERFORM set_config('kis.defer_network_scope', COALESCE(defer_network_scope, 'off'), True);
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.update_network_scopes(id_workspace integer) OWNER TO kis;
+
+--
+-- Name: pre_update_host_name_scope(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.pre_update_host_name_scope()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+            domain_scope scopetype;
+        BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the scope is updated by function update_host_name_scopes
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NEW;
+            END IF;
+            -- automatically set host_name's in_scope attribute to true, if domain_name scope is all
+            domain_scope := (SELECT scope FROM domain_name WHERE id = NEW.domain_name_id);
+            IF (domain_scope = 'all' OR
+                (domain_scope = 'vhost' AND
+                 EXISTS(SELECT hn.id FROM host_name hn
+                        INNER JOIN host_host_name_mapping m ON m.host_name_id = hn.id AND
+                                                               hn.id = NEW.id AND
+                                                               COALESCE(m.type, 4) < 3
+                        INNER JOIN host h ON h.id = m.host_id AND
+                                             COALESCE(h.in_scope, False)))) THEN
+                 NEW.in_scope := True;
+            ELSIF (domain_scope = 'exclude') THEN
+                NEW.in_scope := False;
+            END IF;
+            RETURN NEW;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.pre_update_host_name_scope() OWNER TO kis;
+
+--
+-- Name: post_update_scopes_after_host_host_name_mapping_update(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_scopes_after_host_host_name_mapping_update()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+            current_host_name_id INTEGER;
+            current_host_id INTEGER;
+            current_type INTEGER;
+            domain_scope scopetype;
+            network_scope scopetype;
+            host_name_record_count INTEGER;
+            host_record_count INTEGER;
+        BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the scopes are updated by functions update_host_name_scopes and
+            -- update_network_scopes
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                current_host_id = OLD.host_id;
+                current_host_name_id = OLD.host_name_id;
+                current_type = OLD.type;
+            ELSE
+                current_host_id = NEW.host_id;
+                current_host_name_id = NEW.host_name_id;
+                current_type = NEW.type;
+            END IF;
+            -- RAISE NOTICE 'BEGIN POST HOST_HOST_NAME_MAPPING: TG_OP = %, host_id = %, host_name_id = %', TG_OP, current_host_id, current_host_name_id;
+            IF COALESCE(current_type, 4) < 3 THEN
+                -- Determine the domain scope settings
+                SELECT d.scope INTO domain_scope FROM domain_name d
+                    INNER JOIN host_name h ON d.id = h.domain_name_id AND h.id = current_host_name_id;
+                -- Determine the host scope settings
+                SELECT n.scope INTO network_scope FROM host h
+                    INNER JOIN network n ON n.id = h.network_id AND h.id = current_host_id;
+                   
+                -- Determine if the current host name still has an A or AAAA relationship to a in scope host.
+                host_name_record_count := (SELECT COUNT(*) FROM host_name hn
+                    INNER JOIN host_host_name_mapping m ON hn.id = m.host_name_id AND
+                                                           hn.id = current_host_name_id AND
+                                                           COALESCE(m.type, 4) < 3
+                    INNER JOIN domain_name dn ON dn.scope = 'vhost' AND dn.id = hn.domain_name_id
+                    INNER JOIN host h ON h.id = m.host_id AND h.in_scope IS NOT NULL AND h.in_scope);
+                -- Determine if the current host still has an A or AAAA relationship to a in scope host.
+                host_record_count := (SELECT COUNT(*) FROM host h
+                    INNER JOIN host_host_name_mapping m ON h.id = m.host_id AND
+                                                           h.id = current_host_id AND
+                                                           COALESCE(m.type, 4) < 3
+                    INNER JOIN network n ON n.scope = 'vhost' AND n.id = h.network_id
+                    INNER JOIN host_name hn ON hn.id = m.host_name_id AND COALESCE(hn.in_scope, False));
+                -- RAISE NOTICE '  network_scope = %, host_record_count = %', network_scope, COALESCE(host_record_count, 0);
+                
+                -- If we have a domain scope of type vhost and an in scope host, then we have to put the host_name in scope
+                IF COALESCE(domain_scope, 'exclude') = 'vhost' THEN
+                    UPDATE host_name SET in_scope = COALESCE(host_name_record_count, 0) > 0
+                        WHERE id = current_host_name_id;
+                END IF;
+                IF COALESCE(network_scope, 'exclude') = 'vhost' THEN
+                    UPDATE host SET in_scope = COALESCE(host_record_count, 0) > 0
+                        WHERE id = current_host_id;
+                END IF;
+                -- RAISE NOTICE 'END POST HOST_HOST_NAME_MAPPING: TG_OP = %, host_id = %, host_name_id = %', TG_OP, current_host_id, current_host_name_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_scopes_after_host_host_name_mapping_update() OWNER TO kis;
+
+--
+-- Name: assign_services_to_host_name(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.assign_services_to_host_name()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+        host_service_cursor CURSOR(id_host integer) FOR SELECT * FROM service WHERE service.host_id = id_host;
+        host_name_service_cursor CURSOR(id_host_name integer) FOR SELECT * FROM service WHERE service.host_name_id = id_host_name;
+        current_row service%ROWTYPE;
+        BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the services are synchronized by function add_mapped_services
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
+            IF (NEW.type & 1) = 1 OR (NEW.type & 2) = 2 THEN
+                -- 1. Sync host services to host name
+                OPEN host_service_cursor(NEW.host_id);
+                LOOP
+                    FETCH host_service_cursor INTO current_row;
+                    EXIT WHEN NOT FOUND;
+                    IF (NOT EXISTS(SELECT * FROM service WHERE protocol = current_row.protocol AND port = current_row.port AND host_name_id = NEW.host_name_id)) THEN
+                        INSERT INTO service (host_name_id,
+                                             protocol,
+                                             port,
+                                             nmap_service_name, 
+                                             nessus_service_name, 
+                                             nmap_service_confidence, 
+                                             nessus_service_confidence, 
+                                             nmap_service_name_original,
+                                             state,
+                                             nmap_service_state_reason, 
+                                             nmap_product,
+                                             nmap_version,
+                                             nmap_tunnel, 
+                                             nmap_os_type, 
+                                             creation_date) VALUES (NEW.host_name_id,
+                                                                    current_row.protocol,
+                                                                    current_row.port,
+                                                                    current_row.nmap_service_name,
+                                                                    current_row.nessus_service_name,
+                                                                    current_row.nmap_service_confidence,
+                                                                    current_row.nessus_service_confidence,
+                                                                    current_row.nmap_service_name_original,
+                                                                    current_row.state,
+                                                                    current_row.nmap_service_state_reason,
+                                                                    current_row.nmap_product,
+                                                                    current_row.nmap_version,
+                                                                    current_row.nmap_tunnel,
+                                                                    current_row.nmap_os_type,
+                                                                    NOW());
+                    END IF;
+                END LOOP;
+                CLOSE host_service_cursor;
+
+                -- 2. Sync host name services to host
+                OPEN host_name_service_cursor(NEW.host_name_id);
+                LOOP
+                    FETCH host_name_service_cursor INTO current_row;
+                    EXIT WHEN NOT FOUND;
+                    IF (NOT EXISTS(SELECT * FROM service WHERE protocol = current_row.protocol AND port = current_row.port AND host_id = NEW.host_id)) THEN
+                        INSERT INTO service (host_id,
+                                             protocol,
+                                             port,
+                                             nmap_service_name,
+                                             nessus_service_name,
+                                             nmap_service_confidence,
+                                             nessus_service_confidence,
+                                             nmap_service_name_original,
+                                             state,
+                                             nmap_service_state_reason,
+                                             nmap_product,
+                                             nmap_version,
+                                             nmap_tunnel,
+                                             nmap_os_type,
+                                             creation_date) VALUES (NEW.host_id,
+                                                                    current_row.protocol,
+                                                                    current_row.port,
+                                                                    current_row.nmap_service_name,
+                                                                    current_row.nessus_service_name,
+                                                                    current_row.nmap_service_confidence,
+                                                                    current_row.nessus_service_confidence,
+                                                                    current_row.nmap_service_name_original,
+                                                                    current_row.state,
+                                                                    current_row.nmap_service_state_reason,
+                                                                    current_row.nmap_product,
+                                                                    current_row.nmap_version,
+                                                                    current_row.nmap_tunnel,
+                                                                    current_row.nmap_os_type,
+                                                                    NOW());
+                    END IF;
+                END LOOP;
+                CLOSE host_name_service_cursor;
+            END IF;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.assign_services_to_host_name() OWNER TO kis;
+
+--
+-- Name: add_services_to_host_name(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.add_services_to_host_name()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+        mapping_host_name_cursor CURSOR(id_service integer) FOR SELECT hhnm.host_name_id FROM
+            host_host_name_mapping hhnm
+            INNER JOIN host ON host.id = hhnm.host_id
+            INNER JOIN service ON service.host_id = host.id
+            INNER JOIN host_name ON host_name.id = hhnm.host_name_id
+            WHERE ((hhnm.type & 1) = 1 OR (hhnm.type & 2) = 2) AND service.id = id_service;
+        id_host_name integer;
+        mapping_host_cursor CURSOR(id_service integer) FOR SELECT hhnm.host_id FROM
+            host_host_name_mapping hhnm
+            INNER JOIN host_name ON host_name.id = hhnm.host_name_id
+            INNER JOIN service ON service.host_name_id = host_name.id
+            INNER JOIN host ON host.id = hhnm.host_id
+            WHERE ((hhnm.type & 1) = 1 OR (hhnm.type & 2) = 2) AND service.id = id_service;
+        id_host integer;
+        BEGIN
+            -- Services that are added by function add_mapped_services are handled like the ones added by trigger
+            -- assign_services_to_host_name (pg_trigger_depth() = 2)
+            IF (pg_trigger_depth() = 1 AND COALESCE(current_setting('kis.bulk_mode', True), 'off') <> 'reconcile') THEN
+                IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
+                    IF (NEW.host_id IS NOT NULL) THEN
+                        OPEN mapping_host_name_cursor(NEW.id);
+                        LOOP
+                            FETCH mapping_host_name_cursor INTO id_host_name;
+                            EXIT WHEN NOT FOUND;
+                            IF (NOT EXISTS(SELECT * FROM service WHERE protocol = NEW.protocol AND port = NEW.port AND host_name_id = id_host_name)) THEN
+                                INSERT INTO service (host_name_id,
+                                                     protocol,
+                                                     port,
+                                                     nmap_service_name,
+                                                     nessus_service_name,
+                                                     nmap_service_confidence,
+                                                     nessus_service_confidence,
+                                                     nmap_service_name_original,
+                                                     state,
+                                                     nmap_service_state_reason,
+                                                     nmap_product,
+                                                     nmap_version,
+                                                     nmap_tunnel,
+                                                     nmap_extra_info,
+                                                     nmap_os_type,
+                                                     creation_date) SELECT id_host_name,
+                                                                           protocol,
+                                                                           port,
+                                                                           nmap_service_name,
+                                                                           nessus_service_name,
+                                                                           nmap_service_confidence,
+                                                                           nessus_service_confidence,
+                                                                           nmap_service_name_original,
+                                                                           state,
+                                                                           nmap_service_state_reason,
+                                                                           nmap_product,
+                                                                           nmap_version,
+                                                                           nmap_tunnel,
+                                                                           nmap_extra_info,
+                                                                           nmap_os_type,
+                                                                           NOW() FROM service WHERE id = NEW.id;
+                            ELSIF (NEW.host_id = OLD.host_id AND NEW.protocol = OLD.protocol AND NEW.port = OLD.port) THEN
+                                UPDATE service
+                                SET protocol = t.protocol,
+                                    port = t.port,
+                                    nmap_service_name = t.nmap_service_name,
+                                    nessus_service_name = t.nessus_service_name,
+                                    nmap_service_confidence = t.nmap_service_confidence,
+                                    nessus_service_confidence = t.nessus_service_confidence,
+                                    nmap_service_name_original = t.nmap_service_name_original,
+                                    state = t.state,
+                                    nmap_service_state_reason = t.nmap_service_state_reason,
+                                    nmap_product = t.nmap_product,
+                                    nmap_version = t.nmap_version,
+                                    nmap_tunnel = t.nmap_tunnel,
+                                    nmap_extra_info = t.nmap_extra_info,
+                                    nmap_os_type = t.nmap_os_type
+                                FROM service AS s
+                                JOIN (SELECT id_host_name AS host_name_id,
+                                             protocol,
+                                             port,
+                                             nmap_service_name,
+                                             nessus_service_name,
+                                             nmap_service_confidence,
+                                             nessus_service_confidence,
+                                             nmap_service_name_original,
+                                             state,
+                                             nmap_service_state_reason,
+                                             nmap_product,
+                                             nmap_version,
+                                             nmap_tunnel,
+                                             nmap_extra_info,
+                                             nmap_os_type FROM service WHERE id = NEW.id) AS t ON t.host_name_id = s.host_name_id AND
+                                                                                                  t.port = s.port AND
+                                                                                                  t.protocol = s.protocol
+                                WHERE service.id = s.id;
+                            END IF;
+                        END LOOP;
+                        CLOSE mapping_host_name_cursor;
+                    ELSIF (NEW.host_name_id IS NOT NULL) THEN
+                        OPEN mapping_host_cursor(NEW.id);
+                        LOOP
+                            FETCH mapping_host_cursor INTO id_host;
+                            EXIT WHEN NOT FOUND;
+                            IF (NOT EXISTS(SELECT * FROM service WHERE protocol = NEW.protocol AND port = NEW.port AND host_id = id_host)) THEN
+                                INSERT INTO service (host_id,
+                                                     protocol,
+                                                     port,
+                                                     nmap_service_name,
+                                                     nessus_service_name,
+                                                     nmap_service_confidence,
+                                                     nessus_service_confidence,
+                                                     nmap_service_name_original,
+                                                     state,
+                                                     nmap_service_state_reason,
+                                                     nmap_product,
+                                                     nmap_version,
+                                                     nmap_tunnel,
+                                                     nmap_extra_info,
+                                                     nmap_os_type,
+                                                     creation_date) SELECT id_host,
+                                                                           protocol,
+                                                                           port,
+                                                                           nmap_service_name,
+                                                                           nessus_service_name,
+                                                                           nmap_service_confidence,
+                                                                           nessus_service_confidence,
+                                                                           nmap_service_name_original,
+                                                                           state,
+                                                                           nmap_service_state_reason,
+                                                                           nmap_product,
+                                                                           nmap_version,
+                                                                           nmap_tunnel,
+                                                                           nmap_extra_info,
+                                                                           nmap_os_type,
+                                                                           NOW() FROM service WHERE id = NEW.id;
+                            ELSIF (NEW.host_name_id = OLD.host_name_id AND NEW.protocol = OLD.protocol AND NEW.port = OLD.port) THEN
+                                UPDATE service
+                                SET protocol = t.protocol,
+                                    port = t.port,
+                                    nmap_service_name = t.nmap_service_name,
+                                    nessus_service_name = t.nessus_service_name,
+                                    nmap_service_confidence = t.nmap_service_confidence,
+                                    nessus_service_confidence = t.nessus_service_confidence,
+                                    nmap_service_name_original = t.nmap_service_name_original,
+                                    state = t.state,
+                                    nmap_service_state_reason = t.nmap_service_state_reason,
+                                    nmap_product = t.nmap_product,
+                                    nmap_version = t.nmap_version,
+                                    nmap_tunnel = t.nmap_tunnel,
+                                    nmap_extra_info = t.nmap_extra_info,
+                                    nmap_os_type = t.nmap_os_type
+                                FROM service AS s
+                                JOIN (SELECT id_host AS host_id,
+                                             protocol,
+                                             port,
+                                             nmap_service_name,
+                                             nessus_service_name,
+                                             nmap_service_confidence,
+                                             nessus_service_confidence,
+                                             nmap_service_name_original,
+                                             state,
+                                             nmap_service_state_reason,
+                                             nmap_product,
+                                             nmap_version,
+                                             nmap_tunnel,
+                                             nmap_extra_info,
+                                             nmap_os_type FROM service WHERE id = NEW.id) AS t ON t.host_id = s.host_id AND
+                                                                                                  t.port = s.port AND
+                                                                                                  t.protocol = s.protocol
+                                WHERE service.id = s.id;
+                            END IF;
+                        END LOOP;
+                        CLOSE mapping_host_cursor;
+                    END IF;
+
+                    -- If web service, then add the default path '/' to the path table
+                    IF (NEW.state = 'Open' AND NEW.protocol = 'tcp' AND
+                        (NEW.nmap_service_name IN ('ssl|http', 'http', 'https', 'http-alt', 'https-alt', 'http-proxy', 'https-proxy', 'sgi-soap', 'caldav') OR
+                         NEW.nessus_service_name IN ('www', 'http', 'https', 'http-alt', 'https-alt', 'pcsync-http', 'pcsync-https', 'homepage', 'greenbone-administrator', 'openvas-administrator') OR
+                         NEW.port = 80 OR NEW.port = 443) AND
+                        NOT EXISTS(SELECT * FROM path WHERE service_id = NEW.id AND name = '/')) THEN
+                        INSERT INTO path (service_id, name, type, creation_date) VALUES (NEW.id, '/', 'http', NOW());
+                    END IF;
+                ELSIF (TG_OP = 'DELETE') THEN
+                    RAISE NOTICE 'DELETE';
+                    IF (OLD.host_id IS NOT NULL) THEN
+                        -- RAISE NOTICE 'DELETE host name service';
+                        -- Check if a host's service was deleted. If so, then delete the corresponding host name service
+                        DELETE FROM service
+                        WHERE id IN (SELECT s.id FROM service s
+                                     INNER JOIN host_name hn ON s.host_name_id = hn.id
+                                     INNER JOIN host_host_name_mapping hhnm ON hhnm.host_name_id = hn.id AND ((hhnm.type & 1) = 1 OR (hhnm.type & 2) = 2)
+                                     INNER JOIN host h ON hhnm.host_id = h.id
+                                     WHERE s.protocol = OLD.protocol AND s.port = OLD.port AND h.id = OLD.host_id);
+                    ELSIF (OLD.host_name_id IS NOT NULL) THEN
+                        -- RAISE NOTICE 'DELETE host name service';
+                        -- Check if a host's service was deleted. If so, then delete the corresponding host name service
+                        DELETE FROM service
+                        WHERE id IN (SELECT s.id FROM service s
+                                     INNER JOIN host h ON s.host_id = h.id
+                                     INNER JOIN host_host_name_mapping hhnm ON hhnm.host_id = h.id AND ((hhnm.type & 1) = 1 OR (hhnm.type & 2) = 2)
+                                     INNER JOIN host_name hn ON hhnm.host_name_id = hn.id
+                                     WHERE s.protocol = OLD.protocol AND s.port = OLD.port AND hn.id = OLD.host_name_id);
+                    END IF;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.add_services_to_host_name() OWNER TO kis;
+
+--
+-- Name: update_host_name_scopes(id_workspace integer); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.update_host_name_scopes(id_workspace integer)
+ RETURNS void
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            -- This function performs the scope updates of triggers pre_update_host_name_scope and
+            -- post_update_scopes_after_host_host_name_mapping_update at once for all host names of the given
+            -- workspace. It is called after bulk loads in bulk mode (see Engine.bulk_mode).
+            UPDATE host_name hn
+                SET in_scope = t.in_scope
+                FROM (SELECT c.id, CASE
+                                     WHEN d.scope = 'all' THEN True
+                                     WHEN d.scope = 'exclude' THEN False
+                                     WHEN d.scope = 'vhost' AND
+                                          EXISTS(SELECT * FROM host_host_name_mapping m
+                                                 WHERE m.host_name_id = c.id AND COALESCE(m.type, 4) < 3) THEN
+                                         EXISTS(SELECT * FROM host_host_name_mapping m
+                                                INNER JOIN host h ON h.id = m.host_id AND COALESCE(h.in_scope, False)
+                                                WHERE m.host_name_id = c.id AND COALESCE(m.type, 4) < 3)
+                                     ELSE c.in_scope
+                                   END AS in_scope
+                      FROM host_name c
+                      INNER JOIN domain_name d ON d.id = c.domain_name_id AND d.workspace_id = id_workspace) t
+                WHERE hn.id = t.id AND hn.in_scope IS DISTINCT FROM t.in_scope;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.update_host_name_scopes(id_workspace integer) OWNER TO kis;
+
+--
+-- Name: add_mapped_services(id_workspace integer); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.add_mapped_services(id_workspace integer)
+ RETURNS void
+ LANGUAGE plpgsql
+AS $function$
+        DECLARE
+            bulk_mode text;
+        BEGIN
+            -- This function performs the service synchronization of trigger assign_services_to_host_name at once for
+            -- all A and AAAA records of the given workspace. It is called after bulk loads in bulk mode (see
+            -- Engine.bulk_mode).
+            bulk_mode := current_setting('kis.bulk_mode', True);
+            PERFORM set_config('kis.bulk_mode', 'reconcile', True);
+            -- 1. Sync host services to host names
+            INSERT INTO service (host_name_id,
+                                 protocol,
+                                 port,
+                                 nmap_service_name,
+                                 nessus_service_name,
+                                 nmap_service_confidence,
+                                 nessus_service_confidence,
+                                 nmap_service_name_original,
+                                 state,
+                                 nmap_service_state_reason,
+                                 nmap_product,
+                                 nmap_version,
+                                 nmap_tunnel,
+                                 nmap_os_type,
+                                 creation_date)
+                SELECT DISTINCT ON (m.host_name_id, s.protocol, s.port) m.host_name_id,
+                                                                        s.protocol,
+                                                                        s.port,
+                                                                        s.nmap_service_name,
+                                                                        s.nessus_service_name,
+                                                                        s.nmap_service_confidence,
+                                                                        s.nessus_service_confidence,
+                                                                        s.nmap_service_name_original,
+                                                                        s.state,
+                                                                        s.nmap_service_state_reason,
+                                                                        s.nmap_product,
+                                                                        s.nmap_version,
+                                                                        s.nmap_tunnel,
+                                                                        s.nmap_os_type,
+                                                                        NOW()
+                FROM host_host_name_mapping m
+                INNER JOIN host h ON h.id = m.host_id AND h.workspace_id = id_workspace
+                INNER JOIN service s ON s.host_id = m.host_id
+                WHERE ((m.type & 1) = 1 OR (m.type & 2) = 2) AND
+                      NOT EXISTS(SELECT * FROM service e
+                                 WHERE e.host_name_id = m.host_name_id AND
+                                       e.protocol = s.protocol AND
+                                       e.port = s.port)
+                ORDER BY m.host_name_id, s.protocol, s.port, m.id;
+            -- 2. Sync host name services to hosts
+            INSERT INTO service (host_id,
+                                 protocol,
+                                 port,
+                                 nmap_service_name,
+                                 nessus_service_name,
+                                 nmap_service_confidence,
+                                 nessus_service_confidence,
+                                 nmap_service_name_original,
+                                 state,
+                                 nmap_service_state_reason,
+                                 nmap_product,
+                                 nmap_version,
+                                 nmap_tunnel,
+                                 nmap_os_type,
+                                 creation_date)
+                SELECT DISTINCT ON (m.host_id, s.protocol, s.port) m.host_id,
+                                                                   s.protocol,
+                                                                   s.port,
+                                                                   s.nmap_service_name,
+                                                                   s.nessus_service_name,
+                                                                   s.nmap_service_confidence,
+                                                                   s.nessus_service_confidence,
+                                                                   s.nmap_service_name_original,
+                                                                   s.state,
+                                                                   s.nmap_service_state_reason,
+                                                                   s.nmap_product,
+                                                                   s.nmap_version,
+                                                                   s.nmap_tunnel,
+                                                                   s.nmap_os_type,
+                                                                   NOW()
+                FROM host_host_name_mapping m
+                INNER JOIN host h ON h.id = m.host_id AND h.workspace_id = id_workspace
+                INNER JOIN service s ON s.host_name_id = m.host_name_id
+                WHERE ((m.type & 1) = 1 OR (m.type & 2) = 2) AND
+                      NOT EXISTS(SELECT * FROM service e
+                                 WHERE e.host_id = m.host_id AND
+                                       e.protocol = s.protocol AND
+                                       e.port = s.port)
+                ORDER BY m.host_id, s.protocol, s.port, m.id;
+            PERFORM set_config('kis.bulk_mode', COALESCE(bulk_mode, 'off'), True);
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.add_mapped_services(id_workspace integer) OWNER TO kis;
+
+--
+-- Name: command_search_index; Type: TABLE; Schema: public; Owner: kis
+--
+
+CREATE TABLE IF NOT EXISTS public.command_search_index (
+    command_id integer NOT NULL,
+    search_vector tsvector,
+    CONSTRAINT command_search_index_pkey PRIMARY KEY (command_id),
+    CONSTRAINT command_search_index_command_id_fkey FOREIGN KEY (command_id) REFERENCES public.command(id) ON DELETE CASCADE
+);
+
+
+ALTER TABLE public.command_search_index OWNER TO kis;
+
+--
+-- Name: command_search_index ix_command_search_index_search_vector; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_command_search_index_search_vector ON public.command_search_index USING gin (search_vector);
+
+
+--
+-- Name: command_search_text(output text); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.command_search_text(output text)
+ RETURNS text
+ LANGUAGE sql
+ IMMUTABLE
+AS $function$
+            -- This function normalises the given collector output for the search index (see column
+            -- command_search_index.search_vector). ANSI escape sequences are removed and all words are separated by
+            -- spaces. Thereby, for example, Apache/2.4.41 is indexed as the words Apache, 2, 4, and 41.
+            SELECT regexp_replace(regexp_replace(output, '\x1b\[[0-9;]*[A-Za-z]', '', 'g'), '[^0-9A-Za-z]+', ' ', 'g');
+        $function$;
+
+
+ALTER FUNCTION public.command_search_text(output text) OWNER TO kis;
+
+--
+-- Name: command_search_vector(output text); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.command_search_vector(output text)
+ RETURNS tsvector
+ LANGUAGE plpgsql
+ IMMUTABLE
+AS $function$
+        BEGIN
+            -- This function computes the search index over the given collector output (see column
+            -- command_search_index.search_vector). The word positions are stripped, as matching lines are determined
+            -- when querying the index. If the output is too large for a TSVECTOR, then NULL is returned and the output
+            -- is searched without index.
+            RETURN strip(to_tsvector('simple', command_search_text(output)));
+        EXCEPTION WHEN program_limit_exceeded THEN
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.command_search_vector(output text) OWNER TO kis;
+
+--
+-- Name: service_summary; Type: TABLE; Schema: public; Owner: kis
+--
+
+CREATE TABLE IF NOT EXISTS public.service_summary (
+    id serial NOT NULL,
+    host_id integer NOT NULL,
+    host_service_id integer NOT NULL,
+    host_host_name_mapping_id integer,
+    host_name_service_id integer,
+    CONSTRAINT service_summary_pkey PRIMARY KEY (id),
+    CONSTRAINT service_summary_host_id_fkey FOREIGN KEY (host_id) REFERENCES public.host(id) ON DELETE CASCADE,
+    CONSTRAINT service_summary_host_service_id_fkey FOREIGN KEY (host_service_id) REFERENCES public.service(id) ON DELETE CASCADE,
+    CONSTRAINT service_summary_host_host_name_mapping_id_fkey FOREIGN KEY (host_host_name_mapping_id) REFERENCES public.host_host_name_mapping(id) ON DELETE CASCADE,
+    CONSTRAINT service_summary_host_name_service_id_fkey FOREIGN KEY (host_name_service_id) REFERENCES public.service(id) ON DELETE CASCADE
+);
+
+
+ALTER TABLE public.service_summary OWNER TO kis;
+
+--
+-- Name: service_summary ix_service_summary_host_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_summary_host_id ON public.service_summary USING btree (host_id);
+
+
+--
+-- Name: service_summary ix_service_summary_host_service_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_summary_host_service_id ON public.service_summary USING btree (host_service_id);
+
+
+--
+-- Name: service_summary ix_service_summary_host_host_name_mapping_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_summary_host_host_name_mapping_id ON public.service_summary USING btree (host_host_name_mapping_id);
+
+
+--
+-- Name: service_summary ix_service_summary_host_name_service_id; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_summary_host_name_service_id ON public.service_summary USING btree (host_name_service_id);
+
+
+--
+-- Name: update_service_summary_of_hosts(host_ids integer[]); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.update_service_summary_of_hosts(host_ids integer[])
+ RETURNS void
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            -- This function recomputes the rows of table service_summary for the given hosts. Each host service is
+            -- paired with the host name services on the same port and protocol of all host names that resolve to the
+            -- host (A and AAAA records).
+            DELETE FROM service_summary WHERE host_id = ANY(host_ids);
+            INSERT INTO service_summary (host_id, host_service_id, host_host_name_mapping_id, host_name_service_id)
+                SELECT DISTINCT hs.host_id, hs.id, m.id, hns.id
+                FROM service hs
+                LEFT OUTER JOIN host_host_name_mapping m ON m.host_id = hs.host_id AND
+                                                            ((m.type & 1) = 1 OR (m.type & 2) = 2)
+                LEFT OUTER JOIN service hns ON hns.host_name_id = m.host_name_id
+                WHERE hs.host_id = ANY(host_ids) AND
+                      (hns.id IS NULL OR (hns.port = hs.port AND hns.protocol = hs.protocol));
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.update_service_summary_of_hosts(host_ids integer[]) OWNER TO kis;
+
+--
+-- Name: update_service_summary(id_workspace integer); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.update_service_summary(id_workspace integer)
+ RETURNS void
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            -- This function recomputes the rows of table service_summary for all hosts of the given workspace. It is
+            -- called after bulk loads in bulk mode (see Engine.bulk_mode) and by kismanage database --refresh-views.
+            PERFORM update_service_summary_of_hosts(ARRAY(SELECT id FROM host WHERE workspace_id = id_workspace));
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.update_service_summary(id_workspace integer) OWNER TO kis;
+
+--
+-- Name: post_update_service_summary_after_service_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_service_summary_after_service_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the summary is recomputed by function update_service_summary
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
+            -- Updates of the service's state, banner, etc. do not change the pairs of host and host name services
+            IF TG_OP = 'UPDATE' AND OLD.port = NEW.port AND OLD.protocol = NEW.protocol AND
+               OLD.host_id IS NOT DISTINCT FROM NEW.host_id AND
+               OLD.host_name_id IS NOT DISTINCT FROM NEW.host_name_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM update_service_summary_of_hosts(ARRAY(
+                    SELECT OLD.host_id WHERE OLD.host_id IS NOT NULL
+                    UNION
+                    SELECT host_id FROM host_host_name_mapping
+                    WHERE host_name_id = OLD.host_name_id AND ((type & 1) = 1 OR (type & 2) = 2)));
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM update_service_summary_of_hosts(ARRAY(
+                    SELECT NEW.host_id WHERE NEW.host_id IS NOT NULL
+                    UNION
+                    SELECT host_id FROM host_host_name_mapping
+                    WHERE host_name_id = NEW.host_name_id AND ((type & 1) = 1 OR (type & 2) = 2)));
+            END IF;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_service_summary_after_service_changes() OWNER TO kis;
+
+--
+-- Name: post_update_service_summary_after_host_host_name_mapping_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_service_summary_after_host_host_name_mapping_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the summary is recomputed by function update_service_summary
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                PERFORM update_service_summary_of_hosts(ARRAY[NEW.host_id]);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM update_service_summary_of_hosts(ARRAY[OLD.host_id]);
+            ELSIF OLD.host_id <> NEW.host_id OR OLD.host_name_id <> NEW.host_name_id OR OLD.type <> NEW.type THEN
+                PERFORM update_service_summary_of_hosts(ARRAY[OLD.host_id, NEW.host_id]);
+            END IF;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_service_summary_after_host_host_name_mapping_changes() OWNER TO kis;
+
+--
+-- Name: service post_update_service_summary_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS post_update_service_summary_trigger ON public.service;
+CREATE TRIGGER post_update_service_summary_trigger AFTER INSERT OR DELETE OR UPDATE ON public.service FOR EACH ROW EXECUTE FUNCTION public.post_update_service_summary_after_service_changes();
+
+--
+-- Name: host_host_name_mapping post_update_service_summary_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS post_update_service_summary_trigger ON public.host_host_name_mapping;
+CREATE TRIGGER post_update_service_summary_trigger AFTER INSERT OR DELETE OR UPDATE ON public.host_host_name_mapping FOR EACH ROW EXECUTE FUNCTION public.post_update_service_summary_after_host_host_name_mapping_changes();
+
+--
+-- Name: service_summary; Type: TABLE DATA; Schema: public; Owner: kis
+--
+
+TRUNCATE public.service_summary;
+SELECT public.update_service_summary(id) FROM public.workspace;
+
+--
+-- Name: service url; Type: COLUMN; Schema: public; Owner: kis
+--
+
+ALTER TABLE public.service ADD COLUMN IF NOT EXISTS url text;
+
+--
+-- Name: path url; Type: COLUMN; Schema: public; Owner: kis
+--
+
+ALTER TABLE public.path ADD COLUMN IF NOT EXISTS url text;
+
+--
+-- Name: service ix_service_url; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_service_url ON public.service USING btree (url text_pattern_ops);
+
+
+--
+-- Name: path ix_path_url; Type: INDEX; Schema: public; Owner: kis
+--
+
+CREATE INDEX IF NOT EXISTS ix_path_url ON public.path USING btree (url text_pattern_ops);
+
+
+--
+-- Name: service_url(id_host integer, id_host_name integer, port integer, tunnel text); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.service_url(id_host integer, id_host_name integer, port integer, tunnel text)
+ RETURNS text
+ LANGUAGE sql
+ STABLE
+AS $function$
+            -- This function computes the base URL of a service (see column service.url and method
+            -- Service.get_urlparse). IPv6 addresses are enclosed in brackets and the default ports 80 and 443 are
+            -- omitted.
+            SELECT CASE WHEN tunnel = 'ssl' THEN 'https' ELSE 'http' END || '://' ||
+                   COALESCE((SELECT CASE WHEN family(h.address) = 6 THEN '[' || host(h.address) || ']'
+                                     ELSE host(h.address) END
+                             FROM host h WHERE h.id = id_host),
+                            (SELECT CASE WHEN COALESCE(n.name, '') = '' THEN d.name ELSE n.name || '.' || d.name END
+                             FROM host_name n INNER JOIN domain_name d ON d.id = n.domain_name_id
+                             WHERE n.id = id_host_name)) ||
+                   CASE WHEN port IN (80, 443) THEN '' ELSE ':' || port END;
+        $function$;
+
+
+ALTER FUNCTION public.service_url(id_host integer, id_host_name integer, port integer, tunnel text) OWNER TO kis;
+
+--
+-- Name: path_url(service_url text, name text); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.path_url(service_url text, name text)
+ RETURNS text
+ LANGUAGE sql
+ IMMUTABLE
+AS $function$
+            -- This function computes the URL of a path (see column path.url and method Path.get_urlparse)
+            SELECT CASE WHEN COALESCE(name, '') = '' THEN NULL
+                        WHEN left(name, 1) = '/' THEN service_url || name
+                        ELSE service_url || '/' || name END;
+        $function$;
+
+
+ALTER FUNCTION public.path_url(service_url text, name text) OWNER TO kis;
+
+--
+-- Name: pre_update_service_url(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.pre_update_service_url()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            NEW.url := service_url(NEW.host_id, NEW.host_name_id, NEW.port, NEW.nmap_tunnel);
+            RETURN NEW;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.pre_update_service_url() OWNER TO kis;
+
+--
+-- Name: pre_update_path_url(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.pre_update_path_url()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            NEW.url := path_url((SELECT url FROM service WHERE id = NEW.service_id), NEW.name);
+            RETURN NEW;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.pre_update_path_url() OWNER TO kis;
+
+--
+-- Name: post_update_path_urls_after_service_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_path_urls_after_service_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            UPDATE path SET url = path_url(NEW.url, name) WHERE service_id = NEW.id;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_path_urls_after_service_changes() OWNER TO kis;
+
+--
+-- Name: post_update_service_urls_after_host_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_service_urls_after_host_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            UPDATE service SET url = service_url(host_id, host_name_id, port, nmap_tunnel) WHERE host_id = NEW.id;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_service_urls_after_host_changes() OWNER TO kis;
+
+--
+-- Name: post_update_service_urls_after_host_name_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_service_urls_after_host_name_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            UPDATE service SET url = service_url(host_id, host_name_id, port, nmap_tunnel) WHERE host_name_id = NEW.id;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_service_urls_after_host_name_changes() OWNER TO kis;
+
+--
+-- Name: post_update_service_urls_after_domain_name_changes(); Type: FUNCTION; Schema: public; Owner: kis
+--
+
+CREATE OR REPLACE FUNCTION public.post_update_service_urls_after_domain_name_changes()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+        BEGIN
+            UPDATE service SET url = service_url(service.host_id, service.host_name_id, service.port, service.nmap_tunnel)
+            FROM host_name
+            WHERE service.host_name_id = host_name.id AND host_name.domain_name_id = NEW.id;
+            RETURN NULL;
+        END;
+        $function$;
+
+
+ALTER FUNCTION public.post_update_service_urls_after_domain_name_changes() OWNER TO kis;
+
+--
+-- Name: service pre_update_service_url_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS pre_update_service_url_trigger ON public.service;
+CREATE TRIGGER pre_update_service_url_trigger BEFORE INSERT OR UPDATE OF host_id, host_name_id, port, nmap_tunnel ON public.service FOR EACH ROW EXECUTE FUNCTION public.pre_update_service_url();
+
+--
+-- Name: service post_update_path_urls_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS post_update_path_urls_trigger ON public.service;
+CREATE TRIGGER post_update_path_urls_trigger AFTER UPDATE ON public.service FOR EACH ROW WHEN ((old.url IS DISTINCT FROM new.url)) EXECUTE FUNCTION public.post_update_path_urls_after_service_changes();
+
+--
+-- Name: path pre_update_path_url_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS pre_update_path_url_trigger ON public.path;
+CREATE TRIGGER pre_update_path_url_trigger BEFORE INSERT OR UPDATE OF name, service_id ON public.path FOR EACH ROW EXECUTE FUNCTION public.pre_update_path_url();
+
+--
+-- Name: host post_update_service_urls_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS post_update_service_urls_trigger ON public.host;
+CREATE TRIGGER post_update_service_urls_trigger AFTER UPDATE OF address ON public.host FOR EACH ROW EXECUTE FUNCTION public.post_update_service_urls_after_host_changes();
+
+--
+-- Name: host_name post_update_service_urls_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS post_update_service_urls_trigger ON public.host_name;
+CREATE TRIGGER post_update_service_urls_trigger AFTER UPDATE OF name ON public.host_name FOR EACH ROW EXECUTE FUNCTION public.post_update_service_urls_after_host_name_changes();
+
+--
+-- Name: domain_name post_update_service_urls_trigger; Type: TRIGGER; Schema: public; Owner: kis
+--
+
+DROP TRIGGER IF EXISTS post_update_service_urls_trigger ON public.domain_name;
+CREATE TRIGGER post_update_service_urls_trigger AFTER UPDATE OF name ON public.domain_name FOR EACH ROW EXECUTE FUNCTION public.post_update_service_urls_after_domain_name_changes();
+
+--
+-- Name: service url; Type: TABLE DATA; Schema: public; Owner: kis
+--
+
+UPDATE public.service SET url = public.service_url(host_id, host_name_id, port, nmap_tunnel);
+
+--
+-- Name: command resource usage; Type: COLUMN; Schema: public; Owner: kis
+--
+
+ALTER TABLE public.command ADD COLUMN IF NOT EXISTS cpu_user_time double precision;
+ALTER TABLE public.command ADD COLUMN IF NOT EXISTS cpu_system_time double precision;
+ALTER TABLE public.command ADD COLUMN IF NOT EXISTS max_rss bigint;
+ALTER TABLE public.command ADD COLUMN IF NOT EXISTS read_blocks bigint;
+ALTER TABLE public.command ADD COLUMN IF NOT EXISTS write_blocks bigint;
+
+--
+-- Name: version; Type: TABLE DATA; Schema: public; Owner: kis
+--
+
+UPDATE public.version SET major_number = 0, minor_number = 3, revision_number = 1, last_modified = NOW();
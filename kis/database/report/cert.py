@@ -22,7 +22,9 @@ __version__ = 0.1
 
 import argparse
 from openpyxl import Workbook
+from typing import Dict
 from typing import List
+from database.model import Service
 from database.model import CertType
 from database.model import CertInfo
 from database.model import ScopeType
@@ -31,6 +33,8 @@ from database.model import DnsResourceRecordType
 from collectors.os.modules.http.core import HttpServiceDescriptor
 from database.report.core import BaseReport
 from database.report.core import ReportLanguage
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -52,6 +56,15 @@ class ReportClass(BaseReport):
                                         excluded_items=self._excluded_items,
                                         scope=self.scope)
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        service_options = [selectinload(Service.paths),
+                           selectinload(Service.cert_info).selectinload(CertInfo.sources)]
+        return {BaseReport.LOAD_HOSTS: self._load_hosts(service_options=service_options),
+                BaseReport.LOAD_HOST_NAMES: self._load_host_names(service_options=service_options)}
+
     @staticmethod
     def get_add_argparse_arguments(parser_cert: argparse.ArgumentParser):
         """
@@ -155,7 +168,7 @@ class ReportClass(BaseReport):
                 for service in host.services:
                     if service.state in [ServiceState.Open, ServiceState.Closed]:
                         is_http = descriptor.match_nmap_service_name(service)
-                        url_str = [path.get_urlparse().geturl() for path in service.paths if path.name == "/"] \
+                        url_str = [path.url for path in service.paths if path.name == "/"] \
                             if is_http else []
                         for cert_info in service.cert_info:
                             if self._filter(cert_info):
@@ -226,7 +239,7 @@ class ReportClass(BaseReport):
                         if service.state in [ServiceState.Open, ServiceState.Closed] and \
                                 descriptor.match_nmap_service_name(service):
                             is_http = descriptor.match_nmap_service_name(service)
-                            url_str = [path.get_urlparse().geturl() for path in service.paths if path.name == "/"] \
+                            url_str = [path.url for path in service.paths if path.name == "/"] \
                                 if is_http else []
                             for cert_info in service.cert_info:
                                 if self._filter(cert_info):
@@ -30,6 +30,8 @@ from database.model import DomainName
 from database.model import CollectorType
 from database.model import ReportScopeType
 from database.report.core import BaseReport
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -97,7 +99,11 @@ class ReportClass(BaseReport):
             for host_name in self._session.query(HostName) \
                     .join(DomainName) \
                     .join(Workspace) \
-                    .filter(Workspace.name == workspace.name).all():
+                    .filter(Workspace.name == workspace.name) \
+                    .options(joinedload(HostName.domain_name),
+                             selectinload(HostName.source_host_name_mappings),
+                             selectinload(HostName.resolved_host_name_mappings),
+                             selectinload(HostName.host_host_name_mappings)).all():
                 if self._filter(host_name.domain_name) and not host_name.source_host_name_mappings:
                     resolves_to_ipv4 = False
                     resolves_to_ipv6 = False
@@ -23,10 +23,19 @@ __version__ = 0.1
 import os
 import argparse
 from typing import List
+from typing import Iterator
 from database.model import Command
+from database.model import Service
+from database.model import HostName
+from database.model import Email
 from database.model import ReportScopeType
 from database.model import ReportVisibility
 from database.report.core import BaseReport
+from collectors.core import DomainUtils
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import defer
+from sqlalchemy.orm import joinedload
 
 
 class ReportClass(BaseReport):
@@ -59,6 +68,11 @@ class ReportClass(BaseReport):
                                           help='returns gathered information including all collector outputs as text')
         parser_command_group.add_argument('--csv', action='store_true', default=True,
                                           help='returns gathered information in csv format')
+        parser_command_group.add_argument('--search', metavar='TEXT', type=str,
+                                          help='returns all stdout and stderr lines (including their line numbers) '
+                                               'that contain all words of the given text (e.g., "Apache Tomcat") in '
+                                               'csv format. the search uses the search index over the collector '
+                                               'outputs (see kismanage workspace --index-outputs)')
         parser_command.add_argument('--filter', metavar='DOMAIN|HOSTNAME|IP|NETWORK|EMAIL', type=str, nargs='*',
                                     help='list of second-level domains (e.g., megacorpone.com), host names '
                                          '(e.g., www.megacorpone.com), IP addresses (e.g., 192.168.1.1), networks (e.g., '
@@ -91,59 +105,121 @@ class ReportClass(BaseReport):
                                       include_collectors=self._included_collectors,
                                       scope=self._scope)
 
+    def _get_commands(self) -> Query:
+        """
+        This method returns the query for all commands of the selected workspaces.
+        """
+        return self._session.query(Command) \
+            .filter(Command.workspace_id.in_([item.id for item in self._workspaces]))
+
     def get_csv(self) -> List[List[str]]:
         """
         This method returns all information as CSV.
         :return:
         """
-        rows = [["DB ID",
-                 "Workspace",
-                 "Collector",
-                 "Type",
-                 "Address",
-                 "Protocol",
-                 "Port",
-                 "Service",
-                 "Nmap Service Name",
-                 "Nmap Service Name Original",
-                 "Status",
-                 "Start Time [UTC]",
-                 "End Time [UTC]",
-                 "Duration [s]",
-                 "Return Code",
-                 "Stdout Size",
-                 "Stderr Size",
-                 "OS Command"]]
-        commands = self._session.query(Command)
-        for command in commands:
+        return list(self.iter_csv())
+
+    def iter_csv(self) -> Iterator[List[str]]:
+        """
+        This method returns all information as CSV. The rows are streamed from the database via a server-side cursor.
+        The command outputs are not loaded as their sizes are computed by the database.
+        :return:
+        """
+        if "search" in self._args and self._args.search:
+            yield from self.iter_search_csv()
+            return
+        yield ["DB ID",
+               "Workspace",
+               "Collector",
+               "Type",
+               "Address",
+               "Protocol",
+               "Port",
+               "Service",
+               "Nmap Service Name",
+               "Nmap Service Name Original",
+               "Status",
+               "Start Time [UTC]",
+               "End Time [UTC]",
+               "Duration [s]",
+               "Return Code",
+               "Stdout Size",
+               "Stderr Size",
+               "OS Command"]
+        workspaces = {item.id: item.name for item in self._workspaces}
+        stdout_size = func.coalesce(func.length(func.array_to_string(Command._stdout_output, os.linesep)), 0)
+        stderr_size = func.coalesce(func.length(func.array_to_string(Command._stderr_output, os.linesep)), 0)
+        # todo: update for new collector
+        commands = self._get_commands() \
+            .add_columns(stdout_size, stderr_size) \
+            .options(defer(Command._stdout_output),
+                     defer(Command._stderr_output),
+                     defer(Command.xml_output),
+                     defer(Command.json_output),
+                     defer(Command.binary_output),
+                     defer(Command.hint),
+                     joinedload(Command.collector_name),
+                     joinedload(Command.service).joinedload(Service.host),
+                     joinedload(Command.service).joinedload(Service.host_name).joinedload(HostName.domain_name),
+                     joinedload(Command.host),
+                     joinedload(Command.host_name).joinedload(HostName.domain_name),
+                     joinedload(Command.ipv4_network),
+                     joinedload(Command.email).joinedload(Email.host_name).joinedload(HostName.domain_name),
+                     joinedload(Command.company)) \
+            .yield_per(1000)
+        for command, stdout_count, stderr_count in commands:
             service = command.service
-            if command.workspace in self._workspaces:
-                if self._filter(command):
-                    execution_time = (command.stop_time - command.start_time).seconds \
-                        if command.stop_time and command.start_time else None
-                    start_time = command.start_time_str
-                    stop_time = command.stop_time_str
-                    stdout_count = len(os.linesep.join(command.stdout_output))
-                    stderr_count = len(os.linesep.join(command.stderr_output))
-                    rows.append([command.id,
-                                 command.workspace.name,
-                                 command.collector_name.name,
-                                 command.collector_name.type_str,
-                                 command.target_name,
-                                 service.protocol_str if service else None,
-                                 service.port if service else None,
-                                 service.protocol_port_str if service else None,
-                                 service.service_name_with_confidence if service else None,
-                                 service.nmap_service_name_original_with_confidence if service else None,
-                                 command.status_str,
-                                 start_time,
-                                 stop_time,
-                                 execution_time,
-                                 command.return_code,
-                                 stdout_count,
-                                 stderr_count,
-                                 command.os_command_string])
-        return rows
+            if self._filter(command):
+                execution_time = (command.stop_time - command.start_time).seconds \
+                    if command.stop_time and command.start_time else None
+                start_time = command.start_time_str
+                stop_time = command.stop_time_str
+                yield [command.id,
+                       workspaces[command.workspace_id],
+                       command.collector_name.name,
+                       command.collector_name.type_str,
+                       command.target_name,
+                       service.protocol_str if service else None,
+                       service.port if service else None,
+                       service.protocol_port_str if service else None,
+                       service.service_name_with_confidence if service else None,
+                       service.nmap_service_name_original_with_confidence if service else None,
+                       command.status_str,
+                       start_time,
+                       stop_time,
+                       execution_time,
+                       command.return_code,
+                       stdout_count,
+                       stderr_count,
+                       command.os_command_string]
+
+    def iter_search_csv(self) -> Iterator[List[str]]:
+        """
+        This method returns all stdout and stderr lines that contain all words of the search text (see argument
+        --search) as CSV.
+        :return:
+        """
+        yield ["DB ID",
+               "Workspace",
+               "Collector",
+               "Type",
+               "Address",
+               "Output",
+               "Line",
+               "Result"]
+        workspaces = {item.id: item.name for item in self._workspaces}
+        for command, output, number, line in DomainUtils.search_command_outputs(session=self._session,
+                                                                                workspaces=self._workspaces,
+                                                                                text=self._args.search):
+            if self._filter(command):
+                yield [command.id,
+                       workspaces[command.workspace_id],
+                       command.collector_name.name,
+                       command.collector_name.type_str,
+                       command.target_name,
+                       output,
+                       number,
+                       line]
 
     def get_text(self) -> List[str]:
         """
@@ -151,11 +227,9 @@ class ReportClass(BaseReport):
         :return:
         """
         rvalue = []
-        commands = self._session.query(Command)
-        for command in commands:
-            if command.workspace in self._workspaces:
-                if self._filter(command):
-                    rvalue += command.get_text(ident=0,
-                                               report_visibility=self._visibility,
-                                               color=self._color)
+        for command in self._get_commands():
+            if self._filter(command):
+                rvalue += command.get_text(ident=0,
+                                           report_visibility=self._visibility,
+                                           color=self._color)
         return rvalue
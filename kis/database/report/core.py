@@ -25,23 +25,58 @@ import csv
 import sys
 import re
 import enum
+import pickle
 import pkgutil
 import argparse
 import importlib
+import itertools
+import tempfile
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+from database.config import BaseConfig
 from database.config import DomainConfig
 from database.config import SortingHelpFormatter
 from openpyxl import Workbook
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.utils.exceptions import IllegalCharacterError
 from typing import List
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from database.model import FontColor
 from database.model import VhostChoice
 from database.model import Workspace
+from database.model import Host
+from database.model import Network
+from database.model import DomainName
+from database.model import HostName
+from database.model import HostHostNameMapping
+from database.model import Service
+from database.model import Command
+from database.model import Path
 from database.model import CollectorName
 from database.model import ReportScopeType
 from database.model import ReportVisibility
+from database.utils import Engine
+from database.utils import DeclarativeBase
+from sqlalchemy import func
+from sqlalchemy import inspect
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.session import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 
 class ReportLanguage(enum.Enum):
@@ -88,6 +123,11 @@ class BaseReport:
     """
 
     TRUE = "•"
+    # The keys of the loader options (see _get_loader_options) that start at Workspace.hosts and Workspace.domain_names
+    LOAD_HOSTS = "hosts"
+    LOAD_HOST_NAMES = "host_names"
+    # Replaces the outputs of commands, which cannot match the regular expressions (see _load_command_outputs)
+    OUTPUT_PLACEHOLDER = ""
 
     def __init__(self,
                  args,
@@ -105,6 +145,7 @@ class BaseReport:
             if "visibility" in args and getattr(args, "visibility") else None
         self._session = session
         self._workspaces = workspaces
+        self._preloaded = False
         self._kwargs = kwargs
         self._not_grep = args.grep_not if "grep_not" in args else False
         self.description = description
@@ -128,11 +169,235 @@ class BaseReport:
             self._regex_list = [re.compile(item, re.IGNORECASE) for item in args.igrep]
         else:
             self._regex_list = []
+        self._regex_prefilter = self._get_regex_prefilter(self._regex_list)
+        self._regex_literals = self._get_regex_literals(self._regex_list)
+        self._file_names = {}
 
     @property
     def scope(self) -> ReportScopeType:
         return self._args.scope if "scope" in self._args else None
 
+    @staticmethod
+    def _load_hosts(service_options: List[Load] = None, host_options: List[Load] = None) -> Load:
+        """
+        This method returns the loader option for the hosts of a workspace including their networks, sources, A and
+        AAAA records, and services.
+        :param service_options: Additional loader options for each service (e.g., selectinload(Service.paths))
+        :param host_options: Additional loader options for each host (e.g., selectinload(Host.commands))
+        :return:
+        """
+        return selectinload(Workspace.hosts).options(
+            joinedload(Host.ipv4_network).options(selectinload(Network.companies), selectinload(Network.sources)),
+            selectinload(Host.sources),
+            selectinload(Host.host_host_name_mappings)
+            .joinedload(HostHostNameMapping.host_name)
+            .joinedload(HostName.domain_name),
+            selectinload(Host.services).options(selectinload(Service.sources), *(service_options or [])),
+            *(host_options or []))
+
+    @staticmethod
+    def _load_host_names(service_options: List[Load] = None, host_name_options: List[Load] = None) -> Load:
+        """
+        This method returns the loader option for the second-level domains of a workspace including their host names,
+        sources, A and AAAA records, and services.
+        :param service_options: Additional loader options for each service (e.g., selectinload(Service.paths))
+        :param host_name_options: Additional loader options for each host name (e.g., selectinload(HostName.commands))
+        :return:
+        """
+        return selectinload(Workspace.domain_names).options(
+            selectinload(DomainName.companies),
+            selectinload(DomainName.host_names).options(
+                selectinload(HostName.sources),
+                selectinload(HostName.host_host_name_mappings)
+                .joinedload(HostHostNameMapping.host)
+                .joinedload(Host.ipv4_network),
+                selectinload(HostName.services).options(selectinload(Service.sources), *(service_options or [])),
+                *(host_name_options or [])))
+
+    @staticmethod
+    def _load_commands(relationship, outputs: bool = False) -> Load:
+        """
+        This method returns the loader option for the given command relationship (e.g., Service.commands).
+        :param relationship: The command relationship that shall be loaded
+        :param outputs: If False, then the (potentially large) collector outputs are not loaded
+        :return:
+        """
+        result = selectinload(relationship)
+        if not outputs:
+            result = result.defer(Command._stdout_output) \
+                .defer(Command._stderr_output) \
+                .defer(Command.xml_output) \
+                .defer(Command.json_output) \
+                .defer(Command.binary_output)
+        return result
+
+    @property
+    def _load_outputs(self) -> bool:
+        """
+        Returns True if the report returns collector outputs (see arguments --text, --grep, and --igrep). In grep mode,
+        the outputs are not eagerly loaded, if they can be pre-filtered by the database (see _load_command_outputs).
+        """
+        return getattr(self._args, "text", None) or (bool(self._regex_list) and self._regex_literals is None)
+
+    def _get_service_options(self) -> List[Load]:
+        """
+        This method returns the loader options for the commands and additional information of each service as well as
+        the credentials, methods, and paths of each service, if the report returns text output.
+        :return:
+        """
+        result = [self._load_commands(Service.commands, outputs=self._load_outputs).joinedload(Command.collector_name),
+                  selectinload(Service.additional_info)]
+        if self._load_outputs:
+            result += [selectinload(Service.credentials),
+                       selectinload(Service.service_methods),
+                       selectinload(Service.paths).selectinload(Path.sources)]
+        return result
+
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options (e.g., selectinload) for the object graph that the report traverses
+        starting from its workspaces. Method is overwritten by subclasses.
+        :return: Dictionary whose keys specify the relationship at which the loader options (values) start (see
+        LOAD_HOSTS and LOAD_HOST_NAMES)
+        """
+        return {}
+
+    def preload(self) -> None:
+        """
+        This method loads the object graph that the report traverses (see _get_loader_options) for all workspaces at
+        once. Thereby, the report issues a constant number of queries instead of lazily loading the relationships of
+        each host, service, etc. one by one.
+        """
+        if not self._preloaded and self._workspaces:
+            # Each loader option is applied by a separate query. Otherwise, objects that are reachable via several
+            # paths (e.g., host names via hosts and second-level domains) are only populated via the first path.
+            for option in self._get_loader_options().values():
+                self._session.query(Workspace) \
+                    .filter(Workspace.id.in_([item.id for item in self._workspaces])) \
+                    .options(option) \
+                    .all()
+            if self._regex_list and self._regex_literals is not None:
+                self._load_command_outputs()
+        self._preloaded = True
+
+    @staticmethod
+    def _get_regex_prefilter(regex_list: List[re.Pattern]) -> re.Pattern:
+        """
+        This method combines the given regular expressions into a single regular expression, which is used to skip
+        lines that do not match any of the given regular expressions with a single scan.
+        :param regex_list: The regular expressions that shall be combined
+        :return: The combined regular expression or None, if the regular expressions cannot be combined (e.g., they
+        contain back references or the same group names)
+        """
+        result = None
+        if len(regex_list) > 1:
+            for regex in regex_list:
+                if "(?P=" in regex.pattern or re.search(r"\\[1-9]|\(\?\(", regex.pattern):
+                    return None
+            try:
+                result = re.compile("|".join(["(?:{})".format(item.pattern) for item in regex_list]),
+                                    regex_list[0].flags)
+            except re.error:
+                pass
+        return result
+
+    @staticmethod
+    def _get_required_literals(items: Iterable[tuple], ignore_case: bool) -> List[str]:
+        """
+        This method returns literal strings that each match of the given parsed regular expression contains. The first
+        (last) literal is located at the beginning (end) of the match, if the regular expression starts (ends) with it.
+        :param items: The parsed regular expression (see sre_parse.parse)
+        :param ignore_case: True if the regular expression is case-insensitive
+        :return:
+        """
+        result = [""]
+        for operator, value in items:
+            # Case-insensitive regular expressions match i, k, and s also with non-ASCII characters (e.g., Kelvin sign)
+            if operator == sre_constants.LITERAL and 32 <= value < 127 and \
+                    not (ignore_case and chr(value).lower() in "iks"):
+                result[-1] += chr(value)
+            elif operator == sre_constants.SUBPATTERN and not value[1] and not value[2]:
+                literals = BaseReport._get_required_literals(value[3], ignore_case)
+                result[-1] += literals[0]
+                result += literals[1:]
+            elif operator in [sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT] and value[0] > 0:
+                result += BaseReport._get_required_literals(value[2], ignore_case) + [""]
+            else:
+                result.append("")
+        return result
+
+    @staticmethod
+    def _get_regex_literals(regex_list: List[re.Pattern]) -> List[tuple]:
+        """
+        This method determines for each given regular expression the longest literal string that each matching line
+        must contain. These literals are used to pre-filter the collector outputs in the database.
+        :param regex_list: The regular expressions for which the literals shall be determined
+        :return: List of tuples (literal, ignore case) or None, if at least one regular expression does not require a
+        literal
+        """
+        result = []
+        for regex in regex_list:
+            try:
+                parsed = sre_parse.parse(regex.pattern, regex.flags)
+            except re.error:
+                return None
+            ignore_case = bool(parsed.state.flags & re.IGNORECASE)
+            literal = max(BaseReport._get_required_literals(parsed, ignore_case), key=len)
+            # The placeholders of outputs that do not contain the literal must not match (see _load_command_outputs).
+            # Likewise, they must not match the text of duplicate outputs, as placeholders are never duplicates.
+            if not literal or regex.search(BaseReport.OUTPUT_PLACEHOLDER) or regex.search(Command.DUPLICATE_OUTPUT):
+                return None
+            result.append((literal, ignore_case))
+        return result if result else None
+
+    def _load_command_outputs(self) -> None:
+        """
+        This method loads the collector outputs of all preloaded commands. Thereby, the database only returns the
+        outputs of commands that contain at least one line with a literal required by the regular expressions (see
+        --grep and --igrep). The outputs of all other commands cannot match and therefore, they are replaced by
+        OUTPUT_PLACEHOLDER. For the remaining outputs (xml, json, and binary), only placeholders are set, as the text
+        report only documents whether they exist (see Command.raw_data_summary).
+        """
+        commands = {}
+        for item in self._session.identity_map.values():
+            if isinstance(item, Command) and "_stdout_output" in inspect(item).unloaded:
+                commands[item.id] = item
+        if not commands:
+            return
+        line = func.unnest(func.array_cat(Command._stdout_output, Command._stderr_output)).column_valued("line")
+        conditions = []
+        for literal, ignore_case in self._regex_literals:
+            pattern = "%{}%".format(re.sub(r"([/%_])", r"/\1", literal))
+            conditions.append(line.ilike(pattern, escape="/") if ignore_case else line.like(pattern, escape="/"))
+        match = select(line).where(or_(*conditions)).exists()
+        query = self._session.query(Command.id,
+                                    match,
+                                    func.coalesce(func.cardinality(Command._stdout_output), 0) > 0,
+                                    func.coalesce(func.cardinality(Command._stderr_output), 0) > 0,
+                                    func.coalesce(func.length(Command.xml_output), 0) > 0,
+                                    func.coalesce(func.cardinality(Command.json_output), 0) > 0,
+                                    func.coalesce(func.length(Command.binary_output), 0) > 0) \
+            .filter(Command.workspace_id.in_([item.id for item in self._workspaces]))
+        matches = []
+        for command_id, is_match, has_stdout, has_stderr, has_xml, has_json, has_binary in query:
+            command = commands.get(command_id)
+            if command:
+                if is_match:
+                    matches.append(command_id)
+                else:
+                    set_committed_value(command, "_stdout_output", [self.OUTPUT_PLACEHOLDER] if has_stdout else [])
+                    set_committed_value(command, "_stderr_output", [self.OUTPUT_PLACEHOLDER] if has_stderr else [])
+                set_committed_value(command, "xml_output", " " if has_xml else None)
+                set_committed_value(command, "json_output", [None] if has_json else [])
+                set_committed_value(command, "binary_output", b" " if has_binary else None)
+        if matches:
+            for command_id, stdout_output, stderr_output in self._session.query(Command.id,
+                                                                                 Command._stdout_output,
+                                                                                 Command._stderr_output) \
+                    .filter(Command.id.in_(matches)):
+                set_committed_value(commands[command_id], "_stdout_output", stdout_output)
+                set_committed_value(commands[command_id], "_stderr_output", stderr_output)
+
     def _egrep(self, results: List[str]) -> List[str]:
         """
         This method returns all lines matching the given list of regular expressions
@@ -141,6 +406,8 @@ class BaseReport:
         """
         result = []
         for line in results:
+            if self._regex_prefilter and not self._regex_prefilter.search(line):
+                continue
             for regex in self._regex_list:
                 positions = []
                 for match in regex.finditer(line):
@@ -151,61 +418,77 @@ class BaseReport:
                 if positions:
                     if self._color:
                         position = 0
-                        new_line = ""
+                        new_line = []
                         color = FontColor.RED + FontColor.BOLD
                         for start, end in positions:
-                            new_line += line[position:start]
-                            new_line += color
-                            new_line += line[start:end]
-                            new_line += FontColor.END
-                            position += end
-                        new_line += line[position:]
-                        line = new_line
+                            new_line += [line[position:start], color, line[start:end], FontColor.END]
+                            position = end
+                        new_line.append(line[position:])
+                        line = "".join(new_line)
                     result.append(line)
         return result
 
     def fill_excel_sheet(self,
                          worksheet: Worksheet,
-                         csv_list: list,
+                         csv_list: Iterable[list],
                          name: str = None,
                          title: str = None,
                          description: str = None) -> None:
         """
         This method adds an additional sheet to the given workbook
+        :param worksheet: The worksheet to which the rows are appended. The worksheet can also be a worksheet of a
+        write-only workbook.
+        :param csv_list: The rows of the sheet. The rows are consumed one by one and therefore, csv_list can also be
+        a generator like the one returned by method iter_csv.
         :return:
         """
         start_row = 1
+        row_count = 0
+        column_count = 0
+        column_names = []
         name = name if name is not None else self._name
         title = title if title is not None else self.title
         description = description if description is not None else self.description
         worksheet.title = name
-        if description:
-            csv_list.insert(0, [])
-            csv_list.insert(0, [description])
-            start_row += 2
+        header = []
         if title:
-            csv_list.insert(0, [])
-            csv_list.insert(0, [title])
+            header += [[title], []]
             start_row += 2
-        for row in csv_list:
+        if description:
+            header += [[description], []]
+            start_row += 2
+        for row in itertools.chain(header, csv_list):
             try:
                 worksheet.append(row)
             except IllegalCharacterError:
                 print("ignoring row due to illegal character: {}".format(row), file=sys.stderr)
+                continue
             except ValueError:
                 raise ValueError("cannot add row to sheet '{}': {}".format(self._name, row))
-        dimension = worksheet.calculate_dimension()
-        dimension = "A{}:{}".format(start_row, dimension.split(":")[-1])
-        table = Table(displayName=self._name.replace(" ", ""), ref=dimension)
-        style = TableStyleInfo(name="TableStyleLight8")
-        table.tableStyleInfo = style
-        worksheet.add_table(table)
+            row_count += 1
+            if row_count >= start_row:
+                column_count = max(column_count, len(row))
+                if row_count == start_row:
+                    column_names = row
+        if column_count:
+            # Write-only worksheets do not keep their cells. Thus, the table's dimension and column names are
+            # determined while appending the rows.
+            names = [str(item) for item in column_names]
+            names += ["Column{}".format(i) for i in range(len(names) + 1, column_count + 1)]
+            table = Table(displayName=self._name.replace(" ", ""),
+                          ref="A{}:{}{}".format(start_row, get_column_letter(column_count), row_count),
+                          tableColumns=[TableColumn(id=i, name=name) for i, name in enumerate(names, start=1)])
+            table.tableStyleInfo = TableStyleInfo(name="TableStyleLight8")
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                worksheet.add_table(table)
 
     def export(self):
         """
         This method executes the export
         :return:
         """
+        self.preload()
         if "text" in self._args and getattr(self._args, "text"):
             for line in self.get_text():
                 print(line)
@@ -220,22 +503,31 @@ class BaseReport:
             else:
                 print("Invalid output directory '{}'.".format(self._args.export_path), file=sys.stderr)
         elif "csv" in self._args and getattr(self._args, "csv"):
-            results = self.get_csv()
             csv_writer = csv.writer(sys.stdout, dialect='excel')
-            csv_writer.writerows(results)
+            csv_writer.writerows(self.iter_csv())
 
     def _get_unique_file_name(self, output_path: str, file_name: str) -> str:
-        """This method returns a unique output path"""
-        tmp = os.path.splitext(file_name)
-        ext = tmp[-1]
-        name = tmp[0]
-        path = os.path.join(output_path, "{}{}".format(name, ext))
-        i = 1
-        while os.path.exists(path):
-            new_name = "{}_{:03d}".format(name, i)
-            path = os.path.join(output_path, "{}{}".format(new_name, ext))
+        """
+        This method returns a unique output path. The content of the given output directory is listed once and
+        afterwards, all returned file names are tracked in memory. Thereby, the filesystem does not have to be probed
+        for each file name.
+        :param output_path: The output directory
+        :param file_name: The desired file name, which is suffixed by a counter (e.g., _001) if it is already used
+        :return: The unique output path
+        """
+        if output_path not in self._file_names:
+            self._file_names[output_path] = (set(os.listdir(output_path)), {})
+        file_names, counters = self._file_names[output_path]
+        name, ext = os.path.splitext(file_name)
+        result = "{}{}".format(name, ext)
+        # The counter of each file name is stored. Thereby, the suffixes do not have to be probed from _001 again.
+        i = counters.get(file_name, 1)
+        while result in file_names:
+            result = "{}_{:03d}{}".format(name, i, ext)
             i += 1
-        return path
+        counters[file_name] = i
+        file_names.add(result)
+        return os.path.join(output_path, result)
 
     @staticmethod
     def get_add_argparse_arguments(arg_group: argparse.ArgumentParser):
@@ -258,6 +550,15 @@ class BaseReport:
         """
         raise NotImplementedError("not implemented")
 
+    def iter_csv(self) -> Iterator[List[str]]:
+        """
+        This method returns all information as CSV, one row at a time. Reports that potentially return large amounts
+        of data override this method to stream their rows from the database. Per default, the rows of method get_csv
+        are returned.
+        :return:
+        """
+        return iter(self.get_csv())
+
     def grep_text(self) -> List[List[str]]:
         """
         This method returns all information as a list of text.
@@ -329,6 +630,12 @@ class ReportGenerator:
         parser.add_argument('--testing',
                             action="store_true",
                             help="if specified, then KIS uses the testing instead of the production database")
+        parser.add_argument("--profile-sql", dest="profile_sql",
+                            action="store_true",
+                            help="if specified, then the SQL statements sent to the database are counted and timed per "
+                                 "call site, and a ranked profile including possible N+1 query patterns is printed to "
+                                 "stderr at exit. alternatively, set environment variable "
+                                 "{}=1".format(BaseConfig.ENV_PROFILE_SQL))
         return parser
 
     @staticmethod
@@ -360,6 +667,17 @@ class ReportGenerator:
                                   nargs="+",
                                   default=[item.name for item in ExcelReport],
                                   help='import only the following reports into Microsoft Excel')
+        parser_excel.add_argument("-p", "--processes",
+                                  type=int,
+                                  default=1,
+                                  metavar="N",
+                                  help="number of worker processes that create the report sheets in parallel (e.g., "
+                                       "the number of CPUs). per default, the report sheets are created one after "
+                                       "the other by the kisreport process")
+        parser_excel.add_argument("--snapshot", action="store_true",
+                                  help="load the data of all selected reports at once and create the report sheets "
+                                       "from this snapshot. in combination with argument --processes, the worker "
+                                       "processes share the snapshot instead of querying the database themselves")
         parser_excel.add_argument("-r", "--report-level",
                                   choices=[item.name for item in VhostChoice],
                                   default=VhostChoice.all.name,
@@ -374,6 +692,9 @@ class ReportGenerator:
                                   help="query the given workspaces",
                                   nargs="+",
                                   type=str)
+        parser_final.add_argument("--snapshot", action="store_true",
+                                  help="load the data of all final report tables at once instead of loading it "
+                                       "for each report separately")
         parser_final.add_argument('-l', '--language',
                                   type=ReportLanguage.argparse,
                                   choices=list(ReportLanguage),
@@ -413,6 +734,165 @@ class ReportGenerator:
         """
         return self._report_classes[args.module].create_instance(session=session, workspaces=workspaces, args=args)
 
+    @staticmethod
+    def _dump_csv_list(args: argparse.Namespace, report_str: str, workspace_names: List[str], file_name: str) -> None:
+        """
+        This method is executed by the worker processes of kisreport's excel module. It creates the given report
+        with its own database connection and writes the report's rows one by one into the given file.
+        :param args: The argparser arguments based on which the report is created
+        :param report_str: The name of the report that shall be created
+        :param workspace_names: The names of the workspaces that shall be queried
+        :param file_name: The file to which the pickled rows are written
+        :return:
+        """
+        engine = Engine(production=not args.testing)
+        DeclarativeBase.metadata.bind = engine.engine
+        report_classes = ReportGenerator._load_reports()
+        with engine.session_scope() as session:
+            workspaces = {item.name: item for item in session.query(Workspace)
+                          .filter(Workspace.name.in_(workspace_names)).all()}
+            report = report_classes[report_str].create_instance(session=session,
+                                                                workspaces=[workspaces[item]
+                                                                            for item in workspace_names],
+                                                                args=args)
+            report.preload()
+            with open(file_name, "wb") as file:
+                for row in report.iter_csv():
+                    pickle.dump(row, file, protocol=pickle.HIGHEST_PROTOCOL)
+        engine.engine.dispose()
+
+    @staticmethod
+    def _load_csv_list(file_name: str) -> Iterator[list]:
+        """
+        This method yields the rows that were written by method _dump_csv_list.
+        """
+        with open(file_name, "rb") as file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    break
+
+    @staticmethod
+    def _dump_snapshot_csv_list(report: BaseReport, file_name: str) -> None:
+        """
+        This method is executed by the forked worker processes of kisreport's excel module in snapshot mode (see
+        argument --snapshot). It writes the rows of the given report, which was created by the parent process, one by
+        one into the given file.
+        :param report: The report whose object graph was already loaded by the parent process
+        :param file_name: The file to which the pickled rows are written
+        :return:
+        """
+        # The forked process must not use the database connections of its parent. Thus, it creates new connections
+        # if a report has to query data that is not part of the snapshot. Argument close requires SQLAlchemy 1.4.33.
+        report._session.get_bind().dispose(close=False)
+        with open(file_name, "wb") as file:
+            for row in report.iter_csv():
+                pickle.dump(row, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load_snapshot(session: Session, workspaces: List[Workspace], reports: List[BaseReport]) -> None:
+        """
+        This method loads the object graphs of all given reports (see BaseReport.preload) at once into the given
+        session. The loader options of all reports that start at the same relationship (e.g., Workspace.hosts, see
+        BaseReport.LOAD_HOSTS) are applied by the same query. Thereby, the hosts, services, host names, etc. are queried once instead of once per
+        report.
+        :param session: The database session into which the object graph is loaded
+        :param workspaces: The workspaces whose object graph is loaded
+        :param reports: The reports whose loader options are applied
+        :return:
+        """
+        options = {}
+        for report in reports:
+            for key, option in report._get_loader_options().items():
+                options.setdefault(key, []).append(option)
+            report._preloaded = True
+        for items in options.values():
+            session.query(Workspace) \
+                .filter(Workspace.id.in_([item.id for item in workspaces])) \
+                .options(*items) \
+                .all()
+
+    def _get_csv_lists(self,
+                       args: argparse.Namespace,
+                       session: Session,
+                       workspaces: List[Workspace],
+                       reports: Dict[str, BaseReport],
+                       temp_dir: str) -> Iterator[tuple]:
+        """
+        This method yields the rows of each given report in the given order. If more than one process is requested
+        (see argument --processes), then the reports are created in parallel by worker processes, which write their
+        rows into temporary files. Otherwise, the rows are directly obtained from the given session.
+
+        In snapshot mode (see argument --snapshot), the object graphs of all reports are loaded at once into the
+        given session. The worker processes are then forked, and thereby, they share this snapshot instead of
+        querying the database again.
+        :param args: The argparser arguments based on which the reports are created
+        :param session: The database session that is used if the reports are not created by worker processes
+        :param workspaces: The workspaces that shall be queried
+        :param reports: The reports (values) that shall be created and their names (keys)
+        :param temp_dir: The directory in which the worker processes store their rows
+        :return: Tuples containing the report and an iterator over the report's rows
+        """
+        processes = min(args.processes, len(reports)) if "processes" in args and args.processes else 1
+        snapshot = "snapshot" in args and args.snapshot
+        if snapshot:
+            self._load_snapshot(session=session, workspaces=workspaces, reports=list(reports.values()))
+        if processes <= 1:
+            for report_str, report in reports.items():
+                print("* creating report for: {}".format(report_str))
+                report.preload()
+                yield report, report.iter_csv()
+        elif snapshot:
+            # The current transaction is committed without expiring the snapshot. Thereby, its database connection
+            # is returned to the pool, and the forked processes do not inherit an active transaction.
+            session.expire_on_commit = False
+            session.commit()
+            session.expire_on_commit = True
+            context = multiprocessing.get_context("fork")
+            workers = []
+            for report_str, report in reports.items():
+                print("* creating report for: {}".format(report_str))
+                file_name = os.path.join(temp_dir, "{}.pickle".format(report_str))
+                workers.append((report_str,
+                                report,
+                                file_name,
+                                context.Process(target=ReportGenerator._dump_snapshot_csv_list,
+                                                args=(report, file_name))))
+            for item in workers[:processes]:
+                item[3].start()
+            # The sheets are merged in the order of argument --reports
+            for i, (report_str, report, file_name, process) in enumerate(workers):
+                process.join()
+                if i + processes < len(workers):
+                    workers[i + processes][3].start()
+                if process.exitcode != 0:
+                    for item in workers[i + 1:i + processes + 1]:
+                        if item[3].is_alive():
+                            item[3].terminate()
+                    raise ChildProcessError("creating report '{}' failed with exit code {}".format(report_str,
+                                                                                                   process.exitcode))
+                yield report, self._load_csv_list(file_name)
+        else:
+            workspace_names = [item.name for item in workspaces]
+            # Worker processes are spawned instead of forked as they must not share the database connections of
+            # the current process.
+            with ProcessPoolExecutor(max_workers=processes,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = []
+                for report_str, report in reports.items():
+                    print("* creating report for: {}".format(report_str))
+                    file_name = os.path.join(temp_dir, "{}.pickle".format(report_str))
+                    futures.append((report, file_name, executor.submit(ReportGenerator._dump_csv_list,
+                                                                       args,
+                                                                       report_str,
+                                                                       workspace_names,
+                                                                       file_name)))
+                # The sheets are merged in the order of argument --reports
+                for report, file_name, future in futures:
+                    future.result()
+                    yield report, self._load_csv_list(file_name)
+
     def run(self, args: dict, session: Session, workspaces: List[Workspace]) -> None:
         """
         This method initializes the selected report and runs the desired export
@@ -422,33 +902,36 @@ class ReportGenerator:
         if args.module == "excel":
             if os.path.exists(args.FILE):
                 os.unlink(args.FILE)
-            workbook = Workbook()
-            first = True
-            processed = []
+            # Write-only workbooks stream their rows to a temporary file and thus, use constant memory
+            workbook = Workbook(write_only=True)
+            reports = {}
             for report_str in args.reports:
-                if report_str not in processed:
-                    print("* creating report for: {}".format(report_str))
-                    processed.append(report_str)
-                    report = self._report_classes[report_str].create_instance(session=session,
-                                                                              workspaces=workspaces,
-                                                                              args=args)
-                    csv_list = report.get_csv()
-                    if len(csv_list) > 1:
-                        if first:
-                            report.fill_excel_sheet(workbook.active, csv_list=csv_list)
-                            first = False
-                        else:
-                            report.fill_excel_sheet(workbook.create_sheet(), csv_list=csv_list)
-            workbook.save(args.FILE)
+                if report_str not in reports:
+                    reports[report_str] = self._report_classes[report_str].create_instance(session=session,
+                                                                                           workspaces=workspaces,
+                                                                                           args=args)
+            with tempfile.TemporaryDirectory() as temp_dir:
+                for report, csv_list in self._get_csv_lists(args=args,
+                                                            session=session,
+                                                            workspaces=workspaces,
+                                                            reports=reports,
+                                                            temp_dir=temp_dir):
+                    # Only create sheets for reports that contain at least one row besides the header
+                    rows = list(itertools.islice(csv_list, 2))
+                    if len(rows) > 1:
+                        report.fill_excel_sheet(workbook.create_sheet(), csv_list=itertools.chain(rows, csv_list))
+                workbook.save(args.FILE)
         elif args.module == "final":
             if os.path.exists(args.FILE):
                 os.unlink(args.FILE)
-            workbook = Workbook()
-            workbook.remove(workbook.active)
-            for item in ExcelReport:
-                report = self._report_classes[item.name].create_instance(session=session,
-                                                                         workspaces=workspaces,
-                                                                         args=args)
+            workbook = Workbook(write_only=True)
+            reports = [self._report_classes[item.name].create_instance(session=session,
+                                                                       workspaces=workspaces,
+                                                                       args=args) for item in ExcelReport]
+            if "snapshot" in args and args.snapshot:
+                self._load_snapshot(session=session, workspaces=workspaces, reports=reports)
+            for report in reports:
+                report.preload()
                 report.final_report(workbook=workbook)
             workbook.save(args.FILE)
         else:
@@ -21,12 +21,18 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import argparse
+from typing import Dict
 from typing import List
 from database.model import Credentials
+from database.model import Email
+from database.model import Service
+from database.model import HostName
 from database.model import CollectorType
 from database.model import DnsResourceRecordType
 from database.model import ReportScopeType
 from database.report.core import BaseReport
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -65,6 +71,18 @@ class ReportClass(BaseReport):
                                        help='return only information about in scope (within) or out of scope (outside) '
                                             'items. per default, all information is returned')
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        service_options = [selectinload(Service.credentials).selectinload(Credentials.sources)]
+        host_name_options = [selectinload(HostName.emails)
+                             .selectinload(Email.credentials)
+                             .selectinload(Credentials.sources)]
+        return {BaseReport.LOAD_HOSTS: self._load_hosts(service_options=service_options),
+                BaseReport.LOAD_HOST_NAMES: self._load_host_names(service_options=service_options,
+                                                                  host_name_options=host_name_options)}
+
     def _filter(self, credentials: Credentials) -> bool:
         """
         Method determines whether the given item shall be included into the report
@@ -23,14 +23,20 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import argparse
+from typing import Dict
 from typing import List
 from database.model import DomainName
+from database.model import Host
+from database.model import HostName
+from database.model import HostHostNameMapping
 from database.model import ServiceState
 from database.model import ReportScopeType
 from database.model import ReportVisibility
 from database.model import TextReportDetails
 from database.model import DnsResourceRecordType
 from database.report.core import BaseReport
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -91,6 +97,17 @@ class ReportClass(BaseReport):
                                    help='list of collector names whose outputs should be returned in text mode (see '
                                         'argument --text). per default, all collector information is returned')
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        host_name_options = [self._load_commands(HostName.commands, outputs=self._load_outputs),
+                             selectinload(HostName.emails),
+                             selectinload(HostName.host_host_name_mappings)
+                             .joinedload(HostHostNameMapping.host)
+                             .selectinload(Host.services)]
+        return {BaseReport.LOAD_HOST_NAMES: self._load_host_names(host_name_options=host_name_options)}
+
     def _filter(self, domain_name: DomainName) -> bool:
         """
         Method determines whether the given item shall be included into the report
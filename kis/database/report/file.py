@@ -21,16 +21,32 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import os
-import sys
 import json
+import shutil
 import argparse
+from threading import BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
+from database.model import File
 from database.model import FileType
 from database.model import CommandFileMapping
-from typing import List
 from typing import Dict
+from typing import List
+from typing import Tuple
 from database.model import Command
+from database.model import HostName
 from database.model import ReportScopeType
 from database.report.core import BaseReport
+from sqlalchemy import Text
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy import true
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import defer
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -38,6 +54,13 @@ class ReportClass(BaseReport):
     this module allows querying information about collected files (e.g., raw scan results, certificates, etc.)
     """
 
+    # The files are streamed in chunks of this size (in bytes or characters) from the database
+    CHUNK_SIZE = 1024 * 1024
+    # The text outputs of commands are streamed in chunks of this number of lines from the database
+    CHUNK_LINES = 10000
+    # The maximum number of files per worker thread that are queued for export at the same time
+    QUEUED_FILES_PER_THREAD = 2
+
     def __init__(self, args, **kwargs) -> None:
         super().__init__(args=args,
                          name="file info",
@@ -84,6 +107,12 @@ class ReportClass(BaseReport):
                                  help='return only files of type TYPE (e.g., screenshot or certificate). file types json, '
                                       'xml, binary, or text contain the raw scan results returned by the respective '
                                       'collector command')
+        parser_file.add_argument('-t', '--threads',
+                                 type=int,
+                                 default=4,
+                                 metavar="N",
+                                 help='number of threads that write the files in export mode (see argument -o). '
+                                      'per default, four threads are used')
         parser_file.add_argument('--filter', metavar='DOMAIN|HOSTNAME|IP|NETWORK|EMAIL', type=str, nargs='*',
                                  help='list of second-level domains (e.g., megacorpone.com), host names '
                                       '(e.g., www.megacorpone.com), IP addresses (e.g., 192.168.1.1), networks (e.g., '
@@ -112,20 +141,127 @@ class ReportClass(BaseReport):
                                       include_collectors=self._included_collectors,
                                       scope=self._scope)
 
-    def _export_file(self, file_info: CommandFileMapping, deduplicated: Dict[str, str] = {}):
+    def _get_commands(self, defer_content: bool = False) -> Query:
+        """
+        This method returns the query for all commands of the selected workspaces including their files and targets.
+        :param defer_content: If True, then the content of the files and the raw scan results are not loaded
+        """
+        file_option = selectinload(Command.file_mappings).joinedload(CommandFileMapping.file)
+        options = []
+        if defer_content:
+            file_option = file_option.defer(File.content)
+            options = [defer(Command._stdout_output),
+                       defer(Command._stderr_output),
+                       defer(Command.xml_output),
+                       defer(Command.json_output),
+                       defer(Command.binary_output)]
+        return self._session.query(Command) \
+            .filter(Command.workspace_id.in_([item.id for item in self._workspaces])) \
+            .options(joinedload(Command.collector_name),
+                     joinedload(Command.service),
+                     joinedload(Command.host),
+                     joinedload(Command.host_name).joinedload(HostName.domain_name),
+                     joinedload(Command.ipv4_network),
+                     joinedload(Command.email),
+                     file_option,
+                     *options)
+
+    @classmethod
+    def _write_chunks(cls, connection: Connection, file, column, condition) -> None:
+        """
+        This method streams the content of the given text or binary column in chunks from the database to the given
+        file.
+        :param connection: The database connection used to query the content
+        :param file: The file object to which the content is written
+        :param column: The column whose content is written
+        :param condition: The condition that selects the row whose content is written
+        :return:
+        """
+        offset = 1
+        while True:
+            chunk = connection.execute(select(func.substring(column, offset, cls.CHUNK_SIZE)).where(condition)).scalar()
+            file.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            if len(chunk) < cls.CHUNK_SIZE:
+                break
+            offset += cls.CHUNK_SIZE
+
+    @classmethod
+    def _write_lines(cls, connection: Connection, file, command_id: int) -> None:
+        """
+        This method streams the stdout and stderr lines of the given command in chunks from the database to the given
+        file.
+        :param connection: The database connection used to query the lines
+        :param file: The file object to which the lines are written
+        :param command_id: The primary key of the command whose lines are written
+        :return:
+        """
+        separator = b""
+        for column in [Command._stdout_output, Command._stderr_output]:
+            offset = 1
+            while True:
+                lines = connection.execute(select(column[offset:offset + cls.CHUNK_LINES - 1])
+                                           .where(Command.id == command_id)).scalar() or []
+                for line in lines:
+                    file.write(separator + line.encode("utf-8"))
+                    separator = os.linesep.encode("utf-8")
+                if len(lines) < cls.CHUNK_LINES:
+                    break
+                offset += cls.CHUNK_LINES
+
+    @classmethod
+    def _export_file(cls, engine: Engine, file_id: int, file_path: str) -> None:
+        """
+        This method streams the content of the given file in chunks from the database to the filesystem. It is
+        executed by the worker threads and therefore, uses its own database connection.
+        :param engine: The database engine used to query the file's content
+        :param file_id: The primary key of the file whose content is exported
+        :param file_path: The path to which the content is written
+        :return:
+        """
+        with engine.connect() as connection, open(file_path, "wb") as file:
+            cls._write_chunks(connection, file, File.content, File.id == file_id)
+
+    @classmethod
+    def _export_raw_scan_result(cls,
+                                engine: Engine,
+                                command_id: int,
+                                file_type: FileType,
+                                index: int,
+                                file_path: str) -> None:
         """
-        This method writes the given file_info to the filesystem
-        :param file_info:
-        :param deduplicated:
+        This method streams the given raw scan result of a command in chunks from the database to the filesystem. It is
+        executed by the worker threads and therefore, uses its own database connection.
+        :param engine: The database engine used to query the raw scan result
+        :param command_id: The primary key of the command whose raw scan result is exported
+        :param file_type: The type of the raw scan result that is exported
+        :param index: The position (starting at 1) of the exported JSON object in column json_output
+        :param file_path: The path to which the raw scan result is written
         :return:
         """
-        deduplicated[file_info.file.sha256_value] = True
-        file_name = self._get_unique_file_name(self._args.export_path, file_info.file_name)
-        if os.path.isfile(file_name):
-            print("file '{}' exists already but will be overwritten.".format(file_name),
-                  file=sys.stderr)
-        with open(file_name, "wb") as file:
-            file.write(file_info.file.content)
+        with engine.connect() as connection, open(file_path, "wb") as file:
+            if file_type == FileType.text:
+                cls._write_lines(connection, file, command_id)
+            elif file_type == FileType.xml:
+                cls._write_chunks(connection, file, Command.xml_output, Command.id == command_id)
+            elif file_type == FileType.binary:
+                cls._write_chunks(connection, file, Command.binary_output, Command.id == command_id)
+            elif file_type == FileType.json:
+                item = connection.execute(select(Command.json_output[index]).where(Command.id == command_id)).scalar()
+                file.write(json.dumps(item, indent=4).encode("utf-8"))
+
+    @staticmethod
+    def _link_file(source: str, destination: str) -> None:
+        """
+        This method creates a hard link to an already exported file with the same content. If the filesystem does not
+        support hard links, then the file is copied.
+        :param source: The path of the already exported file
+        :param destination: The path of the hard link
+        :return:
+        """
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
 
     def _append_csv_row(self, csv_rows: List[List[str]], command: Command, file_type: FileType) -> None:
         service = command.service
@@ -154,52 +290,92 @@ class ReportClass(BaseReport):
                                  service.service_name if service else None,
                                  command.status_str])
 
-    def _export_raw_scan_result(self, command: Command, file_type: FileType) -> None:
+    def _get_raw_scan_results(self) -> Dict[int, List[Tuple[FileType, int, str]]]:
         """
-        This method writes the raw scan results to the filesystem
-        :param command:
-        :param file_type:
-        :return:
+        This method returns the types and SHA256 values of all raw scan results of the selected workspaces. The SHA256
+        values are computed by the database and therefore, the raw scan results do not have to be loaded for the
+        deduplication.
+        :return: Dictionary containing the command IDs (keys) and a list of tuples (values). Each tuple contains the
+        file type, the position of the JSON object in column json_output (1 for all other file types), and the SHA256
+        value of the respective raw scan result
         """
-        if not self._file_types or file_type in self._file_types:
-            contents = []
-            file_name = None
-            stdout = command.stdout
-            if file_type == FileType.xml and command.xml_output:
-                file_name = "{}.xml".format(command.file_name)
-                contents = [command.xml_output]
-            elif file_type == FileType.json and command.json_output:
-                file_name = "{}.json".format(command.file_name)
-                contents = [json.dumps(item, indent=4) for item in command.json_output if item]
-            elif file_type == FileType.binary and command.binary_output:
-                file_name = "{}.bin".format(command.file_name)
-                contents = [command.binary_output]
-            elif file_type == FileType.text and stdout:
-                file_name = "{}.txt".format(command.file_name)
-                contents = [os.linesep.join(stdout)]
-            for content in contents:
-                file_path = self._get_unique_file_name(self._args.export_path, file_name)
-                mode = "w" if isinstance(content, str) else "wb"
-                with open(file_path, mode) as file:
-                    file.write(content)
+        result = {}
+        workspace_ids = [item.id for item in self._workspaces]
+        stdout_count = func.coalesce(func.cardinality(Command._stdout_output), 0) + \
+            func.coalesce(func.cardinality(Command._stderr_output), 0)
+        stdout = func.array_to_string(func.array_cat(Command._stdout_output, Command._stderr_output), os.linesep)
+        json_item = func.unnest(Command.json_output) \
+            .table_valued("value", with_ordinality="ordinality") \
+            .render_derived()
+        queries = {FileType.text: self._session.query(Command.id,
+                                                      func.sha256(func.convert_to(stdout, "UTF8")))
+                       .filter(stdout_count > 0),
+                   FileType.xml: self._session.query(Command.id,
+                                                     func.sha256(func.convert_to(Command.xml_output, "UTF8")))
+                       .filter(func.length(Command.xml_output) > 0),
+                   FileType.json: self._session.query(Command.id,
+                                                      func.sha256(func.convert_to(cast(json_item.c.value, Text),
+                                                                                  "UTF8")),
+                                                      json_item.c.ordinality)
+                       .join(json_item, true())
+                       .filter(cast(json_item.c.value, Text).notin_(["null", "{}", "[]", '""', "0", "false"]))
+                       .order_by(json_item.c.ordinality),
+                   FileType.binary: self._session.query(Command.id, func.sha256(Command.binary_output))
+                       .filter(func.length(Command.binary_output) > 0)}
+        for file_type, query in queries.items():
+            if not self._file_types or file_type in self._file_types:
+                for row in query.filter(Command.workspace_id.in_(workspace_ids)):
+                    index = row[2] if file_type == FileType.json else 1
+                    result.setdefault(row[0], []).append((file_type, index, bytes(row[1]).hex()))
+        return result
 
     def export_files(self) -> None:
         """
-        Exports all files from the database.
+        Exports all files from the database. The files are written in parallel by worker threads (see argument
+        --threads), which stream the files' contents and the raw scan results in chunks from the database. Files with
+        the same content are written only once and the duplicates are hard links to the first file.
         :return:
         """
-        commands = self._session.query(Command)
-        deduplicated = {}
-        for command in commands.all():
-            if command.workspace in self._workspaces:
+        engine = self._session.get_bind()
+        threads = self._args.threads if "threads" in self._args and self._args.threads else 1
+        # Limits the number of files that are queued for export to keep the memory consumption constant
+        semaphore = BoundedSemaphore(threads * self.QUEUED_FILES_PER_THREAD)
+        # Contains the SHA256 values (keys) of all exported contents and the paths (values) to which they are written
+        exported = {}
+        links = []
+        extensions = {FileType.text: "txt", FileType.xml: "xml", FileType.json: "json", FileType.binary: "bin"}
+        raw_scan_results = self._get_raw_scan_results()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = []
+
+            def submit(function, *args) -> None:
+                semaphore.acquire()
+                future = executor.submit(function, *args)
+                future.add_done_callback(lambda _: semaphore.release())
+                futures.append(future)
+
+            for command in self._get_commands(defer_content=True):
                 if self._filter(command):
-                    self._export_raw_scan_result(command, FileType.text)
-                    self._export_raw_scan_result(command, FileType.xml)
-                    self._export_raw_scan_result(command, FileType.json)
-                    self._export_raw_scan_result(command, FileType.binary)
+                    for file_type, index, sha256_value in raw_scan_results.get(command.id, []):
+                        file_name = "{}.{}".format(command.file_name, extensions[file_type])
+                        file_path = self._get_unique_file_name(self._args.export_path, file_name)
+                        if sha256_value in exported:
+                            links.append((exported[sha256_value], file_path))
+                        else:
+                            exported[sha256_value] = file_path
+                            submit(self._export_raw_scan_result, engine, command.id, file_type, index, file_path)
                     for mapping in command.file_mappings:
                         if not self._file_types or mapping.file.type in self._file_types:
-                            self._export_file(mapping, deduplicated)
+                            file_path = self._get_unique_file_name(self._args.export_path, mapping.file_name)
+                            if mapping.file.sha256_value in exported:
+                                links.append((exported[mapping.file.sha256_value], file_path))
+                            else:
+                                exported[mapping.file.sha256_value] = file_path
+                                submit(self._export_file, engine, mapping.file.id, file_path)
+            for future in futures:
+                future.result()
+        for source, destination in links:
+            self._link_file(source, destination)
 
     def get_csv(self) -> List[List[str]]:
         """
@@ -218,27 +394,25 @@ class ReportClass(BaseReport):
                  "Port",
                  "Service Name",
                  "Status"]]
-        commands = self._session.query(Command)
-        for command in commands:
-            if command.workspace in self._workspaces:
-                if self._filter(command):
-                    self._append_csv_row(rows, command, FileType.text)
-                    self._append_csv_row(rows, command, FileType.xml)
-                    self._append_csv_row(rows, command, FileType.json)
-                    self._append_csv_row(rows, command, FileType.binary)
-                    for mapping in command.file_mappings:
-                        if not self._file_types or mapping.file.type in self._file_types:
-                            service = command.service
-                            rows.append([command.id,
-                                         command.workspace.name,
-                                         mapping.file_name,
-                                         mapping.file.type_str,
-                                         len(mapping.file.content),
-                                         command.collector_name.name,
-                                         command.collector_name.type_str,
-                                         command.target_name,
-                                         service.port if service else None,
-                                         service.protocol_str if service else None,
-                                         service.service_name if service else None,
-                                         command.status_str])
+        for command in self._get_commands():
+            if self._filter(command):
+                self._append_csv_row(rows, command, FileType.text)
+                self._append_csv_row(rows, command, FileType.xml)
+                self._append_csv_row(rows, command, FileType.json)
+                self._append_csv_row(rows, command, FileType.binary)
+                for mapping in command.file_mappings:
+                    if not self._file_types or mapping.file.type in self._file_types:
+                        service = command.service
+                        rows.append([command.id,
+                                     command.workspace.name,
+                                     mapping.file_name,
+                                     mapping.file.type_str,
+                                     len(mapping.file.content),
+                                     command.collector_name.name,
+                                     command.collector_name.type_str,
+                                     command.target_name,
+                                     service.port if service else None,
+                                     service.protocol_str if service else None,
+                                     service.service_name if service else None,
+                                     command.status_str])
         return rows
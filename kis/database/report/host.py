@@ -21,6 +21,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import argparse
+from typing import Dict
 from typing import List
 from database.model import Host
 from database.model import ServiceState
@@ -29,6 +30,7 @@ from database.model import ReportVisibility
 from database.model import TextReportDetails
 from database.model import DnsResourceRecordType
 from database.report.core import BaseReport
+from sqlalchemy.orm import Load
 
 
 class ReportClass(BaseReport):
@@ -101,6 +103,14 @@ class ReportClass(BaseReport):
                                      include_host_names=True)
         return result
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        host_options = [self._load_commands(Host.commands, outputs=self._load_outputs)]
+        return {BaseReport.LOAD_HOSTS: self._load_hosts(service_options=self._get_service_options(),
+                                                        host_options=host_options)}
+
     def _egrep_text(self, host: Host) -> List[str]:
         """
         This method returns all lines matching the given list of regular expressions
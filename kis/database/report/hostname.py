@@ -23,9 +23,12 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import argparse
+from typing import Dict
 from typing import List
 from openpyxl import Workbook
+from database.model import Host
 from database.model import HostName
+from database.model import HostHostNameMapping
 from database.model import ServiceState
 from database.model import CollectorType
 from database.model import ReportScopeType
@@ -34,6 +37,8 @@ from database.model import TextReportDetails
 from database.model import DnsResourceRecordType
 from database.report.core import BaseReport
 from database.report.core import ReportLanguage
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -110,6 +115,17 @@ class ReportClass(BaseReport):
                                         scope=self._scope,
                                         include_ip_address=True)
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        host_name_options = [self._load_commands(HostName.commands, outputs=self._load_outputs),
+                             selectinload(HostName.host_host_name_mappings)
+                             .joinedload(HostHostNameMapping.host)
+                             .selectinload(Host.services)]
+        return {BaseReport.LOAD_HOST_NAMES: self._load_host_names(service_options=self._get_service_options(),
+                                                                  host_name_options=host_name_options)}
+
     def _egrep_text(self, host_name: HostName) -> List[str]:
         """
         This method returns all lines matching the given list of regular expressions
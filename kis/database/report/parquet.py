@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+"""This module allows exporting the workspaces' entities into columnar files for offline analyses."""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2022 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import os
+import sys
+import enum
+import argparse
+from typing import List
+from typing import Tuple
+from typing import Iterator
+from database.model import Host
+from database.model import Path
+from database.model import Email
+from database.model import Command
+from database.model import Service
+from database.model import TlsInfo
+from database.model import HostName
+from database.model import Workspace
+from database.model import DomainName
+from database.model import CipherSuite
+from database.model import Credentials
+from database.model import CollectorName
+from database.model import TlsInfoCipherSuiteMapping
+from database.report.core import BaseReport
+from sqlalchemy import Text
+from sqlalchemy import case
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ColumnarFormat(enum.Enum):
+    parquet = enum.auto()
+    arrow = enum.auto()
+
+
+class ColumnarTable(enum.Enum):
+    hosts = enum.auto()
+    host_names = enum.auto()
+    services = enum.auto()
+    paths = enum.auto()
+    credentials = enum.auto()
+    tls = enum.auto()
+    commands = enum.auto()
+
+
+class ReportClass(BaseReport):
+    """
+    this module allows exporting workspace entities into typed parquet or arrow files for offline analyses
+    """
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(name="columnar export",
+                         title="Columnar Export of Workspace Entities",
+                         description="Exports the workspaces' entities into typed columnar files.",
+                         **kwargs)
+
+    @staticmethod
+    def get_add_argparse_arguments(parser_parquet: argparse.ArgumentParser):
+        """
+        This method adds the report's specific command line arguments.
+        """
+        # setup parquet parser
+        parser_parquet.add_argument("-w", "--workspaces",
+                                    metavar="WORKSPACE",
+                                    help="query the given workspaces",
+                                    nargs="+",
+                                    type=str)
+        parser_parquet_group = parser_parquet.add_mutually_exclusive_group()
+        parser_parquet_group.add_argument('--csv', default=True,
+                                          action='store_true',
+                                          help='returns the columns and types of the exported tables in csv format')
+        parser_parquet_group.add_argument('-o', '--export-path',
+                                          type=str,
+                                          metavar="DIR",
+                                          help='exports one file per table (e.g., services.parquet) to output '
+                                               'directory DIR')
+        parser_parquet.add_argument('--format',
+                                    choices=[item.name for item in ColumnarFormat],
+                                    default=ColumnarFormat.parquet.name,
+                                    help='the format of the exported files. format parquet creates compressed files '
+                                         'for archiving and data exchange. format arrow creates uncompressed arrow IPC '
+                                         'files, which can be memory-mapped and thus, loaded without copying them '
+                                         '(e.g., pyarrow.ipc.open_file(pyarrow.memory_map(path)).read_all()). per '
+                                         'default, format parquet is used')
+        parser_parquet.add_argument('--tables',
+                                    choices=[item.name for item in ColumnarTable] + ["all"],
+                                    default=["all"],
+                                    nargs='+',
+                                    help='export only the given tables. per default, all tables are exported')
+        parser_parquet.add_argument('--compression',
+                                    choices=["none", "snappy", "gzip", "zstd"],
+                                    default="snappy",
+                                    help='the compression codec of the parquet files. per default, snappy is used')
+        parser_parquet.add_argument('-b', '--batch-size',
+                                    type=int,
+                                    default=10000,
+                                    metavar="N",
+                                    help='number of rows that are fetched from the database and written as one batch '
+                                         '(parquet row group or arrow record batch). the memory consumption only '
+                                         'depends on this value and not on the size of the workspaces. per default, '
+                                         '10000 rows are used')
+
+    @property
+    def _tables(self) -> List[ColumnarTable]:
+        tables = self._args.tables if "tables" in self._args and self._args.tables else ["all"]
+        return list(ColumnarTable) if "all" in tables else [ColumnarTable[item] for item in tables]
+
+    @property
+    def _format(self) -> ColumnarFormat:
+        return ColumnarFormat[self._args.format] if "format" in self._args and self._args.format \
+            else ColumnarFormat.parquet
+
+    @property
+    def _batch_size(self) -> int:
+        return self._args.batch_size if "batch_size" in self._args and self._args.batch_size else 10000
+
+    @staticmethod
+    def _get_host_name_expression(host_name, domain_name):
+        """
+        This method returns the SQL expression that computes the full host name (e.g., www.megacorpone.com).
+        """
+        return case((func.coalesce(host_name.name, "") == "", domain_name.name),
+                    else_=host_name.name + "." + domain_name.name)
+
+    def _get_service_columns(self, statement_columns: List[tuple], service) -> Tuple[list, callable]:
+        """
+        This method adds the columns workspace and address of the given service to the given column definitions and
+        returns a function, which adds the respective joins to a select statement.
+        :param statement_columns: The list of column definitions (tuples of name, arrow type, and SQL expression)
+        :param service: The service entity (or alias) that is joined
+        :return: Tuple containing the extended column definitions and the join function
+        """
+        host = aliased(Host)
+        host_name = aliased(HostName)
+        domain_name = aliased(DomainName)
+        workspace_id = func.coalesce(host.workspace_id, domain_name.workspace_id)
+        columns = [("workspace", pyarrow.string(), Workspace.name),
+                   ("address", pyarrow.string(), func.coalesce(func.host(host.address),
+                                                               self._get_host_name_expression(host_name, domain_name)))]
+
+        def join(statement: Select) -> Select:
+            return statement.outerjoin(host, service.host_id == host.id) \
+                .outerjoin(host_name, service.host_name_id == host_name.id) \
+                .outerjoin(domain_name, host_name.domain_name_id == domain_name.id) \
+                .join(Workspace, Workspace.id == workspace_id) \
+                .where(workspace_id.in_([item.id for item in self._workspaces]))
+        return columns + statement_columns, join
+
+    def _get_statement(self, table: ColumnarTable) -> Tuple[list, Select]:
+        """
+        This method returns the column definitions and the select statement of the given table.
+        :param table: The table whose statement is returned
+        :return: Tuple containing the column definitions (tuples of name, arrow type, and SQL expression) and the select
+        statement
+        """
+        workspace_ids = [item.id for item in self._workspaces]
+        if table == ColumnarTable.hosts:
+            columns = [("id", pyarrow.int32(), Host.id),
+                       ("workspace", pyarrow.string(), Workspace.name),
+                       ("address", pyarrow.string(), func.host(Host.address)),
+                       ("version", pyarrow.int8(), func.family(Host.address)),
+                       ("mac_address", pyarrow.string(), cast(Host.mac_address, Text)),
+                       ("in_scope", pyarrow.bool_(), Host._in_scope),
+                       ("is_up", pyarrow.bool_(), Host.is_up),
+                       ("reason_up", pyarrow.string(), Host.reason_up),
+                       ("os_family", pyarrow.string(), Host.os_family),
+                       ("os_details", pyarrow.string(), Host.os_details),
+                       ("workgroup", pyarrow.string(), Host.workgroup),
+                       ("creation_date", pyarrow.timestamp("us"), Host.creation_date),
+                       ("last_modified", pyarrow.timestamp("us"), Host.last_modified)]
+            statement = select([item[2] for item in columns]) \
+                .join(Workspace, Host.workspace_id == Workspace.id) \
+                .where(Host.workspace_id.in_(workspace_ids)) \
+                .order_by(Host.id)
+        elif table == ColumnarTable.host_names:
+            columns = [("id", pyarrow.int32(), HostName.id),
+                       ("workspace", pyarrow.string(), Workspace.name),
+                       ("host_name", pyarrow.string(), self._get_host_name_expression(HostName, DomainName)),
+                       ("domain_name", pyarrow.string(), DomainName.name),
+                       ("domain_name_scope", pyarrow.string(), cast(DomainName.scope, Text)),
+                       ("in_scope", pyarrow.bool_(), HostName._in_scope),
+                       ("creation_date", pyarrow.timestamp("us"), HostName.creation_date),
+                       ("last_modified", pyarrow.timestamp("us"), HostName.last_modified)]
+            statement = select([item[2] for item in columns]) \
+                .join(DomainName, HostName.domain_name_id == DomainName.id) \
+                .join(Workspace, DomainName.workspace_id == Workspace.id) \
+                .where(DomainName.workspace_id.in_(workspace_ids)) \
+                .order_by(HostName.id)
+        elif table == ColumnarTable.services:
+            columns, join = self._get_service_columns([
+                ("host_id", pyarrow.int32(), Service.host_id),
+                ("host_name_id", pyarrow.int32(), Service.host_name_id),
+                ("protocol", pyarrow.string(), cast(Service.protocol, Text)),
+                ("port", pyarrow.int32(), Service.port),
+                ("state", pyarrow.string(), cast(Service.state, Text)),
+                ("nmap_service_name", pyarrow.string(), Service.nmap_service_name),
+                ("nmap_service_confidence", pyarrow.int32(), Service.nmap_service_confidence),
+                ("nessus_service_name", pyarrow.string(), Service.nessus_service_name),
+                ("nessus_service_confidence", pyarrow.int32(), Service.nessus_service_confidence),
+                ("nmap_product", pyarrow.string(), Service.nmap_product),
+                ("nmap_version", pyarrow.string(), Service.nmap_version),
+                ("nmap_extra_info", pyarrow.string(), Service.nmap_extra_info),
+                ("nmap_tunnel", pyarrow.string(), Service.nmap_tunnel),
+                ("nmap_os_type", pyarrow.string(), Service.nmap_os_type),
+                ("smb_message_signing", pyarrow.bool_(), Service.smb_message_signing),
+                ("rdp_nla", pyarrow.bool_(), Service.rdp_nla),
+                ("url", pyarrow.string(), Service.url),
+                ("creation_date", pyarrow.timestamp("us"), Service.creation_date),
+                ("last_modified", pyarrow.timestamp("us"), Service.last_modified)], Service)
+            columns.insert(0, ("id", pyarrow.int32(), Service.id))
+            statement = join(select([item[2] for item in columns]).select_from(Service)).order_by(Service.id)
+        elif table == ColumnarTable.paths:
+            columns, join = self._get_service_columns([
+                ("service_id", pyarrow.int32(), Path.service_id),
+                ("port", pyarrow.int32(), Service.port),
+                ("name", pyarrow.string(), Path.name),
+                ("type", pyarrow.string(), cast(Path.type, Text)),
+                ("return_code", pyarrow.int32(), Path.return_code),
+                ("size_bytes", pyarrow.int32(), Path.size_bytes),
+                ("url", pyarrow.string(), Path.url),
+                ("creation_date", pyarrow.timestamp("us"), Path.creation_date),
+                ("last_modified", pyarrow.timestamp("us"), Path.last_modified)], Service)
+            columns.insert(0, ("id", pyarrow.int32(), Path.id))
+            statement = join(select([item[2] for item in columns])
+                             .select_from(Path)
+                             .join(Service, Path.service_id == Service.id)).order_by(Path.id)
+        elif table == ColumnarTable.credentials:
+            # Credentials either belong to a service or to an email address
+            host = aliased(Host)
+            host_name = aliased(HostName)
+            domain_name = aliased(DomainName)
+            email_host_name = aliased(HostName)
+            email_domain_name = aliased(DomainName)
+            workspace_id = func.coalesce(host.workspace_id, domain_name.workspace_id, email_domain_name.workspace_id)
+            columns = [("id", pyarrow.int32(), Credentials.id),
+                       ("workspace", pyarrow.string(), Workspace.name),
+                       ("service_id", pyarrow.int32(), Credentials.service_id),
+                       ("email_id", pyarrow.int32(), Credentials.email_id),
+                       ("address", pyarrow.string(),
+                        func.coalesce(func.host(host.address),
+                                      self._get_host_name_expression(host_name, domain_name))),
+                       ("port", pyarrow.int32(), Service.port),
+                       ("email", pyarrow.string(),
+                        Email.address + "@" + self._get_host_name_expression(email_host_name, email_domain_name)),
+                       ("username", pyarrow.string(), Credentials.username),
+                       ("domain", pyarrow.string(), Credentials.domain),
+                       ("password", pyarrow.string(), Credentials.password),
+                       ("type", pyarrow.string(), cast(Credentials.type, Text)),
+                       ("complete", pyarrow.bool_(), Credentials.complete),
+                       ("creation_date", pyarrow.timestamp("us"), Credentials.creation_date),
+                       ("last_modified", pyarrow.timestamp("us"), Credentials.last_modified)]
+            statement = select([item[2] for item in columns]) \
+                .select_from(Credentials) \
+                .outerjoin(Service, Credentials.service_id == Service.id) \
+                .outerjoin(host, Service.host_id == host.id) \
+                .outerjoin(host_name, Service.host_name_id == host_name.id) \
+                .outerjoin(domain_name, host_name.domain_name_id == domain_name.id) \
+                .outerjoin(Email, Credentials.email_id == Email.id) \
+                .outerjoin(email_host_name, Email.host_name_id == email_host_name.id) \
+                .outerjoin(email_domain_name, email_host_name.domain_name_id == email_domain_name.id) \
+                .join(Workspace, Workspace.id == workspace_id) \
+                .where(workspace_id.in_(workspace_ids)) \
+                .order_by(Credentials.id)
+        elif table == ColumnarTable.tls:
+            columns, join = self._get_service_columns([
+                ("service_id", pyarrow.int32(), TlsInfo.service_id),
+                ("port", pyarrow.int32(), Service.port),
+                ("version", pyarrow.string(), cast(TlsInfo.version, Text)),
+                ("preference", pyarrow.string(), cast(TlsInfo.preference, Text)),
+                ("heartbleed", pyarrow.bool_(), TlsInfo.heartbleed),
+                ("cipher_suite", pyarrow.string(), CipherSuite.iana_name),
+                ("openssl_name", pyarrow.string(), CipherSuite.openssl_name),
+                ("security", pyarrow.string(), cast(CipherSuite.security, Text)),
+                ("kex_algorithm", pyarrow.string(), cast(TlsInfoCipherSuiteMapping.kex_algorithm_details, Text)),
+                ("kex_bits", pyarrow.int32(), TlsInfoCipherSuiteMapping.kex_bits),
+                ("order", pyarrow.int32(), TlsInfoCipherSuiteMapping.order),
+                ("prefered", pyarrow.bool_(), TlsInfoCipherSuiteMapping.prefered)], Service)
+            columns.insert(0, ("tls_info_id", pyarrow.int32(), TlsInfo.id))
+            statement = join(select([item[2] for item in columns])
+                             .select_from(TlsInfoCipherSuiteMapping)
+                             .join(TlsInfo, TlsInfoCipherSuiteMapping.tls_info_id == TlsInfo.id)
+                             .join(CipherSuite, TlsInfoCipherSuiteMapping.cipher_suite_id == CipherSuite.id)
+                             .join(Service, TlsInfo.service_id == Service.id)) \
+                .order_by(TlsInfo.id, TlsInfoCipherSuiteMapping.order)
+        elif table == ColumnarTable.commands:
+            # The command outputs are not exported as their sizes are computed by the database
+            columns = [("id", pyarrow.int32(), Command.id),
+                       ("workspace", pyarrow.string(), Workspace.name),
+                       ("collector", pyarrow.string(), CollectorName.name),
+                       ("collector_type", pyarrow.string(), cast(CollectorName.type, Text)),
+                       ("status", pyarrow.string(), cast(Command.status, Text)),
+                       ("host_id", pyarrow.int32(), Command.host_id),
+                       ("host_name_id", pyarrow.int32(), Command.host_name_id),
+                       ("service_id", pyarrow.int32(), Command.service_id),
+                       ("email_id", pyarrow.int32(), Command.email_id),
+                       ("company_id", pyarrow.int32(), Command.company_id),
+                       ("os_command", pyarrow.string(), func.array_to_string(Command.os_command, " ")),
+                       ("return_code", pyarrow.int32(), Command.return_code),
+                       ("start_time", pyarrow.timestamp("us"), Command.start_time),
+                       ("stop_time", pyarrow.timestamp("us"), Command.stop_time),
+                       ("stdout_size", pyarrow.int64(),
+                        func.coalesce(func.length(func.array_to_string(Command._stdout_output, os.linesep)), 0)),
+                       ("stderr_size", pyarrow.int64(),
+                        func.coalesce(func.length(func.array_to_string(Command._stderr_output, os.linesep)), 0)),
+                       ("creation_date", pyarrow.timestamp("us"), Command.creation_date)]
+            statement = select([item[2] for item in columns]) \
+                .join(CollectorName, Command.collector_name_id == CollectorName.id) \
+                .join(Workspace, Command.workspace_id == Workspace.id) \
+                .where(Command.workspace_id.in_(workspace_ids)) \
+                .order_by(Command.id)
+        else:
+            raise NotImplementedError("table '{}' is not implemented".format(table.name))
+        return columns, statement
+
+    def iter_batches(self, table: ColumnarTable) -> Iterator:
+        """
+        This method streams the rows of the given table via a server-side cursor from the database and returns them as
+        arrow record batches of at most --batch-size rows.
+        :param table: The table whose rows are returned
+        :return: Iterator of pyarrow.RecordBatch objects
+        """
+        columns, statement = self._get_statement(table)
+        schema = self.get_schema(columns)
+        result = self._session.execute(statement.execution_options(stream_results=True))
+        for rows in result.partitions(self._batch_size):
+            values = list(zip(*rows))
+            yield pyarrow.RecordBatch.from_arrays([pyarrow.array(values[i], type=item[1])
+                                                   for i, item in enumerate(columns)], schema=schema)
+
+    @staticmethod
+    def get_schema(columns: List[tuple]):
+        """
+        This method returns the arrow schema of the given column definitions.
+        """
+        return pyarrow.schema([pyarrow.field(item[0], item[1]) for item in columns])
+
+    def export_table(self, table: ColumnarTable, file_path: str) -> None:
+        """
+        This method writes the given table batch by batch into the given file. Thereby, the memory consumption remains
+        constant, independent of the number of rows.
+        :param table: The table that is exported
+        :param file_path: The path of the parquet or arrow file
+        :return:
+        """
+        columns, _ = self._get_statement(table)
+        schema = self.get_schema(columns)
+        if self._format == ColumnarFormat.parquet:
+            compression = self._args.compression if "compression" in self._args and self._args.compression \
+                else "snappy"
+            with pyarrow.parquet.ParquetWriter(file_path, schema, compression=compression) as writer:
+                for batch in self.iter_batches(table):
+                    writer.write_batch(batch)
+        else:
+            with pyarrow.OSFile(file_path, "wb") as sink, pyarrow.ipc.new_file(sink, schema) as writer:
+                for batch in self.iter_batches(table):
+                    writer.write_batch(batch)
+
+    @staticmethod
+    def read_table(file_path: str):
+        """
+        This method loads the given parquet or arrow file. Arrow files are memory-mapped and thus, their columns are
+        not copied into memory.
+        :param file_path: The path of the parquet or arrow file
+        :return: The pyarrow.Table
+        """
+        if pyarrow is None:
+            raise ModuleNotFoundError("pyarrow not found")
+        if os.path.splitext(file_path)[1] == ".arrow":
+            return pyarrow.ipc.open_file(pyarrow.memory_map(file_path, "r")).read_all()
+        return pyarrow.parquet.read_table(file_path)
+
+    def export_files(self) -> None:
+        """
+        Exports the selected tables into the output directory.
+        :return:
+        """
+        if pyarrow is None:
+            raise ModuleNotFoundError("pyarrow not found. install it via: pip3 install pyarrow")
+        for table in self._tables:
+            file_path = os.path.join(self._args.export_path, "{}.{}".format(table.name, self._format.name))
+            self.export_table(table, file_path)
+
+    def get_csv(self) -> List[List[str]]:
+        """
+        This method returns the columns and types of all selected tables as CSV.
+        :return:
+        """
+        if pyarrow is None:
+            raise ModuleNotFoundError("pyarrow not found. install it via: pip3 install pyarrow")
+        rows = [["Table", "Column", "Type"]]
+        for table in self._tables:
+            columns, _ = self._get_statement(table)
+            rows += [[table.name, item[0], str(item[1])] for item in columns]
+        return rows
+
+    def export(self):
+        """
+        This method executes the export
+        :return:
+        """
+        if "export_path" in self._args and self._args.export_path:
+            if os.path.isdir(self._args.export_path):
+                self.export_files()
+            else:
+                print("Invalid output directory '{}'.".format(self._args.export_path), file=sys.stderr)
+        else:
+            super().export()
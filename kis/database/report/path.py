@@ -21,13 +21,17 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import argparse
+from typing import Dict
 from typing import List
 from database.model import Path
+from database.model import Service
 from database.model import PathType
 from database.model import CollectorType
 from database.model import ReportScopeType
 from database.model import DnsResourceRecordType
 from database.report.core import BaseReport
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -74,6 +78,14 @@ class ReportClass(BaseReport):
                                  nargs="+",
                                  help='return only path items of the given type. per default, all information is returned')
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        service_options = [selectinload(Service.paths).options(selectinload(Path.sources), selectinload(Path.queries))]
+        return {BaseReport.LOAD_HOSTS: self._load_hosts(service_options=service_options),
+                BaseReport.LOAD_HOST_NAMES: self._load_host_names(service_options=service_options)}
+
     def _filter(self, path: Path) -> bool:
         """
         Method determines whether the given item shall be included into the report
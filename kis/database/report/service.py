@@ -21,6 +21,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import argparse
+from typing import Dict
 from typing import List
 from openpyxl import Workbook
 from database.model import Host
@@ -35,10 +36,12 @@ from database.model import ReportScopeType
 from database.model import ReportVisibility
 from database.model import TextReportDetails
 from database.model import HostHostNameMapping
+from database.model import ServiceSummary
 from database.model import DnsResourceRecordType
 from collectors.os.modules.http.core import HttpServiceDescriptor
 from database.report.core import BaseReport
 from database.report.core import ReportLanguage
+from sqlalchemy.orm import Load
 from sqlalchemy.orm import aliased
 from sqlalchemy import or_
 from sqlalchemy import and_
@@ -149,6 +152,14 @@ class ReportClass(BaseReport):
                                          include_ip_address=True)
         return result
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        service_options = self._get_service_options()
+        return {BaseReport.LOAD_HOSTS: self._load_hosts(service_options=service_options),
+                BaseReport.LOAD_HOST_NAMES: self._load_host_names(service_options=service_options)}
+
     def _egrep_text(self, item: object) -> List[str]:
         """
         This method returns all lines matching the given list of regular expressions
@@ -534,21 +545,18 @@ class ReportClass(BaseReport):
                    "No. Commands",
                    "No. Vulnerabilities"]]
         workspaces = [item.name for item in self._workspaces]
-        # Print all host and host name services that are related to each other.
+        # Print all host and host name services that are related to each other. The pairs of host and host name
+        # services are precomputed by the database (see table service_summary).
         alias_service_host = aliased(Service)
         alias_service_host_name = aliased(Service)
-        query_results = self._session.query(alias_service_host, alias_service_host_name, HostHostNameMapping) \
-            .join(Host, alias_service_host.host) \
+        query_results = self._session.query(alias_service_host, alias_service_host_name, ServiceSummary) \
+            .select_from(ServiceSummary) \
+            .join(alias_service_host, ServiceSummary.host_service_id == alias_service_host.id) \
+            .join(Host, ServiceSummary.host_id == Host.id) \
             .join(Workspace, and_(Workspace.id == Host.workspace_id, Workspace.name.in_(workspaces))) \
-            .join(HostHostNameMapping,
-                  and_(HostHostNameMapping.host_id == Host.id,
-                       or_(HostHostNameMapping._type.op("&")(DnsResourceRecordType.a.value) == DnsResourceRecordType.a.value,
-                           HostHostNameMapping._type.op("&")(DnsResourceRecordType.aaaa.value) == DnsResourceRecordType.aaaa.value)), isouter=True) \
-            .join(HostName, HostHostNameMapping.host_name, isouter=True) \
-            .join(alias_service_host_name, HostName.services, isouter=True) \
-            .filter(or_(alias_service_host_name.id.is_(None), and_(alias_service_host.port == alias_service_host_name.port,
-                                                                   alias_service_host.protocol == alias_service_host_name.protocol))).distinct()
-        for service_host, service_host_name, mapping in query_results.all():
+            .join(alias_service_host_name, ServiceSummary.host_name_service_id == alias_service_host_name.id,
+                  isouter=True)
+        for service_host, service_host_name, summary in query_results.all():
             if self._filter(service_host.host):
                 host = service_host.host
                 host_names = [mapping.host_name
@@ -571,7 +579,7 @@ class ReportClass(BaseReport):
                 host_sources = host.sources_str
                 if service_host.state in self._service_state_filter:
                     is_http = descriptor.match_nmap_service_name(service_host)
-                    url_str = [path.get_urlparse().geturl() for path in service_host.paths if path.name == "/"] \
+                    url_str = [path.url for path in service_host.paths if path.name == "/"] \
                         if is_http else []
                     # Print host service information
                     result.append([host.workspace.name,  # Workspace
@@ -626,7 +634,7 @@ class ReportClass(BaseReport):
                     hosts_str = ", ".join([item.address for item in hosts])
                     host_name_sources = host_name.sources_str
                     is_http = descriptor.match_nmap_service_name(service_host_name)
-                    url_str = [path.get_urlparse().geturl() for path in service_host_name.paths if path.name == "/"] \
+                    url_str = [path.url for path in service_host_name.paths if path.name == "/"] \
                         if is_http else []
                     result.append([host_name.domain_name.workspace.name,  # Workspace
                                    "vhost",  # Type
@@ -832,7 +840,7 @@ class ReportClass(BaseReport):
                     hosts_str = ", ".join([item.address for item in hosts])
                     host_name_sources = host_name.sources_str
                     is_http = descriptor.match_nmap_service_name(service_host_name)
-                    url_str = [path.get_urlparse().geturl() for path in service_host_name.paths if path.name == "/"] \
+                    url_str = [path.url for path in service_host_name.paths if path.name == "/"] \
                         if is_http else []
                     result.append([host_name.domain_name.workspace.name,  # Workspace
                                    "vhost*",  # Type
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""This module allows ranking the collectors by the execution telemetry recorded by kiscollect."""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2022 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import os
+import argparse
+from typing import List
+from database.config import BaseConfig
+from database.report.core import BaseReport
+from collectors.os.core import ExecutionTelemetry
+from collectors.os.core import TelemetryStatistics
+
+
+class ReportClass(BaseReport):
+    """
+    this module ranks the collectors by the execution telemetry (see kiscollect argument --telemetry)
+    """
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(name="telemetry",
+                         title="Execution Telemetry of Collectors",
+                         description="The table ranks the collectors by the average execution time of their "
+                                     "operating system commands. In addition, it shows the time needed to create the "
+                                     "commands, the time the commands waited in the command queue, the time needed to "
+                                     "analyse each MB of command output, and the time spent in the database.",
+                         **kwargs)
+
+    @staticmethod
+    def get_add_argparse_arguments(parser_telemetry: argparse.ArgumentParser):
+        """
+        This method adds the report's specific command line arguments.
+        """
+        # setup telemetry parser
+        parser_telemetry.add_argument("-w", "--workspaces",
+                                      metavar="WORKSPACE",
+                                      help="query the given workspaces",
+                                      nargs="+",
+                                      type=str)
+        parser_telemetry.add_argument("-f", "--file",
+                                      type=str,
+                                      metavar="FILE",
+                                      default=BaseConfig.get_telemetry_file(),
+                                      help="the telemetry file written by kiscollect (see kiscollect argument "
+                                           "--telemetry). per default, file {} is "
+                                           "used".format(BaseConfig.get_telemetry_file()))
+        parser_telemetry_group = parser_telemetry.add_mutually_exclusive_group()
+        parser_telemetry_group.add_argument('--csv', action='store_true', default=True,
+                                            help='returns the ranking of the collectors in csv format')
+        parser_telemetry_group.add_argument('--phases', action='store_true',
+                                            help='returns the duration histogram of each collector and phase in csv '
+                                                 'format')
+
+    def _get_telemetry(self) -> ExecutionTelemetry:
+        """
+        This method aggregates the spans of the selected workspaces.
+        """
+        file_name = self._args.file if "file" in self._args and self._args.file else BaseConfig.get_telemetry_file()
+        if os.path.isfile(file_name):
+            result = ExecutionTelemetry.load(file_name, workspaces=[item.name for item in self._workspaces])
+        else:
+            result = ExecutionTelemetry()
+        return result
+
+    def get_csv(self) -> List[List[str]]:
+        """
+        This method returns all information as CSV.
+        :return:
+        """
+        telemetry = self._get_telemetry()
+        if "phases" in self._args and self._args.phases:
+            buckets = ["<= {}s".format(item) for item in TelemetryStatistics.BUCKETS]
+            buckets.append("> {}s".format(TelemetryStatistics.BUCKETS[-1]))
+            result = [["Collector",
+                       "Phase",
+                       "Count",
+                       "Total [s]",
+                       "Average [s]",
+                       "Maximum [s]",
+                       "Output [bytes]"] + buckets]
+            for item in sorted(telemetry.get_statistics(), key=lambda x: (x.collector, x.phase.value)):
+                result.append([item.collector,
+                               item.phase.name,
+                               item.count,
+                               item.total,
+                               item.average,
+                               item.maximum,
+                               item.output_size] + item.histogram)
+        else:
+            result = [["Rank",
+                       "Collector",
+                       "Commands",
+                       "Creation [s]",
+                       "Queue Wait [s/command]",
+                       "Execution [s/command]",
+                       "Analysis [s/MB]",
+                       "Database [s]",
+                       "Database [s/command]"]]
+            for rank, row in enumerate(telemetry.get_ranking(), start=1):
+                result.append([rank] + row)
+        return result
@@ -22,8 +22,11 @@ __version__ = 0.1
 
 import argparse
 from openpyxl import Workbook
+from typing import Dict
 from typing import List
+from database.model import Service
 from database.model import TlsInfo
+from database.model import TlsInfoCipherSuiteMapping
 from database.model import ScopeType
 from database.model import ServiceState
 from database.model import CipherSuiteSecurity
@@ -31,6 +34,9 @@ from database.model import DnsResourceRecordType
 from collectors.os.modules.http.core import HttpServiceDescriptor
 from database.report.core import BaseReport
 from database.report.core import ReportLanguage
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 
 
 class ReportClass(BaseReport):
@@ -76,6 +82,18 @@ class ReportClass(BaseReport):
                                        excluded_items=self._excluded_items,
                                        scope=self.scope)
 
+    def _get_loader_options(self) -> Dict[str, Load]:
+        """
+        This method returns the loader options for the object graph that the report traverses.
+        """
+        service_options = [selectinload(Service.paths),
+                           selectinload(Service.tls_info)
+                           .selectinload(TlsInfo.cipher_suite_mappings)
+                           .options(joinedload(TlsInfoCipherSuiteMapping.cipher_suite),
+                                    selectinload(TlsInfoCipherSuiteMapping.sources))]
+        return {BaseReport.LOAD_HOSTS: self._load_hosts(service_options=service_options),
+                BaseReport.LOAD_HOST_NAMES: self._load_host_names(service_options=service_options)}
+
     def _kex_summary(self, kex_algorithm_str: str, kex_algorithm_bits: int) -> str:
         result = None
         if kex_algorithm_str:
@@ -153,7 +171,7 @@ class ReportClass(BaseReport):
                 for service in host.services:
                     if service.state in [ServiceState.Open, ServiceState.Closed]:
                         is_http = descriptor.match_nmap_service_name(service)
-                        url_str = [path.get_urlparse().geturl() for path in service.paths if path.name == "/"] \
+                        url_str = [path.url for path in service.paths if path.name == "/"] \
                             if is_http else []
                         patch_missing_kex = {}
                         for tls_info in service.tls_info:
@@ -223,7 +241,7 @@ class ReportClass(BaseReport):
                     for service in host_name.services:
                         if service.state in [ServiceState.Open, ServiceState.Closed] and \
                                 descriptor.match_nmap_service_name(service):
-                            url_str = [path.get_urlparse().geturl() for path in service.paths if path.name == "/"]
+                            url_str = [path.url for path in service.paths if path.name == "/"]
                             patch_missing_kex = {}
                             for tls_info in service.tls_info:
                                 if self._filter(tls_info):
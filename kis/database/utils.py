@@ -18,16 +18,21 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
-__db_version__ = "0.3.0"
+__db_version__ = "0.3.1"
 __kis_version__ = "0.3.0"
 
+import os
 import sys
 import grp
+import time
+import atexit
 import passgen
 import shutil
 import tempfile
 import sqlalchemy
+from threading import Lock
 from sqlalchemy import and_
+from sqlalchemy import event
 from sqlalchemy import create_engine
 from database import config
 from database.config import Database as DatabaseConfig
@@ -47,16 +52,204 @@ from database.model import *
 logger = logging.getLogger('database')
 
 
+class SqlStatistics:
+    """
+    This class holds the aggregated executions of one SQL statement issued by one call site.
+    """
+
+    def __init__(self, call_site: str, statement: str):
+        self.call_site = call_site
+        self.statement = statement
+        self.count = 0
+        self.total = 0.
+        self.maximum = 0.
+        # The maximum number of times the statement was executed within a single transaction
+        self.repetitions = 0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.
+
+    def copy(self):
+        result = SqlStatistics(call_site=self.call_site, statement=self.statement)
+        result.count = self.count
+        result.total = self.total
+        result.maximum = self.maximum
+        result.repetitions = self.repetitions
+        return result
+
+
+class SqlProfiler:
+    """
+    This class counts and times the SQL statements sent to the database per call site.
+
+    The call site is the innermost stack frame outside of SQLAlchemy that caused the statement (e.g., the model
+    property Host.is_processable, which lazy loads a relationship). In addition, the profiler counts how often each
+    statement is repeated within a single transaction. Statements that are repeated at least n_plus_one_threshold
+    times are reported as possible N+1 query patterns.
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 10):
+        self._lock = Lock()
+        self._statistics = {}
+        self._engines = []
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._sqlalchemy_home = os.path.dirname(sqlalchemy.__file__) + os.sep
+        self._script_home = config.BaseConfig.get_script_home() + os.sep
+
+    def attach(self, engine: sqlalchemy.engine.Engine) -> None:
+        """
+        This method starts profiling the statements executed via the given engine.
+        """
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        for name in ["begin", "commit", "rollback"]:
+            event.listen(engine, name, self._reset_transaction)
+        self._engines.append(engine)
+
+    def detach(self, engine: sqlalchemy.engine.Engine = None) -> None:
+        """
+        This method stops profiling the statements of the given engine.
+        :param engine: The engine that is detached. If None, then all attached engines are detached and the report,
+        which is printed at exit (see Engine.enable_profiler), is cancelled.
+        """
+        for item in [engine] if engine else self._engines:
+            event.remove(item, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(item, "after_cursor_execute", self._after_cursor_execute)
+            for name in ["begin", "commit", "rollback"]:
+                event.remove(item, name, self._reset_transaction)
+        self._engines = [item for item in self._engines if engine and item != engine]
+        if not engine:
+            atexit.unregister(self.print_report)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statistics = {}
+
+    def _get_call_site(self) -> str:
+        """
+        :return: The file name, line number, and function name of the innermost stack frame outside of SQLAlchemy
+        """
+        frame = sys._getframe(2)
+        while frame and (frame.f_code.co_filename.startswith(self._sqlalchemy_home) or
+                         frame.f_code.co_filename.endswith("contextlib.py")):
+            frame = frame.f_back
+        if not frame:
+            return "unknown"
+        file_name = frame.f_code.co_filename
+        if file_name.startswith(self._script_home):
+            file_name = file_name[len(self._script_home):]
+        return "{}:{} ({})".format(file_name, frame.f_lineno, frame.f_code.co_name)
+
+    @staticmethod
+    def _reset_transaction(conn, *args, **kwargs) -> None:
+        conn.info.pop("kis_profiler_repetitions", None)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("kis_profiler_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        duration = time.perf_counter() - conn.info["kis_profiler_start_time"].pop()
+        repetitions = conn.info.setdefault("kis_profiler_repetitions", {})
+        repetitions[statement] = repetitions.get(statement, 0) + 1
+        call_site = self._get_call_site()
+        with self._lock:
+            key = (call_site, statement)
+            if key not in self._statistics:
+                self._statistics[key] = SqlStatistics(call_site=call_site, statement=statement)
+            statistics = self._statistics[key]
+            statistics.count += 1
+            statistics.total += duration
+            statistics.maximum = max(statistics.maximum, duration)
+            statistics.repetitions = max(statistics.repetitions, repetitions[statement])
+
+    def get_statistics(self) -> List[SqlStatistics]:
+        """
+        :return: A snapshot of the profiled statements ranked by their total execution time
+        """
+        with self._lock:
+            result = [item.copy() for item in self._statistics.values()]
+        result.sort(key=lambda x: (-x.total, -x.count, x.call_site))
+        return result
+
+    def get_n_plus_one_candidates(self) -> List[SqlStatistics]:
+        """
+        :return: The profiled statements that were repeated at least n_plus_one_threshold times within a single
+        transaction ranked by their number of repetitions
+        """
+        result = [item for item in self.get_statistics() if item.repetitions >= self.n_plus_one_threshold]
+        result.sort(key=lambda x: (-x.repetitions, -x.total, x.call_site))
+        return result
+
+    def print_report(self, file=None, limit: int = 25) -> None:
+        """
+        This method prints the call sites that spent the most time in the database as well as all possible N+1 query
+        patterns.
+        :param file: The file object to which the report is written. If None, then the report is written to stderr.
+        :param limit: The maximum number of statements printed per section
+        """
+        # sys.stderr is resolved at call time as it might have been replaced since this module was imported
+        file = file if file else sys.stderr
+        statistics = self.get_statistics()
+        candidates = self.get_n_plus_one_candidates()
+        print("sql profile: {} statements in {:.3f}s".format(sum([item.count for item in statistics]),
+                                                              sum([item.total for item in statistics])), file=file)
+        for title, items in [("statements ranked by total time", statistics[:limit]),
+                             ("possible n+1 queries (statements repeated at least {} times within a "
+                              "transaction)".format(self.n_plus_one_threshold), candidates[:limit])]:
+            print(file=file)
+            print(title, file=file)
+            print("{:>8} {:>10} {:>10} {:>10} {:>11}  {}".format("calls", "total [s]", "avg [ms]", "max [ms]",
+                                                               "repetitions", "call site"), file=file)
+            for item in items:
+                print("{:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>11}  {}".format(item.count,
+                                                                            item.total,
+                                                                            item.average * 1000,
+                                                                            item.maximum * 1000,
+                                                                            item.repetitions,
+                                                                            item.call_site), file=file)
+                print("{:>54}{}".format("", " ".join(item.statement.split())[:200]), file=file)
+
+
 class Engine:
     """This class implements general methods to interact with the underlying database."""
 
-    def __init__(self, production: bool = True):
+    def __init__(self, production: bool = True, profile_sql: bool = None):
+        """
+        :param production: If true, then the production database is used, else the testing database
+        :param profile_sql: If true, then all SQL statements are profiled (see SqlProfiler) and the profile is printed
+        to stderr at exit. If None, then environment variable KIS_PROFILE_SQL decides.
+        """
         self._production = production
+        self._profiler = None
         self._config = config.Database(self._production)
         self._engine = create_engine(self._config.connection_string)
         self._session_factory = sessionmaker(bind=self._engine)
         self._Session = scoped_session(self._session_factory)
         self.production = production
+        if profile_sql or (profile_sql is None and DatabaseConfig.env_profile_sql()):
+            self.enable_profiler()
+
+    @property
+    def profiler(self) -> SqlProfiler:
+        """
+        :return: The SQL query profiler or None, if profiling is disabled
+        """
+        return self._profiler
+
+    def enable_profiler(self, print_at_exit: bool = True) -> SqlProfiler:
+        """
+        This method starts profiling all SQL statements executed via this engine.
+        :param print_at_exit: If true, then the profile is printed to stderr when the interpreter exits
+        :return: The SQL query profiler
+        """
+        if not self._profiler:
+            self._profiler = SqlProfiler()
+            self._profiler.attach(self._engine)
+            if print_at_exit:
+                atexit.register(self._profiler.print_report)
+        return self._profiler
 
     @property
     def production(self) -> bool:
@@ -64,11 +257,16 @@ class Engine:
 
     @production.setter
     def production(self, value) -> bool:
+        previous_engine = self._engine
         self._production = value
         self._config = config.Database(self._production)
         self._engine = create_engine(self._config.connection_string)
         self._session_factory = sessionmaker(bind=self._engine)
         self._Session = scoped_session(self._session_factory)
+        if self._profiler:
+            # The report, which is printed at exit, remains registered
+            self._profiler.detach(previous_engine)
+            self._profiler.attach(self._engine)
 
     @property
     def engine(self):
@@ -92,6 +290,60 @@ class Engine:
         finally:
             session.close()
 
+    @staticmethod
+    @contextmanager
+    def deferred_network_scope(session, workspace: Workspace):
+        """
+        This context manager suspends the network and host scope updates of the row-level triggers for the current
+        transaction. Thereby, bulk loads (e.g., thousands of networks from an IPAM export) do not recompute the network
+        assignments and scopes of all hosts for each inserted network. Instead, the network assignments and scopes of
+        the given workspace are recomputed at once by database function update_network_scopes at the end of the bulk
+        load.
+
+        Networks without scope obtain the scope of the closest parent network, which is the same result as if all
+        networks were inserted from the largest to the smallest network. Thus, an explicitly set scope that contradicts
+        the scope of a parent network raises an exception instead of being overwritten by the parent's scope.
+        :param session: The session whose transaction performs the bulk load
+        :param workspace: The workspace whose network assignments and scopes are recomputed after the bulk load
+        """
+        session.execute(sqlalchemy.text("SELECT set_config('kis.defer_network_scope', 'on', True);"))
+        yield
+        session.flush()
+        session.execute(sqlalchemy.text("SELECT update_network_scopes(:workspace_id);"),
+                        {"workspace_id": workspace.id})
+        session.execute(sqlalchemy.text("SELECT set_config('kis.defer_network_scope', 'off', True);"))
+        # The scopes were updated by the database and therefore, the session's objects are outdated
+        session.expire_all()
+
+    @staticmethod
+    @contextmanager
+    def bulk_mode(session, workspace: Workspace):
+        """
+        This context manager extends the deferred network scope mode (see deferred_network_scope) to host names. In
+        addition to the network and host scopes, it suspends the host name scope updates as well as the service
+        synchronization between hosts and host names (A and AAAA records) of the row-level triggers for the current
+        transaction. This speeds up bulk loads like scan imports or adding thousands of host names. At the end of the
+        bulk load, all scopes and services of the given workspace are updated at once by database functions
+        update_host_name_scopes, update_network_scopes, and add_mapped_services. Likewise, the service summary (see
+        table service_summary) is recomputed by database function update_service_summary.
+
+        Updates and deletions of services are still synchronized by the row-level trigger add_services_to_host_name.
+        :param session: The session whose transaction performs the bulk load
+        :param workspace: The workspace whose scopes and services are updated after the bulk load
+        """
+        session.execute(sqlalchemy.text("SELECT set_config('kis.bulk_mode', 'on', True);"))
+        with Engine.deferred_network_scope(session=session, workspace=workspace):
+            yield
+            session.flush()
+            params = {"workspace_id": workspace.id}
+            session.execute(sqlalchemy.text("SELECT update_host_name_scopes(:workspace_id);"), params)
+        # Host names of domains with scope vhost depend on the host scopes updated by deferred_network_scope
+        session.execute(sqlalchemy.text("SELECT update_host_name_scopes(:workspace_id);"), params)
+        session.execute(sqlalchemy.text("SELECT add_mapped_services(:workspace_id);"), params)
+        session.execute(sqlalchemy.text("SELECT update_service_summary(:workspace_id);"), params)
+        session.execute(sqlalchemy.text("SELECT set_config('kis.bulk_mode', 'off', True);"))
+        session.expire_all()
+
     def get_workspace(self, session, name: str) -> Workspace:
         try:
             workspace = session.query(Workspace).filter(Workspace.name == name).one()
@@ -201,6 +453,16 @@ class Engine:
                 .filter(Command.status.in_([CommandStatus.pending, CommandStatus.collecting])).scalar_subquery()
             session.query(Command).filter(Command.id.in_(command_ids)).delete(synchronize_session='fetch')
 
+    def refresh_views(self) -> None:
+        """
+        This method rebuilds the precomputed report data (see table service_summary) of all workspaces. Usually, this
+        data is maintained by the database triggers and thus, a rebuild is only necessary if it got out of sync (e.g.,
+        because the triggers were disabled while data was loaded).
+        """
+        with self.session_scope() as session:
+            session.execute(sqlalchemy.text("TRUNCATE service_summary;"))
+            session.execute(sqlalchemy.text("SELECT update_service_summary(id) FROM workspace;"))
+
     def _patch_database(self, version: Version):
         """
         This method reads the patch file of the given version and applies it to the database.
@@ -215,6 +477,17 @@ class Engine:
             content = file.read()
         self._engine.execute(sqlalchemy.text(content).execution_options(autocommit=True))
 
+    @staticmethod
+    def get_patch_versions() -> List[Version]:
+        """
+        This method returns the database model versions of all available patch files in ascending order.
+        """
+        patch_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), "patches")
+        result = [Version(os.path.splitext(item)[0].lstrip("v"))
+                  for item in os.listdir(patch_directory) if re.match(r"^v\d+\.\d+\.\d+\.sql$", item)]
+        result.sort()
+        return result
+
     def patch_database(self, ask_user: bool = True, test_deployed_version: bool = None) -> bool:
         """
         This method takes the given version and applies all necessary database model patches to upgrade to the given
@@ -240,16 +513,18 @@ class Engine:
             else:
                 user_input = "yes"
             if user_input == "yes":
-                if str(current_kis_version) == "v0.3.0":
-                    try:
-                        self._patch_database(current_kis_version)
-                        result = True
-                        print("patch successfully applied.")
-                        print()
-                    except:
-                        print("applying the patch failed.", file=sys.stderr)
-                        print(file=sys.stderr)
-                        result = False
+                try:
+                    # Apply all patches between the deployed and the current database model version
+                    for version in self.get_patch_versions():
+                        if database_version < version and not version > current_kis_version:
+                            self._patch_database(version)
+                    result = True
+                    print("patch successfully applied.")
+                    print()
+                except:
+                    print("applying the patch failed.", file=sys.stderr)
+                    print(file=sys.stderr)
+                    result = False
             else:
                 print("database patch has not been applied.", file=sys.stderr)
                 print(file=sys.stderr)
@@ -337,6 +612,7 @@ class Engine:
 
     def init(self, load_cipher_suites: bool):
         """This method initializes the database."""
+        CipherSuiteIndex.clear()
         self._create_tables()
         self._create_views()
         self._create_functions()
@@ -364,6 +640,7 @@ class Engine:
 
     def drop(self):
         """This method drops all views and tables in the database."""
+        CipherSuiteIndex.clear()
         self._drop_views()
         self._drop_tables()
 
@@ -481,6 +758,10 @@ class Engine:
         DECLARE
             domain_scope scopetype;
         BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the scope is updated by function update_host_name_scopes
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NEW;
+            END IF;
             -- automatically set host_name's in_scope attribute to true, if domain_name scope is all
             domain_scope := (SELECT scope FROM domain_name WHERE id = NEW.domain_name_id);
             IF (domain_scope = 'all' OR
@@ -510,6 +791,11 @@ class Engine:
             host_name_record_count INTEGER;
             host_record_count INTEGER;
         BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the scopes are updated by functions update_host_name_scopes and
+            -- update_network_scopes
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
             IF TG_OP = 'DELETE' THEN
                 current_host_id = OLD.host_id;
                 current_host_name_id = OLD.host_name_id;
@@ -606,6 +892,7 @@ class Engine:
                         WHERE n.workspace_id = NEW.workspace_id AND
                               n.address >> NEW.address AND
                               n.scope IS NOT NULL
+                        ORDER BY masklen(n.address) DESC
                         LIMIT 1;
                     IF (scope IS NOT NULL) THEN
                         NEW.scope = scope;
@@ -625,6 +912,11 @@ class Engine:
         DECLARE
             sub_net inet;
         BEGIN
+            -- In deferred mode (see Engine.deferred_network_scope), hosts and networks are updated at once by
+            -- function update_network_scopes after the bulk load.
+            IF COALESCE(current_setting('kis.defer_network_scope', True), 'off') = 'on' THEN
+                RETURN NULL;
+            END IF;
             -- This trigger updates all networks and hosts based on the current network's scope
             -- RAISE NOTICE 'BEGIN POST NETWORK: TG_OP = %%, address = %%, new scope = %% old scope = %%', TG_OP, NEW.address, NEW.scope, OLD.scope;
             IF (NEW.scope IS NOT NULL) THEN
@@ -689,7 +981,10 @@ class Engine:
             network_scope scopetype;
         BEGIN
             -- RAISE NOTICE 'BEGIN PRE HOST: TG_OP = %%, address = %%, new scope = %%, old scope = %%, network_id = %%', TG_OP, NEW.address, NEW.in_scope, OLD.in_scope, NEW.network_id;
-            IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
+            IF COALESCE(current_setting('kis.defer_network_scope', True), 'off') = 'on' THEN
+                -- In deferred mode, the network and scope is assigned by function update_network_scopes
+                RETURN NEW;
+            ELSIF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
                 -- Usually network assignments are performed when a new network is inserted or updated. If all
                 -- networks, however, are already inserted, then this case ensures that it is inserted to the smallest
                 -- network.
@@ -719,6 +1014,403 @@ class Engine:
             RETURN NEW;
         END;
         $$ LANGUAGE PLPGSQL;""")
+        # update_network_scopes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION update_network_scopes(id_workspace INTEGER)
+        RETURNS VOID AS $$
+        DECLARE
+            defer_network_scope text;
+            network inet;
+            network_scope scopetype;
+            parent_network inet;
+            parent_scope scopetype;
+        BEGIN
+            -- This function performs the network scope updates of triggers
+            -- post_update_network_scopes_after_network_changes and pre_update_hosts_after_host_changes at once for
+            -- all networks and hosts of the given workspace. It is called after bulk loads in deferred mode (see
+            -- Engine.deferred_network_scope). The result is the same as if all networks were inserted from the
+            -- largest to the smallest network.
+            defer_network_scope := current_setting('kis.defer_network_scope', True);
+            PERFORM set_config('kis.defer_network_scope', 'on', True);
+            -- Check whether there is a scope contradiction with the closest parent network
+            SELECT c.address, c.scope, p.address, p.scope INTO network, network_scope, parent_network, parent_scope
+                FROM network c
+                INNER JOIN LATERAL (SELECT n.address, n.scope FROM network n
+                                    WHERE n.workspace_id = c.workspace_id AND
+                                          n.address >> c.address AND
+                                          n.scope IS NOT NULL
+                                    ORDER BY masklen(n.address) DESC
+                                    LIMIT 1) p ON True
+                WHERE c.workspace_id = id_workspace AND
+                      c.scope IS NOT NULL AND
+                      p.scope <> 'strict' AND
+                      p.scope <> 'exclude' AND
+                      p.scope <> c.scope
+                LIMIT 1;
+            IF network IS NOT NULL THEN
+                RAISE EXCEPTION 'update failed because there is the following scope contradiction: Network (%%) with
+                                 scope %% has a different scope than the parent network %% with scope %%. update the
+                                 scope of the parent network first or use the same scope as the parent
+                                 network.', network, network_scope, parent_network, parent_scope;
+            END IF;
+            -- Networks without scope obtain the scope of the closest parent network
+            UPDATE network n
+                SET scope = t.scope
+                FROM (SELECT c.id, (SELECT p.scope FROM network p
+                                    WHERE p.workspace_id = c.workspace_id AND
+                                          p.address >> c.address AND
+                                          p.scope IS NOT NULL
+                                    ORDER BY masklen(p.address) DESC
+                                    LIMIT 1) AS scope
+                      FROM network c
+                      WHERE c.workspace_id = id_workspace AND c.scope IS NULL) t
+                WHERE n.id = t.id AND t.scope IS NOT NULL;
+            -- Hosts are assigned to the smallest network they are part of
+            UPDATE host h
+                SET network_id = t.network_id
+                FROM (SELECT c.id, (SELECT n.id FROM network n
+                                    WHERE n.workspace_id = c.workspace_id AND
+                                          n.address >>= c.address
+                                    ORDER BY masklen(n.address) DESC
+                                    LIMIT 1) AS network_id
+                      FROM host c
+                      WHERE c.workspace_id = id_workspace) t
+                WHERE h.id = t.id AND h.network_id IS DISTINCT FROM t.network_id;
+            -- Finally, the host's scope is updated based on the network's scope
+            UPDATE host h
+                SET in_scope = t.in_scope
+                FROM (SELECT c.id, CASE
+                                     WHEN n.scope = 'all' THEN True
+                                     WHEN n.scope = 'vhost' THEN
+                                         EXISTS(SELECT * FROM host_host_name_mapping m
+                                                INNER JOIN host_name hn ON m.host_name_id = hn.id AND
+                                                                           COALESCE(hn.in_scope, FALSE) AND
+                                                                           COALESCE(m.type, 4) < 3 AND
+                                                                           m.host_id = c.id)
+                                     WHEN n.scope = 'strict' THEN c.in_scope
+                                     ELSE False
+                                   END AS in_scope
+                      FROM host c
+                      LEFT OUTER JOIN network n ON n.id = c.network_id
+                      WHERE c.workspace_id = id_workspace) t
+                WHERE h.id = t.id AND h.in_scope IS DISTINCT FROM t.in_scope;
+            PERFORM set_config('kis.defer_network_scope', COALESCE(defer_network_scope, 'off'), True);
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # update_host_name_scopes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION update_host_name_scopes(id_workspace INTEGER)
+        RETURNS VOID AS $$
+        BEGIN
+            -- This function performs the scope updates of triggers pre_update_host_name_scope and
+            -- post_update_scopes_after_host_host_name_mapping_update at once for all host names of the given
+            -- workspace. It is called after bulk loads in bulk mode (see Engine.bulk_mode).
+            UPDATE host_name hn
+                SET in_scope = t.in_scope
+                FROM (SELECT c.id, CASE
+                                     WHEN d.scope = 'all' THEN True
+                                     WHEN d.scope = 'exclude' THEN False
+                                     WHEN d.scope = 'vhost' AND
+                                          EXISTS(SELECT * FROM host_host_name_mapping m
+                                                 WHERE m.host_name_id = c.id AND COALESCE(m.type, 4) < 3) THEN
+                                         EXISTS(SELECT * FROM host_host_name_mapping m
+                                                INNER JOIN host h ON h.id = m.host_id AND COALESCE(h.in_scope, False)
+                                                WHERE m.host_name_id = c.id AND COALESCE(m.type, 4) < 3)
+                                     ELSE c.in_scope
+                                   END AS in_scope
+                      FROM host_name c
+                      INNER JOIN domain_name d ON d.id = c.domain_name_id AND d.workspace_id = id_workspace) t
+                WHERE hn.id = t.id AND hn.in_scope IS DISTINCT FROM t.in_scope;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # command_search_text
+        self._engine.execute("""CREATE OR REPLACE FUNCTION command_search_text(output TEXT)
+        RETURNS TEXT AS $$
+            -- This function normalises the given collector output for the search index (see column
+            -- command_search_index.search_vector). ANSI escape sequences are removed and all words are separated by
+            -- spaces. Thereby, for example, Apache/2.4.41 is indexed as the words Apache, 2, 4, and 41.
+            SELECT regexp_replace(regexp_replace(output, '\\x1b\\[[0-9;]*[A-Za-z]', '', 'g'), '[^0-9A-Za-z]+', ' ', 'g');
+        $$ LANGUAGE SQL IMMUTABLE;""")
+        # command_search_vector
+        self._engine.execute("""CREATE OR REPLACE FUNCTION command_search_vector(output TEXT)
+        RETURNS TSVECTOR AS $$
+        BEGIN
+            -- This function computes the search index over the given collector output (see column
+            -- command_search_index.search_vector). The word positions are stripped, as matching lines are determined
+            -- when querying the index. If the output is too large for a TSVECTOR, then NULL is returned and the output
+            -- is searched without index.
+            RETURN strip(to_tsvector('simple', command_search_text(output)));
+        EXCEPTION WHEN program_limit_exceeded THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE PLPGSQL IMMUTABLE;""")
+        # add_mapped_services
+        self._engine.execute("""CREATE OR REPLACE FUNCTION add_mapped_services(id_workspace INTEGER)
+        RETURNS VOID AS $$
+        DECLARE
+            bulk_mode text;
+        BEGIN
+            -- This function performs the service synchronization of trigger assign_services_to_host_name at once for
+            -- all A and AAAA records of the given workspace. It is called after bulk loads in bulk mode (see
+            -- Engine.bulk_mode).
+            bulk_mode := current_setting('kis.bulk_mode', True);
+            PERFORM set_config('kis.bulk_mode', 'reconcile', True);
+            -- 1. Sync host services to host names
+            INSERT INTO service (host_name_id,
+                                 protocol,
+                                 port,
+                                 nmap_service_name,
+                                 nessus_service_name,
+                                 nmap_service_confidence,
+                                 nessus_service_confidence,
+                                 nmap_service_name_original,
+                                 state,
+                                 nmap_service_state_reason,
+                                 nmap_product,
+                                 nmap_version,
+                                 nmap_tunnel,
+                                 nmap_os_type,
+                                 creation_date)
+                SELECT DISTINCT ON (m.host_name_id, s.protocol, s.port) m.host_name_id,
+                                                                        s.protocol,
+                                                                        s.port,
+                                                                        s.nmap_service_name,
+                                                                        s.nessus_service_name,
+                                                                        s.nmap_service_confidence,
+                                                                        s.nessus_service_confidence,
+                                                                        s.nmap_service_name_original,
+                                                                        s.state,
+                                                                        s.nmap_service_state_reason,
+                                                                        s.nmap_product,
+                                                                        s.nmap_version,
+                                                                        s.nmap_tunnel,
+                                                                        s.nmap_os_type,
+                                                                        NOW()
+                FROM host_host_name_mapping m
+                INNER JOIN host h ON h.id = m.host_id AND h.workspace_id = id_workspace
+                INNER JOIN service s ON s.host_id = m.host_id
+                WHERE ((m.type & 1) = 1 OR (m.type & 2) = 2) AND
+                      NOT EXISTS(SELECT * FROM service e
+                                 WHERE e.host_name_id = m.host_name_id AND
+                                       e.protocol = s.protocol AND
+                                       e.port = s.port)
+                ORDER BY m.host_name_id, s.protocol, s.port, m.id;
+            -- 2. Sync host name services to hosts
+            INSERT INTO service (host_id,
+                                 protocol,
+                                 port,
+                                 nmap_service_name,
+                                 nessus_service_name,
+                                 nmap_service_confidence,
+                                 nessus_service_confidence,
+                                 nmap_service_name_original,
+                                 state,
+                                 nmap_service_state_reason,
+                                 nmap_product,
+                                 nmap_version,
+                                 nmap_tunnel,
+                                 nmap_os_type,
+                                 creation_date)
+                SELECT DISTINCT ON (m.host_id, s.protocol, s.port) m.host_id,
+                                                                   s.protocol,
+                                                                   s.port,
+                                                                   s.nmap_service_name,
+                                                                   s.nessus_service_name,
+                                                                   s.nmap_service_confidence,
+                                                                   s.nessus_service_confidence,
+                                                                   s.nmap_service_name_original,
+                                                                   s.state,
+                                                                   s.nmap_service_state_reason,
+                                                                   s.nmap_product,
+                                                                   s.nmap_version,
+                                                                   s.nmap_tunnel,
+                                                                   s.nmap_os_type,
+                                                                   NOW()
+                FROM host_host_name_mapping m
+                INNER JOIN host h ON h.id = m.host_id AND h.workspace_id = id_workspace
+                INNER JOIN service s ON s.host_name_id = m.host_name_id
+                WHERE ((m.type & 1) = 1 OR (m.type & 2) = 2) AND
+                      NOT EXISTS(SELECT * FROM service e
+                                 WHERE e.host_id = m.host_id AND
+                                       e.protocol = s.protocol AND
+                                       e.port = s.port)
+                ORDER BY m.host_id, s.protocol, s.port, m.id;
+            PERFORM set_config('kis.bulk_mode', COALESCE(bulk_mode, 'off'), True);
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # service_url
+        self._engine.execute("""CREATE OR REPLACE FUNCTION service_url(id_host INTEGER,
+                                                                  id_host_name INTEGER,
+                                                                  port INTEGER,
+                                                                  tunnel TEXT)
+        RETURNS TEXT AS $$
+            -- This function computes the base URL of a service (see column service.url and method
+            -- Service.get_urlparse). IPv6 addresses are enclosed in brackets and the default ports 80 and 443 are
+            -- omitted.
+            SELECT CASE WHEN tunnel = 'ssl' THEN 'https' ELSE 'http' END || '://' ||
+                   COALESCE((SELECT CASE WHEN family(h.address) = 6 THEN '[' || host(h.address) || ']'
+                                     ELSE host(h.address) END
+                             FROM host h WHERE h.id = id_host),
+                            (SELECT CASE WHEN COALESCE(n.name, '') = '' THEN d.name ELSE n.name || '.' || d.name END
+                             FROM host_name n INNER JOIN domain_name d ON d.id = n.domain_name_id
+                             WHERE n.id = id_host_name)) ||
+                   CASE WHEN port IN (80, 443) THEN '' ELSE ':' || port END;
+        $$ LANGUAGE SQL STABLE;""")
+        # path_url
+        self._engine.execute("""CREATE OR REPLACE FUNCTION path_url(service_url TEXT, name TEXT)
+        RETURNS TEXT AS $$
+            -- This function computes the URL of a path (see column path.url and method Path.get_urlparse)
+            SELECT CASE WHEN COALESCE(name, '') = '' THEN NULL
+                        WHEN left(name, 1) = '/' THEN service_url || name
+                        ELSE service_url || '/' || name END;
+        $$ LANGUAGE SQL IMMUTABLE;""")
+        # pre_update_service_url
+        self._engine.execute("""CREATE OR REPLACE FUNCTION pre_update_service_url()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.url := service_url(NEW.host_id, NEW.host_name_id, NEW.port, NEW.nmap_tunnel);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # pre_update_path_url
+        self._engine.execute("""CREATE OR REPLACE FUNCTION pre_update_path_url()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.url := path_url((SELECT url FROM service WHERE id = NEW.service_id), NEW.name);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # post_update_path_urls_after_service_changes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION post_update_path_urls_after_service_changes()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            UPDATE path SET url = path_url(NEW.url, name) WHERE service_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # post_update_service_urls_after_host_changes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION post_update_service_urls_after_host_changes()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            UPDATE service SET url = service_url(host_id, host_name_id, port, nmap_tunnel) WHERE host_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # post_update_service_urls_after_host_name_changes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION post_update_service_urls_after_host_name_changes()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            UPDATE service SET url = service_url(host_id, host_name_id, port, nmap_tunnel) WHERE host_name_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # post_update_service_urls_after_domain_name_changes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION post_update_service_urls_after_domain_name_changes()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            UPDATE service SET url = service_url(service.host_id, service.host_name_id, service.port, service.nmap_tunnel)
+            FROM host_name
+            WHERE service.host_name_id = host_name.id AND host_name.domain_name_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # update_service_summary_of_hosts
+        self._engine.execute("""CREATE OR REPLACE FUNCTION update_service_summary_of_hosts(host_ids INTEGER[])
+        RETURNS VOID AS $$
+        BEGIN
+            -- This function recomputes the rows of table service_summary for the given hosts. Each host service is
+            -- paired with the host name services on the same port and protocol of all host names that resolve to the
+            -- host (A and AAAA records).
+            DELETE FROM service_summary WHERE host_id = ANY(host_ids);
+            INSERT INTO service_summary (host_id, host_service_id, host_host_name_mapping_id, host_name_service_id)
+                SELECT DISTINCT hs.host_id, hs.id, m.id, hns.id
+                FROM service hs
+                LEFT OUTER JOIN host_host_name_mapping m ON m.host_id = hs.host_id AND
+                                                            ((m.type & 1) = 1 OR (m.type & 2) = 2)
+                LEFT OUTER JOIN service hns ON hns.host_name_id = m.host_name_id
+                WHERE hs.host_id = ANY(host_ids) AND
+                      (hns.id IS NULL OR (hns.port = hs.port AND hns.protocol = hs.protocol));
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # update_service_summary
+        self._engine.execute("""CREATE OR REPLACE FUNCTION update_service_summary(id_workspace INTEGER)
+        RETURNS VOID AS $$
+        BEGIN
+            -- This function recomputes the rows of table service_summary for all hosts of the given workspace. It is
+            -- called after bulk loads in bulk mode (see Engine.bulk_mode) and by kismanage database --refresh-views.
+            PERFORM update_service_summary_of_hosts(ARRAY(SELECT id FROM host WHERE workspace_id = id_workspace));
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # post_update_service_summary_after_service_changes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION post_update_service_summary_after_service_changes()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the summary is recomputed by function update_service_summary
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
+            -- Updates of the service's state, banner, etc. do not change the pairs of host and host name services
+            IF TG_OP = 'UPDATE' AND OLD.port = NEW.port AND OLD.protocol = NEW.protocol AND
+               OLD.host_id IS NOT DISTINCT FROM NEW.host_id AND
+               OLD.host_name_id IS NOT DISTINCT FROM NEW.host_name_id THEN
+                RETURN NULL;
+            END IF;
+            -- Only the pairs that involve the changed service are updated (see update_service_summary_of_hosts)
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM service_summary WHERE host_service_id = OLD.id OR host_name_service_id = OLD.id;
+                -- The host services are paired with NULL, if the host name does not have any services anymore
+                IF OLD.host_name_id IS NOT NULL AND
+                   NOT EXISTS(SELECT 1 FROM service WHERE host_name_id = OLD.host_name_id) THEN
+                    INSERT INTO service_summary (host_id,
+                                                 host_service_id,
+                                                 host_host_name_mapping_id,
+                                                 host_name_service_id)
+                        SELECT hs.host_id, hs.id, m.id, NULL
+                        FROM host_host_name_mapping m
+                        INNER JOIN service hs ON hs.host_id = m.host_id
+                        WHERE m.host_name_id = OLD.host_name_id AND ((m.type & 1) = 1 OR (m.type & 2) = 2);
+                END IF;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.host_id IS NOT NULL THEN
+                INSERT INTO service_summary (host_id, host_service_id, host_host_name_mapping_id, host_name_service_id)
+                    SELECT DISTINCT hs.host_id, hs.id, m.id, hns.id
+                    FROM service hs
+                    LEFT OUTER JOIN host_host_name_mapping m ON m.host_id = hs.host_id AND
+                                                                ((m.type & 1) = 1 OR (m.type & 2) = 2)
+                    LEFT OUTER JOIN service hns ON hns.host_name_id = m.host_name_id
+                    WHERE hs.id = NEW.id AND
+                          (hns.id IS NULL OR (hns.port = hs.port AND hns.protocol = hs.protocol));
+            ELSIF TG_OP IN ('INSERT', 'UPDATE') AND NEW.host_name_id IS NOT NULL THEN
+                -- The host services are not paired with NULL anymore, as the host name has a service now
+                DELETE FROM service_summary s USING host_host_name_mapping m
+                WHERE s.host_host_name_mapping_id = m.id AND s.host_name_service_id IS NULL AND
+                      m.host_name_id = NEW.host_name_id;
+                INSERT INTO service_summary (host_id, host_service_id, host_host_name_mapping_id, host_name_service_id)
+                    SELECT hs.host_id, hs.id, m.id, NEW.id
+                    FROM host_host_name_mapping m
+                    INNER JOIN service hs ON hs.host_id = m.host_id
+                    WHERE m.host_name_id = NEW.host_name_id AND ((m.type & 1) = 1 OR (m.type & 2) = 2) AND
+                          hs.port = NEW.port AND hs.protocol = NEW.protocol;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
+        # post_update_service_summary_after_host_host_name_mapping_changes
+        self._engine.execute("""CREATE OR REPLACE FUNCTION post_update_service_summary_after_host_host_name_mapping_changes()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the summary is recomputed by function update_service_summary
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                PERFORM update_service_summary_of_hosts(ARRAY[NEW.host_id]);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM update_service_summary_of_hosts(ARRAY[OLD.host_id]);
+            ELSIF OLD.host_id <> NEW.host_id OR OLD.host_name_id <> NEW.host_name_id OR OLD.type <> NEW.type THEN
+                PERFORM update_service_summary_of_hosts(ARRAY[OLD.host_id, NEW.host_id]);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE PLPGSQL;""")
         # assign_services_to_host_name
         self._engine.execute("""CREATE OR REPLACE FUNCTION assign_services_to_host_name()
         RETURNS TRIGGER AS $$
@@ -727,6 +1419,10 @@ class Engine:
         host_name_service_cursor CURSOR(id_host_name integer) FOR SELECT * FROM service WHERE service.host_name_id = id_host_name;
         current_row service%%ROWTYPE;
         BEGIN
+            -- In bulk mode (see Engine.bulk_mode), the services are synchronized by function add_mapped_services
+            IF COALESCE(current_setting('kis.bulk_mode', True), 'off') IN ('on', 'reconcile') THEN
+                RETURN NULL;
+            END IF;
             IF (NEW.type & 1) = 1 OR (NEW.type & 2) = 2 THEN
                 -- 1. Sync host services to host name
                 OPEN host_service_cursor(NEW.host_id);
@@ -828,7 +1524,9 @@ class Engine:
             WHERE ((hhnm.type & 1) = 1 OR (hhnm.type & 2) = 2) AND service.id = id_service;
         id_host integer;
         BEGIN
-            IF (pg_trigger_depth() = 1) THEN
+            -- Services that are added by function add_mapped_services are handled like the ones added by trigger
+            -- assign_services_to_host_name (pg_trigger_depth() = 2)
+            IF (pg_trigger_depth() = 1 AND COALESCE(current_setting('kis.bulk_mode', True), 'off') <> 'reconcile') THEN
                 IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') THEN
                     IF (NEW.host_id IS NOT NULL) THEN
                         OPEN mapping_host_name_cursor(NEW.id);
@@ -1026,6 +1724,23 @@ class Engine:
         self._engine.execute("""DROP FUNCTION pre_update_network_scopes_after_network_changes;""")
         self._engine.execute("""DROP FUNCTION post_update_network_scopes_after_network_changes;""")
         self._engine.execute("""DROP FUNCTION pre_update_hosts_after_host_changes;""")
+        self._engine.execute("""DROP FUNCTION update_network_scopes;""")
+        self._engine.execute("""DROP FUNCTION update_host_name_scopes;""")
+        self._engine.execute("""DROP FUNCTION add_mapped_services;""")
+        self._engine.execute("""DROP FUNCTION post_update_service_summary_after_service_changes;""")
+        self._engine.execute("""DROP FUNCTION post_update_service_summary_after_host_host_name_mapping_changes;""")
+        self._engine.execute("""DROP FUNCTION update_service_summary;""")
+        self._engine.execute("""DROP FUNCTION update_service_summary_of_hosts;""")
+        self._engine.execute("""DROP FUNCTION pre_update_service_url;""")
+        self._engine.execute("""DROP FUNCTION pre_update_path_url;""")
+        self._engine.execute("""DROP FUNCTION post_update_path_urls_after_service_changes;""")
+        self._engine.execute("""DROP FUNCTION post_update_service_urls_after_host_changes;""")
+        self._engine.execute("""DROP FUNCTION post_update_service_urls_after_host_name_changes;""")
+        self._engine.execute("""DROP FUNCTION post_update_service_urls_after_domain_name_changes;""")
+        self._engine.execute("""DROP FUNCTION service_url;""")
+        self._engine.execute("""DROP FUNCTION path_url;""")
+        self._engine.execute("""DROP FUNCTION command_search_vector;""")
+        self._engine.execute("""DROP FUNCTION command_search_text;""")
         self._engine.execute("""DROP FUNCTION assign_services_to_host_name;""")
         self._engine.execute("""DROP FUNCTION add_services_to_host_name;""")
         self._engine.execute("""DROP FUNCTION update_service_check;""")
@@ -1059,6 +1774,24 @@ class Engine:
  FOR EACH ROW EXECUTE PROCEDURE add_services_to_host_name();""")
         self._engine.execute("""CREATE TRIGGER check_service_update BEFORE UPDATE ON service
  FOR EACH ROW EXECUTE PROCEDURE update_service_check();""")
+        # Triggers to maintain the URLs of services and paths (see columns service.url and path.url)
+        self._engine.execute("""CREATE TRIGGER pre_update_service_url_trigger BEFORE INSERT OR UPDATE OF host_id, host_name_id, port, nmap_tunnel ON service
+ FOR EACH ROW EXECUTE PROCEDURE pre_update_service_url();""")
+        self._engine.execute("""CREATE TRIGGER post_update_path_urls_trigger AFTER UPDATE ON service
+ FOR EACH ROW WHEN (OLD.url IS DISTINCT FROM NEW.url) EXECUTE PROCEDURE post_update_path_urls_after_service_changes();""")
+        self._engine.execute("""CREATE TRIGGER pre_update_path_url_trigger BEFORE INSERT OR UPDATE OF name, service_id ON path
+ FOR EACH ROW EXECUTE PROCEDURE pre_update_path_url();""")
+        self._engine.execute("""CREATE TRIGGER post_update_service_urls_trigger AFTER UPDATE OF address ON host
+ FOR EACH ROW EXECUTE PROCEDURE post_update_service_urls_after_host_changes();""")
+        self._engine.execute("""CREATE TRIGGER post_update_service_urls_trigger AFTER UPDATE OF name ON host_name
+ FOR EACH ROW EXECUTE PROCEDURE post_update_service_urls_after_host_name_changes();""")
+        self._engine.execute("""CREATE TRIGGER post_update_service_urls_trigger AFTER UPDATE OF name ON domain_name
+ FOR EACH ROW EXECUTE PROCEDURE post_update_service_urls_after_domain_name_changes();""")
+        # Triggers to maintain the service summary (see table service_summary)
+        self._engine.execute("""CREATE TRIGGER post_update_service_summary_trigger AFTER INSERT OR UPDATE OR DELETE ON service
+ FOR EACH ROW EXECUTE PROCEDURE post_update_service_summary_after_service_changes();""")
+        self._engine.execute("""CREATE TRIGGER post_update_service_summary_trigger AFTER INSERT OR UPDATE OR DELETE ON host_host_name_mapping
+ FOR EACH ROW EXECUTE PROCEDURE post_update_service_summary_after_host_host_name_mapping_changes();""")
 
     def _drop_trigger(self) -> None:
         """This method drops all triggers."""
@@ -1071,6 +1804,14 @@ class Engine:
         self._engine.execute("""DROP TRIGGER host_name_mapping_insert ON host_name_mapping""")
         self._engine.execute("""DROP TRIGGER service_insert ON service""")
         self._engine.execute("""DROP TRIGGER check_service_update ON service""")
+        self._engine.execute("""DROP TRIGGER post_update_service_summary_trigger ON service""")
+        self._engine.execute("""DROP TRIGGER post_update_service_summary_trigger ON host_host_name_mapping""")
+        self._engine.execute("""DROP TRIGGER pre_update_service_url_trigger ON service""")
+        self._engine.execute("""DROP TRIGGER post_update_path_urls_trigger ON service""")
+        self._engine.execute("""DROP TRIGGER pre_update_path_url_trigger ON path""")
+        self._engine.execute("""DROP TRIGGER post_update_service_urls_trigger ON host""")
+        self._engine.execute("""DROP TRIGGER post_update_service_urls_trigger ON host_name""")
+        self._engine.execute("""DROP TRIGGER post_update_service_urls_trigger ON domain_name""")
 
     @staticmethod
     def get_or_create(session, model, one_or_none=True, **kwargs):
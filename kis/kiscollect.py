@@ -88,6 +88,8 @@ https://github.com/chopicalqui/KaliIntelligenceSuite/wiki/KIS-Use-Cases#kiscolle
         with tempfile.TemporaryDirectory() as temp_dir:
             if args.testing:
                 engine.production = False
+            if args.profile_sql:
+                engine.enable_profiler()
             arguments = vars(args)
             if args.output_dir and not os.path.isdir(args.output_dir):
                 print("output directory '{}' does not exist!".format(args.output_dir), file=sys.stderr)
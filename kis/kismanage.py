@@ -136,6 +136,11 @@ class ManageDatabase:
                 self._domain_utils.add_workspace(session, self._arguments.WORKSPACE)
             elif self._arguments.delete:
                 self._domain_utils.delete_workspace(session, self._arguments.WORKSPACE)
+            elif self._arguments.index_outputs:
+                workspace = self._domain_utils.get_workspace(session=session, name=self._arguments.WORKSPACE)
+                if not workspace:
+                    raise WorkspaceNotFound(self._arguments.WORKSPACE)
+                self._domain_utils.index_command_outputs(session=session, workspace=workspace)
 
     def _manage_database(self):
         if os.geteuid() != 0:
@@ -168,6 +173,8 @@ class ManageDatabase:
                     self._engine.recreate_database()
             if self._arguments.init:
                 self._engine.init(load_cipher_suites=True)
+            if self._arguments.refresh_views:
+                self._engine.refresh_views()
 
     def _get_items(self, name: str) -> List[str]:
         results = []
@@ -192,41 +199,49 @@ class ManageDatabase:
 
     def _manage_network(self, session: Session, workspace: Workspace, source: Source):
         if self._arguments.module == "network":
-            scope = ScopeType[self._arguments.Scope] if self._arguments.Scope else self._arguments.scope
-            for network in self._get_items("NETWORK"):
-                if self._arguments.add or self._arguments.Add:
-                    ipv4_network = self._ip_utils.add_network(session=session,
-                                                              workspace=workspace,
-                                                              network=network,
-                                                              scope=scope,
-                                                              source=source)
-                    if not ipv4_network:
-                        raise ValueError("adding network '{}' failed".format(network))
-                elif self._arguments.delete or self._arguments.Delete:
-                    self._ip_utils.delete_network(session=session,
-                                                  workspace=workspace,
-                                                  network=network)
-                elif self._arguments.scope or self._arguments.Scope:
-                    result = self._ip_utils.get_network(session=session,
-                                                        workspace=workspace,
-                                                        network=network)
-                    if not result:
-                        raise ValueError("cannot set scope as network '{}' does not exist".format(network))
-                    elif result.scope != scope:
-                        result.scope = scope
-                if self._arguments.create_hosts and not (self._arguments.delete or self._arguments.Delete):
-                    ipv4_network = self._ip_utils.add_network(session=session,
-                                                              workspace=workspace,
-                                                              network=network,
-                                                              scope=scope,
-                                                              source=source)
-                    if not ipv4_network:
-                        raise ValueError("adding network '{}' failed".format(network))
-                    for ipv4_address in ipaddress.ip_network(ipv4_network.network):
-                        self._ip_utils.add_host(session=session,
-                                                workspace=workspace,
-                                                address=str(ipv4_address),
-                                                source=source)
+            if self._arguments.Add:
+                # Networks from files are bulk loaded and therefore, their scopes are recomputed only once at the end
+                with self._engine.deferred_network_scope(session=session, workspace=workspace):
+                    self._update_networks(session=session, workspace=workspace, source=source)
+            else:
+                self._update_networks(session=session, workspace=workspace, source=source)
+
+    def _update_networks(self, session: Session, workspace: Workspace, source: Source):
+        scope = ScopeType[self._arguments.Scope] if self._arguments.Scope else self._arguments.scope
+        for network in self._get_items("NETWORK"):
+            if self._arguments.add or self._arguments.Add:
+                ipv4_network = self._ip_utils.add_network(session=session,
+                                                          workspace=workspace,
+                                                          network=network,
+                                                          scope=scope,
+                                                          source=source)
+                if not ipv4_network:
+                    raise ValueError("adding network '{}' failed".format(network))
+            elif self._arguments.delete or self._arguments.Delete:
+                self._ip_utils.delete_network(session=session,
+                                              workspace=workspace,
+                                              network=network)
+            elif self._arguments.scope or self._arguments.Scope:
+                result = self._ip_utils.get_network(session=session,
+                                                    workspace=workspace,
+                                                    network=network)
+                if not result:
+                    raise ValueError("cannot set scope as network '{}' does not exist".format(network))
+                elif result.scope != scope:
+                    result.scope = scope
+            if self._arguments.create_hosts and not (self._arguments.delete or self._arguments.Delete):
+                ipv4_network = self._ip_utils.add_network(session=session,
+                                                          workspace=workspace,
+                                                          network=network,
+                                                          scope=scope,
+                                                          source=source)
+                if not ipv4_network:
+                    raise ValueError("adding network '{}' failed".format(network))
+                for ipv4_address in ipaddress.ip_network(ipv4_network.network):
+                    self._ip_utils.add_host(session=session,
+                                            workspace=workspace,
+                                            address=str(ipv4_address),
+                                            source=source)
 
     def _manage_host(self, session: Session, workspace: Workspace, source: Source):
         if self._arguments.module == "host":
@@ -303,72 +318,80 @@ class ManageDatabase:
 
     def _manage_host_name(self, session: Session, workspace: Workspace, source: Source):
         if self._arguments.module == "hostname":
-            scope = ReportScopeType[self._arguments.scope]
-            in_scope = scope == ReportScopeType.within
-            exception_thrown = None
-            for host_name_str in self._get_items("HOSTNAME"):
-                if self._arguments.add or self._arguments.Add:
-                    try:
-                        host_name = self._domain_utils.add_host_name(session=session,
-                                                                     workspace=workspace,
-                                                                     name=host_name_str,
-                                                                     in_scope=in_scope,
-                                                                     source=source)
-                        if not host_name:
-                            raise ValueError("adding host name '{}' failed".format(host_name_str))
-                    except DomainNameNotFound as ex:
-                        if self._arguments.debug:
-                            domain_name_str = self._domain_utils.extract_domain_name_from_host_name(name=host_name_str)
-                            print(domain_name_str)
-                            exception_thrown = ex
+            if self._arguments.Add or self._arguments.sharphound:
+                # Host names from files are bulk loaded and therefore, their scopes are updated only once at the end
+                with self._engine.bulk_mode(session=session, workspace=workspace):
+                    self._update_host_names(session=session, workspace=workspace, source=source)
+            else:
+                self._update_host_names(session=session, workspace=workspace, source=source)
+
+    def _update_host_names(self, session: Session, workspace: Workspace, source: Source):
+        scope = ReportScopeType[self._arguments.scope]
+        in_scope = scope == ReportScopeType.within
+        exception_thrown = None
+        for host_name_str in self._get_items("HOSTNAME"):
+            if self._arguments.add or self._arguments.Add:
+                try:
+                    host_name = self._domain_utils.add_host_name(session=session,
+                                                                 workspace=workspace,
+                                                                 name=host_name_str,
+                                                                 in_scope=in_scope,
+                                                                 source=source)
+                    if not host_name:
+                        raise ValueError("adding host name '{}' failed".format(host_name_str))
+                except DomainNameNotFound as ex:
+                    if self._arguments.debug:
+                        domain_name_str = self._domain_utils.extract_domain_name_from_host_name(name=host_name_str)
+                        print(domain_name_str)
+                        exception_thrown = ex
+                    else:
+                        raise ex
+            elif self._arguments.sharphound:
+                for host_name_str in self._get_items("HOSTNAME"):
+                    with open(host_name_str, "rb") as file:
+                        json_object = json.loads(file.read())
+                        if "computers" in json_object and isinstance(json_object["computers"], list):
+                            source = self._domain_utils.add_source(session=session, name="sharphound")
+                            for item in json_object["computers"]:
+                                if "Properties" in item and "name" in item["Properties"]:
+                                    computer_name = item["Properties"]["name"]
+                                    try:
+                                        host_name = self._domain_utils.add_host_name(session=session,
+                                                                                     workspace=workspace,
+                                                                                     name=computer_name,
+                                                                                     in_scope=in_scope,
+                                                                                     source=source)
+                                        if not host_name:
+                                            raise ValueError("adding host name '{}' failed".format(item))
+                                    except DomainNameNotFound as ex:
+                                        if self._arguments.debug:
+                                            domain_name_str = self._domain_utils.extract_domain_name_from_host_name(name=computer_name)
+                                            print(domain_name_str)
+                                            exception_thrown = ex
+                                        else:
+                                            raise ex
+                                else:
+                                    raise KeyError("invalid sharphound computer file. file does not contain "
+                                                   "attribute 'Properties' and/or 'name'")
                         else:
-                            raise ex
-                elif self._arguments.sharphound:
-                    for host_name_str in self._get_items("HOSTNAME"):
-                        with open(host_name_str, "rb") as file:
-                            json_object = json.loads(file.read())
-                            if "computers" in json_object and isinstance(json_object["computers"], list):
-                                source = self._domain_utils.add_source(session=session, name="sharphound")
-                                for item in json_object["computers"]:
-                                    if "Properties" in item and "name" in item["Properties"]:
-                                        computer_name = item["Properties"]["name"]
-                                        try:
-                                            host_name = self._domain_utils.add_host_name(session=session,
-                                                                                         workspace=workspace,
-                                                                                         name=computer_name,
-                                                                                         in_scope=in_scope,
-                                                                                         source=source)
-                                            if not host_name:
-                                                raise ValueError("adding host name '{}' failed".format(item))
-                                        except DomainNameNotFound as ex:
-                                            if self._arguments.debug:
-                                                domain_name_str = self._domain_utils.extract_domain_name_from_host_name(name=computer_name)
-                                                print(domain_name_str)
-                                                exception_thrown = ex
-                                            else:
-                                                raise ex
-                                    else:
-                                        raise KeyError("invalid sharphound computer file. file does not contain "
-                                                       "attribute 'Properties' and/or 'name'")
-                            else:
-                                raise KeyError("invalid sharphound computer file. file does not contain "
-                                               "attribute 'computers'")
-                    if exception_thrown:
-                        raise exception_thrown
-                elif self._arguments.delete or self._arguments.Delete:
-                    self._domain_utils.delete_host_name(session=session,
-                                                        workspace=workspace,
-                                                        host_name=host_name_str)
-                else:
-                    result = self._domain_utils.get_host_name(session=session,
-                                                              workspace=workspace,
-                                                              host_name=host_name_str)
-                    if not result:
-                        raise ValueError("cannot set scope as host name '{}' does not exist".format(host_name_str))
-                    elif result._in_scope != in_scope:
-                        result._in_scope = in_scope
-            if exception_thrown:
-                raise exception_thrown
+                            raise KeyError("invalid sharphound computer file. file does not contain "
+                                           "attribute 'computers'")
+                if exception_thrown:
+                    raise exception_thrown
+            elif self._arguments.delete or self._arguments.Delete:
+                self._domain_utils.delete_host_name(session=session,
+                                                    workspace=workspace,
+                                                    host_name=host_name_str)
+            else:
+                result = self._domain_utils.get_host_name(session=session,
+                                                          workspace=workspace,
+                                                          host_name=host_name_str)
+                if not result:
+                    raise ValueError("cannot set scope as host name '{}' does not exist".format(host_name_str))
+                elif result._in_scope != in_scope:
+                    result._in_scope = in_scope
+        if exception_thrown:
+            raise exception_thrown
 
     def _manage_email(self, session: Session, workspace: Workspace, source: Source):
         if self._arguments.module == "email":
@@ -514,6 +537,12 @@ https://github.com/chopicalqui/KaliIntelligenceSuite/wiki/KIS-Use-Cases#kismanag
     parser.add_argument('--testing',
                         action="store_true",
                         help="if specified, then KIS uses the testing instead of the production database")
+    parser.add_argument("--profile-sql", dest="profile_sql",
+                        action="store_true",
+                        help="if specified, then the SQL statements sent to the database are counted and timed per "
+                             "call site, and a ranked profile including possible N+1 query patterns is printed to "
+                             "stderr at exit. alternatively, set environment variable "
+                             "{}=1".format(BaseConfig.ENV_PROFILE_SQL))
     sub_parser = parser.add_subparsers(help='list of available database modules', dest="module")
     parser_kiscollect = sub_parser.add_parser('kiscollect', help='contains functionality used by kiscollect')
     parser_scan = sub_parser.add_parser('scan', help='allows importing scan results from filesystem')
@@ -537,6 +566,11 @@ https://github.com/chopicalqui/KaliIntelligenceSuite/wiki/KIS-Use-Cases#kismanag
                                         action="store_true",
                                         help="delete the given workspace WORKSPACE together with all associated "
                                              "information from KIS database (use with caution)")
+    parser_workspace_group.add_argument('--index-outputs',
+                                        action="store_true",
+                                        help="rebuild the search index over the collector outputs of the given "
+                                             "workspace WORKSPACE (see kisreport command --search). the outputs of "
+                                             "new commands are indexed automatically")
     # setup database parser
     parser_database.add_argument("--init",
                                  help="creates tables, views, functions, and triggers for the KIS database",
@@ -544,6 +578,11 @@ https://github.com/chopicalqui/KaliIntelligenceSuite/wiki/KIS-Use-Cases#kismanag
     parser_database.add_argument("--drop",
                                  help="drops tables, views, functions, and triggers in the KIS database",
                                  action="store_true")
+    parser_database.add_argument("--refresh-views",
+                                 help="rebuilds the precomputed report data (e.g., the pairs of host and host name "
+                                      "services queried by kisreport service). usually, this data is maintained "
+                                      "automatically",
+                                 action="store_true")
     parser_database.add_argument("--version", help="obtain version information", action="store_true")
     if not BaseConfig.is_docker():
         parser_database.add_argument("--backup", metavar="FILE", type=str, help="writes database backup to FILE")
@@ -961,7 +1000,7 @@ https://github.com/chopicalqui/KaliIntelligenceSuite/wiki/KIS-Use-Cases#kismanag
         parser.print_help()
         sys.exit(1)
     try:
-        engine = Engine(production=not args.testing)
+        engine = Engine(production=not args.testing, profile_sql=args.profile_sql or None)
         domain_utils = DomainUtils()
         ipv4_address_utils = IpUtils()
         DeclarativeBase.metadata.bind = engine.engine
@@ -51,7 +51,7 @@ https://github.com/chopicalqui/KaliIntelligenceSuite/wiki/KIS-Use-Cases#kisrepor
         parser.print_help()
         sys.exit(1)
     try:
-        engine = Engine(production=not args.testing)
+        engine = Engine(production=not args.testing, profile_sql=args.profile_sql or None)
         DeclarativeBase.metadata.bind = engine.engine
         # Check KIS' database status and version
         engine.perform_preflight_check(appy_patches=True, ask_user=True)
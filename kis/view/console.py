@@ -39,6 +39,7 @@ from database.model import CommandStatus
 from view.core import ReportItem
 from view.core import BaseKisKollectConsole
 from collectors.os.collector import CollectionStatus
+from collectors.os.core import TelemetryStatistics
 from sqlalchemy.sql.expression import func
 
 
@@ -55,6 +56,7 @@ class ThreadArgumentEnum(enum.Enum):
     command = enum.auto()
     stderr = enum.auto()
     stdout = enum.auto()
+    target = enum.auto()
 
 
 class CollectorArgumentEnum(enum.Enum):
@@ -62,6 +64,10 @@ class CollectorArgumentEnum(enum.Enum):
     remaining = enum.auto()
 
 
+class StatsArgumentEnum(enum.Enum):
+    phases = enum.auto()
+
+
 class KisConsoleConsoleCommand(enum.Enum):
     clear = enum.auto()
     collector = enum.auto()
@@ -69,6 +75,7 @@ class KisConsoleConsoleCommand(enum.Enum):
     kill = enum.auto()
     next = enum.auto()
     start = enum.auto()
+    stats = enum.auto()
     status = enum.auto()
     terminate = enum.auto()
     thread = enum.auto()
@@ -221,6 +228,14 @@ class KisCollectConsole(BaseKisKollectConsole):
                     raise InvalidInputException("subcommand '{}' is invalid for current command".format(result[0]))
                 result = [CollectorArgumentEnum[result[0]]]
                 result += result[1:]
+        # Verify stats command
+        elif command == KisConsoleConsoleCommand.stats:
+            if len(result) > 1:
+                raise InvalidInputException("command does not accept more than one argument.")
+            if len(result) == 1:
+                if result[0] not in [item.name for item in StatsArgumentEnum]:
+                    raise InvalidInputException("subcommand '{}' is invalid for current command".format(result[0]))
+                result = [StatsArgumentEnum[result[0]]]
         return result
 
     def default(self, input: str):
@@ -337,12 +352,15 @@ this command does the following depending on the given subcommand:
 - {}: display the command that is currently executed by all threads.
 - {}: add a new worker thread.
 - {} TID: print current stdout of thread with ID TID.
-- {} TID: print current stderr of thread with ID TID.""".format(KisConsoleConsoleCommand.thread.name,
-                                                                "|".join([item.name for item in ThreadArgumentEnum]),
-                                                                ThreadArgumentEnum.command.name,
-                                                                ThreadArgumentEnum.add.name,
-                                                                ThreadArgumentEnum.stdout.name,
-                                                                ThreadArgumentEnum.stderr.name))
+- {} TID: print current stderr of thread with ID TID.
+- {}: print the number of commands and tool threads that are currently executed against each IP address or host
+  name as well as their peaks.""".format(KisConsoleConsoleCommand.thread.name,
+                                        "|".join([item.name for item in ThreadArgumentEnum]),
+                                        ThreadArgumentEnum.command.name,
+                                        ThreadArgumentEnum.add.name,
+                                        ThreadArgumentEnum.stdout.name,
+                                        ThreadArgumentEnum.stderr.name,
+                                        ThreadArgumentEnum.target.name))
 
     def do_thread(self, input: str):
         try:
@@ -360,6 +378,19 @@ this command does the following depending on the given subcommand:
                     print("{}: {}".format(item.thread_str, command if command else "n/a"))
             elif arguments[0] == ThreadArgumentEnum.add:
                 self._producer_thread.add_consumer_thread()
+            elif arguments[0] == ThreadArgumentEnum.target:
+                governor = self._producer_thread.governor
+                print("maximum threads per target: {}".format(governor.max_target_threads))
+                print("{:<40} {:>8} {:>8} {:>13} {:>12} {:>14}".format("target", "commands", "threads",
+                                                                      "peak commands", "peak threads",
+                                                                      "total commands"))
+                for item in sorted(governor.get_metrics(), key=lambda x: (-x.commands, x.target)):
+                    print("{:<40} {:>8} {:>8} {:>13} {:>12} {:>14}".format(item.target,
+                                                                          item.commands,
+                                                                          item.threads,
+                                                                          item.peak_commands,
+                                                                          item.peak_threads,
+                                                                          item.total_commands))
             elif arguments[0] in [ThreadArgumentEnum.stdout, ThreadArgumentEnum.stderr]:
                 current_process = self._consumer_threads[arguments[1]].current_process
                 if current_process:
@@ -426,5 +457,52 @@ this command does the following depending on the given subcommand:
         except Exception:
             traceback.print_exc(file=sys.stderr)
 
+    def help_stats(self):
+        print("""usage: {} [{{{}}}]
+
+this command prints the execution telemetry of the current collection depending on the given subcommand:
+- if no subcommand is given, then rank the collectors by the average execution time of their OS commands. in addition,
+  print the time needed to create the OS commands, the time the OS commands waited in the command queue, the time
+  needed to analyse each MB of command output, and the time spent in the database.
+- {}: print the duration histogram of each collector and phase.""".format(KisConsoleConsoleCommand.stats.name,
+                                                                        "|".join([item.name
+                                                                                  for item in StatsArgumentEnum]),
+                                                                        StatsArgumentEnum.phases.name))
+
+    def do_stats(self, input: str):
+        try:
+            arguments = self._process_input(KisConsoleConsoleCommand.stats, input)
+            telemetry = self._producer_thread.telemetry
+            if len(arguments) == 0:
+                print("{:<30} {:>8} {:>12} {:>12} {:>12} {:>12} {:>12}".format("collector", "commands",
+                                                                             "create [s]", "queue [s]",
+                                                                             "execute [s]", "verify [s/MB]",
+                                                                             "database [s]"))
+                for item in telemetry.get_ranking():
+                    print("{:<30} {:>8} {:>12.2f} {:>12.2f} {:>12.2f} {:>12} {:>12.2f}".format(
+                        item[0],
+                        item[1],
+                        item[2],
+                        item[3],
+                        item[4],
+                        "{:.2f}".format(item[5]) if item[5] is not None else "n/a",
+                        item[6]))
+            elif arguments[0] == StatsArgumentEnum.phases:
+                buckets = ["<={}s".format(item) for item in TelemetryStatistics.BUCKETS]
+                buckets.append(">{}s".format(TelemetryStatistics.BUCKETS[-1]))
+                print("{:<30} {:<8} {:>8} {:>10} {:>10} {:>10} ".format("collector", "phase", "count", "total [s]",
+                                                                      "avg [s]", "max [s]") +
+                      " ".join(["{:>7}".format(item) for item in buckets]))
+                for item in sorted(telemetry.get_statistics(), key=lambda x: (x.collector, x.phase.value)):
+                    print("{:<30} {:<8} {:>8} {:>10.2f} {:>10.2f} {:>10.2f} ".format(item.collector,
+                                                                                   item.phase.name,
+                                                                                   item.count,
+                                                                                   item.total,
+                                                                                   item.average,
+                                                                                   item.maximum) +
+                          " ".join(["{:>7}".format(count) for count in item.histogram]))
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+
     do_EOF = do_exit
     help_EOF = help_exit
@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+"""
+this file implements the generation of large synthetic workspaces, which are used to benchmark KIS
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2022 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import sqlalchemy
+from typing import Dict
+from typing import List
+from typing import Iterator
+from collectors.core import BaseUtils
+from database.utils import Engine
+from database.model import Workspace
+from database.model import Network
+from database.model import Host
+from database.model import DomainName
+from database.model import HostName
+from database.model import HostHostNameMapping
+from database.model import DnsResourceRecordType
+from database.model import Service
+from database.model import ServiceState
+from database.model import ProtocolType
+from database.model import Path
+from database.model import PathType
+from database.model import TlsInfo
+from database.model import TlsVersion
+from database.model import TlsPreference
+from database.model import Command
+from database.model import CommandStatus
+from database.model import CollectorType
+from database.model import ScopeType
+from sqlalchemy.orm.session import Session
+
+
+class WorkspaceSize:
+    """
+    This class specifies the size of a synthetic workspace.
+    """
+
+    # The services, which are created for each host (port, Nmap service name, Nmap tunnel). The first
+    # services_per_host entries are used.
+    SERVICES = [(80, "http", None),
+                (443, "https", "ssl"),
+                (22, "ssh", None),
+                (445, "microsoft-ds", None),
+                (8080, "http", None),
+                (8443, "https", "ssl"),
+                (21, "ftp", None),
+                (25, "smtp", None),
+                (3389, "ms-wbt-server", None),
+                (53, "domain", None),
+                (111, "rpcbind", None),
+                (139, "netbios-ssn", None),
+                (3306, "mysql", None),
+                (5432, "postgresql", None),
+                (5985, "wsman", None),
+                (993, "imaps", "ssl")]
+
+    def __init__(self,
+                 hosts: int = 100000,
+                 services_per_host: int = 10,
+                 hosts_per_domain: int = 1000,
+                 paths_per_service: int = 5):
+        """
+        :param hosts: The number of hosts. Each /24 network contains 254 hosts.
+        :param services_per_host: The number of TCP services per host
+        :param hosts_per_domain: The number of host names per second-level domain. Each host has one host name.
+        :param paths_per_service: The number of paths per HTTP(S) service in addition to the root path. Each HTTP(S)
+        service has one command, whose output (see collector httpgobuster) contains these paths.
+        """
+        if services_per_host > len(self.SERVICES):
+            raise ValueError("at most {} services per host are supported".format(len(self.SERVICES)))
+        self.hosts = hosts
+        self.services_per_host = services_per_host
+        self.hosts_per_domain = hosts_per_domain
+        self.paths_per_service = paths_per_service
+
+    @property
+    def networks(self) -> int:
+        return (self.hosts + 253) // 254
+
+    @property
+    def domains(self) -> int:
+        return (self.hosts + self.hosts_per_domain - 1) // self.hosts_per_domain
+
+    def get_json(self) -> Dict[str, int]:
+        return {"hosts": self.hosts,
+                "services_per_host": self.services_per_host,
+                "hosts_per_domain": self.hosts_per_domain,
+                "paths_per_service": self.paths_per_service}
+
+
+class WorkspaceGenerator:
+    """
+    This class populates a workspace with networks, hosts, host names, services, paths, TLS information, and
+    httpgobuster commands including their recorded outputs.
+
+    The rows are bulk inserted within Engine.bulk_mode. Thus, the database triggers compute the scopes, network
+    assignments, and host name services (A records) once at the end instead of once per row.
+    """
+
+    COLLECTOR_NAME = "httpgobuster"
+    CHUNK_SIZE = 10000
+
+    def __init__(self, engine: Engine, workspace: str, size: WorkspaceSize):
+        self._engine = engine
+        self._workspace = workspace
+        self._size = size
+
+    @staticmethod
+    def get_network(index: int) -> str:
+        return "10.{}.{}.0/24".format(index // 256 % 256, index % 256)
+
+    @staticmethod
+    def get_address(index: int) -> str:
+        network = index // 254
+        return "10.{}.{}.{}".format(network // 256 % 256, network % 256, index % 254 + 1)
+
+    @staticmethod
+    def get_gobuster_output(paths: List[str]) -> List[str]:
+        return ["===============================================================",
+                "Gobuster v3.0.1",
+                "==============================================================="] + \
+               ["{} (Status: 200) [Size: {}]".format(item, 100 + len(item)) for item in paths]
+
+    @staticmethod
+    def _chunks(items: List, size: int) -> Iterator[List]:
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    def _insert(self, session: Session, table: sqlalchemy.Table, rows: List[dict]) -> None:
+        for chunk in self._chunks(rows, self.CHUNK_SIZE):
+            session.execute(table.insert(), chunk)
+
+    def _add_networks_and_hosts(self, session: Session, workspace: Workspace) -> Dict[str, int]:
+        self._insert(session, Network.__table__, [{"address": self.get_network(i),
+                                                   "scope": ScopeType.all,
+                                                   "workspace_id": workspace.id}
+                                                  for i in range(self._size.networks)])
+        self._insert(session, Host.__table__, [{"address": self.get_address(i),
+                                                "workspace_id": workspace.id,
+                                                "is_up": True,
+                                                "reason_up": "syn-ack"} for i in range(self._size.hosts)])
+        return {str(address): host_id for host_id, address in
+                session.query(Host.id, Host.address).filter(Host.workspace_id == workspace.id)}
+
+    def _add_host_names(self, session: Session, workspace: Workspace, host_ids: Dict[str, int]) -> None:
+        self._insert(session, DomainName.__table__, [{"name": "benchmark{}.com".format(i),
+                                                      "scope": ScopeType.all,
+                                                      "workspace_id": workspace.id}
+                                                     for i in range(self._size.domains)])
+        domain_ids = {name: domain_id for domain_id, name in
+                      session.query(DomainName.id, DomainName.name).filter(DomainName.workspace_id == workspace.id)}
+        # Second-level domains are stored as host names without name
+        rows = [{"name": None, "domain_name_id": item} for item in domain_ids.values()]
+        rows += [{"name": "host{}".format(i),
+                  "domain_name_id": domain_ids["benchmark{}.com".format(i // self._size.hosts_per_domain)]}
+                 for i in range(self._size.hosts)]
+        self._insert(session, HostName.__table__, rows)
+        host_name_ids = {name: host_name_id for host_name_id, name in
+                         session.query(HostName.id, HostName.name)
+                             .join(DomainName, HostName.domain_name)
+                             .filter(DomainName.workspace_id == workspace.id, HostName.name.isnot(None))}
+        self._insert(session, HostHostNameMapping.__table__,
+                     [{"host_id": host_ids[self.get_address(i)],
+                       "host_name_id": host_name_ids["host{}".format(i)],
+                       "type": DnsResourceRecordType.a.value} for i in range(self._size.hosts)])
+
+    def _add_services(self, session: Session, workspace: Workspace, host_ids: List[int], collector_name_id: int):
+        services = WorkspaceSize.SERVICES[:self._size.services_per_host]
+        self._insert(session, Service.__table__, [{"host_id": host_id,
+                                                   "port": port,
+                                                   "protocol": ProtocolType.tcp,
+                                                   "state": ServiceState.Open,
+                                                   "nmap_service_name": name,
+                                                   "nmap_service_confidence": 10,
+                                                   "nmap_tunnel": tunnel}
+                                                  for host_id in host_ids for port, name, tunnel in services])
+        # The database trigger of table service adds the root path of each HTTP(S) service
+        paths = ["/dir{}/".format(i) for i in range(self._size.paths_per_service)]
+        path_rows = []
+        tls_rows = []
+        command_rows = []
+        for service_id, host_id, address, port, name, tunnel in session.query(Service.id,
+                                                                              Service.host_id,
+                                                                              Host.address,
+                                                                              Service.port,
+                                                                              Service.nmap_service_name,
+                                                                              Service.nmap_tunnel) \
+                .join(Host, Service.host) \
+                .filter(Service.host_id.in_(host_ids)):
+            if tunnel == "ssl":
+                tls_rows += [{"service_id": service_id, "version": version, "preference": TlsPreference.server}
+                             for version in [TlsVersion.tls12, TlsVersion.tls13]]
+            if name in ["http", "https"]:
+                url = "{}://{}:{}/".format(name, address, port)
+                path_rows += [{"service_id": service_id,
+                               "name": item,
+                               "type": PathType.http,
+                               "return_code": 200,
+                               "size_bytes": 100 + len(item)} for item in paths]
+                command_rows.append({"os_command": ["gobuster", "dir", "-u", url, "-w", "/usr/share/dirb/common.txt"],
+                                     "status": CommandStatus.completed,
+                                     "return_code": 0,
+                                     "hide": True,
+                                     "stdout_output": self.get_gobuster_output(paths),
+                                     "collector_name_id": collector_name_id,
+                                     "host_id": host_id,
+                                     "service_id": service_id,
+                                     "workspace_id": workspace.id})
+        self._insert(session, Path.__table__, path_rows)
+        self._insert(session, TlsInfo.__table__, tls_rows)
+        self._insert(session, Command.__table__, command_rows)
+
+    def run(self) -> Dict[str, int]:
+        """
+        This method creates the workspace and populates it.
+        :return: Dictionary containing the number of rows of each populated table
+        """
+        with self._engine.session_scope() as session:
+            workspace = self._engine.get_or_create(session, Workspace, name=self._workspace)
+            collector_name = BaseUtils.add_collector_name(session=session,
+                                                          name=self.COLLECTOR_NAME,
+                                                          type=CollectorType.host_service,
+                                                          priority=0)
+            session.flush()
+            with Engine.bulk_mode(session=session, workspace=workspace):
+                host_ids = self._add_networks_and_hosts(session, workspace)
+                self._add_host_names(session, workspace, host_ids)
+                for chunk in self._chunks(list(host_ids.values()), max(1, self.CHUNK_SIZE //
+                                                                       max(1, self._size.services_per_host))):
+                    self._add_services(session, workspace, chunk, collector_name.id)
+            workspace_id = workspace.id
+        # Update the planner statistics as they would be after a long-running collection
+        with self._engine.engine.connect() as connection:
+            connection.execution_options(isolation_level="AUTOCOMMIT").execute(sqlalchemy.text("ANALYZE;"))
+        return self.get_row_counts(workspace_id)
+
+    def get_row_counts(self, workspace_id: int) -> Dict[str, int]:
+        """
+        :return: Dictionary containing the number of rows of each populated table of the given workspace
+        """
+        with self._engine.session_scope() as session:
+            return {"networks": session.query(Network).filter(Network.workspace_id == workspace_id).count(),
+                    "hosts": session.query(Host).filter(Host.workspace_id == workspace_id).count(),
+                    "host_names": session.query(HostName)
+                        .join(DomainName, HostName.domain_name)
+                        .filter(DomainName.workspace_id == workspace_id).count(),
+                    "services": session.query(Service)
+                        .outerjoin(Host, Service.host)
+                        .outerjoin(HostName, Service.host_name)
+                        .outerjoin(DomainName, HostName.domain_name)
+                        .filter(sqlalchemy.or_(Host.workspace_id == workspace_id,
+                                               DomainName.workspace_id == workspace_id)).count(),
+                    "paths": session.query(Path)
+                        .join(Service, Path.service)
+                        .join(Host, Service.host)
+                        .filter(Host.workspace_id == workspace_id).count(),
+                    "tls_info": session.query(TlsInfo)
+                        .join(Service, TlsInfo.service)
+                        .join(Host, Service.host)
+                        .filter(Host.workspace_id == workspace_id).count(),
+                    "commands": session.query(Command).filter(Command.workspace_id == workspace_id).count()}
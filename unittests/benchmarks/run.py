@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+"""
+this script generates a large synthetic workspace in KIS' testing database and executes timed benchmark scenarios
+(command creation and analysis of kiscollect, all kisreport modules, the Nmap, Nessus, and Masscan importers, the bulk
+adds of kismanage, the network scope computations with and without deferred mode, as well as the service report's
+queries with and without table service_summary) against it. the measurements are written in JSON format to track
+performance across commits.
+
+the script must be executed from the repository's root directory with the kis directory in the python path:
+
+PYTHONPATH=kis:. python3 -m unittests.benchmarks.run -o benchmark.json
+
+note that the testing database is dropped and re-initialized, unless argument --skip-generation is specified.
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2022 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import os
+import sys
+import json
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from contextlib import redirect_stdout
+from database.config import BaseConfig
+from database.utils import Engine
+from unittests.benchmarks.generator import WorkspaceSize
+from unittests.benchmarks.scenarios import Benchmark
+from unittests.benchmarks.scenarios import ScenarioType
+
+
+def get_commit() -> str:
+    """
+    :return: The git commit of the benchmarked source code or None, if it cannot be determined
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                       cwd=BaseConfig.get_script_home(),
+                                       stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", metavar="FILE", type=str,
+                        help="write the measurements to the given JSON file instead of stdout")
+    parser.add_argument("-w", "--workspace", type=str, default="benchmark",
+                        help="the name of the synthetic workspace")
+    parser.add_argument("-s", "--scenarios", nargs="+", choices=[item.name for item in ScenarioType],
+                        help="execute only the given scenarios. per default, all scenarios are executed")
+    parser.add_argument("--skip-generation", dest="skip_generation", action="store_true",
+                        help="do not re-initialize the testing database and reuse the already generated workspace")
+    parser.add_argument("--hosts", metavar="N", type=int, default=100000,
+                        help="the number of hosts in the synthetic workspace")
+    parser.add_argument("--services-per-host", metavar="N", dest="services_per_host", type=int, default=10,
+                        help="the number of services per host in the synthetic workspace")
+    parser.add_argument("--hosts-per-domain", metavar="N", dest="hosts_per_domain", type=int, default=1000,
+                        help="the number of host names per second-level domain in the synthetic workspace")
+    parser.add_argument("--paths-per-service", metavar="N", dest="paths_per_service", type=int, default=5,
+                        help="the number of paths and recorded httpgobuster results per HTTP(S) service in the "
+                             "synthetic workspace")
+    parser.add_argument("--collectors", nargs="+", metavar="COLLECTOR", default=["httpgobuster"],
+                        help="the kiscollect collectors whose command creation and analysis is benchmarked")
+    parser.add_argument("--import-hosts", metavar="N", dest="import_hosts", type=int, default=1000,
+                        help="the number of hosts in the scan files of the importer scenarios")
+    parser.add_argument("--manage-items", metavar="N", dest="manage_items", type=int, default=1000,
+                        help="the number of networks, hosts, and host names added by the kismanage scenarios")
+    parser.add_argument("--scope-networks", metavar="N", dest="scope_networks", type=int, default=1000,
+                        help="the number of networks added by the scope scenarios")
+    args = parser.parse_args()
+
+    engine = Engine(production=False)
+    size = WorkspaceSize(hosts=args.hosts,
+                         services_per_host=args.services_per_host,
+                         hosts_per_domain=args.hosts_per_domain,
+                         paths_per_service=args.paths_per_service)
+    scenarios = [ScenarioType[item] for item in args.scenarios] if args.scenarios else list(ScenarioType)
+    if args.skip_generation:
+        scenarios = [item for item in scenarios if item != ScenarioType.generate]
+    elif ScenarioType.generate in scenarios:
+        engine.drop()
+        engine.init(load_cipher_suites=True)
+    started = datetime.utcnow()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chmod(temp_dir, 0o777)
+        benchmark = Benchmark(engine=engine,
+                              workspace=args.workspace,
+                              size=size,
+                              collectors=args.collectors,
+                              import_hosts=args.import_hosts,
+                              manage_items=args.manage_items,
+                              scope_networks=args.scope_networks,
+                              output_dir=temp_dir)
+        # The importers print their progress to stdout, which might contain the JSON output
+        with redirect_stdout(sys.stderr):
+            benchmark.run(scenarios)
+    result = {"commit": get_commit(),
+              "started": started.isoformat(),
+              "python": platform.python_version(),
+              "host": platform.node()}
+    result.update(benchmark.get_json())
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=4)
+    else:
+        json.dump(result, sys.stdout, indent=4)
+        print()
+    sys.exit(1 if any([item.error for item in benchmark.results]) else 0)
@@ -0,0 +1,456 @@
+#!/usr/bin/python3
+"""
+this file implements the timed benchmark scenarios, which are executed against a synthetic workspace
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2022 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import os
+import sys
+import enum
+import time
+import logging
+import resource
+import tempfile
+import traceback
+import subprocess
+import contextlib
+from typing import Dict
+from typing import List
+from typing import Callable
+from sqlalchemy import or_
+from sqlalchemy import and_
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.session import Session
+from database.config import BaseConfig
+from database.utils import Engine
+from database.model import Host
+from database.model import Network
+from database.model import Service
+from database.model import HostName
+from database.model import ScopeType
+from database.model import Workspace
+from database.model import Command
+from database.model import CollectorName
+from database.model import ServiceSummary
+from database.model import HostHostNameMapping
+from database.model import DnsResourceRecordType
+from database.report.core import ReportGenerator
+from collectors.os.collector import CollectorProducer
+from collectors.filesystem.nmap import DatabaseImporter as NmapDatabaseImporter
+from collectors.filesystem.nessus import DatabaseImporter as NessusDatabaseImporter
+from collectors.filesystem.masscan import DatabaseImporter as MasscanDatabaseImporter
+from unittests.benchmarks.generator import WorkspaceSize
+from unittests.benchmarks.generator import WorkspaceGenerator
+
+logger = logging.getLogger('benchmark')
+
+
+class ScenarioType(enum.Enum):
+    generate = enum.auto()
+    create = enum.auto()
+    analyze = enum.auto()
+    report = enum.auto()
+    importer = enum.auto()
+    manage = enum.auto()
+    scope = enum.auto()
+    service = enum.auto()
+
+
+class BenchmarkResult:
+    """
+    This class holds the measurements of one benchmark scenario.
+    """
+
+    def __init__(self, scenario: str):
+        self.scenario = scenario
+        self.duration = None
+        self.statements = None
+        self.rows = None
+        self.max_rss = None
+        self.error = None
+
+    def get_json(self) -> dict:
+        return {"scenario": self.scenario,
+                "duration": self.duration,
+                "statements": self.statements,
+                "rows": self.rows,
+                "max_rss": self.max_rss,
+                "error": self.error}
+
+
+class Benchmark:
+    """
+    This class executes timed scenarios against a synthetic workspace (see WorkspaceGenerator).
+
+    Each scenario measures its wall time, the number of SQL statements sent by this process (see SqlProfiler), the
+    number of processed rows, and the peak resident set size of this process (kiscollect and kisreport scenarios) or
+    of the kismanage process (kismanage scenarios).
+    """
+
+    # These report modules write Microsoft Excel files instead of CSV output
+    EXCEL_REPORTS = ["excel", "final"]
+    # These report modules export files into an output directory instead of returning CSV output
+    EXPORT_REPORTS = ["file", "parquet"]
+    # The HTTP ports of the services, which are created in the scan files for the importer scenarios
+    IMPORT_PORTS = [80, 443, 8080, 8443]
+    # The number of hosts per network, which are created by the scope scenarios
+    SCOPE_HOSTS_PER_NETWORK = 4
+
+    def __init__(self,
+                 engine: Engine,
+                 workspace: str,
+                 size: WorkspaceSize,
+                 collectors: List[str] = None,
+                 import_hosts: int = 1000,
+                 manage_items: int = 1000,
+                 scope_networks: int = 1000,
+                 output_dir: str = None):
+        """
+        :param engine: The engine of the testing database
+        :param workspace: The name of the synthetic workspace
+        :param size: The size of the synthetic workspace
+        :param collectors: The kiscollect collectors, whose command creation and analysis are benchmarked
+        :param import_hosts: The number of hosts in each scan file of the importer scenarios
+        :param manage_items: The number of networks, hosts, and host names added by the kismanage scenarios
+        :param scope_networks: The number of networks added by the scope scenarios
+        :param output_dir: The directory where the scan files and the kismanage input files are created
+        """
+        self._engine = engine
+        self._workspace = workspace
+        self._size = size
+        self._collectors = collectors if collectors else [WorkspaceGenerator.COLLECTOR_NAME]
+        self._import_hosts = import_hosts
+        self._manage_items = manage_items
+        self._scope_networks = scope_networks
+        self._output_dir = output_dir if output_dir else tempfile.gettempdir()
+        self._profiler = engine.enable_profiler(print_at_exit=False)
+        self.results = []
+
+    def _measure(self, scenario: str, function: Callable[[], int]) -> BenchmarkResult:
+        """
+        This method executes the given scenario and records its measurements.
+        :param scenario: The unique name of the scenario
+        :param function: The function that executes the scenario and returns the number of processed rows
+        :return: The measurements of the scenario
+        """
+        result = BenchmarkResult(scenario)
+        print("[*] executing benchmark scenario: {}".format(scenario), file=sys.stderr)
+        self._profiler.reset()
+        start_time = time.perf_counter()
+        try:
+            result.rows = function()
+        except Exception as ex:
+            traceback.print_exc(file=sys.stderr)
+            logger.exception(ex)
+            result.error = str(ex)
+        result.duration = time.perf_counter() - start_time
+        result.statements = sum([item.count for item in self._profiler.get_statistics()])
+        result.max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.results.append(result)
+        return result
+
+    def _create_collector_producer(self, collector: str, analyze: bool = False) -> CollectorProducer:
+        """
+        This method initializes a collector producer like kiscollect does.
+        """
+        parser = CollectorProducer.get_argument_parser(description=__doc__)
+        producer = CollectorProducer(self._engine)
+        producer.add_argparser_arguments(CollectorProducer.add_collector_argument_group(parser))
+        arguments = ["--testing", "-w", self._workspace, "-o", self._output_dir, "--{}".format(collector)]
+        if analyze:
+            arguments.append("--analyze")
+        producer.init(vars(parser.parse_args(arguments)))
+        return producer
+
+    def _get_command_count(self, collector: str) -> int:
+        with self._engine.session_scope() as session:
+            return session.query(Command) \
+                .join(Workspace, Command.workspace_id == Workspace.id) \
+                .join(CollectorName, Command.collector_name) \
+                .filter(Workspace.name == self._workspace, CollectorName.name == collector).count()
+
+    def _run_generate(self) -> None:
+        generator = WorkspaceGenerator(engine=self._engine, workspace=self._workspace, size=self._size)
+        self._measure("generate", lambda: sum(generator.run().values()))
+
+    def _run_create(self) -> None:
+        for collector in self._collectors:
+            producer = self._create_collector_producer(collector)
+
+            def create():
+                producer._create()
+                return self._get_command_count(collector)
+            self._measure("kiscollect:create:{}".format(collector), create)
+
+    def _run_analyze(self) -> None:
+        for collector in self._collectors:
+            producer = self._create_collector_producer(collector, analyze=True)
+
+            def analyze():
+                producer._analyze()
+                return self._get_command_count(collector)
+            self._measure("kiscollect:analyze:{}".format(collector), analyze)
+
+    def _run_report(self) -> None:
+        parser = ReportGenerator.get_report_argument_parser()
+        report_classes = ReportGenerator.add_argparser_arguments(ReportGenerator.add_sub_argument_parsers(parser))
+        generator = ReportGenerator(report_classes=report_classes)
+        for module in sorted(report_classes.keys()):
+            if module not in self.EXCEL_REPORTS + self.EXPORT_REPORTS:
+                args = parser.parse_args(["--testing", module, "-w", self._workspace, "--csv"])
+
+                def create_report():
+                    with self._engine.session_scope() as session:
+                        workspaces = [self._engine.get_workspace(session, self._workspace)]
+                        report = generator.create_report_instance(args=args, session=session, workspaces=workspaces)
+                        report.preload()
+                        return len(report.get_csv()) - 1
+                self._measure("kisreport:{}".format(module), create_report)
+        # The file writing modules are executed like kisreport does. Their number of processed rows is the number of
+        # written files.
+        for module in self.EXCEL_REPORTS + self.EXPORT_REPORTS:
+            with tempfile.TemporaryDirectory(dir=self._output_dir) as temp_dir:
+                if module in self.EXCEL_REPORTS:
+                    arguments = [module, os.path.join(temp_dir, "{}.xlsx".format(module)), "--snapshot"]
+                else:
+                    arguments = [module, "-o", temp_dir]
+                args = parser.parse_args(["--testing"] + arguments + ["-w", self._workspace])
+
+                def create_files():
+                    with self._engine.session_scope() as session:
+                        workspaces = [self._engine.get_workspace(session, self._workspace)]
+                        generator.run(args=args, session=session, workspaces=workspaces)
+                    return len(os.listdir(temp_dir))
+                self._measure("kisreport:{}".format(module), create_files)
+
+    @staticmethod
+    def get_nmap_xml(hosts: int, ports: List[int]) -> str:
+        result = ['<?xml version="1.0" encoding="UTF-8"?>', '<nmaprun scanner="nmap" args="nmap -sS">']
+        for i in range(hosts):
+            result.append('<host><status state="up" reason="syn-ack"/>'
+                          '<address addr="{}" addrtype="ipv4"/><ports>'.format(WorkspaceGenerator.get_address(i)))
+            for port in ports:
+                result.append('<port protocol="tcp" portid="{}"><state state="open" reason="syn-ack"/>'
+                              '<service name="http" product="nginx" version="1.18.0" method="probed" conf="10"/>'
+                              '</port>'.format(port))
+            result.append('</ports></host>')
+        result.append('</nmaprun>')
+        return os.linesep.join(result)
+
+    @staticmethod
+    def get_masscan_xml(hosts: int, ports: List[int]) -> str:
+        result = ['<?xml version="1.0"?>', '<nmaprun scanner="masscan">']
+        for i in range(hosts):
+            for port in ports:
+                result.append('<host endtime="1600000000"><address addr="{}" addrtype="ipv4"/><ports>'
+                              '<port protocol="tcp" portid="{}"><state state="open" reason="syn-ack" reason_ttl="64"/>'
+                              '</port></ports></host>'.format(WorkspaceGenerator.get_address(i), port))
+        result.append('</nmaprun>')
+        return os.linesep.join(result)
+
+    @staticmethod
+    def get_nessus_xml(hosts: int, ports: List[int]) -> str:
+        result = ['<?xml version="1.0" ?>', '<NessusClientData_v2><Report name="benchmark">']
+        for i in range(hosts):
+            address = WorkspaceGenerator.get_address(i)
+            result.append('<ReportHost name="{0}"><HostProperties><tag name="host-ip">{0}</tag>'
+                          '<tag name="os">linux</tag></HostProperties>'.format(address))
+            for port in ports:
+                result.append('<ReportItem port="{}" svc_name="www" protocol="tcp" severity="2" pluginID="10107" '
+                              'pluginName="HTTP Server Type and Version"><description>The remote web server type '
+                              'is nginx.</description><cvss_base_score>5.0</cvss_base_score>'
+                              '</ReportItem>'.format(port))
+            result.append('</ReportHost>')
+        result.append('</Report></NessusClientData_v2>')
+        return os.linesep.join(result)
+
+    def _run_import(self) -> None:
+        ports = self.IMPORT_PORTS
+        for name, importer_class, content in [("nmap", NmapDatabaseImporter,
+                                               self.get_nmap_xml(self._import_hosts, ports)),
+                                              ("nessus", NessusDatabaseImporter,
+                                               self.get_nessus_xml(self._import_hosts, ports)),
+                                              ("masscan", MasscanDatabaseImporter,
+                                               self.get_masscan_xml(self._import_hosts, ports))]:
+            file_name = os.path.join(self._output_dir, "benchmark-{}.xml".format(name))
+            with open(file_name, "w") as file:
+                file.write(content)
+
+            def import_file():
+                with self._engine.session_scope() as session:
+                    workspace = self._engine.get_or_create(session, Workspace,
+                                                           name="{}-{}".format(self._workspace, name)[:25])
+                    importer_class(session, workspace, [file_name], stdout=sys.stderr).run()
+                return self._import_hosts * len(ports)
+            self._measure("import:{}".format(name), import_file)
+
+    def _execute_kismanage(self, arguments: List[str]) -> None:
+        """
+        This method executes kismanage with the given arguments against the testing database.
+        """
+        command = [sys.executable, os.path.join(BaseConfig.get_script_home(), "kismanage.py"), "--testing"] + arguments
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if process.returncode != 0:
+            raise ChildProcessError("kismanage failed with return code {}: {}".format(process.returncode,
+                                                                                      process.stderr.strip()))
+
+    def _run_manage(self) -> None:
+        workspace = "{}-manage".format(self._workspace)[:25]
+        domain = "benchmark-manage.com"
+        self._execute_kismanage(["workspace", "-a", workspace])
+        self._execute_kismanage(["domain", "-w", workspace, "-a", domain])
+        for module, items in [("network", [WorkspaceGenerator.get_network(i) for i in range(self._manage_items)]),
+                              ("host", [WorkspaceGenerator.get_address(i) for i in range(self._manage_items)]),
+                              ("hostname", ["host{}.{}".format(i, domain) for i in range(self._manage_items)])]:
+            file_name = os.path.join(self._output_dir, "benchmark-{}.txt".format(module))
+            with open(file_name, "w") as file:
+                file.write(os.linesep.join(items))
+
+            def add():
+                self._execute_kismanage([module, "-w", workspace, "-A", file_name])
+                return len(items)
+            result = self._measure("kismanage:{}".format(module), add)
+            result.statements = None
+            result.max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    def _run_scope(self) -> None:
+        """
+        This method loads networks and hosts by bulk inserts with the row-level triggers and with the deferred network
+        scope mode (see Engine.deferred_network_scope). Thereby, the measured times are dominated by the network
+        assignments and scope computations.
+        """
+        networks = [(WorkspaceGenerator.get_network(i), ScopeType.all if i % 2 else None)
+                    for i in range(self._scope_networks)]
+        hosts = [item.replace(".0/24", ".{}".format(i + 1)) for item, _ in networks
+                 for i in range(self.SCOPE_HOSTS_PER_NETWORK)]
+        for name, deferred in [("row", False), ("deferred", True)]:
+            workspace_str = "{}-scope-{}".format(self._workspace, name)[:25]
+            # The workspace is re-created, so that repeated runs (see --skip-generation) load the same networks
+            with self._engine.session_scope() as session:
+                workspace = session.query(Workspace).filter_by(name=workspace_str).one_or_none()
+                if workspace:
+                    session.delete(workspace)
+            with self._engine.session_scope() as session:
+                session.add(Workspace(name=workspace_str))
+
+            def load():
+                with self._engine.session_scope() as session:
+                    workspace = session.query(Workspace).filter_by(name=workspace_str).one()
+                    with self._engine.deferred_network_scope(session=session, workspace=workspace) \
+                            if deferred else contextlib.nullcontext():
+                        session.execute(Host.__table__.insert(),
+                                        [{"workspace_id": workspace.id, "address": item} for item in hosts])
+                        # The parent network is inserted first, so that the sub-networks obtain its scope
+                        session.execute(Network.__table__.insert(),
+                                        {"workspace_id": workspace.id,
+                                         "address": "10.0.0.0/8",
+                                         "scope": ScopeType.exclude})
+                        session.execute(Network.__table__.insert(),
+                                        [{"workspace_id": workspace.id, "address": address, "scope": scope}
+                                         for address, scope in networks])
+                return len(networks) + len(hosts)
+            self._measure("scope:{}".format(name), load)
+
+    def _get_service_pairs(self, session: Session) -> set:
+        """
+        This method computes the pairs of host and host name services of the synthetic workspace by joining the
+        services with the A and AAAA records. This is the query that was executed by the service report before the
+        pairs were precomputed in table service_summary.
+        :return: Set of tuples containing the host service ID, the host host name mapping ID, and the host name service
+        ID
+        """
+        service_host = aliased(Service)
+        service_host_name = aliased(Service)
+        query = session.query(service_host.id, HostHostNameMapping.id, service_host_name.id) \
+            .join(Host, service_host.host) \
+            .join(Workspace, Host.workspace_id == Workspace.id) \
+            .join(HostHostNameMapping,
+                  and_(HostHostNameMapping.host_id == Host.id,
+                       or_(HostHostNameMapping._type.op("&")(DnsResourceRecordType.a.value) ==
+                           DnsResourceRecordType.a.value,
+                           HostHostNameMapping._type.op("&")(DnsResourceRecordType.aaaa.value) ==
+                           DnsResourceRecordType.aaaa.value)), isouter=True) \
+            .join(HostName, HostHostNameMapping.host_name, isouter=True) \
+            .join(service_host_name, HostName.services, isouter=True) \
+            .filter(Workspace.name == self._workspace,
+                    or_(service_host_name.id.is_(None), and_(service_host.port == service_host_name.port,
+                                                             service_host.protocol == service_host_name.protocol)))
+        return set(query.all())
+
+    def _get_service_summary(self, session: Session) -> set:
+        """
+        This method returns the pairs of host and host name services of the synthetic workspace, which are stored in
+        table service_summary.
+        :return: Set of tuples containing the host service ID, the host host name mapping ID, and the host name service
+        ID
+        """
+        query = session.query(ServiceSummary.host_service_id,
+                              ServiceSummary.host_host_name_mapping_id,
+                              ServiceSummary.host_name_service_id) \
+            .join(Service, ServiceSummary.host_service_id == Service.id) \
+            .join(Host, Service.host) \
+            .join(Workspace, Host.workspace_id == Workspace.id) \
+            .filter(Workspace.name == self._workspace)
+        return set(query.all())
+
+    def _run_service(self) -> None:
+        """
+        This method compares the time needed by the service report to obtain the pairs of host and host name services
+        with the join query and with table service_summary. Thereby, both queries must return the same pairs.
+        """
+        results = {}
+        for name, function in [("join", self._get_service_pairs), ("summary", self._get_service_summary)]:
+
+            def query():
+                with self._engine.session_scope() as session:
+                    results[name] = function(session)
+                if "join" in results and results["join"] != results[name]:
+                    raise ValueError("table service_summary does not contain the pairs of the join query")
+                return len(results[name])
+            self._measure("service:{}".format(name), query)
+
+    def run(self, scenarios: List[ScenarioType] = None) -> List[BenchmarkResult]:
+        """
+        This method executes the given scenarios in the order of enum ScenarioType.
+        :param scenarios: The scenarios to be executed. If None, then all scenarios are executed.
+        :return: The measurements of all executed scenarios
+        """
+        scenarios = scenarios if scenarios else list(ScenarioType)
+        mapping = {ScenarioType.generate: self._run_generate,
+                   ScenarioType.create: self._run_create,
+                   ScenarioType.analyze: self._run_analyze,
+                   ScenarioType.report: self._run_report,
+                   ScenarioType.importer: self._run_import,
+                   ScenarioType.manage: self._run_manage,
+                   ScenarioType.scope: self._run_scope,
+                   ScenarioType.service: self._run_service}
+        for item in ScenarioType:
+            if item in scenarios:
+                mapping[item]()
+        return self.results
+
+    def get_json(self) -> Dict:
+        return {"size": self._size.get_json(),
+                "collectors": self._collectors,
+                "import_hosts": self._import_hosts,
+                "manage_items": self._manage_items,
+                "scope_networks": self._scope_networks,
+                "results": [item.get_json() for item in self.results]}
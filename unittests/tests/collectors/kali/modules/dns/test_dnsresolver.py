@@ -0,0 +1,469 @@
+#!/usr/bin/python3
+"""
+this file implements all unittests for the asynchronous DNS resolver and collectors dnsresolvehost and dnsresolvereverse
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2018 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import os
+import struct
+import unittest
+import tempfile
+import ipaddress
+import socketserver
+from threading import Thread
+from threading import Lock
+from unittest.mock import patch
+from typing import List
+from unittests.tests.collectors.kali.modules.dns.core import BaseKaliDnsCollectorTestCase
+from collectors.os.modules.dns.dnsresolvehost import CollectorClass as DnsresolvehostCollector
+from collectors.os.modules.dns.dnsresolvereverse import CollectorClass as DnsresolvereverseCollector
+from collectors.os.modules.dns.resolver import DnsResolver
+from collectors.os.modules.dns.resolver import DnsResolverCommand
+from unittests.tests.collectors.core import CollectorProducerTestSuite
+from collectors.os.core import BatchCommandResult
+from database.model import Command
+from database.model import CommandStatus
+from database.model import CollectorType
+from database.model import Host
+from database.model import HostName
+from database.model import DomainName
+from database.model import DnsResourceRecordType
+from database.model import ScopeType
+
+
+class StubDnsServer(socketserver.ThreadingUDPServer):
+    """
+    This class implements a minimal authoritative DNS server, which answers queries based on the given records
+    """
+    allow_reuse_address = True
+
+    def __init__(self, records: dict, answer: bool = True):
+        """
+        :param records: Dictionary with key (name, record type) and a list of (name, record type, value) tuples
+        :param answer: If False, then the server does not respond, which allows simulating unreachable name servers
+        """
+        super().__init__(("127.0.0.1", 0), StubDnsHandler)
+        self.records = records
+        self.answer = answer
+        self.query_count = 0
+        self.lock = Lock()
+        self._thread = Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def nameserver(self) -> str:
+        return "{}:{}".format(*self.server_address)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
+
+
+class StubDnsHandler(socketserver.BaseRequestHandler):
+    """This class answers a single DNS query"""
+
+    @staticmethod
+    def _encode_rdata(record_type: DnsResourceRecordType, value: str) -> bytes:
+        if record_type in [DnsResourceRecordType.a, DnsResourceRecordType.aaaa]:
+            result = ipaddress.ip_address(value).packed
+        elif record_type == DnsResourceRecordType.mx:
+            preference, exchange = value.split(" ")
+            result = struct.pack("!H", int(preference)) + DnsResolver.encode_name(exchange)
+        else:
+            result = DnsResolver.encode_name(value)
+        return result
+
+    def handle(self):
+        data, sock = self.request
+        with self.server.lock:
+            self.server.query_count += 1
+        if not self.server.answer:
+            return
+        query_id = struct.unpack("!H", data[:2])[0]
+        name, offset = DnsResolver._read_name(data, 12)
+        qtype = DnsResolver.RECORD_TYPES[struct.unpack("!H", data[offset:offset + 2])[0]]
+        question = data[12:offset + 4]
+        answers = []
+        # Follow CNAME records like a recursive resolver does
+        current = name
+        while (current, DnsResourceRecordType.cname) in self.server.records and qtype != DnsResourceRecordType.cname:
+            answers.extend(self.server.records[(current, DnsResourceRecordType.cname)])
+            current = self.server.records[(current, DnsResourceRecordType.cname)][0][2]
+        answers.extend(self.server.records.get((current, qtype), []))
+        known = any([item[0] == name for item in self.server.records.keys()])
+        rcode = 0 if known else DnsResolver.RCODE_NXDOMAIN
+        response = struct.pack("!HHHHHH", query_id, 0x8180 | rcode, 1, len(answers), 0, 0) + question
+        for record_name, record_type, value in answers:
+            rdata = self._encode_rdata(record_type, value)
+            response += DnsResolver.encode_name(record_name)
+            response += struct.pack("!HHIH", DnsResolver.QUERY_TYPES[record_type], 1, 300, len(rdata)) + rdata
+        sock.sendto(response, self.client_address)
+
+
+RECORDS = {("www.test.local", DnsResourceRecordType.cname): [("www.test.local",
+                                                              DnsResourceRecordType.cname,
+                                                              "web.test.local")],
+           ("web.test.local", DnsResourceRecordType.a): [("web.test.local", DnsResourceRecordType.a, "192.168.1.1")],
+           ("web.test.local", DnsResourceRecordType.aaaa): [("web.test.local",
+                                                             DnsResourceRecordType.aaaa,
+                                                             "2001:db8::1")],
+           ("test.local", DnsResourceRecordType.mx): [("test.local", DnsResourceRecordType.mx, "10 mail.test.local")],
+           ("1.1.168.192.in-addr.arpa", DnsResourceRecordType.ptr): [("1.1.168.192.in-addr.arpa",
+                                                                      DnsResourceRecordType.ptr,
+                                                                      "web.test.local")]}
+
+
+class TestDnsResolver(unittest.TestCase):
+    """
+    This class implements all unittests for the asynchronous DNS resolver by using a local stub DNS server
+    """
+
+    def test_parse_nameserver(self):
+        self.assertEqual(("8.8.8.8", 53), DnsResolver.parse_nameserver("8.8.8.8"))
+        self.assertEqual(("127.0.0.1", 5353), DnsResolver.parse_nameserver("127.0.0.1:5353"))
+        self.assertEqual(("::1", 5353), DnsResolver.parse_nameserver("[::1]:5353"))
+        self.assertEqual(("::1", 53), DnsResolver.parse_nameserver("::1"))
+
+    def test_resolve(self):
+        with StubDnsServer(RECORDS) as server:
+            resolver = DnsResolver(nameservers=[server.nameserver], timeout=1)
+            results = resolver.resolve([("www.test.local", DnsResourceRecordType.a),
+                                        ("www.test.local", DnsResourceRecordType.aaaa),
+                                        ("test.local", DnsResourceRecordType.mx),
+                                        (DnsResolver.get_reverse_pointer("192.168.1.1"), DnsResourceRecordType.ptr),
+                                        ("unknown.test.local", DnsResourceRecordType.a)])
+        self.assertEqual(5, len(results))
+        self.assertListEqual(["www.test.local is an alias for web.test.local.",
+                              "web.test.local has address 192.168.1.1"], [str(item) for item in results[0].answers])
+        self.assertListEqual(["www.test.local is an alias for web.test.local.",
+                              "web.test.local has IPv6 address 2001:db8::1"], [str(item) for item in results[1].answers])
+        self.assertListEqual(["test.local mail is handled by 10 mail.test.local."],
+                             [str(item) for item in results[2].answers])
+        self.assertListEqual(["1.1.168.192.in-addr.arpa domain name pointer web.test.local."],
+                             [str(item) for item in results[3].answers])
+        self.assertTrue(results[4].not_found)
+        self.assertFalse(results[4].failed)
+
+    def test_nameserver_rotation(self):
+        with StubDnsServer(RECORDS, answer=False) as dead_server:
+            with StubDnsServer(RECORDS) as server:
+                resolver = DnsResolver(nameservers=[dead_server.nameserver, server.nameserver],
+                                       retries=1,
+                                       timeout=0.5)
+                results = resolver.resolve([("web.test.local", DnsResourceRecordType.a)] * 4)
+                self.assertEqual(4, server.query_count)
+        self.assertTrue(all([not item.failed for item in results]))
+        self.assertTrue(all([str(item.answers[0]) == "web.test.local has address 192.168.1.1" for item in results]))
+        self.assertGreater(dead_server.query_count, 0)
+
+    def test_unreachable_nameserver(self):
+        with StubDnsServer(RECORDS, answer=False) as server:
+            command = DnsResolverCommand(DnsResolverCommand.create_os_command(targets=["web.test.local"],
+                                                                              record_types=DnsResourceRecordType.a,
+                                                                              nameservers=[server.nameserver],
+                                                                              retries=1,
+                                                                              wait=0.2))
+            command.start()
+            command.join()
+            self.assertEqual(2, server.query_count)
+        self.assertEqual(1, command.return_code)
+        self.assertFalse(command.killed)
+        self.assertListEqual([";; connection timed out; no servers could be reached"], command.stdout_list)
+
+    def test_resolver_command(self):
+        with tempfile.NamedTemporaryFile(mode="w") as file:
+            file.write("test.local{}".format(os.linesep))
+            file.flush()
+            with StubDnsServer(RECORDS) as server:
+                os_command = DnsResolverCommand.create_os_command(targets=["www.test.local", "unknown.test.local"],
+                                                                  record_types=DnsResourceRecordType.a |
+                                                                               DnsResourceRecordType.aaaa |
+                                                                               DnsResourceRecordType.mx,
+                                                                  nameservers=[server.nameserver],
+                                                                  input_file=file.name)
+                command = DnsResolverCommand(os_command)
+                command.start()
+                command.join()
+        self.assertEqual(0, command.return_code)
+        self.assertListEqual([], command.stderr_list)
+        self.assertListEqual(["www.test.local is an alias for web.test.local.",
+                              "web.test.local has address 192.168.1.1",
+                              "web.test.local has IPv6 address 2001:db8::1",
+                              "Host unknown.test.local not found: 3(NXDOMAIN)",
+                              "test.local mail is handled by 10 mail.test.local."], command.stdout_list)
+
+    def test_reverse_resolver_command(self):
+        with StubDnsServer(RECORDS) as server:
+            os_command = DnsResolverCommand.create_os_command(targets=["192.168.1.1"],
+                                                              reverse=True,
+                                                              nameservers=[server.nameserver])
+            command = DnsResolverCommand(os_command)
+            command.start()
+            command.join()
+        self.assertEqual(0, command.return_code)
+        self.assertListEqual(["1.1.168.192.in-addr.arpa domain name pointer web.test.local."], command.stdout_list)
+
+
+class DnsResolveHostCollectorTestCase(BaseKaliDnsCollectorTestCase):
+    """
+    This class implements all unittestss for the given collector
+    """
+    def __init__(self, test_name: str, **kwargs):
+        super().__init__(test_name,
+                         collector_name="dnsresolvehost",
+                         collector_class=DnsresolvehostCollector,
+                         **kwargs)
+
+    @staticmethod
+    def get_command_text_outputs() -> List[str]:
+        """
+        This method returns example outputs of the respective collectors
+        :return:
+        """
+        return """www.test.local is an alias for sites.test.local.edgekey.net.
+sites.test.local.edgekey.net is an alias for e13595.a.akamaiedge.net.
+e13595.a.akamaiedge.net has address 92.122.36.1
+e13595.a.akamaiedge.net has IPv6 address 2a00:1450:400a:802::2004
+Host unknown.test.local not found: 3(NXDOMAIN)
+test.local mail is handled by 10 mail.test.local.""".split(os.linesep)
+
+    def test_verify_results(self):
+        """
+        This method checks whether the collector correctly verifies the command output
+        :return:
+        """
+        self.init_db()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            test_suite = CollectorProducerTestSuite(engine=self._engine,
+                                                    arguments={"workspace": self._workspaces[0],
+                                                               "output_dir": temp_dir})
+            with self._engine.session_scope() as session:
+                source = self.create_source(session, source_str=self._collector_name)
+                command = self.create_command(session=session,
+                                              workspace_str=self._workspaces[0],
+                                              command=["kis-resolver", "www.test.local"],
+                                              collector_name_str=self._collector_name,
+                                              collector_name_type=CollectorType.domain,
+                                              host_name_str="www.test.local",
+                                              scope=ScopeType.all,
+                                              output_path=temp_dir)
+                command.stdout_output = self.get_command_text_outputs()
+                test_suite.verify_results(session=session,
+                                          arg_parse_module=self._arg_parse_module,
+                                          command=command,
+                                          source=source,
+                                          report_item=self._report_item)
+        with self._engine.session_scope() as session:
+            results = [item.full_name for item in session.query(HostName).join(DomainName).all()]
+            results.sort()
+            self.assertListEqual(["a.akamaiedge.net",
+                                  "akamaiedge.net",
+                                  "e13595.a.akamaiedge.net",
+                                  "edgekey.net",
+                                  "local.edgekey.net",
+                                  "mail.test.local",
+                                  "sites.test.local.edgekey.net",
+                                  "test.local",
+                                  "test.local.edgekey.net",
+                                  "www.test.local"], results)
+            for address in ["92.122.36.1", "2a00:1450:400a:802::2004"]:
+                host = session.query(Host).filter_by(address=address).one()
+                results = [item.host_name.full_name for item in host.host_host_name_mappings]
+                results.sort()
+                self.assertListEqual(["e13595.a.akamaiedge.net",
+                                      "sites.test.local.edgekey.net",
+                                      "www.test.local"], results)
+            host_name = session.query(HostName).filter_by(name="www").one()
+            results = [(item.resolved_host_name.full_name, item.type)
+                       for item in host_name.resolved_host_name_mappings]
+            self.assertListEqual([("sites.test.local.edgekey.net", DnsResourceRecordType.cname)], results)
+
+
+    def test_split_batch_output(self):
+        """
+        This method checks whether the collector correctly assigns the output of a batch to the batch's commands
+        :return:
+        """
+        self.init_db()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self._arg_parse_module.create_instance(engine=self._engine,
+                                                   workspace=self._workspaces[0],
+                                                   output_dir=temp_dir)
+            collector = self._arg_parse_module.instance
+            with self._engine.session_scope() as session:
+                commands = []
+                for host_name in ["www.test.local", "unknown.test.local", "test.local", "dead.test.local"]:
+                    command = self.create_command(session=session,
+                                                  workspace_str=self._workspaces[0],
+                                                  command=collector._get_resolver_command(
+                                                      [host_name],
+                                                      DnsResourceRecordType.a | DnsResourceRecordType.mx),
+                                                  collector_name_str=self._collector_name,
+                                                  collector_name_type=CollectorType.domain,
+                                                  host_name_str=host_name,
+                                                  scope=ScopeType.all,
+                                                  output_path=temp_dir)
+                    commands.append(command)
+                self.assertEqual(collector.get_batch_key(commands[0]), collector.get_batch_key(commands[1]))
+                os_command = collector.create_batch_os_command(commands, "/tmp/input.txt")
+                self.assertListEqual(["-i", "/tmp/input.txt"], os_command[-2:])
+                self.assertNotIn("--", os_command)
+                process = BatchCommandResult(process=None, return_code=0,
+                                             stdout_list=self.get_command_text_outputs(),
+                                             stderr_list=[";; A dead.test.local: timeout",
+                                                          ";; MX dead.test.local: timeout",
+                                                          ";; MX www.test.local: timeout"])
+                results = collector.split_batch_output(commands, process)
+                self.assertListEqual(["www.test.local is an alias for sites.test.local.edgekey.net.",
+                                      "sites.test.local.edgekey.net is an alias for e13595.a.akamaiedge.net.",
+                                      "e13595.a.akamaiedge.net has address 92.122.36.1",
+                                      "e13595.a.akamaiedge.net has IPv6 address 2a00:1450:400a:802::2004"],
+                                     results[commands[0].id].stdout_list)
+                self.assertListEqual([";; MX www.test.local: timeout"], results[commands[0].id].stderr_list)
+                self.assertEqual(0, results[commands[0].id].return_code)
+                self.assertListEqual(["Host unknown.test.local not found: 3(NXDOMAIN)"],
+                                     results[commands[1].id].stdout_list)
+                self.assertListEqual(["test.local mail is handled by 10 mail.test.local."],
+                                     results[commands[2].id].stdout_list)
+                self.assertListEqual([";; connection timed out; no servers could be reached"],
+                                     results[commands[3].id].stdout_list)
+                self.assertEqual(1, results[commands[3].id].return_code)
+
+    def test_batch_execution(self):
+        """
+        This method checks whether the collector's commands are correctly executed in batches
+        :return:
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            for host_name in ["www.test.local", "web.test.local", "unknown.test.local"]:
+                self.create_hostname(session=session, workspace_str=self._workspaces[0], host_name=host_name)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with StubDnsServer(RECORDS) as server:
+                test_suite = CollectorProducerTestSuite(engine=self._engine,
+                                                        arguments={"workspace": self._workspaces[0],
+                                                                   "output_dir": temp_dir,
+                                                                   "dns_server": server.nameserver,
+                                                                   "batch_size": 10})
+                test_suite.create_execute_commands([self._arg_parse_module])
+        with self._engine.session_scope() as session:
+            results = {item.host_name.full_name: item for item in session.query(Command)
+                       .filter(Command.host_name_id.isnot(None)).all()}
+            self.assertEqual(CommandStatus.completed, results["www.test.local"].status)
+            self.assertEqual(0, results["www.test.local"].return_code)
+            self.assertIn("web.test.local has address 192.168.1.1", results["www.test.local"].stdout_output)
+            self.assertIn("web.test.local has address 192.168.1.1", results["web.test.local"].stdout_output)
+            self.assertListEqual(["Host unknown.test.local not found: 3(NXDOMAIN)"],
+                                 results["unknown.test.local"].stdout_output)
+            host = session.query(Host).filter_by(address="192.168.1.1").one()
+            results = [item.host_name.full_name for item in host.host_host_name_mappings]
+            results.sort()
+            self.assertListEqual(["web.test.local", "www.test.local"], results)
+
+    def test_failed_batch_creation(self):
+        """
+        This method checks whether the commands of a batch are reset to pending, if the batch cannot be created
+        :return:
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            for host_name in ["www.test.local", "web.test.local"]:
+                self.create_hostname(session=session, workspace_str=self._workspaces[0], host_name=host_name)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch.object(DnsresolvehostCollector, "create_batch_os_command", side_effect=OSError()):
+                test_suite = CollectorProducerTestSuite(engine=self._engine,
+                                                        arguments={"workspace": self._workspaces[0],
+                                                                   "output_dir": temp_dir,
+                                                                   "batch_size": 10})
+                test_suite.create_execute_commands([self._arg_parse_module])
+            self.assertListEqual([], [item for item in os.listdir(temp_dir) if "-batch-" in item])
+        with self._engine.session_scope() as session:
+            results = {(item.status, item.start_time) for item in session.query(Command)
+                       .filter(Command.host_name_id.isnot(None)).all()}
+            self.assertSetEqual({(CommandStatus.pending, None)}, results)
+
+
+class DnsResolveReverseCollectorTestCase(BaseKaliDnsCollectorTestCase):
+    """
+    This class implements all unittestss for the given collector
+    """
+    def __init__(self, test_name: str, **kwargs):
+        super().__init__(test_name,
+                         collector_name="dnsresolvereverse",
+                         collector_class=DnsresolvereverseCollector,
+                         **kwargs)
+
+    @staticmethod
+    def get_command_text_outputs() -> List[str]:
+        """
+        This method returns example outputs of the respective collectors
+        :return:
+        """
+        return """36.168.217.172.in-addr.arpa domain name pointer zrh04s14-in-f4.1e100.net.
+4.0.0.2.0.0.0.0.0.0.0.0.0.0.0.0.2.0.8.0.a.0.0.4.0.5.4.1.0.0.a.2.ip6.arpa domain name pointer zrh04s14-in-x04.1e100.net.""".split(os.linesep)
+
+    def test_get_address_from_pointer(self):
+        self.assertEqual("172.217.168.36",
+                         DnsresolvereverseCollector.get_address_from_pointer("36.168.217.172.in-addr.arpa."))
+        self.assertEqual("2a00:1450:400a:802::2004",
+                         DnsresolvereverseCollector.get_address_from_pointer(
+                             DnsResolver.get_reverse_pointer("2a00:1450:400a:802::2004")))
+        self.assertIsNone(DnsresolvereverseCollector.get_address_from_pointer("www.test.local"))
+
+    def test_verify_results(self):
+        """
+        This method checks whether the collector correctly verifies the command output
+        :return:
+        """
+        self.init_db()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            test_suite = CollectorProducerTestSuite(engine=self._engine,
+                                                    arguments={"workspace": self._workspaces[0],
+                                                               "output_dir": temp_dir})
+            with self._engine.session_scope() as session:
+                source = self.create_source(session, source_str=self._collector_name)
+                self.create_host(session=session, workspace_str=self._workspaces[0], address="172.217.168.36")
+                command = self.create_command(session=session,
+                                              workspace_str=self._workspaces[0],
+                                              command=["kis-resolver", "-x", "127.0.0.1"],
+                                              collector_name_str=self._collector_name,
+                                              collector_name_type=CollectorType.host,
+                                              ipv4_address="127.0.0.1",
+                                              scope=ScopeType.all,
+                                              output_path=temp_dir)
+                command.stdout_output = self.get_command_text_outputs()
+                test_suite.verify_results(session=session,
+                                          arg_parse_module=self._arg_parse_module,
+                                          command=command,
+                                          source=source,
+                                          report_item=self._report_item)
+        with self._engine.session_scope() as session:
+            results = {}
+            for host in session.query(Host).all():
+                for mapping in host.host_host_name_mappings:
+                    self.assertEqual(DnsResourceRecordType.ptr, mapping.type)
+                    self.assertListEqual([self._collector_name], [item.name for item in mapping.sources])
+                    results[host.address] = mapping.host_name.full_name
+            self.assertDictEqual({"172.217.168.36": "zrh04s14-in-f4.1e100.net",
+                                  "2a00:1450:400a:802::2004": "zrh04s14-in-x04.1e100.net"}, results)
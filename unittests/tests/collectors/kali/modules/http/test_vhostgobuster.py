@@ -177,6 +177,13 @@ class TestVhostGoBusterFilteringClass(BaseKaliCollectorTestCase):
                          collector_name="vhostgobuster",
                          collector_class=VhostGobusterCollector)
 
+    @staticmethod
+    def _get_wordlist(command: Command) -> str:
+        """
+        This method returns the path to the wordlist used by the given command.
+        """
+        return command.os_command[command.os_command.index("-w") + 1]
+
     def _create_test_data(self, workspace_str: str):
         with self._engine.session_scope() as session:
             # Setup database
@@ -217,8 +224,7 @@ class TestVhostGoBusterFilteringClass(BaseKaliCollectorTestCase):
             # Check content of created wordlist. It should not contain test1.local and www.test1.local.
             with self._engine.session_scope() as session:
                 command = session.query(Command).one()
-                with open(os.path.join(temp_dir,
-                                       "{0}/vhostgobuster_{0}-tcp-80-wordlist.txt".format(command.host.address)), "r") as file:
+                with open(self._get_wordlist(command), "r") as file:
                     lines = [line.strip() for line in file.readlines()]
                     self.assertEqual(3, len(lines))
                     self.assertNotIn(exclude_filter[0], lines)
@@ -247,8 +253,7 @@ class TestVhostGoBusterFilteringClass(BaseKaliCollectorTestCase):
             # Check content of created wordlist. It should not contain test2.local and www.test2.local.
             with self._engine.session_scope() as session:
                 command = session.query(Command).one()
-                with open(os.path.join(temp_dir,
-                                       "{0}/vhostgobuster_{0}-tcp-80-wordlist.txt".format(command.host.address)), "r") as file:
+                with open(self._get_wordlist(command), "r") as file:
                     lines = [line.strip() for line in file.readlines()]
                     self.assertEqual(2, len(lines))
                     self.assertIn(include_filter[0], lines)
@@ -278,8 +283,7 @@ class TestVhostGoBusterFilteringClass(BaseKaliCollectorTestCase):
             # Check content of created wordlist. It should not contain test2.local and www.test2.local.
             with self._engine.session_scope() as session:
                 command = session.query(Command).one()
-                with open(os.path.join(temp_dir,
-                                       "{0}/vhostgobuster_{0}-tcp-80-wordlist.txt".format(command.host.address)), "r") as file:
+                with open(self._get_wordlist(command), "r") as file:
                     lines = [line.strip() for line in file.readlines()]
                     self.assertEqual(3, len(lines))
                     self.assertIn(include_filter[0], lines)
@@ -305,8 +309,7 @@ class TestVhostGoBusterFilteringClass(BaseKaliCollectorTestCase):
             # Check content of created wordlist. It should not contain www.test1.local.
             with self._engine.session_scope() as session:
                 command = session.query(Command).one()
-                with open(os.path.join(temp_dir,
-                                       "{0}/vhostgobuster_{0}-tcp-80-wordlist.txt".format(command.host.address)), "r") as file:
+                with open(self._get_wordlist(command), "r") as file:
                     lines = [line.strip() for line in file.readlines()]
                     self.assertEqual(5, len(lines))
                     self.assertIn(include_filter[0], lines)
@@ -314,3 +317,49 @@ class TestVhostGoBusterFilteringClass(BaseKaliCollectorTestCase):
                     self.assertIn(include_filter[2], lines)
                     self.assertIn(include_filter[3], lines)
                     self.assertIn(include_filter[4], lines)
+
+    def test_shared_wordlist(self):
+        """
+        All services of a workspace share the same wordlist. If the host names or their mappings change, then the
+        wordlist's content is updated but its path remains. Thus, no new commands are created.
+        """
+        workspace_str = self._workspaces[0]
+        self.init_db()
+        self._create_test_data(workspace_str)
+        with self._engine.session_scope() as session:
+            self.create_service(session=session, workspace_str=workspace_str, address="192.168.1.2", port=80)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            arguments = {"workspace": workspace_str, "output_dir": temp_dir}
+            test_suite = CollectorProducerTestSuite(engine=self._engine, arguments=arguments)
+            test_suite.create_commands([self._arg_parse_module])
+            with self._engine.session_scope() as session:
+                wordlists = set([self._get_wordlist(item) for item in session.query(Command).all()])
+                self.assertEqual(1, len(wordlists))
+                wordlist = wordlists.pop()
+                self.assertEqual(temp_dir, os.path.dirname(wordlist))
+                os_commands = set([tuple(item.os_command) for item in session.query(Command).all()])
+            # Without changes, the same wordlist is used
+            test_suite.create_commands([self._arg_parse_module])
+            with self._engine.session_scope() as session:
+                wordlists = set([self._get_wordlist(item) for item in session.query(Command).all()])
+                self.assertSetEqual({wordlist}, wordlists)
+            # A new A record updates the wordlist
+            with self._engine.session_scope() as session:
+                host = self.create_host(session=session, workspace_str=workspace_str, address="192.168.1.2")
+                host_name = self._domain_utils.get_host_name(session=session,
+                                                             workspace=host.workspace,
+                                                             host_name="www.test1.local")
+                self._domain_utils.add_host_host_name_mapping(session=session,
+                                                              host=host,
+                                                              host_name=host_name,
+                                                              mapping_type=DnsResourceRecordType.a)
+            test_suite.create_commands([self._arg_parse_module])
+            with self._engine.session_scope() as session:
+                wordlists = set([self._get_wordlist(item) for item in session.query(Command).all()])
+                self.assertSetEqual({wordlist}, wordlists)
+                self.assertSetEqual(os_commands, set([tuple(item.os_command) for item in session.query(Command).all()]))
+                self.assertListEqual([os.path.basename(wordlist)],
+                                     [item for item in os.listdir(temp_dir) if item.endswith("-wordlist.txt")])
+                with open(wordlist, "r") as file:
+                    lines = [line.strip() for line in file.readlines()]
+                self.assertListEqual(["test1.local", "test2.local", "test3.local", "www.test2.local"], lines)
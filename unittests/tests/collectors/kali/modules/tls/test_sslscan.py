@@ -22,7 +22,10 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 __version__ = 0.1
 
+import os
 import tempfile
+import xml.etree.ElementTree as ET
+from types import SimpleNamespace
 from database.model import CollectorType
 from database.model import TlsInfo
 from database.model import CertInfo
@@ -35,6 +38,7 @@ from typing import List
 from unittests.tests.collectors.core import CollectorProducerTestSuite
 from unittests.tests.collectors.kali.modules.scan.core import BaseNmapCollectorTestCase
 from collectors.os.modules.tls.sslscan import CollectorClass as SslscanCollector
+from collectors.os.core import BatchCommandResult
 
 
 #   Supported Server Cipher(s):
@@ -370,3 +374,64 @@ Signed Certificate Timestamp:
                 .filter(TlsInfo.version == TlsVersion.tls12,
                         CipherSuite.iana_name == "TLS_RSA_WITH_3DES_EDE_CBC_SHA").one()
             self.assertIsNone(result.kex_algorithm_details)
+
+    def test_split_batch_output(self):
+        """
+        This method checks whether the collector correctly splits the output of a batched sslscan command per command
+        :return:
+        """
+        self.init_db()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self._arg_parse_module.create_instance(engine=self._engine,
+                                                   workspace=self._workspaces[0],
+                                                   output_dir=temp_dir)
+            collector = self._arg_parse_module.instance
+            with self._engine.session_scope() as session:
+                collector_name = self.create_collector_name(session=session,
+                                                            name=self._collector_name,
+                                                            type=CollectorType.host_service)
+                commands = []
+                for address in ["192.168.1.1", "192.168.1.2"]:
+                    service = self.create_service(session=session,
+                                                  workspace_str=self._workspaces[0],
+                                                  address=address,
+                                                  port=443,
+                                                  nmap_service_name="https")
+                    commands += collector.create_service_commands(session, service, collector_name)
+                self.assertEqual(2, len(commands))
+                self.assertEqual(collector.get_batch_key(commands[0]), collector.get_batch_key(commands[1]))
+                input_file = os.path.join(temp_dir, "input.txt")
+                xml_file = os.path.join(temp_dir, "input.xml")
+                os_command = collector.create_batch_os_command(commands, input_file)
+                self.assertEqual("--targets={}".format(input_file), os_command[-1])
+                self.assertIn("--xml={}".format(xml_file), os_command)
+                self.assertNotIn("192.168.1.1:443", os_command)
+                with open(xml_file, "w") as file:
+                    file.write("""<?xml version="1.0" encoding="UTF-8"?>
+<document title="SSLScan Results" version="2.0.10-static" web="http://github.com/rbsec/sslscan">
+ <ssltest host="192.168.1.1" sniname="192.168.1.1" port="443">
+  <cipher status="preferred" sslversion="TLSv1.3" bits="128" cipher="TLS_AES_128_GCM_SHA256" />
+ </ssltest>
+ <ssltest host="192.168.1.2" sniname="192.168.1.2" port="443">
+  <cipher status="preferred" sslversion="TLSv1.2" bits="256" cipher="ECDHE-RSA-AES256-GCM-SHA384" />
+ </ssltest>
+</document>""")
+                process = BatchCommandResult(process=SimpleNamespace(os_command=os_command),
+                                             return_code=0,
+                                             stdout_list=["Version: 2.0.10-static",
+                                                          "Testing SSL server 192.168.1.1 on port 443 using SNI name "
+                                                          "192.168.1.1",
+                                                          "Preferred TLSv1.3  128 bits  TLS_AES_128_GCM_SHA256",
+                                                          "Testing SSL server 192.168.1.2 on port 443 using SNI name "
+                                                          "192.168.1.2",
+                                                          "Preferred TLSv1.2  256 bits  ECDHE-RSA-AES256-GCM-SHA384"])
+                results = collector.split_batch_output(commands, process)
+                self.assertFalse(os.path.exists(xml_file))
+                self.assertListEqual(["Version: 2.0.10-static",
+                                      "Testing SSL server 192.168.1.1 on port 443 using SNI name 192.168.1.1",
+                                      "Preferred TLSv1.3  128 bits  TLS_AES_128_GCM_SHA256"],
+                                     results[commands[0].id].stdout_list)
+                for command, address in zip(commands, ["192.168.1.1", "192.168.1.2"]):
+                    collector.import_output_files(command)
+                    results = ET.fromstring(command.xml_output).findall("ssltest")
+                    self.assertListEqual([address], [item.attrib["host"] for item in results])
@@ -22,7 +22,10 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 __version__ = 0.1
 
+import os
 import tempfile
+import xml.etree.ElementTree as ET
+from types import SimpleNamespace
 from database.model import CollectorType
 from database.model import TlsInfo
 from database.model import CipherSuite
@@ -34,6 +37,8 @@ from typing import List
 from unittests.tests.collectors.core import CollectorProducerTestSuite
 from unittests.tests.collectors.kali.modules.scan.core import BaseNmapCollectorTestCase
 from collectors.os.modules.tls.tlsnmap import CollectorClass as TlsNmapCollector
+from collectors.os.core import BatchCommandResult
+from collectors.core import NmapUtils
 
 
 # PORT    STATE SERVICE
@@ -422,3 +427,75 @@ class BaseTlsNmapCollectorTestCase(BaseNmapCollectorTestCase):
                 .filter(TlsInfo.version == TlsVersion.tls12,
                         CipherSuite.iana_name == "TLS_RSA_WITH_3DES_EDE_CBC_SHA").one()
             self.assertEqual(KeyExchangeAlgorithm.rsa2048, result.kex_algorithm_details)
+
+    def test_split_batch_output(self):
+        """
+        This method checks whether the collector correctly splits the output of a batched Nmap scan per command
+        :return:
+        """
+        self.init_db()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self._arg_parse_module.create_instance(engine=self._engine,
+                                                   workspace=self._workspaces[0],
+                                                   output_dir=temp_dir)
+            collector = self._arg_parse_module.instance
+            with self._engine.session_scope() as session:
+                collector_name = self.create_collector_name(session=session,
+                                                            name=self._collector_name,
+                                                            type=CollectorType.host_service)
+                commands = []
+                for address in ["192.168.1.1", "192.168.1.2"]:
+                    service = self.create_service(session=session,
+                                                  workspace_str=self._workspaces[0],
+                                                  address=address,
+                                                  port=443,
+                                                  nmap_service_name="https")
+                    commands += collector.create_service_commands(session, service, collector_name)
+                self.assertEqual(2, len(commands))
+                self.assertEqual(collector.get_batch_key(commands[0]), collector.get_batch_key(commands[1]))
+                input_file = os.path.join(temp_dir, "input.txt")
+                os_command = collector.create_batch_os_command(commands, input_file)
+                self.assertListEqual(["-iL", input_file], os_command[-2:])
+                self.assertNotIn("192.168.1.1", os_command)
+                self.assertEqual(os.path.join(temp_dir, "input.xml"), os_command[os_command.index("-oX") + 1])
+                with open(os.path.join(temp_dir, "input.xml"), "w") as file:
+                    file.write("""<?xml version="1.0" encoding="UTF-8"?>
+<nmaprun scanner="nmap" args="nmap -p 443 -iL input.txt" version="7.91" xmloutputversion="1.05">
+<scaninfo type="syn" protocol="tcp" numservices="1" services="443"/>
+<host><status state="up" reason="echo-reply" reason_ttl="109"/>
+<address addr="192.168.1.1" addrtype="ipv4"/>
+<hostnames />
+<ports><port protocol="tcp" portid="443"><state state="open" reason="syn-ack" reason_ttl="51"/></port></ports>
+</host>
+<host><status state="up" reason="echo-reply" reason_ttl="109"/>
+<address addr="192.168.1.2" addrtype="ipv4"/>
+<hostnames />
+<ports><port protocol="tcp" portid="443"><state state="closed" reason="reset" reason_ttl="51"/></port></ports>
+</host>
+<runstats><finished time="1631733009" elapsed="1.06" exit="success"/><hosts up="2" down="0" total="2"/></runstats>
+</nmaprun>""")
+                process = BatchCommandResult(process=SimpleNamespace(os_command=os_command),
+                                             return_code=0,
+                                             stdout_list=["Starting Nmap 7.91 ( https://nmap.org )",
+                                                          "Nmap scan report for 192.168.1.1",
+                                                          "443/tcp open  https",
+                                                          "",
+                                                          "Nmap scan report for 192.168.1.2",
+                                                          "443/tcp closed https",
+                                                          "",
+                                                          "Nmap done: 2 IP addresses (2 hosts up) scanned"])
+                results = collector.split_batch_output(commands, process)
+                self.assertFalse(os.path.exists(os.path.join(temp_dir, "input.xml")))
+                self.assertListEqual(["Starting Nmap 7.91 ( https://nmap.org )",
+                                      "Nmap scan report for 192.168.1.2",
+                                      "443/tcp closed https",
+                                      "",
+                                      "Nmap done: 2 IP addresses (2 hosts up) scanned"],
+                                     results[commands[1].id].stdout_list)
+                for command, address in zip(commands, ["192.168.1.1", "192.168.1.2"]):
+                    self.assertEqual(0, results[command.id].return_code)
+                    collector.import_output_files(command)
+                    utils = NmapUtils(command.xml_output)
+                    self.assertIsNotNone(utils.get_host_tag_by_ipv4(address))
+                    self.assertEqual(1, len(ET.fromstring(command.xml_output).findall("host")))
+                    self.assertIsNotNone(ET.fromstring(command.xml_output).find("runstats"))
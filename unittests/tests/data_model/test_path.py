@@ -27,6 +27,8 @@ from database.model import Path
 from database.model import Host
 from database.model import Source
 from database.model import Service
+from database.model import HostName
+from database.model import DomainName
 from database.model import PathType
 from database.model import Workspace
 from database.model import ProtocolType
@@ -461,3 +463,81 @@ class TestPathCreationTrigger(BaseKisTestCase):
         with self._engine.session_scope() as session:
             result = session.query(Path).all()
             self.assertEqual(1, len(result))
+
+
+class TestUrlTriggers(BaseKisTestCase):
+    """
+    This test case tests the triggers pre_update_service_url and pre_update_path_url, which maintain the columns
+    service.url and path.url.
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    def _assert_urls(self):
+        """
+        This method verifies that the persisted URLs match the URLs computed by method get_urlparse.
+        """
+        with self._engine.session_scope() as session:
+            for service in session.query(Service).all():
+                self.assertEqual(service.get_urlparse().geturl(), service.url)
+            for path in session.query(Path).all():
+                self.assertEqual(path.get_urlparse().geturl(), path.url)
+
+    def test_url(self):
+        """
+        The URLs must be computed for hosts, IPv6 hosts, and host names and must be updated, if the service changes.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            service = self.create_service(session=session, address="192.168.1.1", port=80)
+            self._domain_utils.add_path(session=session, service=service, path="admin", path_type=PathType.http)
+            self.create_service(session=session, address="::1", port=8443, nmap_tunnel="ssl")
+            self.create_service(session=session, address=None, host_name_str="www.unittest.com", port=443)
+        with self._engine.session_scope() as session:
+            self.assertListEqual(["http://192.168.1.1", "https://[::1]:8443", "http://www.unittest.com"],
+                                 [item.url for item in session.query(Service).order_by(Service.id).all()])
+            self.assertListEqual(["http://192.168.1.1/", "http://192.168.1.1/admin", "http://www.unittest.com/"],
+                                 [item.url for item in session.query(Path).order_by(Path.url).all()])
+        self._assert_urls()
+        # update service
+        with self._engine.session_scope() as session:
+            service = session.query(Service).filter_by(port=80).one()
+            service.nmap_tunnel = "ssl"
+        with self._engine.session_scope() as session:
+            self.assertEqual("https://192.168.1.1", session.query(Service).filter_by(port=80).one().url)
+            self.assertListEqual(["https://192.168.1.1/", "https://192.168.1.1/admin"],
+                                 [item.url for item in session.query(Path)
+                                 .filter(Path.url.like("https://192.168.1.1/%")).order_by(Path.url).all()])
+        self._assert_urls()
+        # update host
+        with self._engine.session_scope() as session:
+            session.query(Host).filter_by(address="192.168.1.1").one().address = "192.168.1.2"
+        with self._engine.session_scope() as session:
+            self.assertEqual(2, session.query(Path).filter(Path.url.like("https://192.168.1.2/%")).count())
+        self._assert_urls()
+
+    def test_rename_host_name(self):
+        """
+        The URLs of services and paths must be updated, if their host name or domain name is renamed.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            service = self.create_service(session=session, address=None, host_name_str="www.unittest.com", port=443)
+            self._domain_utils.add_path(session=session, service=service, path="admin", path_type=PathType.http)
+        # rename host name
+        with self._engine.session_scope() as session:
+            session.query(HostName).filter_by(name="www").one().name = "mail"
+        with self._engine.session_scope() as session:
+            self.assertEqual("http://mail.unittest.com", session.query(Service).one().url)
+            self.assertListEqual(["http://mail.unittest.com/", "http://mail.unittest.com/admin"],
+                                 [item.url for item in session.query(Path).order_by(Path.url).all()])
+        self._assert_urls()
+        # rename domain name
+        with self._engine.session_scope() as session:
+            session.query(DomainName).filter_by(name="unittest.com").one().name = "test.com"
+        with self._engine.session_scope() as session:
+            self.assertEqual("http://mail.test.com", session.query(Service).one().url)
+            self.assertListEqual(["http://mail.test.com/", "http://mail.test.com/admin"],
+                                 [item.url for item in session.query(Path).order_by(Path.url).all()])
+        self._assert_urls()
@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+"""
+this file implements unittests for the data model
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2022 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+from database.model import Host
+from database.model import Service
+from database.model import HostName
+from database.model import Workspace
+from database.model import ScopeType
+from database.model import ServiceState
+from database.model import ProtocolType
+from database.model import ServiceSummary
+from database.model import HostHostNameMapping
+from database.model import DnsResourceRecordType
+from collectors.core import IpUtils
+from unittests.tests.core import BaseKisTestCase
+from sqlalchemy import or_
+from sqlalchemy import and_
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.session import Session
+
+
+def get_service_pairs(session: Session) -> set:
+    """
+    This method computes the pairs of host and host name services by joining the services with the A and AAAA
+    records. This is the query that was executed by the service report before the pairs were precomputed in table
+    service_summary.
+    :return: Set of tuples containing the host service ID, the host host name mapping ID, and the host name service ID
+    """
+    service_host = aliased(Service)
+    service_host_name = aliased(Service)
+    query = session.query(service_host.id, HostHostNameMapping.id, service_host_name.id) \
+        .join(Host, service_host.host) \
+        .join(HostHostNameMapping,
+              and_(HostHostNameMapping.host_id == Host.id,
+                   or_(HostHostNameMapping._type.op("&")(DnsResourceRecordType.a.value) ==
+                       DnsResourceRecordType.a.value,
+                       HostHostNameMapping._type.op("&")(DnsResourceRecordType.aaaa.value) ==
+                       DnsResourceRecordType.aaaa.value)), isouter=True) \
+        .join(HostName, HostHostNameMapping.host_name, isouter=True) \
+        .join(service_host_name, HostName.services, isouter=True) \
+        .filter(or_(service_host_name.id.is_(None), and_(service_host.port == service_host_name.port,
+                                                         service_host.protocol == service_host_name.protocol)))
+    return set(query.all())
+
+
+def get_service_summary(session: Session) -> set:
+    """
+    This method returns the pairs of host and host name services stored in table service_summary.
+    :return: Set of tuples containing the host service ID, the host host name mapping ID, and the host name service ID
+    """
+    query = session.query(ServiceSummary.host_service_id,
+                          ServiceSummary.host_host_name_mapping_id,
+                          ServiceSummary.host_name_service_id)
+    result = query.all()
+    if len(result) != len(set(result)):
+        raise ValueError("table service_summary contains duplicates")
+    return set(result)
+
+
+class TestServiceSummary(BaseKisTestCase):
+    """
+    Test data model for service_summary
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    def _assert_summary(self) -> set:
+        """
+        This method verifies that table service_summary contains the same pairs as the join query.
+        """
+        with self._engine.session_scope() as session:
+            expected = get_service_pairs(session)
+            self.assertSetEqual(expected, get_service_summary(session))
+        return expected
+
+    def _load(self, session: Session, workspace: Workspace):
+        """
+        This method creates two hosts with services, which are mapped to host names.
+        """
+        self._domain_utils.add_domain_name(session=session, workspace=workspace, item="test.local", scope=ScopeType.all)
+        hosts = [IpUtils.add_host(session=session, workspace=workspace, address=item)
+                 for item in ["10.0.0.1", "10.0.0.2"]]
+        host_names = [self._domain_utils.add_host_name(session=session, workspace=workspace, name=item,
+                                                       in_scope=True)
+                      for item in ["www.test.local", "mail.test.local", "ftp.test.local"]]
+        for port in [80, 443]:
+            IpUtils.add_service(session=session,
+                                port=port,
+                                protocol_type=ProtocolType.tcp,
+                                state=ServiceState.Open,
+                                host=hosts[0])
+        IpUtils.add_service(session=session,
+                            port=25,
+                            protocol_type=ProtocolType.tcp,
+                            state=ServiceState.Open,
+                            host_name=host_names[1])
+        IpUtils.add_host_host_name_mapping(session=session,
+                                           host=hosts[0],
+                                           host_name=host_names[0],
+                                           mapping_type=DnsResourceRecordType.a)
+        IpUtils.add_host_host_name_mapping(session=session,
+                                           host=hosts[0],
+                                           host_name=host_names[2],
+                                           mapping_type=DnsResourceRecordType.ptr)
+        IpUtils.add_host_host_name_mapping(session=session,
+                                           host=hosts[1],
+                                           host_name=host_names[1],
+                                           mapping_type=DnsResourceRecordType.aaaa)
+
+    def test_triggers(self):
+        """
+        The row-level triggers must keep table service_summary in sync with the services and A/AAAA records.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name=self._workspaces[0])
+            self._load(session, workspace)
+        self.assertEqual(3, len(self._assert_summary()))
+        # add service to host name, which is synchronized to the host
+        with self._engine.session_scope() as session:
+            IpUtils.add_service(session=session,
+                                port=8080,
+                                protocol_type=ProtocolType.tcp,
+                                state=ServiceState.Open,
+                                host_name=self._domain_utils.get_host_name(session=session,
+                                                                           workspace=session.query(Workspace).one(),
+                                                                           host_name="www.test.local"))
+        self.assertEqual(4, len(self._assert_summary()))
+        # update service state
+        with self._engine.session_scope() as session:
+            for service in session.query(Service).all():
+                service.state = ServiceState.Closed
+        self.assertEqual(4, len(self._assert_summary()))
+        # change AAAA record to a PTR record
+        with self._engine.session_scope() as session:
+            mapping = session.query(HostHostNameMapping).join(HostName).filter(HostName.name == "mail").one()
+            mapping.type = DnsResourceRecordType.ptr
+        self.assertEqual(4, len(self._assert_summary()))
+        # delete host name service
+        with self._engine.session_scope() as session:
+            session.delete(session.query(Service).filter(Service.port == 443, Service.host_name_id.isnot(None)).one())
+        self.assertEqual(3, len(self._assert_summary()))
+        # delete A record
+        with self._engine.session_scope() as session:
+            session.delete(session.query(HostHostNameMapping).join(HostName).filter(HostName.name == "www").one())
+        self.assertEqual(3, len(self._assert_summary()))
+        # delete all services of a host name, whose host services are thereby paired with NULL
+        with self._engine.session_scope() as session:
+            host_name = session.query(HostName).filter(HostName.name == "mail").one()
+            mapping = session.query(HostHostNameMapping).filter_by(host_name_id=host_name.id).one()
+            mapping.type = DnsResourceRecordType.a
+            IpUtils.add_service(session=session,
+                                port=25,
+                                protocol_type=ProtocolType.tcp,
+                                state=ServiceState.Open,
+                                host=mapping.host)
+        self._assert_summary()
+        with self._engine.session_scope() as session:
+            for service in session.query(Service).join(HostName).filter(HostName.name == "mail").all():
+                session.delete(service)
+        self._assert_summary()
+        # delete host service
+        with self._engine.session_scope() as session:
+            session.delete(session.query(Service).filter(Service.port == 80, Service.host_id.isnot(None)).one())
+        self._assert_summary()
+        # delete workspace
+        with self._engine.session_scope() as session:
+            session.delete(session.query(Workspace).one())
+        self.assertEqual(0, len(self._assert_summary()))
+
+    def test_bulk_mode(self):
+        """
+        In bulk mode, the summary must be recomputed at the end of the bulk load.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name=self._workspaces[0])
+            with self._engine.bulk_mode(session=session, workspace=workspace):
+                self._load(session, workspace)
+                session.flush()
+                self.assertSetEqual(set(), get_service_summary(session))
+        self.assertEqual(3, len(self._assert_summary()))
+
+    def test_refresh_views(self):
+        """
+        Method refresh_views must rebuild the entire summary.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                workspace = IpUtils.add_workspace(session=session, name=workspace_str)
+                self._load(session, workspace)
+        with self._engine.session_scope() as session:
+            expected = get_service_summary(session)
+            session.query(ServiceSummary).delete()
+        self._engine.refresh_views()
+        self.assertSetEqual(expected, self._assert_summary())
+
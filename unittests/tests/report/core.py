@@ -23,8 +23,13 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import argparse
+import contextlib
 from typing import List
+from sqlalchemy import event
 from sqlalchemy.orm.session import Session
+from database.model import ScopeType
+from database.model import TlsVersion
+from database.model import DnsResourceRecordType
 from database.report.core import ReportGenerator
 from unittests.tests.core import KisCommandEnum
 from unittests.tests.core import BaseTestKisCommand
@@ -60,3 +65,46 @@ class BaseReportTestCase(BaseTestKisCommand):
         report = self._generator.create_report_instance(args=args, session=session, workspaces=[workspace])
         result = report._filter(item)
         self.assertEqual(expected_result, result)
+
+    @contextlib.contextmanager
+    def count_queries(self):
+        """
+        This context manager counts the SELECT statements that are sent to the database within its block.
+        :return: List whose only element contains the number of executed SELECT statements
+        """
+        result = [0]
+
+        def before_cursor_execute(conn, cursor, statement, *args, **kwargs):
+            if statement.lstrip().upper().startswith("SELECT"):
+                result[0] += 1
+        event.listen(self._engine.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield result
+        finally:
+            event.remove(self._engine.engine, "before_cursor_execute", before_cursor_execute)
+
+    def _populate_report_data(self, session: Session, workspace_str: str, count: int):
+        """
+        This method creates the given number of hosts. Each host has an in-scope host name and a HTTPS service
+        including paths, TLS, and certificate information. The data is used to verify that the number of queries
+        executed by the reports does not depend on the number of hosts.
+        """
+        cipher_suite = self.query_cipher_suite(session=session)
+        for i in range(1, count + 1):
+            host_name = self.create_hostname(session=session,
+                                             workspace_str=workspace_str,
+                                             host_name="www{}.unittest.com".format(i),
+                                             scope=ScopeType.all)
+            service = self.create_service(session=session,
+                                          workspace_str=workspace_str,
+                                          address="10.0.0.{}".format(i),
+                                          port=443,
+                                          nmap_service_name="https")
+            self._domain_utils.add_host_host_name_mapping(session=session,
+                                                          host=service.host,
+                                                          host_name=host_name,
+                                                          mapping_type=DnsResourceRecordType.a)
+            self._domain_utils.add_url_path(session=session, service=service, url_path="/admin")
+            tls_info = self.create_tls_info(session=session, service=service, version=TlsVersion.tls12)
+            self.create_tls_info_cipher_suite_mapping(session=session, tls_info=tls_info, cipher_suite=cipher_suite)
+            self.create_cert_info(session=session, service=service, common_name=host_name.full_name)
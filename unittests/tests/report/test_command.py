@@ -22,7 +22,10 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 __version__ = 0.1
 
+import os
 from database.model import ScopeType
+from database.model import CommandStatus
+from collectors.core import DomainUtils
 from sqlalchemy.orm.session import Session
 from unittests.tests.report.core import BaseReportTestCase
 
@@ -215,3 +218,85 @@ class TestCollectorReport(BaseReportTestCase):
                                                       collector_name="udpnmap",
                                                       ipv4_network="192.168.0.0/24"),
                               expected_result=True)
+
+    def test_csv(self):
+        """
+        The CSV report must only contain the commands of the selected workspaces and the output sizes computed by
+        the database must match the sizes computed by Python.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self.create_command(session,
+                                    workspace_str=workspace_str,
+                                    command=["nmap", "-sS", "192.168.0.0/24"],
+                                    collector_name_str="tcpnmap",
+                                    ipv4_network_str="192.168.0.0/24",
+                                    stdout_output=os.linesep.join(["line 1", "line 2", "line 3"]))
+                self.create_command(session,
+                                    workspace_str=workspace_str,
+                                    command=["nikto", "https://192.168.1.1"],
+                                    collector_name_str="nikto")
+        with self._engine.session_scope() as session:
+            workspace = self._workspaces[0]
+            args = self._parser.parse_args(["--testing", "command", "-w", workspace, "--csv"])
+            report = self._generator.create_report_instance(args=args,
+                                                            session=session,
+                                                            workspaces=[self.create_workspace(session,
+                                                                                              workspace=workspace)])
+            rows = report.get_csv()
+            self.assertEqual(3, len(rows))
+            results = {row[2]: row for row in rows[1:]}
+            self.assertListEqual([workspace, workspace], [row[1] for row in rows[1:]])
+            self.assertEqual("192.168.0.0/24", results["tcpnmap"][4])
+            self.assertEqual(len(os.linesep.join(["line 1", "line 2", "line 3"])), results["tcpnmap"][15])
+            self.assertEqual(0, results["tcpnmap"][16])
+            self.assertEqual("192.168.1.1", results["nikto"][4])
+            self.assertEqual(80, results["nikto"][6])
+            self.assertEqual(0, results["nikto"][15])
+
+    def test_search(self):
+        """
+        Unittests for argument --search
+        :return:
+        """
+        self.init_db()
+        outputs = ["22/tcp open ssh OpenSSH 7.4\nServer: Apache Tomcat/9.0.41",
+                   "\x1b[31mApache\x1b[0m httpd",
+                   "Tomcat Apache"]
+        with self._engine.session_scope() as session:
+            workspace = self._workspaces[0]
+            for i, output in enumerate(outputs):
+                command = self.create_command(session,
+                                              workspace_str=workspace,
+                                              command=["nmap", str(i), "192.168.0.0/24"],
+                                              collector_name_str="tcpnmap",
+                                              ipv4_network_str="192.168.0.0/24",
+                                              stdout_output=output)
+                command.status = CommandStatus.completed
+                command.stderr_output = ["warning: apache tomcat manager"]
+                # The first command is indexed during ingestion and the second command is not indexed at all
+                if i == 0:
+                    command.update_search_vector()
+        with self._engine.session_scope() as session:
+            workspaces = [self.create_workspace(session=session, workspace=workspace)]
+            args = self._parser.parse_args(["command", "-w", workspace, "--search", "apache tomcat/9"])
+            report = self._generator.create_report_instance(args=args, session=session, workspaces=workspaces)
+            results = [item[5:] for item in report.get_csv()]
+            self.assertListEqual([["Output", "Line", "Result"],
+                                  ["stdout", 2, "Server: Apache Tomcat/9.0.41"]], results)
+            args = self._parser.parse_args(["command", "-w", workspace, "--search", "Apache"])
+            report = self._generator.create_report_instance(args=args, session=session, workspaces=workspaces)
+            results = [item[5:] for item in report.get_csv()]
+            self.assertListEqual([["Output", "Line", "Result"],
+                                  ["stdout", 2, "Server: Apache Tomcat/9.0.41"],
+                                  ["stderr", 1, "warning: apache tomcat manager"],
+                                  ["stdout", 1, "\x1b[31mApache\x1b[0m httpd"],
+                                  ["stderr", 1, "warning: apache tomcat manager"],
+                                  ["stdout", 1, "Tomcat Apache"],
+                                  ["stderr", 1, "warning: apache tomcat manager"]], results)
+            # After rebuilding the index, all commands are searched via the index
+            self.assertEqual(3, DomainUtils.index_command_outputs(session=session, workspace=workspaces[0]))
+            results = DomainUtils.search_command_outputs(session=session, workspaces=workspaces, text="apache httpd")
+            self.assertListEqual([("stdout", 1, "\x1b[31mApache\x1b[0m httpd")], [item[1:] for item in results])
+            self.assertListEqual(["nmap", "1", "192.168.0.0/24"], results[0][0].os_command)
@@ -23,9 +23,26 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import os
+import re
+import json
 import tempfile
+from unittest.mock import patch
+from openpyxl import load_workbook
 from collectors.core import DomainUtils
+from database.model import Command
+from database.model import CommandStatus
+from database.model import FileType
+from database.model import ScopeType
+from database.model import Host
+from database.model import Path
+from database.model import Service
+from database.report.core import BaseReport
 from database.report.core import ReportGenerator
+from database.report.parquet import ColumnarTable
+from database.report.file import ReportClass as FileReport
+from database.report.parquet import ReportClass as ParquetReport
+from collectors.os.core import TelemetryPhase
+from collectors.os.core import ExecutionTelemetry
 from unittests.tests.report.core import BaseReportTestCase
 
 
@@ -61,6 +78,76 @@ class TestReportCreation(BaseReportTestCase):
             self.execute(subcommand="excel", arguments="{} -w {} -r all".format(excel_file, " ".join(self._workspaces)))
             self.assertTrue(os.path.isfile(excel_file))
 
+    def _get_excel_content(self, file_name: str) -> list:
+        """
+        This method returns the rows and tables of all sheets of the given Microsoft Excel file.
+        """
+        result = []
+        workbook = load_workbook(file_name)
+        for worksheet in workbook.worksheets:
+            result.append([worksheet.title,
+                           [[cell.value for cell in row] for row in worksheet.iter_rows()],
+                           [(table.ref, [column.name for column in table.tableColumns])
+                            for table in worksheet.tables.values()]])
+        return result
+
+    def test_excel_creation_processes(self):
+        """
+        The sheets created by worker processes must be identical to the ones created by a single process.
+        """
+        self.init_db(load_cipher_suites=True)
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self._populate_all_tables(session, workspace_str)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = []
+            for processes in ["1", "3"]:
+                excel_file = os.path.join(temp_dir, "excel{}.xlsx".format(processes))
+                args = self._parser.parse_args(["--testing", "excel", excel_file, "-p", processes, "-w"] +
+                                               self._workspaces)
+                with self._engine.session_scope() as session:
+                    workspaces = [self.create_workspace(session, workspace=item) for item in self._workspaces]
+                    self._generator.run(args=args, session=session, workspaces=workspaces)
+                results.append(self._get_excel_content(excel_file))
+            self.assertGreater(len(results[0]), 1)
+            self.assertListEqual(results[0], results[1])
+
+    def test_excel_creation_snapshot(self):
+        """
+        The sheets created from a snapshot must be identical to the ones created by loading the data of each report
+        separately. The snapshot must be loaded by fewer queries.
+        """
+        self.init_db(load_cipher_suites=True)
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self._populate_all_tables(session, workspace_str)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = []
+            for arguments in [["-p", "1"], ["-p", "1", "--snapshot"], ["-p", "3", "--snapshot"]]:
+                excel_file = os.path.join(temp_dir, "excel.xlsx")
+                args = self._parser.parse_args(["--testing", "excel", excel_file, "-w"] + self._workspaces + arguments)
+                with self._engine.session_scope() as session:
+                    workspaces = [self.create_workspace(session, workspace=item) for item in self._workspaces]
+                    self._generator.run(args=args, session=session, workspaces=workspaces)
+                results.append(self._get_excel_content(excel_file))
+            self.assertListEqual(results[0], results[1])
+            self.assertListEqual(results[0], results[2])
+        args = self._parser.parse_args(["--testing", "excel", "excel.xlsx", "-w"] + self._workspaces)
+        counts = []
+        for snapshot in [False, True]:
+            with self._engine.session_scope() as session:
+                workspaces = [self.create_workspace(session, workspace=item) for item in self._workspaces]
+                reports = [self._report_classes[item].create_instance(session=session,
+                                                                      workspaces=workspaces,
+                                                                      args=args) for item in args.reports]
+                with self.count_queries() as count:
+                    if snapshot:
+                        self._generator._load_snapshot(session=session, workspaces=workspaces, reports=reports)
+                    for report in reports:
+                        report.preload()
+                counts.append(count[0])
+        self.assertLess(counts[1], counts[0])
+
     def test_final_creation(self):
         self.init_db(load_cipher_suites=True)
         # create database
@@ -86,6 +173,142 @@ class TestReportCreation(BaseReportTestCase):
             result = os.listdir(temp_dir)
             self.assertListEqual(['test_001', 'test'], result)
 
+    def test_file_export_deduplication(self):
+        """
+        The file export must write files with the same content only once and create hard links for the duplicates.
+        """
+        self.init_db(load_cipher_suites=True)
+        # The screenshot is larger than a chunk and thus, it is streamed in multiple chunks from the database
+        screenshot = bytes(range(256)) * 10000
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self.create_network(session=session,
+                                    workspace_str=workspace_str,
+                                    network="192.168.1.0/24",
+                                    scope=ScopeType.all)
+                for i in range(2):
+                    command = self.create_command(session=session,
+                                                  workspace_str=workspace_str,
+                                                  command=["nmap", str(i)],
+                                                  collector_name_str="nmap{}".format(i),
+                                                  stdout_output="22/tcp open ssh")
+                    command.status = CommandStatus.completed
+                    DomainUtils.add_file_content(session=session,
+                                                 workspace=command.workspace,
+                                                 command=command,
+                                                 file_name="screenshot.png",
+                                                 file_type=FileType.screenshot,
+                                                 content=screenshot)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, "screenshot.png"), "w") as file:
+                file.write("existing file")
+            with self._engine.session_scope() as session:
+                workspaces = DomainUtils.get_workspaces(session=session)
+                args = self._parser.parse_args(["file", "-o", temp_dir, "-t", "2"])
+                report = self._generator.create_report_instance(args=args, session=session, workspaces=workspaces)
+                report.export_files()
+            result = os.listdir(temp_dir)
+            self.assertListEqual(["nmap0-192.168.1.1-tcp-80.txt",
+                                  "nmap0-192.168.1.1-tcp-80_001.txt",
+                                  "nmap1-192.168.1.1-tcp-80.txt",
+                                  "nmap1-192.168.1.1-tcp-80_001.txt",
+                                  "screenshot.png",
+                                  "screenshot_001.png",
+                                  "screenshot_002.png",
+                                  "screenshot_003.png",
+                                  "screenshot_004.png"], sorted(result))
+            with open(os.path.join(temp_dir, "screenshot.png"), "r") as file:
+                self.assertEqual("existing file", file.read())
+            with open(os.path.join(temp_dir, "screenshot_004.png"), "rb") as file:
+                self.assertEqual(screenshot, file.read())
+            with open(os.path.join(temp_dir, "nmap1-192.168.1.1-tcp-80_001.txt"), "r") as file:
+                self.assertEqual("22/tcp open ssh", file.read())
+            # all duplicates are hard links to the first exported file
+            self.assertEqual(4, os.stat(os.path.join(temp_dir, "screenshot_001.png")).st_nlink)
+            self.assertEqual(4, os.stat(os.path.join(temp_dir, "nmap0-192.168.1.1-tcp-80.txt")).st_nlink)
+
+    def test_file_export_raw_scan_results(self):
+        """
+        The file export must stream the raw scan results in chunks from the database and write each JSON object into
+        its own file.
+        """
+        self.init_db(load_cipher_suites=True)
+        stdout = ["line {}".format(i) for i in range(25)]
+        stderr = ["error {}".format(i) for i in range(5)]
+        xml = "<nmaprun>{}</nmaprun>".format("x" * 50)
+        binary = bytes(range(256)) * 3
+        with self._engine.session_scope() as session:
+            command = self.create_command(session=session,
+                                          workspace_str=self._workspaces[0],
+                                          command=["nmap", "192.168.1.1"],
+                                          collector_name_str="nmap")
+            command.status = CommandStatus.completed
+            command.stdout_output = stdout
+            command.stderr_output = stderr
+            command.xml_output = xml
+            command.json_output = [{"id": 1}, None, {"id": 2}, {"id": 1}]
+            command.binary_output = binary
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with self._engine.session_scope() as session:
+                workspaces = DomainUtils.get_workspaces(session=session)
+                args = self._parser.parse_args(["file", "-o", temp_dir, "-t", "2"])
+                report = self._generator.create_report_instance(args=args, session=session, workspaces=workspaces)
+                with patch.object(FileReport, "CHUNK_SIZE", 16), patch.object(FileReport, "CHUNK_LINES", 10):
+                    report.export_files()
+            result = os.listdir(temp_dir)
+            self.assertListEqual(["nmap-192.168.1.1-tcp-80.bin",
+                                  "nmap-192.168.1.1-tcp-80.json",
+                                  "nmap-192.168.1.1-tcp-80.txt",
+                                  "nmap-192.168.1.1-tcp-80.xml",
+                                  "nmap-192.168.1.1-tcp-80_001.json",
+                                  "nmap-192.168.1.1-tcp-80_002.json"], sorted(result))
+            with open(os.path.join(temp_dir, "nmap-192.168.1.1-tcp-80.txt"), "r") as file:
+                self.assertEqual(os.linesep.join(stdout + stderr), file.read())
+            with open(os.path.join(temp_dir, "nmap-192.168.1.1-tcp-80.xml"), "r") as file:
+                self.assertEqual(xml, file.read())
+            with open(os.path.join(temp_dir, "nmap-192.168.1.1-tcp-80.bin"), "rb") as file:
+                self.assertEqual(binary, file.read())
+            with open(os.path.join(temp_dir, "nmap-192.168.1.1-tcp-80_001.json"), "r") as file:
+                self.assertEqual(json.dumps({"id": 2}, indent=4), file.read())
+            # the duplicate JSON object is a hard link to the first exported JSON object
+            self.assertEqual(2, os.stat(os.path.join(temp_dir, "nmap-192.168.1.1-tcp-80.json")).st_nlink)
+
+    def test_columnar_export(self):
+        """
+        The columnar export must write all rows of the selected workspaces, batch by batch, into typed parquet and
+        arrow files.
+        """
+        self.init_db(load_cipher_suites=True)
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self._populate_all_tables(session, workspace_str)
+        with self._engine.session_scope() as session:
+            workspaces = DomainUtils.get_workspaces(session=session)
+            expected = {"hosts": session.query(Host).count(),
+                        "services": session.query(Service).count(),
+                        "paths": session.query(Path).count(),
+                        "commands": session.query(Command).count()}
+            expected_services = sorted([(item.id, item.address, item.port, item.url)
+                                        for item in session.query(Service).all()])
+        for file_format in ["parquet", "arrow"]:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                with self._engine.session_scope() as session:
+                    workspaces = DomainUtils.get_workspaces(session=session)
+                    args = self._parser.parse_args(["parquet", "-o", temp_dir, "--format", file_format, "-b", "2"])
+                    report = self._generator.create_report_instance(args=args, session=session, workspaces=workspaces)
+                    report.export_files()
+                self.assertSetEqual({"{}.{}".format(item.name, file_format) for item in ColumnarTable},
+                                    set(os.listdir(temp_dir)))
+                for table_name, count in expected.items():
+                    table = ParquetReport.read_table(os.path.join(temp_dir, "{}.{}".format(table_name, file_format)))
+                    self.assertEqual(count, table.num_rows)
+                table = ParquetReport.read_table(os.path.join(temp_dir, "services.{}".format(file_format)))
+                self.assertEqual("int32", str(table.schema.field("port").type))
+                self.assertEqual("timestamp[us]", str(table.schema.field("creation_date").type))
+                self.assertListEqual(expected_services,
+                                     sorted(zip(*[table.column(item).to_pylist()
+                                                  for item in ["id", "address", "port", "url"]])))
+
     def test_text_creation(self):
         self.init_db(load_cipher_suites=True)
         # create database
@@ -96,9 +319,9 @@ class TestReportCreation(BaseReportTestCase):
         report_classes = ReportGenerator.add_argparser_arguments()
         workspaces = " ".join(self._workspaces)
         for module_name in report_classes.keys():
-            if module_name in ["excel", "final", "file"]:
+            if module_name in ["excel", "final", "file", "parquet"]:
                 continue
-            elif module_name not in ["additionalinfo", "breach", "cert", "tls", "cname", "credential", "file", "path", "vulnerability"]:
+            elif module_name not in ["additionalinfo", "breach", "cert", "tls", "cname", "credential", "file", "path", "telemetry", "vulnerability"]:
                 if module_name == "service":
                     self.execute(subcommand=module_name, arguments="-w {} --text".format(workspaces))
                     self.execute(subcommand=module_name, arguments="-w {} -r domain --text".format(workspaces))
@@ -120,7 +343,7 @@ class TestReportCreation(BaseReportTestCase):
         report_classes = ReportGenerator.add_argparser_arguments()
         workspaces = " ".join(self._workspaces)
         for module_name in report_classes.keys():
-            if module_name in ["excel", "final", "file"]:
+            if module_name in ["excel", "final", "file", "parquet"]:
                 continue
             elif module_name not in ["excel",
                                      "final",
@@ -135,6 +358,7 @@ class TestReportCreation(BaseReportTestCase):
                                      "email",
                                      "file",
                                      "path",
+                                     "telemetry",
                                      "tls",
                                      "vulnerability"]:
                 print(module_name)
@@ -165,6 +389,53 @@ class TestReportCreation(BaseReportTestCase):
             else:
                 self.execute(subcommand=module_name, arguments="-w {} --csv".format(workspaces))
 
+    def test_telemetry_report(self):
+        self.init_db()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "telemetry.jsonl")
+            for workspace, collector, duration in [(self._workspaces[0], "nmap", 10),
+                                                   (self._workspaces[0], "nmap", 20),
+                                                   (self._workspaces[0], "dnshost", 1),
+                                                   (self._workspaces[1], "dnshost", 100)]:
+                telemetry = ExecutionTelemetry(file_name=file_name, workspace=workspace)
+                telemetry.record(collector=collector, phase=TelemetryPhase.execute, duration=duration, command_id=1)
+                telemetry.record(collector=collector, phase=TelemetryPhase.store, duration=1, command_id=1)
+                telemetry.record(collector=collector,
+                                 phase=TelemetryPhase.verify,
+                                 duration=2,
+                                 command_id=1,
+                                 output_size=1024 ** 2)
+                telemetry.close()
+            with self._engine.session_scope() as session:
+                workspaces = [self.create_workspace(session=session, workspace=self._workspaces[0])]
+                # Rank the collectors by their average execution time
+                report = self._generator.create_report_instance(args=self._parser.parse_args(["telemetry",
+                                                                                              "-f", file_name,
+                                                                                              "--csv"]),
+                                                                session=session,
+                                                                workspaces=workspaces)
+                rows = report.get_csv()
+                self.assertListEqual([[1, "nmap", 2, 0, 0, 15, 2, 2, 1], [2, "dnshost", 1, 0, 0, 1, 2, 1, 1]],
+                                     rows[1:])
+                self._check_csv_report_columns(report, "telemetry")
+                # Obtain the histograms of each collector and phase
+                report = self._generator.create_report_instance(args=self._parser.parse_args(["telemetry",
+                                                                                              "-f", file_name,
+                                                                                              "--phases"]),
+                                                                session=session,
+                                                                workspaces=workspaces)
+                rows = report.get_csv()
+                self.assertEqual(6, len(rows) - 1)
+                self.assertListEqual(["nmap", "execute", 2, 30, 15, 20, 0, 0, 0, 0, 1, 1, 0, 0],
+                                     [item for item in rows if item[0] == "nmap" and item[1] == "execute"][0])
+                self._check_csv_report_columns(report, "telemetry")
+                # Missing telemetry files result in empty reports
+                report = self._generator.create_report_instance(args=self._parser.parse_args(
+                    ["telemetry", "-f", os.path.join(temp_dir, "missing.jsonl"), "--csv"]),
+                    session=session,
+                    workspaces=workspaces)
+                self.assertEqual(1, len(report.get_csv()))
+
     def _check_csv_report_columns(self, report, module_name):
         try:
             rows = report.get_csv()
@@ -212,3 +483,106 @@ class TestReportCreation(BaseReportTestCase):
                                                             session=session,
                                                             workspaces=workspaces)
             self._check_csv_report_columns(report, module_name)
+
+    def _get_query_counts(self) -> dict:
+        """
+        This method returns the number of SQL statements that each report executes to create its CSV and text output.
+        """
+        result = {}
+        arguments = [[module_name, "--csv"] for module_name in self._report_classes.keys()]
+        arguments += [[module_name, "--text"] for module_name in ["domain", "host", "hostname", "service"]]
+        for item in arguments:
+            with self._engine.session_scope() as session:
+                workspaces = DomainUtils.get_workspaces(session=session)
+                report = self._generator.create_report_instance(args=self._parser.parse_args(item),
+                                                                session=session,
+                                                                workspaces=workspaces)
+                with self.count_queries() as count:
+                    report.preload()
+                    try:
+                        if item[1] == "--text":
+                            report.get_text()
+                        else:
+                            report.get_csv()
+                    except NotImplementedError:
+                        pass
+                result[" ".join(item)] = count[0]
+        return result
+
+    def test_query_count_independent_of_host_count(self):
+        """
+        The reports must load their data with a constant number of queries instead of lazily loading the
+        relationships of each host, host name, service, etc.
+        """
+        self.init_db(load_cipher_suites=True)
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self._populate_all_tables(session, workspace_str)
+                self._populate_report_data(session, workspace_str, count=5)
+        expected_counts = self._get_query_counts()
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self._populate_report_data(session, workspace_str, count=10)
+        self.assertDictEqual(expected_counts, self._get_query_counts())
+
+    def test_grep_literals(self):
+        """
+        The pre-filter of the grep reports must only use literals that each matching line contains.
+        """
+        self.assertListEqual([("HTTP/1.1 ", False)],
+                             BaseReport._get_regex_literals([re.compile(r"HTTP/1\.1 (200|302)")]))
+        self.assertListEqual([("/tcp open", False), ("Server", False)],
+                             BaseReport._get_regex_literals([re.compile(r"(?P<output>[0-9]+)/tcp open"),
+                                                             re.compile("Server")]))
+        self.assertListEqual([("abcde", False)], BaseReport._get_regex_literals([re.compile("(ab)(cd)e")]))
+        self.assertListEqual([("Apache", True)], BaseReport._get_regex_literals([re.compile("Apache", re.I)]))
+        self.assertListEqual([("erver", True)], BaseReport._get_regex_literals([re.compile("Server", re.I)]))
+        self.assertIsNone(BaseReport._get_regex_literals([re.compile("Apache"), re.compile("a|b")]))
+        self.assertIsNone(BaseReport._get_regex_literals([re.compile(r"\d+")]))
+        self.assertIsNone(BaseReport._get_regex_literals([re.compile("skip")]))
+
+    def test_grep_prefilter(self):
+        """
+        The grep reports must return the same results, no matter whether the collector outputs are pre-filtered by
+        the database or not. The outputs of commands that do not match must not be loaded.
+        """
+        self.init_db(load_cipher_suites=True)
+        outputs = ["22/tcp open ssh OpenSSH 7.4\nServer: Apache",
+                   "80/tcp closed http",
+                   "Server: nginx\nX-Powered-By: PHP/5.4"]
+        with self._engine.session_scope() as session:
+            for workspace_str in self._workspaces:
+                self.create_network(session=session,
+                                    workspace_str=workspace_str,
+                                    network="192.168.1.0/24",
+                                    scope=ScopeType.all)
+                for i, output in enumerate(outputs):
+                    command = self.create_command(session=session,
+                                                  workspace_str=workspace_str,
+                                                  command=["nmap", str(i)],
+                                                  collector_name_str="nmap{}".format(i),
+                                                  stdout_output=output)
+                    command.status = CommandStatus.completed
+        arguments = [["service", "--grep", "Apache"],
+                     ["service", "--not", "--grep", "Tomcat"],
+                     ["service", "--igrep", "apache", "PHP/[0-9.]+"],
+                     ["service", "--grep", "(?P<output>[0-9]+)/tcp open"],
+                     ["service", "--igrep", "server: (apache|nginx)"]]
+        for item in arguments:
+            results = []
+            for prefilter in [True, False]:
+                with self._engine.session_scope() as session:
+                    workspaces = DomainUtils.get_workspaces(session=session)
+                    report = self._generator.create_report_instance(args=self._parser.parse_args(item),
+                                                                    session=session,
+                                                                    workspaces=workspaces)
+                    self.assertIsNotNone(report._regex_literals)
+                    if not prefilter:
+                        report._regex_literals = None
+                    report.preload()
+                    results.append(report.grep_text())
+                    if prefilter and item[1] == "--grep":
+                        for command in session.query(Command).filter(Command.os_command == ["nmap", "1"]):
+                            self.assertListEqual([""], command.stdout_output)
+            self.assertListEqual(results[0], results[1])
+            self.assertGreater(len(results[0]), 1)
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""
+this file implements unittests, which verify the synthetic workspace generator and the benchmark scenarios
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2022 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import os
+import tempfile
+from database.model import Host
+from database.model import Workspace
+from unittests.tests.core import BaseKisTestCase
+from unittests.benchmarks.generator import WorkspaceSize
+from unittests.benchmarks.generator import WorkspaceGenerator
+from unittests.benchmarks.scenarios import Benchmark
+from unittests.benchmarks.scenarios import ScenarioType
+
+
+class TestBenchmarks(BaseKisTestCase):
+    """
+    This class tests the population of synthetic workspaces and the measurements of the benchmark scenarios.
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    def test_workspace_generator(self):
+        self.init_db(load_cipher_suites=True)
+        size = WorkspaceSize(hosts=300, services_per_host=3, hosts_per_domain=100, paths_per_service=2)
+        result = WorkspaceGenerator(engine=self._engine, workspace=self._workspaces[0], size=size).run()
+        # Per host: http with three paths (root and two generated paths), https with three paths and two TLS
+        # versions, and ssh. The database triggers copy each service to the host's host name.
+        self.assertDictEqual({"networks": 2,
+                              "hosts": 300,
+                              "host_names": 303,
+                              "services": 1800,
+                              "paths": 1800,
+                              "tls_info": 600,
+                              "commands": 600}, result)
+
+    def test_benchmark_results(self):
+        self.init_db(load_cipher_suites=True)
+        size = WorkspaceSize(hosts=10, services_per_host=2, hosts_per_domain=5, paths_per_service=1)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            benchmark = Benchmark(engine=self._engine,
+                                  workspace=self._workspaces[0],
+                                  size=size,
+                                  collectors=["httpgobuster"],
+                                  import_hosts=5,
+                                  scope_networks=10,
+                                  output_dir=temp_dir)
+            benchmark.run([ScenarioType.generate, ScenarioType.analyze, ScenarioType.importer, ScenarioType.scope])
+        result = benchmark.get_json()
+        self.assertDictEqual(size.get_json(), result["size"])
+        self.assertListEqual(["generate",
+                              "kiscollect:analyze:httpgobuster",
+                              "import:nmap",
+                              "import:nessus",
+                              "import:masscan",
+                              "scope:row",
+                              "scope:deferred"], [item["scenario"] for item in result["results"]])
+        for item in result["results"]:
+            self.assertIsNone(item["error"], item["scenario"])
+            self.assertGreater(item["duration"], 0)
+            self.assertGreater(item["statements"], 0)
+        self.assertGreater(result["results"][0]["rows"], 10)
+        self.assertEqual(5 * len(Benchmark.IMPORT_PORTS), result["results"][2]["rows"])
+        self.assertEqual(10 + 10 * Benchmark.SCOPE_HOSTS_PER_NETWORK, result["results"][5]["rows"])
+        with self._engine.session_scope() as session:
+            for workspace in ["row", "deferred"]:
+                host = session.query(Host).join(Workspace) \
+                    .filter(Workspace.name == "{}-scope-{}".format(self._workspaces[0], workspace),
+                            Host.address == "10.0.1.1").one()
+                self.assertEqual("10.0.1.0/24", host.ipv4_network.network)
+                self.assertTrue(host.in_scope)
+
+    def test_report_benchmark(self):
+        self.init_db(load_cipher_suites=True)
+        size = WorkspaceSize(hosts=10, services_per_host=2, hosts_per_domain=5, paths_per_service=1)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            benchmark = Benchmark(engine=self._engine, workspace=self._workspaces[0], size=size, output_dir=temp_dir)
+            benchmark.run([ScenarioType.generate, ScenarioType.report])
+            # The files written by the report modules are removed after their measurement
+            self.assertListEqual([], os.listdir(temp_dir))
+        results = {item["scenario"]: item for item in benchmark.get_json()["results"]}
+        for item in results.values():
+            self.assertIsNone(item["error"], item["scenario"])
+        for module in Benchmark.EXCEL_REPORTS + Benchmark.EXPORT_REPORTS:
+            self.assertGreater(results["kisreport:{}".format(module)]["rows"], 0, module)
+        self.assertEqual(1, results["kisreport:excel"]["rows"])
+        self.assertEqual(1, results["kisreport:final"]["rows"])
+
+    def test_service_benchmark(self):
+        self.init_db(load_cipher_suites=True)
+        size = WorkspaceSize(hosts=10, services_per_host=2, hosts_per_domain=5, paths_per_service=1)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            benchmark = Benchmark(engine=self._engine, workspace=self._workspaces[0], size=size, output_dir=temp_dir)
+            benchmark.run([ScenarioType.generate, ScenarioType.service])
+        result = benchmark.get_json()["results"]
+        self.assertListEqual(["generate", "service:join", "service:summary"], [item["scenario"] for item in result])
+        for item in result:
+            self.assertIsNone(item["error"], item["scenario"])
+        # Each host service is paired with the respective service of the host's host name
+        self.assertEqual(10 * 2, result[1]["rows"])
+        self.assertEqual(result[1]["rows"], result[2]["rows"])
@@ -22,7 +22,10 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 __version__ = 0.1
 
+import os
 import unittest
+import time
+import signal
 import tempfile
 import subprocess
 from urllib.parse import urlparse
@@ -64,6 +67,8 @@ from database.model import CertInfo
 from database.model import KeyExchangeAlgorithm
 from database.model import CertType
 from database.model import TlsInfoCipherSuiteMapping
+from database.model import CipherSuite
+from database.model import CipherSuiteIndex
 from database.model import ScopeType
 from database.model import ExecutionInfoType
 from database.model import DomainNameNotFound
@@ -74,6 +79,7 @@ from collectors.core import IpUtils
 from datetime import datetime
 from view.core import ReportItem
 from collectors.os.modules.core import Delay
+from sqlalchemy import event
 from sqlalchemy.orm.session import Session
 
 
@@ -134,6 +140,68 @@ class TestCommandExecution(BaseKisTestCase):
         self.assertIsNone(process.stderr_list)
         self.assertTrue(process.killed)
 
+    def test_terminate_process_group(self):
+        """
+        This unittest checks whether the timeout kills the entire process group. Otherwise, the child processes would
+        keep the output pipes open.
+        """
+        process = PopenCommand(os_command=["sh", "-c", "sleep 100 & echo $!; sleep 100"],
+                               cwd="/tmp",
+                               timeout=1,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+        process.start()
+        process.join(10)
+        self.assertFalse(process.is_alive())
+        self.assertTrue(process.killed)
+        self.assertEqual(-signal.SIGKILL, process.return_code)
+        self.assertEqual(1, len(process.stdout_list))
+
+    def test_kill_and_terminate(self):
+        for method, signal_number in [(PopenCommand.kill, signal.SIGKILL), (PopenCommand.terminate, signal.SIGTERM)]:
+            process = PopenCommand(os_command=["sleep", "10"],
+                                   cwd="/tmp",
+                                   stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+            process.start()
+            # property proc cannot be used as it blocks until the process terminated
+            time.sleep(1)
+            method(process)
+            process.join()
+            self.assertTrue(process.killed)
+            self.assertEqual(-signal_number, process.return_code)
+
+    def test_resource_usage(self):
+        process = PopenCommand(os_command=["python3",
+                                           "-c",
+                                           "data = bytearray(64 * 1024 * 1024); sum(range(10 ** 6))"],
+                               cwd="/tmp",
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+        process.start()
+        process.join()
+        self.assertEqual(0, process.return_code)
+        self.assertIsNotNone(process.rusage)
+        self.assertGreater(process.rusage.ru_utime + process.rusage.ru_stime, 0)
+        self.assertGreater(process.rusage.ru_maxrss, 64 * 1024)
+        command = Command(os_command=process.os_command, collector_name=None)
+        command.update_resource_usage(process.rusage)
+        self.assertEqual(process.rusage.ru_maxrss, command.max_rss)
+        self.assertEqual(process.rusage.ru_utime + process.rusage.ru_stime, command.cpu_time)
+
+    def test_reap_after_foreign_wait(self):
+        """
+        This unittest checks that a process, whose exit status was already collected elsewhere, is not reported as
+        successful.
+        """
+        process = PopenCommand(os_command=["false"], cwd="/tmp")
+        process._proc = subprocess.Popen(["false"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.waitpid(process._proc.pid, 0)
+        with self.assertLogs("process", level="WARNING"):
+            self.assertTrue(process.reap())
+        self.assertEqual(-1, process.poll())
+        self.assertIsNone(process.rusage)
+
     def test_stdout_queue_only(self):
         """
         This unittest checks whether PopenCommand correctly reads the entire subprocess.PIPE data for stdout only.
@@ -2060,6 +2128,53 @@ class TestTlsInfoCipherSuiteMapping(BaseKisTestCase):
                                                          prefered=True,
                                                          kex_algorithm_details=KeyExchangeAlgorithm.ecdh_x25519)
 
+    def test_cipher_suite_index(self):
+        """
+        The cipher suites must be looked up in memory by their names and byte pairs. Thereby, adding the mappings of
+        another TLS info does not query table cipher_suite again and all mappings are inserted by one flush.
+        """
+        self.init_db(load_cipher_suites=True)
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args, **kwargs):
+            statements.append(statement)
+        with self._engine.session_scope() as session:
+            cipher_suites = session.query(CipherSuite).all()
+            for cipher_suite in cipher_suites:
+                self.assertEqual(cipher_suite.id, CipherSuiteIndex.get_id(session, iana_name=cipher_suite.iana_name))
+                self.assertEqual(cipher_suite.id, CipherSuiteIndex.get_id(session,
+                                                                          byte_1=cipher_suite.byte_1,
+                                                                          byte_2=cipher_suite.byte_2))
+                if cipher_suite.openssl_name:
+                    self.assertEqual(cipher_suite.id,
+                                     CipherSuiteIndex.get_id(session, openssl_name=cipher_suite.openssl_name))
+                if cipher_suite.gnutls_name:
+                    self.assertEqual(cipher_suite.id,
+                                     CipherSuiteIndex.get_id(session, gnutls_name=cipher_suite.gnutls_name))
+            self.assertIsNone(CipherSuiteIndex.get_id(session, iana_name="TLS_UNKNOWN"))
+            names = [item.iana_name for item in cipher_suites[:50]]
+            for address in ["192.168.1.1", "192.168.1.2"]:
+                tls_info = self.create_tls_info(session=session,
+                                                service=self.create_service(session=session, address=address))
+                session.flush()
+                statements.clear()
+                event.listen(self._engine.engine, "before_cursor_execute", before_cursor_execute)
+                try:
+                    for order, name in enumerate(names + names, start=1):
+                        self._domain_utils.add_tls_info_cipher_suite_mapping(session=session,
+                                                                             tls_info=tls_info,
+                                                                             kex_algorithm_details=None,
+                                                                             order=order,
+                                                                             iana_name=name)
+                    session.flush()
+                finally:
+                    event.remove(self._engine.engine, "before_cursor_execute", before_cursor_execute)
+                self.assertEqual(1, len([item for item in statements
+                                         if "INSERT INTO tls_info_cipher_suite_mapping" in item]))
+            self.assertEqual(0, len([item for item in statements if "FROM cipher_suite" in item]))
+        with self._engine.session_scope() as session:
+            self.assertEqual(100, session.query(TlsInfoCipherSuiteMapping).count())
+
 
 class TestAddService(BaseKisTestCase):
     """
@@ -2618,9 +2733,9 @@ class TestAddDomainName(BaseKisTestCase):
         with self._engine.session_scope() as session:
             host_names = session.query(HostName)\
                 .join(DomainName).join(Workspace)\
-                .filter(Workspace.name == self._workspaces[0]).all()
+                .filter(Workspace.name == self._workspaces[0]).order_by(HostName.id).all()
             host_names_str = [item.full_name for item in host_names]
-            self.assertListEqual(["test.unittest.com", "www.test.unittest.com", "unittest.com"], host_names_str)
+            self.assertListEqual(["unittest.com", "test.unittest.com", "www.test.unittest.com"], host_names_str)
             for host_name in host_names:
                 self.assertEqual("unittest", host_name.sources[0].name)
                 if host_name.name is not None and host_name.full_name == "www.test.unittest.com":
@@ -3592,6 +3707,48 @@ class TestAddJsonResults(BaseKisTestCase):
         self._unittest_add_json_results(json_objects=[json_object, {}], expected_count=1)
         self._unittest_add_json_results(json_objects=[json_object, {}, {"a": 1}], expected_count=2)
 
+    def test_add_many_json_results(self) -> None:
+        """
+        Json objects must be deduplicated across multiple calls, independent of their key order, and after the command
+        was reloaded from the database.
+        """
+        self.init_db()
+        json_objects = [{"port": i, "banner": "test {}".format(i)} for i in range(5000)]
+        with self._engine.session_scope() as session:
+            command = self.create_command(session=session, workspace_str=self._workspaces[0])
+            self._domain_utils.add_json_results(command=command, json_objects=json_objects[:3000])
+            self._domain_utils.add_json_results(command=command, json_objects=json_objects[2000:])
+            self._domain_utils.add_json_results(command=command, json_objects={"banner": "test 1", "port": 1})
+            self.assertListEqual(json_objects, command.json_output)
+        with self._engine.session_scope() as session:
+            command = session.query(Command).one()
+            self.assertListEqual(json_objects, command.json_output)
+            self._domain_utils.add_json_results(command=command, json_objects=json_objects[4999:] + [{"a": 1}])
+        with self._engine.session_scope() as session:
+            command = session.query(Command).one()
+            self.assertListEqual(json_objects + [{"a": 1}], command.json_output)
+
+    def test_replaced_json_results(self) -> None:
+        """
+        The cached digests must not be used after the command's json objects were replaced or modified by other means.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            command = self.create_command(session=session, workspace_str=self._workspaces[0])
+            self._domain_utils.add_json_results(command=command, json_objects=[{"a": 1}, {"b": 2}])
+            # A different list of the same length
+            command.json_output = [{"c": 3}, {"d": 4}]
+            self._domain_utils.add_json_results(command=command, json_objects=[{"a": 1}])
+            self.assertListEqual([{"c": 3}, {"d": 4}, {"a": 1}], command.json_output)
+            # The list already contains duplicates
+            command.json_output = [{"c": 3}, {"c": 3}]
+            self._domain_utils.add_json_results(command=command, json_objects=[{"c": 3}, {"a": 1}])
+            self.assertListEqual([{"c": 3}, {"c": 3}, {"a": 1}], command.json_output)
+            # The list was extended by other means
+            command.json_output.append({"e": 5})
+            self._domain_utils.add_json_results(command=command, json_objects=[{"e": 5}])
+            self.assertListEqual([{"c": 3}, {"c": 3}, {"a": 1}, {"e": 5}], command.json_output)
+
 
 class TestAddFile(BaseKisTestCase):
     """
@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+"""
+this file implements unittests, which verify that hot queries of the data model use indexes
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2018 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import re
+from unittests.tests.core import BaseKisTestCase
+from database.model import DeclarativeBase
+from database.model import Workspace
+from database.model import Host
+from database.model import HostName
+from database.model import DomainName
+from database.model import Network
+from database.model import Email
+from database.model import Command
+from database.model import CommandStatus
+from database.model import CommandSearchIndex
+from database.model import CollectorName
+from database.model import Service
+from database.model import Path
+from sqlalchemy import and_
+from sqlalchemy import func
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.session import Session
+
+
+class TestQueryPlans(BaseKisTestCase):
+    """
+    This class verifies with the help of EXPLAIN that hot queries do not regress to sequential scans on large
+    workspaces. As the testing database is (almost) empty, the planner would prefer sequential scans anyway.
+    Therefore, sequential scans are disabled for the current transaction, which makes the planner choose a
+    sequential scan or a full index scan only if no suitable index exists.
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    @staticmethod
+    def _get_plan_nodes(plan: dict) -> list:
+        result = [plan]
+        for item in plan.get("Plans", []):
+            result += TestQueryPlans._get_plan_nodes(item)
+        return result
+
+    def _get_full_scans(self, session: Session, statement) -> set:
+        """
+        This method returns the names of all tables that are entirely scanned by the given statement. A table is
+        entirely scanned, if it is sequentially scanned or if it is accessed via an index whose leading column is not
+        restricted by the index condition (e.g., a lookup of command.host_id via unique constraint
+        _command_service_host_unique).
+        :param session: The database session used to execute EXPLAIN
+        :param statement: Either an SQL string or an SQLAlchemy query object
+        :return: Set of table names
+        """
+        result = set()
+        if not isinstance(statement, str):
+            statement = str(statement.statement.compile(dialect=postgresql.dialect(),
+                                                        compile_kwargs={"literal_binds": True}))
+        session.execute(text("SET LOCAL enable_seqscan = off;"))
+        plan = session.execute(text("EXPLAIN (FORMAT JSON) {}".format(statement))).scalar()
+        for node in self._get_plan_nodes(plan[0]["Plan"]):
+            if node["Node Type"] == "Seq Scan":
+                result.add(node["Relation Name"])
+            elif "Index Name" in node:
+                table_name, column_name = session.execute(text("""SELECT t.relname, a.attname FROM pg_index i
+                    INNER JOIN pg_class c ON c.oid = i.indexrelid
+                    INNER JOIN pg_class t ON t.oid = i.indrelid
+                    INNER JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                    WHERE c.relname = :name"""), {"name": node["Index Name"]}).one()
+                if not re.search(r"\(+{} ".format(re.escape(column_name)), node.get("Index Cond", "")):
+                    result.add(table_name)
+        return result
+
+    def test_foreign_key_lookups(self):
+        """
+        Cascade deletes as well as joins look up rows via their foreign keys. Thus, all foreign key columns must be
+        indexed.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            for table in DeclarativeBase.metadata.sorted_tables:
+                for foreign_key in table.foreign_keys:
+                    sql = "SELECT * FROM {} WHERE {} = 1".format(table.name, foreign_key.parent.name)
+                    self.assertNotIn(table.name,
+                                     self._get_full_scans(session, sql),
+                                     "no index for foreign key {}.{}".format(table.name, foreign_key.parent.name))
+
+    def test_analyze_queries(self):
+        """
+        The queries of kiscollect's analysis phase must not entirely scan the command table.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            queries = [session.query(Command)
+                       .join((CollectorName, Command.collector_name))
+                       .join((Host, Command.host))
+                       .join((Workspace, Host.workspace))
+                       .filter(and_(Workspace.name == "unittest", CollectorName.name == "tcpnmap")),
+                       session.query(Command)
+                       .join((CollectorName, Command.collector_name))
+                       .join((HostName, Command.host_name))
+                       .join((DomainName, HostName.domain_name))
+                       .join((Workspace, DomainName.workspace))
+                       .filter(and_(Workspace.name == "unittest", CollectorName.name == "tcpnmap")),
+                       session.query(Command)
+                       .join((CollectorName, Command.collector_name))
+                       .join((Network, Command.ipv4_network))
+                       .join((Workspace, Network.workspace))
+                       .filter(and_(Workspace.name == "unittest", CollectorName.name == "tcpnmap")),
+                       session.query(Command)
+                       .join((CollectorName, Command.collector_name))
+                       .join((Email, Command.email))
+                       .join((HostName, Email.host_name))
+                       .join((DomainName, HostName.domain_name))
+                       .join((Workspace, DomainName.workspace))
+                       .filter(and_(Workspace.name == "unittest", CollectorName.name == "tcpnmap"))]
+            for query in queries:
+                self.assertNotIn("command", self._get_full_scans(session, query))
+
+    def test_command_status_queries(self):
+        """
+        The queries, which reset or delete incomplete commands, must not entirely scan the command table.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            query = session.query(Command.id) \
+                .join(Workspace, and_(Command.workspace_id == Workspace.id, Workspace.name == "unittest")) \
+                .filter(Command.status.in_([CommandStatus.pending, CommandStatus.collecting]))
+            self.assertNotIn("command", self._get_full_scans(session, query))
+            query = session.query(Command) \
+                .join((CollectorName, Command.collector_name)) \
+                .join((Host, Command.host)) \
+                .join((Workspace, Host.workspace)) \
+                .filter(Workspace.name == "unittest", Command.status == CommandStatus.pending)
+            self.assertNotIn("command", self._get_full_scans(session, query))
+
+    def test_service_lookups(self):
+        """
+        The services of hosts and host names are queried by most collectors and reports.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            query = session.query(Service) \
+                .join((Host, Service.host)) \
+                .join((Workspace, Host.workspace)) \
+                .filter(Workspace.name == "unittest")
+            self.assertNotIn("service", self._get_full_scans(session, query))
+            query = session.query(Service) \
+                .join((HostName, Service.host_name)) \
+                .join((DomainName, HostName.domain_name)) \
+                .join((Workspace, DomainName.workspace)) \
+                .filter(Workspace.name == "unittest")
+            self.assertNotIn("service", self._get_full_scans(session, query))
+
+    def test_command_search_queries(self):
+        """
+        The search over the collector outputs (see kisreport command --search) must use the search index.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            query = session.query(CommandSearchIndex.command_id) \
+                .filter(CommandSearchIndex.search_vector.op("@@")(func.plainto_tsquery("simple", "apache")))
+            self.assertNotIn("command_search_index", self._get_full_scans(session, query))
+
+    def test_url_lookups(self):
+        """
+        Services and paths are looked up by URL prefixes.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            query = session.query(Service).filter(Service.url.like("https://www.unittest.com%"))
+            self.assertNotIn("service", self._get_full_scans(session, query))
+            query = session.query(Path).filter(Path.url.like("https://www.unittest.com/admin%"))
+            self.assertNotIn("path", self._get_full_scans(session, query))
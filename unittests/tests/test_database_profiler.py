@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""
+this file implements unittests, which verify the SQL query profiler of the database engine
+"""
+
+__author__ = "Lukas Reiter"
+__license__ = "GPL v3.0"
+__copyright__ = """Copyright 2018 Lukas Reiter
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+__version__ = 0.1
+
+import io
+import os
+from unittest.mock import patch
+from unittests.tests.core import BaseKisTestCase
+from database.config import Database
+from database.model import Host
+from database.utils import Engine
+from sqlalchemy.orm import selectinload
+
+
+class TestSqlProfiler(BaseKisTestCase):
+    """
+    This class tests the counting and timing of SQL statements per call site as well as the detection of N+1 query
+    patterns.
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    def _create_hosts(self, count: int) -> None:
+        self.init_db()
+        with self._engine.session_scope() as session:
+            for i in range(count):
+                self.create_service(session=session, address="192.168.1.{}".format(i + 1))
+
+    def test_disabled_per_default(self):
+        environ = dict(os.environ)
+        try:
+            os.environ.pop(Database.ENV_PROFILE_SQL, None)
+            self.assertIsNone(Engine(production=False).profiler)
+            os.environ[Database.ENV_PROFILE_SQL] = "1"
+            engine = Engine(production=False)
+            self.assertIsNotNone(engine.profiler)
+            engine.profiler.detach()
+            self.assertIsNone(Engine(production=False, profile_sql=False).profiler)
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+
+    def test_switch_database(self):
+        """
+        Switching to the testing database (see argument --testing) keeps profiling and keeps the report at exit.
+        """
+        self._create_hosts(1)
+        engine = Engine(production=True, profile_sql=False)
+        profiler = engine.enable_profiler(print_at_exit=False)
+        with patch("database.utils.atexit.unregister") as unregister:
+            engine.production = False
+            unregister.assert_not_called()
+        with engine.session_scope() as session:
+            session.query(Host).filter_by(address="192.168.1.1").one()
+        self.assertEqual(1, sum([item.count for item in profiler.get_statistics()]))
+        with patch("database.utils.atexit.unregister") as unregister:
+            profiler.detach()
+            unregister.assert_called_once()
+
+    def test_n_plus_one_detection(self):
+        self._create_hosts(12)
+        profiler = self._engine.enable_profiler(print_at_exit=False)
+        profiler.reset()
+        with self._engine.session_scope() as session:
+            for host in session.query(Host).all():
+                self.assertEqual(1, len(host.services))
+        candidates = profiler.get_n_plus_one_candidates()
+        self.assertEqual(1, len(candidates))
+        self.assertEqual(12, candidates[0].count)
+        self.assertEqual(12, candidates[0].repetitions)
+        self.assertIn("FROM service", candidates[0].statement)
+        self.assertIn("test_database_profiler.py", candidates[0].call_site)
+        self.assertIn("test_n_plus_one_detection", candidates[0].call_site)
+        # The report ranks the statements and lists the N+1 candidates
+        output = io.StringIO()
+        profiler.print_report(file=output)
+        self.assertIn("possible n+1 queries", output.getvalue())
+        self.assertIn("test_n_plus_one_detection", output.getvalue())
+        profiler.detach()
+
+    def test_eager_loading_avoids_n_plus_one(self):
+        self._create_hosts(12)
+        profiler = self._engine.enable_profiler(print_at_exit=False)
+        profiler.reset()
+        with self._engine.session_scope() as session:
+            for host in session.query(Host).options(selectinload(Host.services)).all():
+                self.assertEqual(1, len(host.services))
+        self.assertListEqual([], profiler.get_n_plus_one_candidates())
+        self.assertEqual(2, sum([item.count for item in profiler.get_statistics()]))
+        profiler.detach()
+
+    def test_repetitions_per_transaction(self):
+        """
+        Repetitions are only counted within a single transaction.
+        """
+        self._create_hosts(1)
+        profiler = self._engine.enable_profiler(print_at_exit=False)
+        profiler.reset()
+        for _ in range(12):
+            with self._engine.session_scope() as session:
+                session.query(Host).filter_by(address="192.168.1.1").one()
+        statistics = profiler.get_statistics()
+        self.assertEqual(1, len(statistics))
+        self.assertEqual(12, statistics[0].count)
+        self.assertEqual(1, statistics[0].repetitions)
+        self.assertListEqual([], profiler.get_n_plus_one_candidates())
+        profiler.detach()
@@ -23,12 +23,34 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __version__ = 0.1
 
 import os
+import time
 import queue
+import psutil
+import json
 import tempfile
+import threading
 from database.model import VhostChoice
 from database.model import CommandStatus
+from database.model import CollectorType
+from database.model import ExecutionInfoType
+from database.model import Path
+from database.model import Command
+from database.config import BaseConfig
 from unittests.tests.core import BaseKisTestCase
+from collectors.core import BaseUtils
+from collectors.os.core import ConcurrencyGovernor
+from collectors.os.core import AsyncPopenCommand
+from collectors.os.core import TelemetryPhase
+from collectors.os.core import ExecutionTelemetry
+from collectors.os.core import AnalysisBatch
+from collectors.os.core import AnalysisCheckpoint
+from collectors.os.collector import ArgParserModule
 from collectors.os.collector import CollectorProducer
+from collectors.os.collector import CollectorConsumer
+from collectors.os.modules.http.httpgobuster import CollectorClass as HttpGobusterCollector
+from collectors.os.modules.ftp.ftphydra import CollectorClass as FtpHydraCollector
+from unittests.benchmarks.generator import WorkspaceSize
+from unittests.benchmarks.generator import WorkspaceGenerator
 
 
 class TestCollectorProducerInitialization(BaseKisTestCase):
@@ -70,6 +92,7 @@ class TestCollectorProducerInitialization(BaseKisTestCase):
         self.assertFalse(producer._continue_execution)
         self.assertFalse(producer._print_commands)
         self.assertFalse(producer._analyze_results)
+        self.assertEqual(16, producer.governor.max_target_threads)
 
     def test_set_arguments_for_collector_producer(self):
         """
@@ -96,6 +119,7 @@ class TestCollectorProducerInitialization(BaseKisTestCase):
                                   "--analyze",
                                   "--filter", "127.0.0.1", "+127.0.0.2",
                                   "--threads", "10",
+                                  "--target-threads", "8",
                                   "-D", "5",
                                   "-M", "10",
                                   "--restart", CommandStatus.failed.name, CommandStatus.terminated.name,
@@ -105,6 +129,7 @@ class TestCollectorProducerInitialization(BaseKisTestCase):
         producer.init(arguments)
         # Check settings
         self.assertEqual(10, producer._number_of_threads)
+        self.assertEqual(8, producer.governor.max_target_threads)
         self.assertEqual(workspace, producer._workspace)
         self.assertEqual(VhostChoice.domain, producer._vhost)
         self.assertListEqual(["127.0.0.2"], producer._included_items)
@@ -466,3 +491,417 @@ class TestCollectorInitialization(BaseKisTestCase):
             self.assertListEqual([wordlist_file], producer._selected_collectors[0].instance._wordlist_files)
             self.assertTrue(producer._selected_collectors[0].instance._print_commands)
             self.assertEqual("nobody", producer._selected_collectors[0].instance.exec_user.pw_name)
+
+
+class TestConcurrencyGovernor(BaseKisTestCase):
+    """
+    This class tests the distribution of tool threads among the commands that are concurrently executed against the
+    same target.
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    def test_acquire_release(self):
+        """
+        Commands obtain the threads that are still available for their target but at least one thread.
+        """
+        governor = ConcurrencyGovernor(max_target_threads=16)
+        self.assertEqual(10, governor.acquire("192.168.1.1", 10))
+        self.assertEqual(6, governor.acquire("192.168.1.1", 10))
+        self.assertEqual(1, governor.acquire("192.168.1.1", 10))
+        self.assertEqual(0, governor.acquire("192.168.1.1"))
+        self.assertEqual(10, governor.acquire("192.168.1.2", 10))
+        metrics = {item.target: item for item in governor.get_metrics()}
+        self.assertEqual(4, metrics["192.168.1.1"].commands)
+        self.assertEqual(18, metrics["192.168.1.1"].threads)
+        self.assertEqual(1, metrics["192.168.1.2"].commands)
+        self.assertEqual(10, metrics["192.168.1.2"].threads)
+        governor.release("192.168.1.1", 10)
+        governor.release("192.168.1.1", 0)
+        self.assertEqual(9, governor.acquire("192.168.1.1", 10))
+        metrics = {item.target: item for item in governor.get_metrics()}
+        self.assertEqual(3, metrics["192.168.1.1"].commands)
+        self.assertEqual(16, metrics["192.168.1.1"].threads)
+        self.assertEqual(4, metrics["192.168.1.1"].peak_commands)
+        self.assertEqual(18, metrics["192.168.1.1"].peak_threads)
+        self.assertEqual(5, metrics["192.168.1.1"].total_commands)
+
+    def test_command_threads(self):
+        """
+        The consumer threads substitute the number of threads of gobuster commands, which are concurrently executed
+        against the same target.
+        """
+        self.init_db()
+        producer = CollectorProducer(self._engine, queue.Queue(), target_threads=16)
+        module = ArgParserModule("httpgobuster", HttpGobusterCollector)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            wordlist = os.path.join(temp_dir, "wordlist.txt")
+            with open(wordlist, "w") as file:
+                file.write("admin")
+            module.create_instance(engine=self._engine, output_dir=temp_dir)
+            producer.current_collector = module
+            consumers = [CollectorConsumer(self._engine, queue.Queue(), producer) for _ in range(3)]
+            with self._engine.session_scope() as session:
+                collector_name = BaseUtils.add_collector_name(session=session,
+                                                              name=module.name,
+                                                              type=CollectorType.host_service,
+                                                              priority=module.instance.priority)
+                commands = []
+                for port in [80, 443, 8080]:
+                    service = self.create_service(session=session, port=port)
+                    commands += module.instance._get_commands(session,
+                                                              service,
+                                                              collector_name,
+                                                              "gobuster",
+                                                              [wordlist])
+                self.assertEqual(3, len(commands))
+                for command in commands:
+                    # The os_command, which identifies the command, does not depend on the granted threads
+                    self.assertEqual("10", command.os_command[command.os_command.index("-t") + 1])
+                    self.assertEqual(10, command.execution_info[ExecutionInfoType.threads.name])
+                    self.assertEqual("-t", command.execution_info[ExecutionInfoType.threads_argument.name])
+                for consumer, command in zip(consumers, commands):
+                    consumer._acquire_target(command)
+                threads = [item.os_command_substituted[item.os_command_substituted.index("-t") + 1]
+                           for item in commands]
+                self.assertListEqual(["10", "6", "1"], threads)
+                self.assertListEqual(["10", "10", "10"], [item.os_command[item.os_command.index("-t") + 1]
+                                                          for item in commands])
+                metrics = producer.governor.get_metrics()
+                self.assertEqual(1, len(metrics))
+                self.assertEqual("192.168.1.1", metrics[0].target)
+                self.assertEqual(3, metrics[0].commands)
+                for consumer in consumers:
+                    consumer._release_target()
+                self.assertEqual(0, producer.governor.get_metrics()[0].commands)
+                self.assertEqual(0, producer.governor.get_metrics()[0].threads)
+
+    def test_hydra_threads(self):
+        """
+        Hydra commands obtain argument -t at execution time. Thus, their os_command matches the commands that were
+        created before the number of threads was governed.
+        """
+        self.init_db()
+        producer = CollectorProducer(self._engine, queue.Queue(), target_threads=8)
+        module = ArgParserModule("ftphydra", FtpHydraCollector)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            module.create_instance(engine=self._engine, output_dir=temp_dir)
+            producer.current_collector = module
+            consumer = CollectorConsumer(self._engine, queue.Queue(), producer)
+            self.assertEqual(16, module.instance.command_threads)
+            with self._engine.session_scope() as session:
+                collector_name = BaseUtils.add_collector_name(session=session,
+                                                              name=module.name,
+                                                              type=CollectorType.host_service,
+                                                              priority=module.instance.priority)
+                service = self.create_service(session=session, port=21, nmap_service_name="ftp")
+                commands = module.instance._create_commands(session,
+                                                             service,
+                                                             collector_name,
+                                                             "ftp",
+                                                             user="admin",
+                                                             password="admin")
+                self.assertEqual(1, len(commands))
+                command = commands[0]
+                self.assertEqual(16, command.execution_info[ExecutionInfoType.threads.name])
+                self.assertNotIn("-t", command.os_command)
+                consumer._acquire_target(command)
+                self.assertListEqual(["-t", "8"], command.os_command_substituted[1:3])
+                consumer._release_target()
+                # The command is reused when it is created again
+                commands = module.instance._create_commands(session,
+                                                             service,
+                                                             collector_name,
+                                                             "ftp",
+                                                             user="admin",
+                                                             password="admin")
+                self.assertListEqual([command.id], [item.id for item in commands])
+
+
+class TestAsyncPopenCommand(BaseKisTestCase):
+    """
+    This class tests the execution of OS commands via class AsyncPopenCommand
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    @staticmethod
+    def _is_running(pid: int) -> bool:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return False
+
+    def _execute(self, os_command: list, timeout: int = None) -> AsyncPopenCommand:
+        result = AsyncPopenCommand(os_command, cwd=tempfile.gettempdir(), timeout=timeout)
+        result.start()
+        result.join()
+        return result
+
+    def test_output(self):
+        command = self._execute(["sh", "-c", "echo 'line1  '; echo; printf 'line3'; echo error >&2; exit 3"])
+        self.assertFalse(command.killed)
+        self.assertFalse(command.is_alive())
+        self.assertEqual(3, command.return_code)
+        self.assertListEqual(["line1", "", "line3"], command.stdout_list)
+        self.assertListEqual(["error"], command.stderr_list)
+
+    def test_large_output(self):
+        command = self._execute(["python3", "-c", "print('a' * 200000); [print(i) for i in range(10000)]"])
+        self.assertEqual(0, command.return_code)
+        self.assertEqual(10001, len(command.stdout_list))
+        self.assertEqual(200000, len(command.stdout_list[0]))
+        self.assertEqual("9999", command.stdout_list[-1])
+
+    def test_timeout(self):
+        start_time = time.time()
+        command = self._execute(["sh", "-c", "sleep 100 & echo $!; sleep 100"], timeout=1)
+        self.assertLess(time.time() - start_time, 10)
+        self.assertTrue(command.killed)
+        self.assertEqual(-9, command.return_code)
+        # the timeout must also kill the child processes of the command
+        pid = int(command.stdout_list[0])
+        for _ in range(50):
+            if not self._is_running(pid):
+                break
+            time.sleep(0.1)
+        self.assertFalse(self._is_running(pid))
+
+    def test_resource_usage(self):
+        command = self._execute(["python3", "-c", "data = bytearray(64 * 1024 * 1024)"])
+        self.assertEqual(0, command.return_code)
+        self.assertIsNotNone(command.rusage)
+        self.assertGreater(command.rusage.ru_maxrss, 64 * 1024)
+
+    def test_kill(self):
+        command = AsyncPopenCommand(["sleep", "100"], cwd=tempfile.gettempdir())
+        command.start()
+        self.assertTrue(command.is_alive())
+        command.kill()
+        command.join()
+        self.assertTrue(command.killed)
+        self.assertEqual(-9, command.return_code)
+        command = AsyncPopenCommand(["sleep", "100"], cwd=tempfile.gettempdir())
+        command.start()
+        command.terminate()
+        command.join()
+        self.assertTrue(command.killed)
+        self.assertEqual(-15, command.return_code)
+
+    def test_unknown_command(self):
+        command = self._execute(["kis-unknown-command"])
+        self.assertFalse(command.is_alive())
+        self.assertIsNone(command.return_code)
+
+    def test_thread_count(self):
+        """
+        The number of threads must not grow with the number of running commands.
+        """
+        self._execute(["true"])
+        thread_count = threading.active_count()
+        commands = [AsyncPopenCommand(["sleep", "1"], cwd=tempfile.gettempdir()) for _ in range(20)]
+        for command in commands:
+            command.start()
+        self.assertEqual(thread_count, threading.active_count())
+        for command in commands:
+            command.join()
+            self.assertEqual(0, command.return_code)
+
+
+class TestExecutionTelemetry(BaseKisTestCase):
+    """
+    This class tests the recording and aggregation of the durations of each collector's execution phases.
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    def test_span(self):
+        telemetry = ExecutionTelemetry()
+        with telemetry.span(collector="nmap", phase=TelemetryPhase.verify, command_id=1) as span:
+            span["output_size"] = 1024
+            time.sleep(0.2)
+        with self.assertRaises(ValueError):
+            with telemetry.span(collector="nmap", phase=TelemetryPhase.verify, command_id=2):
+                raise ValueError()
+        statistics = telemetry.get_statistics()
+        self.assertEqual(1, len(statistics))
+        self.assertEqual("nmap", statistics[0].collector)
+        self.assertEqual(TelemetryPhase.verify, statistics[0].phase)
+        self.assertEqual(2, statistics[0].count)
+        self.assertEqual(1024, statistics[0].output_size)
+        self.assertLessEqual(0.2, statistics[0].total)
+        self.assertLessEqual(0.2, statistics[0].maximum)
+        self.assertEqual(2, sum(statistics[0].histogram))
+
+    def test_histogram(self):
+        telemetry = ExecutionTelemetry()
+        for duration in [0.001, 0.01, 0.5, 5, 30, 300, 3000]:
+            telemetry.record(collector="nmap", phase=TelemetryPhase.execute, duration=duration)
+        self.assertListEqual([2, 0, 1, 1, 1, 1, 1], telemetry.get_statistics()[0].histogram)
+
+    def test_ranking(self):
+        telemetry = ExecutionTelemetry()
+        telemetry.record(collector="dnshost", phase=TelemetryPhase.create, duration=3)
+        for collector, duration in [("nmap", 10), ("nmap", 30), ("dnshost", 1)]:
+            telemetry.record(collector=collector, phase=TelemetryPhase.queue, duration=2)
+            telemetry.record(collector=collector, phase=TelemetryPhase.execute, duration=duration)
+            telemetry.record(collector=collector, phase=TelemetryPhase.lock, duration=1)
+            telemetry.record(collector=collector, phase=TelemetryPhase.store, duration=1)
+            telemetry.record(collector=collector, phase=TelemetryPhase.verify, duration=1, output_size=512 * 1024)
+        self.assertListEqual([["nmap", 2, 0, 2, 20, 2, 4, 2],
+                              ["dnshost", 1, 3, 2, 1, 2, 2, 2]], telemetry.get_ranking())
+
+    def test_unwritable_file(self):
+        """
+        Spans are still aggregated in memory, if the telemetry file cannot be written.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            telemetry = ExecutionTelemetry(file_name=temp_dir, workspace="unittest")
+            telemetry.record(collector="nmap", phase=TelemetryPhase.execute, duration=1)
+            telemetry.record(collector="nmap", phase=TelemetryPhase.execute, duration=1)
+            self.assertIsNone(telemetry.file_name)
+            self.assertEqual(2, telemetry.get_statistics()[0].count)
+            telemetry.close()
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "telemetry.jsonl")
+            for workspace in ["unittest1", "unittest2"]:
+                telemetry = ExecutionTelemetry(file_name=file_name, workspace=workspace)
+                telemetry.record(collector="nmap", phase=TelemetryPhase.execute, duration=1, command_id=1)
+                telemetry.record(collector="nmap", phase=TelemetryPhase.verify, duration=1, output_size=100)
+                telemetry.close()
+            with open(file_name, "r") as file:
+                spans = [json.loads(line) for line in file]
+            self.assertEqual(4, len(spans))
+            self.assertEqual("unittest1", spans[0]["workspace"])
+            self.assertEqual("execute", spans[0]["phase"])
+            self.assertEqual(1, spans[0]["command_id"])
+            self.assertEqual(100, spans[1]["output_size"])
+            result = {(item.phase, item.count, item.output_size)
+                      for item in ExecutionTelemetry.load(file_name).get_statistics()}
+            self.assertSetEqual({(TelemetryPhase.execute, 2, 0), (TelemetryPhase.verify, 2, 200)}, result)
+            result = {(item.phase, item.count, item.output_size)
+                      for item in ExecutionTelemetry.load(file_name, workspaces=["unittest2"]).get_statistics()}
+            self.assertSetEqual({(TelemetryPhase.execute, 1, 0), (TelemetryPhase.verify, 1, 100)}, result)
+
+    def test_load_partial_line(self):
+        """
+        Invalid lines (e.g., a partial line written before kiscollect crashed) are skipped.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "telemetry.jsonl")
+            telemetry = ExecutionTelemetry(file_name=file_name, workspace="unittest")
+            telemetry.record(collector="nmap", phase=TelemetryPhase.execute, duration=1)
+            telemetry.close()
+            with open(file_name, "a") as file:
+                file.write('{"collector": "nmap", "phase": "exe')
+            with self.assertLogs("process", level="WARNING") as logs:
+                result = ExecutionTelemetry.load(file_name).get_statistics()
+            self.assertIn("skipping invalid line 2", logs.output[0])
+            self.assertListEqual([(TelemetryPhase.execute, 1)], [(item.phase, item.count) for item in result])
+
+
+class TestCollectorAnalysis(BaseKisTestCase):
+    """
+    This class tests the batched and resumable re-analysis of collected information (see kiscollect argument --analyze).
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+
+    def test_partition(self):
+        targets = {("host", 2): [5, 3], ("host", 1): [4], ("host_name", 1): [1, 2, 6]}
+        batches = AnalysisBatch.partition(collector="nmap", targets=targets, batch_size=2, start_index=10)
+        # The commands of a target are never split across batches
+        self.assertListEqual([(10, [4, 3, 5]), (11, [1, 2, 6])],
+                             [(item.index, item.command_ids) for item in batches])
+        self.assertListEqual([[4], [3, 5], [1, 2, 6]],
+                             [item.command_ids for item in AnalysisBatch.partition("nmap", targets, 1)])
+
+    def test_group(self):
+        # Command 3 connects host 2 with host name 1 and command 5 connects host name 1 with host name 4
+        command_targets = {1: [("host", 1)],
+                           2: [("host_name", 1)],
+                           3: [("host", 2), ("host_name", 1)],
+                           4: [("host", 2)],
+                           5: [("host_name", 4), ("host_name", 1)],
+                           6: [("network", 1)]}
+        result = AnalysisBatch.group(command_targets)
+        self.assertDictEqual({("host", 1): [1],
+                              ("host", 2): [2, 3, 4, 5],
+                              ("network", 1): [6]}, result)
+        # Commands of connected targets are never split across batches
+        self.assertListEqual([[1], [2, 3, 4, 5], [6]],
+                             [item.command_ids for item in AnalysisBatch.partition("nmap", result, 1)])
+
+    def test_checkpoint(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "checkpoint.json")
+            checkpoint = AnalysisCheckpoint(file_name=file_name, workspace="unittest1")
+            checkpoint.add("nmap", [1, 2])
+            checkpoint.add("nmap", [3])
+            result = AnalysisCheckpoint(file_name=file_name, workspace="unittest1")
+            result.load()
+            self.assertTrue(result.is_completed("nmap", 3))
+            self.assertFalse(result.is_completed("nmap", 4))
+            self.assertFalse(result.is_completed("dnshost", 1))
+            self.assertEqual(3, result.get_completed("nmap"))
+            # Checkpoints of other workspaces are ignored
+            result = AnalysisCheckpoint(file_name=file_name, workspace="unittest2")
+            result.load()
+            self.assertFalse(result.is_completed("nmap", 1))
+            checkpoint.remove()
+            self.assertFalse(os.path.exists(file_name))
+
+    def _analyze(self, workspace: str, processes: int, resume: bool = False) -> None:
+        producer = CollectorProducer(self._engine)
+        parser = CollectorProducer.get_argument_parser(description="")
+        producer.add_argparser_arguments(CollectorProducer.add_collector_argument_group(parser))
+        arguments = ["--testing", "-w", workspace, "--httpgobuster", "--analyze", "--processes", str(processes)]
+        if resume:
+            arguments.append("--resume")
+        producer.init(vars(parser.parse_args(arguments)))
+        producer.ANALYSIS_BATCH_SIZE = 5
+        producer._analyze()
+
+    def _get_path_count(self) -> int:
+        with self._engine.session_scope() as session:
+            return session.query(Path).filter(Path.name != "/").count()
+
+    def _delete_paths(self) -> None:
+        with self._engine.session_scope() as session:
+            session.query(Path).filter(Path.name != "/").delete(synchronize_session=False)
+
+    def test_analysis(self):
+        workspace = self._workspaces[0]
+        environ = dict(os.environ)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                os.environ[BaseConfig.ENV_LOG_PATH] = temp_dir
+                self.init_db()
+                size = WorkspaceSize(hosts=20, services_per_host=2, hosts_per_domain=10, paths_per_service=2)
+                WorkspaceGenerator(engine=self._engine, workspace=workspace, size=size).run()
+                expected = self._get_path_count()
+                self.assertEqual(80, expected)
+                # Re-analysis in worker processes
+                self._delete_paths()
+                self._analyze(workspace, processes=2)
+                self.assertEqual(expected, self._get_path_count())
+                self.assertFalse(os.path.exists(BaseConfig.get_analysis_checkpoint_file(workspace)))
+                # Resume an interrupted re-analysis
+                with self._engine.session_scope() as session:
+                    command_ids = [item[0] for item in session.query(Command.id).order_by(Command.id)]
+                checkpoint = AnalysisCheckpoint(file_name=BaseConfig.get_analysis_checkpoint_file(workspace),
+                                                workspace=workspace)
+                checkpoint.add(HttpGobusterCollector.__module__.split(".")[-1], command_ids[:10])
+                self._delete_paths()
+                self._analyze(workspace, processes=1, resume=True)
+                self.assertEqual(expected - 20, self._get_path_count())
+                self.assertFalse(os.path.exists(BaseConfig.get_analysis_checkpoint_file(workspace)))
+            finally:
+                os.environ.clear()
+                os.environ.update(environ)
@@ -31,6 +31,9 @@ from database.model import DnsResourceRecordType
 from database.model import ScopeType
 from database.model import Workspace
 from database.model import HostHostNameMapping
+from database.model import Service
+from database.model import ServiceState
+from database.model import ProtocolType
 from collectors.core import IpUtils
 from collectors.core import DomainUtils
 from sqlalchemy.orm.session import Session
@@ -2746,6 +2749,274 @@ class DomainNameScopeTypeVhostTestCases(BaseScopeTypeVhostTestCases):
             self.assertTrue(result.in_scope)
 
 
+
+class DeferredNetworkScopeTestCases(BaseKisTestCase):
+    """
+    This class implements functionalities for testing the deferred network scope mode used by bulk loads
+    """
+
+    NETWORKS = [("0.0.0.0/0", None),
+                ("10.0.0.0/8", ScopeType.exclude),
+                ("10.1.0.0/16", ScopeType.all),
+                ("10.1.1.0/24", None),
+                ("10.2.0.0/16", ScopeType.strict),
+                ("10.2.1.0/24", None),
+                ("10.2.2.0/24", ScopeType.all),
+                ("192.168.0.0/16", ScopeType.all),
+                ("192.168.1.0/24", None)]
+    HOSTS = [("10.1.1.1", None),
+             ("10.1.5.5", None),
+             ("10.2.1.1", True),
+             ("10.2.1.2", None),
+             ("10.2.2.2", None),
+             ("10.3.3.3", True),
+             ("192.168.1.1", None),
+             ("172.16.0.1", True)]
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+        self._workspaces = ["unittest1", "unittest2"]
+
+    @staticmethod
+    def _add_networks(session: Session, workspace: Workspace, networks: list):
+        for network, scope in networks:
+            IpUtils.add_network(session=session, workspace=workspace, network=network, scope=scope)
+
+    @staticmethod
+    def _add_hosts(session: Session, workspace: Workspace, hosts: list):
+        for address, in_scope in hosts:
+            IpUtils.add_host(session=session, workspace=workspace, address=address, in_scope=in_scope)
+
+    @staticmethod
+    def _get_scopes(session: Session, workspace_str: str) -> tuple:
+        """
+        This method returns the network scopes as well as the network assignments and scopes of all hosts.
+        """
+        networks = {item.network: item.scope for item in session.query(Network)
+                    .join(Workspace).filter(Workspace.name == workspace_str).all()}
+        hosts = {item.address: (item.ipv4_network.network if item.ipv4_network else None, item.in_scope)
+                 for item in session.query(Host).join(Workspace).filter(Workspace.name == workspace_str).all()}
+        return networks, hosts
+
+    def test_consistency_with_row_level_triggers(self):
+        """
+        The deferred mode must create the same network assignments and scopes as the row-level triggers, independent
+        of the order in which networks and hosts are inserted.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name=self._workspaces[0])
+            self._add_networks(session, workspace, self.NETWORKS)
+            self._add_hosts(session, workspace, self.HOSTS)
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name=self._workspaces[1])
+            with self._engine.deferred_network_scope(session=session, workspace=workspace):
+                self._add_hosts(session, workspace, self.HOSTS)
+                self._add_networks(session, workspace, reversed(self.NETWORKS))
+        with self._engine.session_scope() as session:
+            expected_networks, expected_hosts = self._get_scopes(session, self._workspaces[0])
+            networks, hosts = self._get_scopes(session, self._workspaces[1])
+            self.assertDictEqual(expected_networks, networks)
+            self.assertDictEqual(expected_hosts, hosts)
+            self.assertEqual(("10.1.1.0/24", True), hosts["10.1.1.1"])
+            self.assertEqual(("10.2.1.0/24", True), hosts["10.2.1.1"])
+            self.assertEqual(("10.2.1.0/24", False), hosts["10.2.1.2"])
+            self.assertEqual(("10.0.0.0/8", False), hosts["10.3.3.3"])
+            self.assertEqual(("0.0.0.0/0", False), hosts["172.16.0.1"])
+
+    def test_triggers_after_deferred_mode(self):
+        """
+        After the deferred mode, the row-level triggers must be active again.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name=self._workspaces[0])
+            with self._engine.deferred_network_scope(session=session, workspace=workspace):
+                self._add_networks(session, workspace, self.NETWORKS)
+            self._add_hosts(session, workspace, self.HOSTS)
+        with self._engine.session_scope() as session:
+            self.assertTrue(session.query(Host).filter_by(address="10.1.1.1").one().in_scope)
+            self.assertFalse(session.query(Host).filter_by(address="10.3.3.3").one().in_scope)
+
+    def test_scope_contradiction(self):
+        """
+        A scope that contradicts the scope of a later inserted parent network must raise an exception.
+        """
+        self.init_db()
+        with self.assertRaises(InternalError):
+            with self._engine.session_scope() as session:
+                workspace = IpUtils.add_workspace(session=session, name=self._workspaces[0])
+                with self._engine.deferred_network_scope(session=session, workspace=workspace):
+                    IpUtils.add_network(session=session,
+                                        workspace=workspace,
+                                        network="10.1.0.0/16",
+                                        scope=ScopeType.exclude)
+                    IpUtils.add_network(session=session,
+                                        workspace=workspace,
+                                        network="10.0.0.0/8",
+                                        scope=ScopeType.all)
+
+
+class BulkModeTestCases(BaseKisTestCase):
+    """
+    This class implements functionalities for testing the bulk mode used by scan imports and bulk loads
+    """
+
+    def __init__(self, test_name: str):
+        super().__init__(test_name)
+        self._domain_utils = DomainUtils()
+
+    def _add_mapping(self, session: Session, workspace: Workspace, address: str, host_name: str,
+                     mapping_type: DnsResourceRecordType):
+        IpUtils.add_host_host_name_mapping(session=session,
+                                           host=IpUtils.get_host(session=session, workspace=workspace, address=address),
+                                           host_name=self._domain_utils.get_host_name(session=session,
+                                                                                      workspace=workspace,
+                                                                                      host_name=host_name),
+                                           mapping_type=mapping_type)
+
+    def _load_domain_scopes(self, session: Session, workspace: Workspace):
+        """
+        This method creates host names in domains with different scopes, which are mapped to hosts in networks with
+        different scopes.
+        """
+        for domain, scope in [("all.local", ScopeType.all),
+                              ("vhost.local", ScopeType.vhost),
+                              ("exclude.local", ScopeType.exclude),
+                              ("strict.local", ScopeType.strict)]:
+            self._domain_utils.add_domain_name(session=session, workspace=workspace, item=domain, scope=scope)
+        for network, scope in [("10.0.0.0/24", ScopeType.all),
+                               ("10.0.1.0/24", ScopeType.exclude),
+                               ("10.0.2.0/24", ScopeType.strict)]:
+            IpUtils.add_network(session=session, workspace=workspace, network=network, scope=scope)
+        for address, in_scope in [("10.0.0.1", None), ("10.0.1.1", None), ("10.0.2.1", True), ("172.16.0.1", None)]:
+            host = IpUtils.add_host(session=session, workspace=workspace, address=address, in_scope=in_scope)
+            IpUtils.add_service(session=session,
+                                port=80,
+                                protocol_type=ProtocolType.tcp,
+                                state=ServiceState.Open,
+                                host=host)
+        for host_name, in_scope in [("www.all.local", False),
+                                    ("www.vhost.local", False),
+                                    ("mail.vhost.local", True),
+                                    ("ftp.vhost.local", True),
+                                    ("www.exclude.local", True),
+                                    ("www.strict.local", True),
+                                    ("mail.strict.local", False)]:
+            self._domain_utils.add_host_name(session=session, workspace=workspace, name=host_name, in_scope=in_scope)
+        IpUtils.add_service(session=session,
+                            port=8080,
+                            protocol_type=ProtocolType.tcp,
+                            state=ServiceState.Open,
+                            host_name=self._domain_utils.get_host_name(session=session,
+                                                                       workspace=workspace,
+                                                                       host_name="www.exclude.local"))
+        self._add_mapping(session, workspace, "10.0.0.1", "www.all.local", DnsResourceRecordType.a)
+        self._add_mapping(session, workspace, "10.0.0.1", "www.vhost.local", DnsResourceRecordType.a)
+        self._add_mapping(session, workspace, "10.0.1.1", "mail.vhost.local", DnsResourceRecordType.aaaa)
+        self._add_mapping(session, workspace, "10.0.0.1", "ftp.vhost.local", DnsResourceRecordType.ptr)
+        self._add_mapping(session, workspace, "172.16.0.1", "www.exclude.local", DnsResourceRecordType.a)
+        self._add_mapping(session, workspace, "10.0.2.1", "www.strict.local", DnsResourceRecordType.a)
+        IpUtils.add_service(session=session,
+                            port=443,
+                            protocol_type=ProtocolType.tcp,
+                            state=ServiceState.Open,
+                            host=IpUtils.get_host(session=session, workspace=workspace, address="10.0.0.1"))
+
+    def _load_network_scopes(self, session: Session, workspace: Workspace):
+        """
+        This method creates hosts in a network with scope vhost, which are mapped to host names.
+        """
+        for domain, scope in [("all.local", ScopeType.all), ("exclude.local", ScopeType.exclude)]:
+            self._domain_utils.add_domain_name(session=session, workspace=workspace, item=domain, scope=scope)
+        IpUtils.add_network(session=session, workspace=workspace, network="10.1.0.0/24", scope=ScopeType.vhost)
+        for address in ["10.1.0.1", "10.1.0.2", "10.1.0.3"]:
+            IpUtils.add_host(session=session, workspace=workspace, address=address, in_scope=True)
+        for host_name in ["www.all.local", "www.exclude.local"]:
+            self._domain_utils.add_host_name(session=session, workspace=workspace, name=host_name, in_scope=False)
+        self._add_mapping(session, workspace, "10.1.0.1", "www.all.local", DnsResourceRecordType.a)
+        self._add_mapping(session, workspace, "10.1.0.2", "www.exclude.local", DnsResourceRecordType.a)
+
+    @staticmethod
+    def _get_results(session: Session, workspace_str: str) -> tuple:
+        """
+        This method returns the scopes of all hosts and host names as well as all services and paths.
+        """
+        hosts = {item.address: item.in_scope
+                 for item in session.query(Host).join(Workspace).filter(Workspace.name == workspace_str).all()}
+        host_names = {item.full_name: item._in_scope
+                      for item in session.query(HostName)
+                      .join(DomainName).join(Workspace).filter(Workspace.name == workspace_str).all()}
+        services = set()
+        paths = set()
+        for service in session.query(Service).all():
+            if service.workspace.name != workspace_str:
+                continue
+            target = service.host.address if service.host else service.host_name.full_name
+            services.add((target, service.protocol, service.port, service.state))
+            paths.update([(target, service.port, item.name) for item in service.paths])
+        return hosts, host_names, services, paths
+
+    def _test_consistency(self, load_function):
+        """
+        This method loads the same data with and without bulk mode and compares the results.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name="row")
+            load_function(session, workspace)
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name="bulk")
+            with self._engine.bulk_mode(session=session, workspace=workspace):
+                load_function(session, workspace)
+        with self._engine.session_scope() as session:
+            expected = self._get_results(session, "row")
+            results = self._get_results(session, "bulk")
+            self.assertDictEqual(expected[0], results[0])
+            self.assertDictEqual(expected[1], results[1])
+            self.assertSetEqual(expected[2], results[2])
+            self.assertSetEqual(expected[3], results[3])
+        return results
+
+    def test_consistency_domain_scopes(self):
+        """
+        The bulk mode must create the same host name scopes and services as the row-level triggers.
+        """
+        hosts, host_names, services, paths = self._test_consistency(self._load_domain_scopes)
+        self.assertTrue(host_names["www.vhost.local"])
+        self.assertFalse(host_names["mail.vhost.local"])
+        self.assertTrue(host_names["ftp.vhost.local"])
+        self.assertFalse(host_names["www.exclude.local"])
+        self.assertTrue(host_names["www.strict.local"])
+        self.assertIn(("www.vhost.local", ProtocolType.tcp, 443, ServiceState.Open), services)
+        self.assertIn(("172.16.0.1", ProtocolType.tcp, 8080, ServiceState.Open), services)
+
+    def test_consistency_network_scopes(self):
+        """
+        The bulk mode must create the same host scopes as the row-level triggers for networks with scope vhost.
+        """
+        hosts, host_names, services, paths = self._test_consistency(self._load_network_scopes)
+        self.assertDictEqual({"10.1.0.1": True, "10.1.0.2": False, "10.1.0.3": False}, hosts)
+
+    def test_triggers_after_bulk_mode(self):
+        """
+        After the bulk mode, the row-level triggers must be active again.
+        """
+        self.init_db()
+        with self._engine.session_scope() as session:
+            workspace = IpUtils.add_workspace(session=session, name="bulk")
+            with self._engine.bulk_mode(session=session, workspace=workspace):
+                self._domain_utils.add_domain_name(session=session,
+                                                   workspace=workspace,
+                                                   item="all.local",
+                                                   scope=ScopeType.all)
+            self._domain_utils.add_host_name(session=session, workspace=workspace, name="www.all.local", in_scope=False)
+        with self._engine.session_scope() as session:
+            self.assertTrue(self.query_hostname(session=session,
+                                                workspace_str="bulk",
+                                                host_name="www.all.local")._in_scope)
+
+
 # Vhost cases to cover
 # 1. Update host_host_name_mapping (add/update new A/AAAA row, delete A/AAAA row)
 # 2. Update network scope (update scope, delete network)